@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: batch forecast endpoint vs one /forecast call per product
+
+Runs the FastAPI app in-process and reports products per second for
+serial single-product calls and for a single /forecast/batch call.
+
+Usage:
+    python benchmarks/bench_batch_forecast.py --products 60 --points 100
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+def generate_item(product_id: str, points: int, days: int, models: list) -> dict:
+    """Generate one product's forecast request"""
+    base_date = datetime(2024, 1, 1)
+    return {
+        "product_id": product_id,
+        "historical_data": [
+            {
+                "date": (base_date + timedelta(days=i)).strftime("%Y-%m-%d"),
+                "quantity": random.randint(50, 150),
+                "price": round(20 + random.uniform(-5, 5), 2)
+            }
+            for i in range(points)
+        ],
+        "days": days,
+        "models": models
+    }
+
+def run_serial(client: TestClient, items: list) -> float:
+    """Forecast every product with its own /forecast call"""
+    start = time.perf_counter()
+    for item in items:
+        response = client.post("/forecast", json=item)
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+def run_batch(client: TestClient, items: list) -> float:
+    """Forecast every product with a single streamed /forecast/batch call"""
+    start = time.perf_counter()
+    completed = 0
+    with client.stream("POST", "/forecast/batch", json={"items": items}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if line:
+                assert json.loads(line)["status"] == "success"
+                completed += 1
+    assert completed == len(items)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch vs serial forecasting")
+    parser.add_argument("--products", type=int, default=60, help="Number of products")
+    parser.add_argument("--points", type=int, default=100, help="Historical points per product")
+    parser.add_argument("--days", type=int, default=30, help="Forecast horizon")
+    parser.add_argument("--models", default="SMA,WMA,ES,ARIMA,ensemble",
+                        help="Comma-separated model list")
+    args = parser.parse_args()
+
+    random.seed(42)
+    models = args.models.split(",")
+    # Separate random series per run so the fitted model cache cannot serve either
+    serial_items = [generate_item(f"serial_{i}", args.points, args.days, models) for i in range(args.products)]
+    batch_items = [generate_item(f"batch_{i}", args.points, args.days, models) for i in range(args.products)]
+
+    with TestClient(app) as client:
+        # Warm up lazy imports so neither run pays them
+        warmup_item = generate_item("warmup", args.points, args.days, models)
+        client.post("/forecast/batch", json={"items": [warmup_item] * 4}).raise_for_status()
+
+        serial_seconds = run_serial(client, serial_items)
+        batch_seconds = run_batch(client, batch_items)
+        print(f"Executor: {client.get('/metrics').json()['executor']}")
+
+    print(f"Products: {args.products}, points: {args.points}, horizon: {args.days}, models: {models}")
+    print(f"Serial /forecast:     {serial_seconds:8.2f}s  {args.products / serial_seconds:8.1f} products/s")
+    print(f"Batch /forecast/batch:{batch_seconds:8.2f}s  {args.products / batch_seconds:8.1f} products/s")
+    print(f"Speedup: {serial_seconds / batch_seconds:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: CatBoost multi-step horizon prediction
+
+Compares the previous per-day loop (mutate one row, pd.cut, predict) with the
+vectorized feature matrix scored by a single predict call, on the same
+fitted model. Also times the direct multi-horizon strategy.
+
+Usage:
+    python benchmarks/bench_catboost_horizon.py --days 365 --repeat 5
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from models.forecast_models import ForecastEngine, _import_catboost
+
+def generate_history(length: int, with_ndvi: bool, seed: int = 42) -> pd.DataFrame:
+    """Generate a daily price/quantity history"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(length)
+    df = pd.DataFrame({
+        "date": pd.date_range("2023-01-01", periods=length, freq="D"),
+        "price": 25 + 2 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 0.5, length),
+        "quantity": 100 + 10 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 5, length)
+    })
+    if with_ndvi:
+        df["ndvi"] = 0.3 + 0.4 * np.sin(2 * np.pi * t / 365) + rng.normal(0, 0.05, length)
+    return df
+
+def legacy_predict(fitted: dict, last_date: pd.Timestamp, days: int) -> list:
+    """The original per-day prediction loop"""
+    model = fitted["model"]
+    last_features = fitted["last_features"].copy()
+    values = []
+    for i in range(days):
+        future_date = last_date + pd.Timedelta(days=i + 1)
+        last_features["month"] = future_date.month
+        last_features["day_of_week"] = future_date.dayofweek
+        last_features["season"] = pd.cut([future_date.month], bins=[0, 3, 6, 9, 12],
+                                       labels=["Q1", "Q2", "Q3", "Q4"])[0]
+        if fitted["recent_ndvi"] is not None:
+            last_features["ndvi"] = fitted["recent_ndvi"]
+            last_features["ndvi_leading"] = fitted["recent_ndvi"]
+            last_features["ndvi_trend"] = fitted["recent_ndvi"]
+        values.append(float(max(0, model.predict(last_features)[0])))
+    return values
+
+def vectorized_predict(engine: ForecastEngine, fitted: dict, last_date: pd.Timestamp, days: int) -> list:
+    """Predict the horizon as the service does (one predict call per trained horizon block)"""
+    future_dates = pd.date_range(last_date + pd.Timedelta(days=1), periods=days, freq="D")
+    return np.maximum(engine._predict_catboost(fitted, future_dates), 0).astype(float).tolist()
+
+def best_of(repeat: int, fn) -> float:
+    """Best wall time of several runs"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CatBoost horizon prediction")
+    parser.add_argument("--days", type=int, default=365, help="Forecast horizon")
+    parser.add_argument("--history", type=int, default=100, help="Historical points")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions")
+    args = parser.parse_args()
+
+    _import_catboost()
+    engine = ForecastEngine()
+    params = engine._get_catboost_params()
+
+    for with_ndvi in (False, True):
+        df = generate_history(args.history, with_ndvi)
+        last_date = df["date"].max()
+        fitted = engine._fit_catboost_model(df, params)
+
+        legacy = legacy_predict(fitted, last_date, args.days)
+        vectorized = vectorized_predict(engine, fitted, last_date, args.days)
+        assert np.allclose(legacy, vectorized), "vectorized horizon differs from the loop"
+
+        legacy_seconds = best_of(args.repeat, lambda: legacy_predict(fitted, last_date, args.days))
+        vectorized_seconds = best_of(args.repeat, lambda: vectorized_predict(engine, fitted, last_date, args.days))
+
+        label = "with NDVI" if with_ndvi else "price only"
+        print(f"{args.days}-day horizon ({label}):")
+        print(f"  per-day loop:      {legacy_seconds * 1000:9.1f} ms")
+        print(f"  vectorized:        {vectorized_seconds * 1000:9.1f} ms  ({legacy_seconds / vectorized_seconds:.0f}x)")
+
+    df = generate_history(args.history, with_ndvi=False)
+    direct = engine._fit_catboost_direct_model(df, params)
+    direct_seconds = best_of(args.repeat, lambda: vectorized_predict(engine, direct, df["date"].max(), args.days))
+    print(f"  direct strategy:   {direct_seconds * 1000:9.1f} ms  (trained to {direct['max_horizon']} days)")
+
+if __name__ == "__main__":
+    main()
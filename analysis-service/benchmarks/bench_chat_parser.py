@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: kiosk chat transaction parsing
+
+Generates a corpus of English and Indonesian kiosk reports with one to three
+items each and known ground truth, then compares the previous substring-scan
+parser with the compiled parser on messages per second and on how many
+messages had every item (product, quantity and unit) parsed correctly.
+Finally times /parse-chat per message against /parse-chat/batch.
+
+Usage:
+    python benchmarks/bench_chat_parser.py --messages 20000 --batch 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.chat_parser import ChatTransactionParser
+
+PRODUCTS = {"UREA": ["Urea", "pupuk urea"], "NPK": ["NPK", "Phonska"], "SP36": ["SP-36", "sp36"], "ZA": ["ZA", "pupuk ZA"]}
+UNITS = {"sack": ["sacks", "karung", "sak"], "kg": ["kg", "kilo"]}
+TEMPLATES = [
+    ("Reporting admin, just sold {items} to Mr. {buyer}", " and "),
+    ("Terjual {items} ke Pak {buyer}", " dan "),
+    ("sold {items}", ", "),
+    ("{items} - Bu {buyer}", "; ")
+]
+BUYERS = ["Budi", "Slamet", "Sri", "Wayan", "Agus", "Dewi"]
+
+def generate_corpus(count: int, seed: int = 42) -> list:
+    """Messages with their expected (name, quantity, unit) items"""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        template, joiner = rng.choice(TEMPLATES)
+        names = rng.sample(list(PRODUCTS), rng.randint(1, 3))
+        expected, phrases = [], []
+        for name in names:
+            quantity = rng.randint(1, 200)
+            unit = rng.choice(list(UNITS))
+            alias, unit_word = rng.choice(PRODUCTS[name]), rng.choice(UNITS[unit])
+            phrases.append(rng.choice([
+                f"{quantity} {unit_word} of {alias}", f"{quantity} {unit_word} {alias}", f"{alias} {quantity} {unit_word}"
+            ]))
+            expected.append((name, quantity, unit))
+        corpus.append((template.format(items=joiner.join(phrases), buyer=rng.choice(BUYERS)), expected))
+    return corpus
+
+def legacy_parse(chat_message: str):
+    """The substring-scan parser the compiled parser replaced (items only)"""
+    message = chat_message.lower()
+    items = []
+    fertilizer_patterns = {
+        'urea': ['urea', 'pupuk urea'],
+        'npk': ['npk', 'pupuk npk'],
+        'sp36': ['sp36', 'sp-36'],
+        'za': ['za', 'pupuk za']
+    }
+    for fertilizer, patterns in fertilizer_patterns.items():
+        for pattern in patterns:
+            if pattern in message:
+                words = message.split()
+                for i, word in enumerate(words):
+                    if word.isdigit() and i > 0:
+                        unit = 'sack' if 'sack' in message else 'kg'
+                        items.append({'name': fertilizer.upper(), 'quantity': int(word), 'unit': unit, 'price': 0})
+                        break
+                break
+    return {'items': items} if items else None
+
+def score(parse, corpus: list) -> tuple:
+    """Messages per second and share of messages with exactly the expected items"""
+    started = time.perf_counter()
+    results = [parse(message) for message, _ in corpus]
+    elapsed = time.perf_counter() - started
+    correct = sum(
+        result is not None and sorted((i["name"], i["quantity"], i["unit"]) for i in result["items"]) == sorted(expected)
+        for result, (_, expected) in zip(results, corpus)
+    )
+    return len(corpus) / elapsed, correct / len(corpus)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark kiosk chat parsing")
+    parser.add_argument("--messages", type=int, default=20000, help="Corpus size for the parser comparison")
+    parser.add_argument("--batch", type=int, default=5000, help="Messages for the endpoint comparison")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.messages)
+    compiled = ChatTransactionParser()
+    print(f"{'parser':<10} {'msg/s':>10} {'all items correct':>18}")
+    for label, parse in (("legacy", legacy_parse), ("compiled", compiled.parse)):
+        rate, accuracy = score(parse, corpus)
+        print(f"{label:<10} {rate:>10.0f} {accuracy:>17.1%}")
+
+    os.environ.setdefault("WARMUP_MODE", "off")
+    os.environ.setdefault("ROUTE_EXECUTOR_BACKEND", "thread")
+    import logging
+    from fastapi.testclient import TestClient
+    from main import app
+
+    messages = [message for message, _ in corpus[:args.batch]]
+    with TestClient(app) as client:
+        logging.getLogger("main").setLevel(logging.WARNING)
+        started = time.perf_counter()
+        for message in messages:
+            client.post("/parse-chat", json={"chat_message": message}).raise_for_status()
+        single_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        response = client.post("/parse-chat/batch", json={"messages": messages})
+        response.raise_for_status()
+        batch_seconds = time.perf_counter() - started
+
+    print(f"\n/parse-chat       {len(messages)} calls  {single_seconds:6.2f} s  {len(messages) / single_seconds:8.0f} msg/s")
+    print(f"/parse-chat/batch 1 call      {batch_seconds:6.2f} s  {len(messages) / batch_seconds:8.0f} msg/s  "
+          f"({response.json()['parsed_count']} parsed)")
+
+if __name__ == "__main__":
+    main()
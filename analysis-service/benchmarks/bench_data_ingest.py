@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: historical data ingestion
+
+Compares the previous DataProcessor.process_historical_data (per-item
+model_dump with one INFO log line per item, DataFrame from dicts, pandas
+conversions and filters) with the array ingest path, for Pydantic rows and
+for the columnar {dates, quantities, prices} form.
+
+Usage:
+    python benchmarks/bench_data_ingest.py --points 10000 --repeat 5
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from main import DemandData, HistoricalSeries
+from models.data_processor import DataProcessor
+from utils.config import settings
+
+def generate_rows(points: int, seed: int = 42) -> dict:
+    """Generate columnar history with a few invalid and duplicate entries"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2000-01-01", periods=points, freq="D").strftime("%Y-%m-%d").tolist()
+    quantities = (100 + rng.normal(0, 10, points)).round(2)
+    prices = (25 + rng.normal(0, 1, points)).round(2)
+    quantities[::97] = -1.0  # Filtered out by validation
+    dates[1::101] = dates[0::101][:len(dates[1::101])]  # Duplicate dates
+    return {"dates": dates, "quantities": quantities.tolist(), "prices": prices.tolist()}
+
+def legacy_process(historical_data: list, logger: logging.Logger) -> pd.DataFrame:
+    """The original row-by-row ingest"""
+    processed_data = []
+    for i, item in enumerate(historical_data):
+        processed_data.append(item.model_dump())
+        logger.info(f"Item {i}: Converted Pydantic v2 model")
+    df = pd.DataFrame(processed_data)
+    df['date'] = pd.to_datetime(df['date'])
+    df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
+    df['price'] = pd.to_numeric(df['price'], errors='coerce')
+    df = df.dropna(subset=['quantity', 'price'])
+    df = df[df['quantity'] > 0]
+    df = df[df['price'] > 0]
+    df = df.sort_values('date', kind='stable').reset_index(drop=True)
+    df = df.drop_duplicates(subset=['date'], keep='last')
+    if len(df) > settings.MAX_DATA_POINTS:
+        df = df.tail(settings.MAX_DATA_POINTS)
+    return df.reset_index(drop=True)
+
+def time_call(fn, repeat: int) -> tuple:
+    """Return (best seconds, last result)"""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark historical data ingestion")
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Send per-item log lines to memory so the benchmark measures formatting, not the terminal
+    legacy_logger = logging.getLogger("bench.legacy_ingest")
+    legacy_logger.setLevel(logging.INFO)
+    legacy_logger.addHandler(logging.StreamHandler(io.StringIO()))
+    legacy_logger.propagate = False
+    logging.getLogger("models.data_processor").setLevel(logging.WARNING)
+
+    columns = generate_rows(args.points)
+    rows = [
+        DemandData(date=d, quantity=abs(q) or 1.0, price=p)
+        for d, q, p in zip(columns["dates"], columns["quantities"], columns["prices"])
+    ]
+    # Keep the invalid quantities for the columnar path; rows must satisfy gt=0
+    columns_valid = dict(columns, quantities=[r.quantity for r in rows])
+    series = HistoricalSeries(**columns_valid)
+    processor = DataProcessor()
+
+    legacy_s, legacy_df = time_call(lambda: legacy_process(rows, legacy_logger), args.repeat)
+    rows_s, rows_df = time_call(lambda: processor.process_historical_data(rows), args.repeat)
+    cols_s, cols_df = time_call(lambda: processor.process_historical_data(series), args.repeat)
+    raw_s, _ = time_call(lambda: processor.process_historical_data(columns), args.repeat)
+
+    pd.testing.assert_frame_equal(legacy_df, rows_df, check_dtype=False)
+    pd.testing.assert_frame_equal(legacy_df, cols_df, check_dtype=False)
+
+    print(f"Ingest of {args.points} points ({len(legacy_df)} after cleaning), best of {args.repeat}")
+    print(f"  legacy rows:        {legacy_s * 1000:8.1f} ms")
+    print(f"  array path, rows:   {rows_s * 1000:8.1f} ms  ({legacy_s / rows_s:5.1f}x)")
+    print(f"  array path, series: {cols_s * 1000:8.1f} ms  ({legacy_s / cols_s:5.1f}x)")
+    print(f"  array path, dict:   {raw_s * 1000:8.1f} ms  ({legacy_s / raw_s:5.1f}x, includes invalid rows)")
+
+if __name__ == "__main__":
+    main()
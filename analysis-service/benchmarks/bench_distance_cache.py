@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: route matrices from the persistent distance cache
+
+Simulates daily route requests that each draw a subset of stops from the
+same kiosk network, plus a few new kiosks per request. Compares building
+every matrix from scratch with gathering it from the memory-mapped cache,
+and reports the cache hit rate.
+
+Usage:
+    python benchmarks/bench_distance_cache.py --kiosks 3000 --stops 500 --requests 50
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from models.distance_cache import DistanceCache
+from models.distance_matrix import build_distance_matrix
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the route distance cache")
+    parser.add_argument("--kiosks", type=int, default=3000)
+    parser.add_argument("--stops", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--new-per-request", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    lats = -6.2 + rng.uniform(-0.5, 0.5, args.kiosks)
+    lngs = 106.8 + rng.uniform(-0.5, 0.5, args.kiosks)
+    ids = [f"kiosk_{i}" for i in range(args.kiosks)]
+
+    requests = []
+    for r in range(args.requests):
+        picks = rng.choice(args.kiosks, args.stops, replace=False)
+        new_lats = -6.2 + rng.uniform(-0.5, 0.5, args.new_per_request)
+        new_lngs = 106.8 + rng.uniform(-0.5, 0.5, args.new_per_request)
+        requests.append((
+            [ids[i] for i in picks] + [f"new_{r}_{j}" for j in range(args.new_per_request)],
+            np.concatenate([lats[picks], new_lats]),
+            np.concatenate([lngs[picks], new_lngs])
+        ))
+
+    start = time.perf_counter()
+    fresh = [build_distance_matrix(req_lats, req_lngs, with_time=True) for _, req_lats, req_lngs in requests]
+    fresh_s = time.perf_counter() - start
+
+    cache_dir = tempfile.mkdtemp(prefix="distance_cache_")
+    try:
+        cache = DistanceCache(cache_dir, max_locations=args.kiosks * 2)
+
+        # Registering the whole network once is the cold-start cost
+        start = time.perf_counter()
+        cache.matrix_for(ids, lats, lngs)
+        prime_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        cached = [cache.matrix_for(*req, with_time=True) for req in requests]
+        cached_s = time.perf_counter() - start
+
+        for a, b in zip(fresh, cached):
+            assert np.array_equal(a.meters, b.meters) and np.array_equal(a.seconds, b.seconds)
+
+        # Reopen from disk to show the cache survives restarts
+        cache.flush()
+        stats = cache.stats()
+        start = time.perf_counter()
+        reopened = DistanceCache(cache_dir, max_locations=args.kiosks * 2)
+        reopen_s = time.perf_counter() - start
+        assert np.array_equal(reopened.matrix_for(*requests[0]).meters, fresh[0].meters)
+        assert reopened.stats()["location_misses"] == 0
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    per_fresh = fresh_s / args.requests * 1000
+    per_cached = cached_s / args.requests * 1000
+    print(f"{args.requests} requests x {args.stops + args.new_per_request} stops from {args.kiosks} kiosks")
+    print(f"  recompute each request: {per_fresh:8.2f} ms/request")
+    print(f"  distance cache gather:  {per_cached:8.2f} ms/request ({per_fresh / per_cached:.1f}x)")
+    print(f"  prime {args.kiosks} kiosks:      {prime_s * 1000:8.1f} ms, reopen from disk {reopen_s * 1000:.1f} ms")
+    print(f"  hit rate {stats['hit_rate']:.3f}, {stats['locations']} locations, capacity {stats['capacity']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: route distance matrix construction
+
+Compares the previous nested loop over RouteOptimizer.calculate_distance
+with the vectorized NumPy haversine builder (int32 meters plus travel-time
+matrix) at several stop counts.
+
+Usage:
+    python benchmarks/bench_distance_matrix.py --sizes 100,500,2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from models.routing_optimizer import Location, RouteOptimizer
+
+def generate_locations(count: int, seed: int = 42) -> list:
+    """Random kiosks around Jakarta, depot first"""
+    rng = np.random.default_rng(seed)
+    lats = -6.2 + rng.uniform(-0.5, 0.5, count)
+    lngs = 106.8 + rng.uniform(-0.5, 0.5, count)
+    return [Location(id=f"loc_{i}", lat=float(lat), lng=float(lng)) for i, (lat, lng) in enumerate(zip(lats, lngs))]
+
+def legacy_distance(loc1: Location, loc2: Location) -> float:
+    """The original per-pair haversine, including its per-call import"""
+    import math
+
+    R = 6371
+    lat1_rad = math.radians(loc1.lat)
+    lng1_rad = math.radians(loc1.lng)
+    lat2_rad = math.radians(loc2.lat)
+    lng2_rad = math.radians(loc2.lng)
+    dlat = lat2_rad - lat1_rad
+    dlng = lng2_rad - lng1_rad
+    a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    return R * c
+
+def legacy_matrix(locations: list) -> list:
+    """The original nested-loop matrix build"""
+    matrix = []
+    for i in range(len(locations)):
+        row = []
+        for j in range(len(locations)):
+            row.append(int(legacy_distance(locations[i], locations[j]) * 1000))
+        matrix.append(row)
+    return matrix
+
+def best_of(fn, repeat: int) -> tuple:
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark distance matrix construction")
+    parser.add_argument("--sizes", default="100,500,2000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    optimizer = RouteOptimizer()
+    print(f"{'stops':>6} {'legacy ms':>11} {'numpy ms':>10} {'+time ms':>10} {'speedup':>8} {'max diff m':>11}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        locations = generate_locations(size)
+        legacy_s, legacy = best_of(lambda: legacy_matrix(locations), 1 if size > 500 else args.repeat)
+        numpy_s, matrix = best_of(lambda: optimizer.build_matrix(locations), args.repeat)
+        timed_s, _ = best_of(lambda: optimizer.build_matrix(locations, with_time=True), args.repeat)
+
+        # Float rounding can move a truncated value by one meter
+        max_diff = int(np.abs(np.asarray(legacy, dtype=np.int64) - matrix.meters).max())
+        assert max_diff <= 1, f"matrices differ by {max_diff} m"
+
+        print(f"{size:>6} {legacy_s * 1000:>11.1f} {numpy_s * 1000:>10.2f} {timed_s * 1000:>10.2f} "
+              f"{legacy_s / numpy_s:>7.0f}x {max_diff:>11}")
+
+if __name__ == "__main__":
+    main()
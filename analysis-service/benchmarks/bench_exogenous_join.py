@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: joining exogenous series onto a demand frame
+
+Builds a daily demand frame and exogenous sources modelled on the columns
+generate_datasets.py synthesizes: daily weather with missing days, weekly
+market prices, monthly economic indicators and 16-day NDVI composites. Then
+times three ways of attaching them: the previous approach (exact-date merge,
+forward fill and mean fill per source), one pandas merge_asof per source,
+and join_exogenous over all sources at once. Checks that the as-of results
+match merge_asof.
+
+Usage:
+    python benchmarks/bench_exogenous_join.py --rows 10000 --sources 20
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from models.exogenous import ExogenousSource, join_exogenous
+
+# Source kinds: (columns, observation every n days, share of observations dropped, as-of tolerance)
+KINDS = [
+    (["temperature", "humidity", "rainfall", "wind_speed"], 1, 0.2, "3D"),
+    (["market_price", "supply_index", "demand_index", "competitor_price_avg"], 7, 0.0, "14D"),
+    (["inflation_rate", "gdp_growth", "unemployment_rate", "exchange_rate"], 30, 0.0, None),
+    (["ndvi"], 16, 0.1, "32D")
+]
+
+def generate(rows: int, sources: int, seed: int = 42):
+    """Demand frame plus (name, frame, tolerance) per source"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2000-01-01")
+    demand = pd.DataFrame({
+        "date": start + pd.to_timedelta(np.arange(rows), unit="D"),
+        "quantity": rng.gamma(5, 20, rows),
+        "price": rng.normal(2250, 100, rows)
+    })
+    generated = []
+    for i in range(sources):
+        columns, every, dropped, tolerance = KINDS[i % len(KINDS)]
+        offsets = np.arange(-60, rows + 60, every)
+        offsets = offsets[rng.random(offsets.size) >= dropped]
+        frame = pd.DataFrame({"date": start + pd.to_timedelta(offsets, unit="D")})
+        for column in columns:
+            frame[f"{column}_{i}"] = rng.normal(50, 10, offsets.size)
+        generated.append((f"source_{i}", frame, tolerance))
+    return demand, generated
+
+def legacy_join(demand: pd.DataFrame, sources: list) -> pd.DataFrame:
+    """Exact-date merge, forward fill, then mean fill, one source at a time"""
+    merged = demand
+    for _, frame, _ in sources:
+        merged = merged.merge(frame, on="date", how="left")
+        for column in frame.columns.drop("date"):
+            merged[column] = merged[column].ffill()
+            if merged[column].isna().any():
+                merged[column] = merged[column].fillna(merged[column].mean())
+    return merged
+
+def merge_asof_join(demand: pd.DataFrame, sources: list) -> pd.DataFrame:
+    merged = demand
+    for _, frame, tolerance in sources:
+        merged = pd.merge_asof(merged, frame, on="date", direction="backward",
+                               tolerance=pd.Timedelta(tolerance) if tolerance else None)
+    return merged
+
+def best_of(repeats: int, fn) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exogenous as-of joins")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--sources", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    demand, sources = generate(args.rows, args.sources)
+    columns = sum(frame.shape[1] - 1 for _, frame, _ in sources)
+    print(f"{args.rows} rows x {args.sources} sources ({columns} columns)\n")
+
+    prepared = [ExogenousSource.from_frame(name, frame, tolerance=tolerance) for name, frame, tolerance in sources]
+    reference = merge_asof_join(demand, sources)
+    joined = join_exogenous(demand, prepared)
+    value_columns = [c for c in reference.columns if c not in demand.columns]
+    assert np.allclose(joined[value_columns].to_numpy(), reference[value_columns].to_numpy(), equal_nan=True)
+
+    results = [
+        ("merge + ffill + mean (legacy)", best_of(args.repeats, lambda: legacy_join(demand, sources))),
+        ("merge_asof per source", best_of(args.repeats, lambda: merge_asof_join(demand, sources))),
+        ("prepare sources", best_of(args.repeats, lambda: [
+            ExogenousSource.from_frame(name, frame, tolerance=tolerance) for name, frame, tolerance in sources
+        ])),
+        ("join_exogenous (prepared)", best_of(args.repeats, lambda: join_exogenous(demand, prepared)))
+    ]
+    for label, seconds in results:
+        print(f"{label:<32} {seconds * 1e3:9.2f} ms")
+
+if __name__ == "__main__":
+    main()
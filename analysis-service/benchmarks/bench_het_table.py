@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: HET price lookups
+
+Builds a synthetic HET table (products x regions x price revisions), then
+times point-in-time lookups three ways: a pandas filter per lookup (the
+obvious approach without an index), HETSnapshot.lookup one at a time and
+HETSnapshot.lookup_many over the whole batch. Also times the index build
+and checks that all three agree.
+
+Usage:
+    python benchmarks/bench_het_table.py --products 12 --regions 500 --revisions 20 --lookups 200000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from models.het_table import NATIONAL_REGION, build_snapshot
+
+def generate_table(products: int, regions: int, revisions: int, seed: int = 42) -> pd.DataFrame:
+    """National prices for every product plus regional prices for half the regions"""
+    rng = np.random.default_rng(seed)
+    region_names = [NATIONAL_REGION] + [f"REGION_{i}" for i in range(regions // 2)]
+    rows = []
+    for p in range(products):
+        for region in region_names:
+            dates = np.sort(rng.choice(np.arange(3650), revisions, replace=False))
+            for day in dates:
+                rows.append((f"PRODUCT_{p}", region, pd.Timestamp("2016-01-01") + pd.Timedelta(days=int(day)),
+                             float(rng.integers(500, 4000))))
+    return pd.DataFrame(rows, columns=["product", "region", "effective_date", "het_price"])
+
+def pandas_lookup(frame: pd.DataFrame, product: str, region: str, date: str) -> float:
+    """Latest regional price in effect, else the national one, by boolean filtering"""
+    date = pd.Timestamp(date)
+    for candidate in (region, NATIONAL_REGION):
+        rows = frame[(frame["product"] == product) & (frame["region"] == candidate) & (frame["effective_date"] <= date)]
+        if len(rows):
+            return float(rows.sort_values("effective_date")["het_price"].iloc[-1])
+    return float("nan")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HET table lookups")
+    parser.add_argument("--products", type=int, default=12)
+    parser.add_argument("--regions", type=int, default=500)
+    parser.add_argument("--revisions", type=int, default=20, help="Price revisions per product and region")
+    parser.add_argument("--lookups", type=int, default=200000)
+    parser.add_argument("--pandas-lookups", type=int, default=200, help="Lookups for the slow pandas baseline")
+    args = parser.parse_args()
+
+    frame = generate_table(args.products, args.regions, args.revisions)
+    started = time.perf_counter()
+    snapshot = build_snapshot(frame)
+    print(f"index {snapshot.row_count} rows in {time.perf_counter() - started:.3f} s")
+
+    rng = np.random.default_rng(7)
+    products = [f"PRODUCT_{p}" for p in rng.integers(0, args.products, args.lookups)]
+    regions = [f"REGION_{r}" for r in rng.integers(0, args.regions, args.lookups)]  # Half have no regional price
+    # ISO date strings, as requests carry them
+    dates = list((pd.Timestamp("2016-01-01") + pd.to_timedelta(rng.integers(0, 4000, args.lookups), unit="D")).strftime("%Y-%m-%d"))
+
+    n = args.pandas_lookups
+    started = time.perf_counter()
+    expected = np.array([pandas_lookup(frame, products[i], regions[i], dates[i]) for i in range(n)])
+    pandas_rate = n / (time.perf_counter() - started)
+
+    n_single = min(args.lookups, 20000)
+    started = time.perf_counter()
+    single = np.array([snapshot.lookup(products[i], regions[i], dates[i]) or np.nan for i in range(n_single)])
+    single_rate = n_single / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    batch = snapshot.lookup_many(products, regions, dates)
+    batch_rate = args.lookups / (time.perf_counter() - started)
+
+    assert np.allclose(batch[:n], expected, equal_nan=True) and np.allclose(batch[:n_single], single, equal_nan=True)
+    print(f"{'method':<22} {'lookups/s':>12}")
+    print(f"{'pandas filter':<22} {pandas_rate:>12.0f}")
+    print(f"{'snapshot.lookup':<22} {single_rate:>12.0f}")
+    print(f"{'snapshot.lookup_many':<22} {batch_rate:>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: full refit vs incremental update as history length grows
+
+For each history length N the engine first fits on N rows, then forecasts
+on N + appended rows. The incremental run reuses the previous fit through
+the series lineage; the full run starts from an empty cache.
+
+Usage:
+    python benchmarks/bench_incremental_fit.py --lengths 100,500,1000,2000 --append 5
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from models.forecast_models import ForecastEngine, _import_catboost, _import_statsmodels
+from models.model_cache import FittedModelCache
+
+# Import the model libraries up front so neither run pays for them
+_import_statsmodels()
+_import_catboost()
+warnings.filterwarnings("ignore")
+
+def generate_history(length: int, seed: int = 42) -> pd.DataFrame:
+    """Generate a weekly-seasonal daily price/quantity history"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(length)
+    return pd.DataFrame({
+        "date": pd.date_range("2015-01-01", periods=length, freq="D"),
+        "price": 25 + 2 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 0.5, length),
+        "quantity": 100 + 10 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 5, length)
+    })
+
+def time_forecast(engine: ForecastEngine, model: str, df: pd.DataFrame, days: int, series_key: str):
+    """Time one model forecast and return (seconds, fit mode)"""
+    method = getattr(engine, f"_generate_{model.lower()}_forecast")
+    start = time.perf_counter()
+    result = method(df, days, True, series_key=series_key)
+    return time.perf_counter() - start, result.fit_mode
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark incremental model updates")
+    parser.add_argument("--lengths", default="100,500,1000,2000", help="Comma-separated history lengths")
+    parser.add_argument("--append", type=int, default=5, help="Rows appended after the first fit")
+    parser.add_argument("--models", default="ES,ARIMA,CatBoost", help="Comma-separated model list")
+    parser.add_argument("--days", type=int, default=30, help="Forecast horizon")
+    args = parser.parse_args()
+
+    lengths = [int(n) for n in args.lengths.split(",")]
+    models = args.models.split(",")
+
+    # Run one untimed fit per model to settle first-call overhead
+    for model in models:
+        engine = ForecastEngine()
+        engine.model_cache = FittedModelCache()
+        time_forecast(engine, model, generate_history(60), args.days, None)
+
+    print(f"{'model':<10}{'history':>10}{'full (s)':>12}{'incremental (s)':>18}{'speedup':>10}")
+    for model in models:
+        for length in lengths:
+            history = generate_history(length + args.append)
+            base, extended = history.iloc[:length], history
+
+            # Full refit on the extended series with a cold cache
+            engine = ForecastEngine()
+            engine.model_cache = FittedModelCache()
+            full_seconds, full_mode = time_forecast(engine, model, extended, args.days, "bench")
+
+            # Fit on the base series, then update with the appended rows
+            engine = ForecastEngine()
+            engine.model_cache = FittedModelCache()
+            time_forecast(engine, model, base, args.days, "bench")
+            incremental_seconds, incremental_mode = time_forecast(engine, model, extended, args.days, "bench")
+
+            assert full_mode == "full" and incremental_mode == "incremental", (full_mode, incremental_mode)
+            print(f"{model:<10}{length:>10}{full_seconds:>12.3f}{incremental_seconds:>18.3f}"
+                  f"{full_seconds / incremental_seconds:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
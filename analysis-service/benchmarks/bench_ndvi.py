@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: NDVI series generation and the grid-cell store
+
+Times NDVI for a set of kiosk locations over a date range: the previous
+per-day loop, the vectorized generator alone, the memory-mapped store on
+first use (cold) and again (warm, as arrays and as a DataFrame), and
+requests whose ranges slide forward so most days overlap what is already
+stored. Also checks that repeated requests return identical values.
+
+Usage:
+    python benchmarks/bench_ndvi.py --locations 200 --days 730
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from models.ndvi_store import NDVIStore, grid_cell, synthetic_ndvi, to_day_range
+
+def legacy_ndvi(lat: float, lng: float, start_date: str, end_date: str) -> pd.DataFrame:
+    """The per-day loop DataProcessor.fetch_ndvi_data used before the store"""
+    ndvi_data = []
+    for date in pd.date_range(start=start_date, end=end_date, freq='D'):
+        base_ndvi = 0.3 + 0.4 * np.sin(2 * np.pi * date.dayofyear / 365)
+        noise = np.random.normal(0, 0.1)
+        location_factor = (lat - (-6.2)) * 0.01
+        ndvi_value = np.clip(base_ndvi + noise + location_factor, -1, 1)
+        ndvi_data.append({'date': date, 'ndvi': round(ndvi_value, 4), 'latitude': lat, 'longitude': lng})
+    return pd.DataFrame(ndvi_data)
+
+def timed(label: str, requests: int, fn) -> float:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:8.3f} s  {elapsed / requests * 1e3:8.3f} ms/request")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NDVI generation and storage")
+    parser.add_argument("--locations", type=int, default=200)
+    parser.add_argument("--days", type=int, default=730, help="Days per request")
+    parser.add_argument("--slides", type=int, default=10, help="Sliding-window requests per location")
+    parser.add_argument("--slide-days", type=int, default=30, help="Days each sliding request moves forward")
+    parser.add_argument("--legacy-locations", type=int, default=20, help="Locations for the slow per-day loop")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    locations = [(rng.uniform(-8.5, -6.0), rng.uniform(106.0, 114.0)) for _ in range(args.locations)]
+    start = pd.Timestamp("2023-01-01")
+    end = start + pd.Timedelta(days=args.days - 1)
+    start_date, end_date = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+    print(f"{args.locations} locations x {args.days} days\n")
+
+    legacy = args.legacy_locations
+    timed("per-day loop (legacy)", legacy,
+          lambda: [legacy_ndvi(lat, lng, start_date, end_date) for lat, lng in locations[:legacy]])
+    days = to_day_range(start_date, end_date)
+    timed("vectorized generator", args.locations,
+          lambda: [synthetic_ndvi(grid_cell(lat, lng, 0.05), lat, days) for lat, lng in locations])
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = NDVIStore(store_dir)
+        first = []
+        timed("store frame (cold)", args.locations,
+              lambda: first.extend(store.frame(lat, lng, start_date, end_date) for lat, lng in locations))
+        timed("store series (warm)", args.locations,
+              lambda: [store.series(lat, lng, start_date, end_date) for lat, lng in locations])
+        again = []
+        timed("store frame (warm)", args.locations,
+              lambda: again.extend(store.frame(lat, lng, start_date, end_date) for lat, lng in locations))
+        assert all(np.array_equal(a["ndvi"], b["ndvi"]) for a, b in zip(first, again))
+
+        generated_before = store.days_generated
+        def slide():
+            for step in range(1, args.slides + 1):
+                shift = pd.Timedelta(days=step * args.slide_days)
+                for lat, lng in locations:
+                    store.frame(lat, lng, (start + shift).strftime("%Y-%m-%d"), (end + shift).strftime("%Y-%m-%d"))
+        timed("store frame (sliding)", args.locations * args.slides, slide)
+        requested = args.locations * args.slides * args.days
+        generated = store.days_generated - generated_before
+        print(f"\nsliding: {generated} of {requested} days generated ({1 - generated / requested:.1%} reused)")
+        print(f"store: {store.stats()['cells']} cells, "
+              f"{sum(os.path.getsize(os.path.join(store_dir, f)) for f in os.listdir(store_dir)) / 1e6:.1f} MB on disk")
+
+if __name__ == "__main__":
+    main()
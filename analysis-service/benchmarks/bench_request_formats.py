@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: /forecast request decoding by wire format
+
+Times body parsing, validation and DataProcessor ingest for the same history
+sent as JSON rows, JSON columns, an Arrow IPC stream and a NumPy frame. Model
+fitting is excluded so only the request path is measured.
+
+Usage:
+    python benchmarks/bench_request_formats.py --points 10000 --repeat 5
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from main import ForecastRequest, _binary_forecast_request
+from models.data_processor import DataProcessor
+from utils.columnar_codec import (
+    ARROW_MEDIA_TYPE, NUMPY_MEDIA_TYPE, decode_frames, encode_numpy_frame, pyarrow_available
+)
+
+FIELDS = {"product_id": "bench", "days": 30, "models": ["SMA", "WMA"]}
+
+def generate_history(points: int, seed: int = 42) -> pd.DataFrame:
+    """Generate a clean daily history"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.date_range("1990-01-01", periods=points, freq="D").values.astype("datetime64[ns]"),
+        "quantity": (100 + rng.normal(0, 10, points)).round(2),
+        "price": (25 + rng.normal(0, 1, points)).round(2)
+    })
+
+def build_bodies(history: pd.DataFrame) -> dict:
+    """Encode the same request in every supported format"""
+    date_strings = history["date"].dt.strftime("%Y-%m-%d").tolist()
+    bodies = {
+        "json rows": json.dumps({**FIELDS, "historical_data": [
+            {"date": d, "quantity": q, "price": p}
+            for d, q, p in zip(date_strings, history["quantity"].tolist(), history["price"].tolist())
+        ]}).encode(),
+        "json columns": json.dumps({**FIELDS, "historical_data": {
+            "dates": date_strings,
+            "quantities": history["quantity"].tolist(),
+            "prices": history["price"].tolist()
+        }}).encode(),
+        "numpy frame": encode_numpy_frame(FIELDS, {
+            "date": history["date"].to_numpy().view("<i8"),
+            "quantity": history["quantity"].to_numpy(),
+            "price": history["price"].to_numpy()
+        })
+    }
+    if pyarrow_available:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(history, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_batch(table.to_batches()[0], custom_metadata={"fields": json.dumps(FIELDS)})
+        bodies["arrow stream"] = sink.getvalue()
+    return bodies
+
+def parse(name: str, body: bytes, processor: DataProcessor) -> pd.DataFrame:
+    """Decode, validate and ingest one request body"""
+    if name.startswith("json"):
+        request = ForecastRequest.model_validate_json(body)
+    else:
+        content_type = ARROW_MEDIA_TYPE if name.startswith("arrow") else NUMPY_MEDIA_TYPE
+        request = _binary_forecast_request(*decode_frames(body, content_type)[0])
+    return processor.process_historical_data(request.historical_data)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /forecast request formats")
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger("models.data_processor").setLevel(logging.WARNING)
+
+    history = generate_history(args.points)
+    bodies = build_bodies(history)
+    processor = DataProcessor()
+
+    print(f"Request decode + ingest for {args.points} points, best of {args.repeat}")
+    baseline = None
+    for name, body in bodies.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            df = parse(name, body, processor)
+            best = min(best, time.perf_counter() - start)
+        pd.testing.assert_frame_equal(df, history, check_dtype=False)
+        baseline = baseline or best
+        print(f"  {name:<13} {len(body) / 1024:8.0f} KiB  {best * 1000:8.2f} ms  ({baseline / best:6.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark: road network distances vs straight-line distances
+
+On the synthetic grid city (one-way streets, closures, fast arterials):
+
+1. Matrix build time: haversine, road network (multi-source Dijkstra batch)
+   and road network through the distance cache (cold, then all cached).
+2. Plan quality: routes planned on straight-line distances and on road
+   distances, both measured on the road network (the km and hours the
+   trucks would actually drive), next to the drive hours each plan
+   estimated for itself.
+
+Usage:
+    python benchmarks/bench_road_network.py --sizes 100,500 --grid 150 --time-limit 5 --goal time
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from models.distance_cache import DistanceCache
+from models.distance_provider import HaversineProvider
+from models.road_network import RoadNetworkProvider, synthetic_road_graph
+from models.routing_optimizer import Location, RouteOptimizer, Vehicle
+
+def road_totals(routes: list, index: dict, meters: np.ndarray, seconds: np.ndarray) -> tuple:
+    """Road km and driving hours of a plan"""
+    km = hours = 0.0
+    for route in routes:
+        nodes = np.array([index[stop.id] for stop in route.stops], dtype=np.intp)
+        km += meters[nodes[:-1], nodes[1:]].sum() / 1000
+        hours += seconds[nodes[:-1], nodes[1:]].sum() / 3600
+    return km, hours
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark road network distances")
+    parser.add_argument("--sizes", default="100,500")
+    parser.add_argument("--grid", type=int, default=150, help="Intersections per side of the synthetic city")
+    parser.add_argument("--time-limit", type=float, default=5)
+    parser.add_argument("--goal", default="time", help="Optimization goal for the plan comparison")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    graph = synthetic_road_graph(size=args.grid)
+    road = RoadNetworkProvider(graph)
+    print(f"graph: {graph.node_count} nodes, {graph.edge_count} edges, "
+          f"built and indexed in {time.perf_counter() - started:.2f} s")
+    straight = HaversineProvider()
+    half_span = 0.45 * (graph.lats.max() - graph.lats.min())
+
+    print(f"{'stops':>6} {'haversine s':>12} {'road s':>8} {'cache cold s':>13} {'cache warm s':>13}")
+    instances = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        rng = np.random.default_rng(size)
+        lats = -6.2 + rng.uniform(-half_span, half_span, size + 1)
+        lngs = 106.8 + rng.uniform(-half_span, half_span, size + 1)
+        lats[0], lngs[0] = -6.2, 106.8
+
+        started = time.perf_counter()
+        straight.matrix(lats, lngs, with_time=True)
+        haversine_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        road_matrix = road.matrix(lats, lngs)
+        road_seconds = time.perf_counter() - started
+
+        ids = ["warehouse"] + [f"kiosk_{i}" for i in range(size)]
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = DistanceCache(cache_dir, provider=road)
+            started = time.perf_counter()
+            cache.matrix_for(ids, lats, lngs)
+            cold_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            cache.matrix_for(ids, lats, lngs)
+            warm_seconds = time.perf_counter() - started
+
+        print(f"{size:>6} {haversine_seconds:>12.3f} {road_seconds:>8.3f} {cold_seconds:>13.3f} {warm_seconds:>13.4f}")
+        instances.append((size, ids, lats, lngs, road_matrix))
+
+    print(f"\n{'stops':>6} {'planned on':<10} {'road km':>9} {'drive h':>8} {'estimated h':>12}")
+    for size, ids, lats, lngs, road_matrix in instances:
+        rng = np.random.default_rng(size)
+        locations = [
+            Location(id=ids[i], lat=float(lats[i]), lng=float(lngs[i]), demand=0 if i == 0 else int(rng.integers(1, 10)))
+            for i in range(size + 1)
+        ]
+        fleet = [Vehicle(id=i, capacity=160, start_location=locations[0]) for i in range(max(2, size // 25))]
+        index = {loc.id: i for i, loc in enumerate(locations)}
+
+        for label, provider in (("straight", straight), ("road", road)):
+            optimizer = RouteOptimizer(distance_provider=provider)
+            routes = optimizer.optimize_fleet(locations[1:], fleet, args.goal, time_limit_seconds=args.time_limit)
+            km, hours = road_totals(routes, index, road_matrix.meters, road_matrix.seconds)
+            estimated = sum(route.total_time for route in routes)
+            print(f"{size:>6} {label:<10} {km:>9.1f} {hours:>8.1f} {estimated:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: routing models with depots, fleets and time windows
+
+Runs the same delivery points through increasingly constrained models:
+
+    baseline     one warehouse, identical trucks
+    multi_depot  three warehouses, trucks spread over them
+    mixed_fleet  three truck types with their own capacity, per-km and fixed cost (cost goal)
+    windows      kiosk opening hours and 10 minute service times
+    combined     all of the above
+
+and reports the time to the first solution, the number of improvements,
+the final distance, stops served and late arrivals.
+
+Usage:
+    python benchmarks/bench_route_constraints.py --sizes 100,300 --time-limit 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from models.routing_optimizer import Location, RouteOptimizer, Vehicle
+
+SCENARIOS = ("baseline", "multi_depot", "mixed_fleet", "windows", "combined")
+
+def generate_points(size: int, windows: bool, seed: int = 3) -> list:
+    """Random kiosks around Jakarta; half open mornings, half afternoons (minutes after 07:00)"""
+    rng = np.random.default_rng(seed)
+    points = []
+    for i in range(size):
+        points.append(Location(
+            id=f"kiosk_{i}",
+            lat=float(-6.2 + rng.uniform(-0.3, 0.3)),
+            lng=float(106.8 + rng.uniform(-0.3, 0.3)),
+            demand=int(rng.integers(1, 10)),
+            service_minutes=10 if windows else 0,
+            time_window=((60, 300) if i % 2 else (240, 600)) if windows else None
+        ))
+    return points
+
+def build_fleet(scenario: str, size: int) -> list:
+    """Fleet for a scenario: about 25 stops per truck, 12 when kiosks have opening hours"""
+    depots = [Location(id="central", lat=-6.2, lng=106.8, time_window=(0, 660))]
+    if scenario in ("multi_depot", "combined"):
+        depots += [
+            Location(id="north", lat=-6.0, lng=106.75, time_window=(0, 660)),
+            Location(id="east", lat=-6.25, lng=107.0, time_window=(0, 660))
+        ]
+    trucks = max(2, size // (12 if scenario in ("windows", "combined") else 25))
+    mixed = scenario in ("mixed_fleet", "combined")
+    # (capacity, cost per km, fixed cost): small van, medium truck, large truck
+    types = [(120, 800, 50000), (160, 1000, 80000), (240, 1400, 150000)] if mixed else [(160, 1000, 0)]
+
+    fleet = []
+    for i in range(trucks):
+        capacity, cost_per_km, fixed_cost = types[i % len(types)]
+        fleet.append(Vehicle(
+            id=i,
+            capacity=capacity,
+            start_location=depots[i % len(depots)],
+            cost_per_km=cost_per_km,
+            fixed_cost=fixed_cost
+        ))
+    return fleet
+
+def run_scenario(optimizer: RouteOptimizer, scenario: str, size: int, time_limit: float) -> dict:
+    windows = scenario in ("windows", "combined")
+    points = generate_points(size, windows)
+    fleet = build_fleet(scenario, size)
+    goal = "cost" if scenario in ("mixed_fleet", "combined") else "distance"
+
+    improvements = []
+    start = time.perf_counter()
+    routes = optimizer.optimize_fleet(
+        points, fleet, goal,
+        time_limit_seconds=time_limit,
+        on_solution=lambda _routes, objective, elapsed: improvements.append(elapsed)
+    )
+    wall = time.perf_counter() - start
+
+    late = 0
+    for route in routes:
+        for stop, arrival in zip(route.stops[1:-1], route.arrival_minutes[1:-1]):
+            if stop.time_window is not None and arrival > stop.time_window[1] + 1e-6:
+                late += 1
+
+    return {
+        "first": improvements[0] if improvements else float("nan"),
+        "improvements": len(improvements),
+        "wall": wall,
+        "distance": sum(route.total_distance for route in routes),
+        "served": sum(len(route.stops) - 2 for route in routes),
+        "late": late
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark constrained routing models")
+    parser.add_argument("--sizes", default="100,300")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--time-limit", type=float, default=10)
+    args = parser.parse_args()
+
+    optimizer = RouteOptimizer()
+    print(f"{'stops':>6} {'scenario':<12} {'first s':>8} {'improv':>7} {'wall s':>7} {'km':>9} {'served':>7} {'late':>5}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        for scenario in args.scenarios.split(","):
+            r = run_scenario(optimizer, scenario, size, args.time_limit)
+            print(f"{size:>6} {scenario:<12} {r['first']:>8.2f} {r['improvements']:>7} {r['wall']:>7.1f} "
+                  f"{r['distance']:>9.1f} {r['served']:>7} {r['late']:>5}")
+
+if __name__ == "__main__":
+    main()
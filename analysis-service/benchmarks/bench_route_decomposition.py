@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cluster-first, route-second vs one monolithic routing model
+
+Solves the same random instance with a single RoutingModel and with sweep
+and k-means decomposition, under the same time budget, and reports total
+distance, wall time, stops served and capacity violations.
+
+Usage:
+    python benchmarks/bench_route_decomposition.py --sizes 1000,5000 --time-limit 30
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from models.routing_optimizer import Location, RouteOptimizer
+from utils.config import settings
+
+def generate_instance(size: int, seed: int = 1) -> list:
+    """Random kiosks around Jakarta with demands of 1-9 units, depot first"""
+    rng = np.random.default_rng(seed)
+    locations = [Location(id="warehouse", lat=-6.2, lng=106.8, demand=0)]
+    for i in range(size):
+        locations.append(Location(
+            id=f"kiosk_{i}",
+            lat=float(-6.2 + rng.uniform(-0.4, 0.4)),
+            lng=float(106.8 + rng.uniform(-0.4, 0.4)),
+            demand=int(rng.integers(1, 10))
+        ))
+    return locations
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark large-instance route decomposition")
+    parser.add_argument("--sizes", default="1000,5000")
+    parser.add_argument("--stops-per-vehicle", type=int, default=50)
+    parser.add_argument("--time-limit", type=float, default=30)
+    parser.add_argument("--methods", default="none,sweep,kmeans")
+    parser.add_argument("--workers", type=int, default=settings.ROUTE_CLUSTER_WORKERS)
+    args = parser.parse_args()
+
+    optimizer = RouteOptimizer()
+    print(f"{'stops':>6} {'method':<7} {'wall s':>7} {'distance km':>12} {'served':>7} {'over cap':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        locations = generate_instance(size)
+        vehicles = max(1, size // args.stops_per_vehicle)
+        # 10% spare fleet capacity
+        capacity = sum(loc.demand for loc in locations) / vehicles * 1.1
+        matrix = optimizer.build_matrix(locations)
+
+        for method in args.methods.split(","):
+            start = time.perf_counter()
+            routes = optimizer.optimize_routes(
+                warehouse=locations[0],
+                delivery_points=locations[1:],
+                vehicle_capacity=capacity,
+                vehicle_count=vehicles,
+                time_limit_seconds=args.time_limit,
+                matrix=matrix,
+                decomposition=None if method == "none" else method,
+                cluster_workers=args.workers
+            )
+            wall = time.perf_counter() - start
+            served = sum(len(route.stops) - 2 for route in routes)
+            over = sum(1 for route in routes if sum(stop.demand for stop in route.stops) > capacity)
+            distance = sum(route.total_distance for route in routes)
+            print(f"{size:>6} {method:<7} {wall:>7.1f} {distance:>12.1f} {served:>7} {over:>9}")
+
+if __name__ == "__main__":
+    main()
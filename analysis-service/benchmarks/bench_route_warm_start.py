@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: warm-starting route searches from a cached plan
+
+Solves a random instance, then changes a few stops (removes some kiosks
+and adds others) and solves the changed instance twice with the same
+budget: cold, from a cheapest-arc first solution, and warm, from the
+first plan via the route plan cache. Reports the first and final
+objectives and the time each search needs to come within 1% and 3% of
+the cold search's final objective. An exact repeat is answered from the
+cache; its lookup time is reported too.
+
+Usage:
+    python benchmarks/bench_route_warm_start.py --sizes 100,200 --seeds 5 --time-limit 10
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from models.route_cache import RoutePlanCache, SearchBudget, make_plan_key
+from models.routing_optimizer import Location, RouteOptimizer, Vehicle
+
+def generate_points(size: int, seed: int) -> list:
+    """Random kiosks around Jakarta with demands of 1-9 units"""
+    rng = np.random.default_rng(seed)
+    return [
+        Location(
+            id=f"kiosk_{i}",
+            lat=float(-6.2 + rng.uniform(-0.3, 0.3)),
+            lng=float(106.8 + rng.uniform(-0.3, 0.3)),
+            demand=int(rng.integers(1, 10))
+        )
+        for i in range(size)
+    ]
+
+def time_to_reach(trajectory: list, target: float):
+    """Seconds until the search first reported an objective at or below target"""
+    return next((elapsed for elapsed, objective in trajectory if objective <= target), None)
+
+def fmt(seconds) -> str:
+    return f"{seconds:.2f}" if seconds is not None else "-"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark warm-started route searches")
+    parser.add_argument("--sizes", default="100,200")
+    parser.add_argument("--seeds", type=int, default=5)
+    parser.add_argument("--changes", type=int, default=2, help="Stops removed and stops added")
+    parser.add_argument("--time-limit", type=float, default=10)
+    args = parser.parse_args()
+
+    optimizer = RouteOptimizer()
+    warehouse = Location(id="warehouse", lat=-6.2, lng=106.8)
+    print(f"{'stops':>6} {'seed':>5} {'start':>6} {'first obj':>10} {'final obj':>10} {'to 3% s':>8} {'to 1% s':>8}")
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        for seed in range(args.seeds):
+            points = generate_points(size + args.changes, seed)
+            fleet = [Vehicle(id=i, capacity=160, start_location=warehouse) for i in range(max(2, size // 25))]
+            cache = RoutePlanCache()
+
+            previous = points[:size]
+            previous_key = make_plan_key(fleet, previous, "distance")
+            cache.put(previous_key, optimizer.optimize_fleet(previous, fleet, time_limit_seconds=args.time_limit),
+                      SearchBudget(args.time_limit))
+
+            started = time.perf_counter()
+            cache.get(previous_key, SearchBudget(args.time_limit))
+            repeat_ms = (time.perf_counter() - started) * 1000
+
+            changed = points[args.changes:]
+            initial_routes = cache.similar(make_plan_key(fleet, changed, "distance"))
+
+            trajectories = {}
+            for start, seed_routes in (("cold", None), ("warm", initial_routes)):
+                trajectory = []
+                optimizer.optimize_fleet(
+                    changed, fleet,
+                    time_limit_seconds=args.time_limit,
+                    initial_routes=seed_routes,
+                    on_solution=lambda _routes, objective, elapsed: trajectory.append((elapsed, objective))
+                )
+                trajectories[start] = trajectory
+
+            target = trajectories["cold"][-1][1]
+            for start, trajectory in trajectories.items():
+                print(f"{size:>6} {seed:>5} {start:>6} {trajectory[0][1]:>10} {trajectory[-1][1]:>10} "
+                      f"{fmt(time_to_reach(trajectory, target * 1.03)):>8} "
+                      f"{fmt(time_to_reach(trajectory, target * 1.01)):>8}")
+            print(f"{size:>6} {seed:>5} repeat answered from the cache in {repeat_ms:.3f} ms")
+
+if __name__ == "__main__":
+    main()
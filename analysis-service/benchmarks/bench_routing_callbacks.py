@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: OR-Tools search throughput with Python vs native transit callbacks
+
+Builds the same VRP twice: once with the previous Python closures for arc
+cost and demand, once with RouteOptimizer.build_routing_model (transit
+matrix and unary transit vector). Both run guided local search for the same
+time limit; the table reports solutions and accepted neighbors per second
+and the final objective.
+
+Usage:
+    python benchmarks/bench_routing_callbacks.py --sizes 50,200 --time-limit 30
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp
+
+from models.routing_optimizer import Location, RouteOptimizer, SOLVER_TIME_LIMIT_SECONDS
+
+def generate_locations(count: int, seed: int = 42) -> list:
+    """Random kiosks around Jakarta with small demands, depot first"""
+    rng = np.random.default_rng(seed)
+    lats = -6.2 + rng.uniform(-0.3, 0.3, count)
+    lngs = 106.8 + rng.uniform(-0.3, 0.3, count)
+    demands = rng.integers(1, 20, count)
+    demands[0] = 0
+    return [
+        Location(id=f"loc_{i}", lat=float(lat), lng=float(lng), demand=float(demand))
+        for i, (lat, lng, demand) in enumerate(zip(lats, lngs, demands))
+    ]
+
+def python_callback_model(locations: list, arc_costs: np.ndarray, vehicle_capacity: float, vehicle_count: int):
+    """The previous model: Python closures called for every arc evaluation"""
+    manager = pywrapcp.RoutingIndexManager(len(locations), vehicle_count, 0)
+    routing = pywrapcp.RoutingModel(manager)
+    costs = arc_costs.tolist()
+
+    def arc_cost_callback(from_index, to_index):
+        return costs[manager.IndexToNode(from_index)][manager.IndexToNode(to_index)]
+
+    def demand_callback(from_index):
+        return int(locations[manager.IndexToNode(from_index)].demand)
+
+    routing.SetArcCostEvaluatorOfAllVehicles(routing.RegisterTransitCallback(arc_cost_callback))
+    routing.AddDimensionWithVehicleCapacity(
+        routing.RegisterUnaryTransitCallback(demand_callback), 0,
+        [int(vehicle_capacity)] * vehicle_count, True, 'Capacity'
+    )
+    return manager, routing
+
+def run(routing, parameters) -> dict:
+    solution = routing.SolveWithParameters(parameters)
+    solver = routing.solver()
+    seconds = solver.WallTime() / 1000
+    return {
+        "seconds": seconds,
+        "solutions_per_s": solver.Solutions() / seconds,
+        "neighbors_per_s": solver.AcceptedNeighbors() / seconds,
+        "objective": solution.ObjectiveValue() if solution else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OR-Tools callback styles")
+    parser.add_argument("--sizes", default="50,200")
+    parser.add_argument("--vehicles", type=int, default=4)
+    parser.add_argument("--time-limit", type=int, default=SOLVER_TIME_LIMIT_SECONDS)
+    args = parser.parse_args()
+
+    optimizer = RouteOptimizer()
+    parameters = optimizer.search_parameters(args.time_limit)
+    print(f"{'stops':>6} {'callbacks':<8} {'sol/s':>9} {'nbr/s':>9} {'objective':>11}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        locations = generate_locations(size + 1)
+        capacity = sum(loc.demand for loc in locations) / args.vehicles * 1.2
+        arc_costs = optimizer.arc_cost_matrix(optimizer.build_matrix(locations), "distance")
+
+        results = {}
+        for label, build in (
+            ("python", python_callback_model),
+            ("native", optimizer.build_routing_model)
+        ):
+            _, routing = build(locations, arc_costs, capacity, args.vehicles)
+            results[label] = run(routing, parameters)
+            r = results[label]
+            print(f"{size:>6} {label:<8} {r['solutions_per_s']:>9.1f} {r['neighbors_per_s']:>9.1f} {r['objective']:>11}")
+
+        speedup = results["native"]["solutions_per_s"] / max(results["python"]["solutions_per_s"], 1e-9)
+        print(f"{'':>6} {'speedup':<8} {speedup:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
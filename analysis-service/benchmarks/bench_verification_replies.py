@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark: matching WhatsApp replies to pending verifications
+
+Registers pending verifications in a fresh SQLite store, then times
+webhook-style replies (phone index lookup plus one row update), reloading
+the pending index after a restart and a sweep that flags every remaining
+verification as a non-responder.
+
+Usage:
+    python benchmarks/bench_verification_replies.py --pending 100000 --replies 50000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.verification_tracker import VerificationTracker
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark verification reply matching")
+    parser.add_argument("--pending", type=int, default=100000, help="Verifications awaiting a reply")
+    parser.add_argument("--replies", type=int, default=50000, help="Replies to match")
+    args = parser.parse_args()
+    logging.getLogger("models.verification_tracker").setLevel(logging.ERROR)
+
+    transaction = {"items": [{"name": "UREA", "quantity": 10, "unit": "sack", "price": 112500}], "het_price": 112500}
+    with tempfile.TemporaryDirectory() as data_dir:
+        db_path = os.path.join(data_dir, "verifications.sqlite3")
+        tracker = VerificationTracker(db_path, sweep_seconds=0)
+
+        started = time.perf_counter()
+        for i in range(args.pending):
+            tracker.register(f"job_{i}", f"+6281{i:08d}", f"kiosk_{i % 500}", transaction, window_hours=24)
+        elapsed = time.perf_counter() - started
+        print(f"register {args.pending:>7}  {elapsed:7.2f} s  {args.pending / elapsed:9.0f}/s")
+
+        started = time.perf_counter()
+        for i in range(args.replies):
+            tracker.record_reply(f"whatsapp:+6281{i:08d}", "YES" if i % 10 else "NO")
+        elapsed = time.perf_counter() - started
+        print(f"replies  {args.replies:>7}  {elapsed:7.2f} s  {args.replies / elapsed:9.0f}/s  "
+              f"({elapsed / args.replies * 1e6:.0f} us each)")
+
+        started = time.perf_counter()
+        tracker = VerificationTracker(db_path, sweep_seconds=0)
+        elapsed = time.perf_counter() - started
+        print(f"reload   {tracker.stats()['pending']:>7}  {elapsed:7.2f} s")
+
+        # Move every deadline into the past so one sweep flags them all
+        tracker._deadlines = [(0.0, verification_id) for _, verification_id in tracker._deadlines]
+        started = time.perf_counter()
+        flagged = tracker.sweep()
+        elapsed = time.perf_counter() - started
+        print(f"sweep    {flagged:>7}  {elapsed:7.2f} s  (flagged as no_response)")
+        print(f"store    {os.path.getsize(db_path) / 1e6:7.1f} MB")
+
+if __name__ == "__main__":
+    main()
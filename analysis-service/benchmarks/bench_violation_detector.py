@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming compliance violation detection
+
+Generates a stream of kiosk transactions (one to three items, priced at or
+just under the HET) and farmer replies, where a few kiosks overcharge on
+part of their sales and collect NO replies. Times the detector on one core
+with item HET prices given, with HET looked up from the table, through the
+submit queue and consumer thread, and by tailing a JSON-lines file. Reports
+which kiosks were flagged against the planted violators and the memory
+held per kiosk.
+
+Usage:
+    python benchmarks/bench_violation_detector.py --kiosks 5000 --events 200000
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.het_table import HETTable
+from models.violation_detector import ViolationDetector
+
+HET_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "het_prices.csv")
+PRODUCTS = ["UREA", "NPK", "ZA", "SP36"]
+
+def generate_events(kiosks: int, count: int, violator_share: float, table: HETTable, seed: int = 42):
+    """Events with per-item HET prices, and the ids of the overcharging kiosks"""
+    rng = random.Random(seed)
+    violators = set(rng.sample(range(kiosks), max(1, int(kiosks * violator_share))))
+    events = []
+    for i in range(count):
+        kiosk = rng.randrange(kiosks)
+        kiosk_id = f"kiosk_{kiosk}"
+        if rng.random() < 0.1:
+            no_share = 0.6 if kiosk in violators else 0.05
+            events.append({"type": "reply", "kiosk_id": kiosk_id, "response": "NO" if rng.random() < no_share else "YES"})
+            continue
+        overcharge = kiosk in violators and rng.random() < 0.4
+        items = []
+        for name in rng.sample(PRODUCTS, rng.randint(1, 3)):
+            unit = rng.choice(["kg", "sack"])
+            het = table.lookup(name, None, "2025-11-01") * (50 if unit == "sack" else 1)
+            factor = rng.uniform(1.1, 1.3) if overcharge else rng.uniform(0.97, 1.0)
+            items.append({"name": name, "unit": unit, "quantity": rng.randint(1, 20), "price": round(het * factor),
+                          "het_price": het})
+        events.append({"kiosk_id": kiosk_id, "transaction_id": f"t{i}", "date": "2025-11-01", "items": items})
+    return events, {f"kiosk_{k}" for k in violators}
+
+def make_detector(table: HETTable, batch_size: int, **kwargs) -> ViolationDetector:
+    return ViolationDetector(het_table=table, min_samples=10, cooldown_seconds=3600, batch_size=batch_size, **kwargs)
+
+def run_batches(detector: ViolationDetector, events: list, batch_size: int) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(events), batch_size):
+        detector.process_many(events[start:start + batch_size])
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming violation detection")
+    parser.add_argument("--kiosks", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--violators", type=float, default=0.02, help="Share of kiosks that overcharge")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    logging.getLogger("models.violation_detector").setLevel(logging.ERROR)
+
+    table = HETTable(HET_PATH, reload_seconds=0)
+    table.load()
+    events, violators = generate_events(args.kiosks, args.events, args.violators, table)
+    lookup_events = [
+        {**event, "items": [{k: v for k, v in item.items() if k != "het_price"} for item in event["items"]]}
+        if "items" in event else event
+        for event in events
+    ]
+
+    print(f"{'mode':<26} {'events/s':>10} {'seconds':>8}")
+    detector = make_detector(table, args.batch_size)
+    elapsed = run_batches(detector, events, args.batch_size)
+    print(f"{'process_many (HET given)':<26} {len(events) / elapsed:>10.0f} {elapsed:>8.2f}")
+
+    elapsed = run_batches(make_detector(table, args.batch_size), lookup_events, args.batch_size)
+    print(f"{'process_many (HET lookup)':<26} {len(events) / elapsed:>10.0f} {elapsed:>8.2f}")
+
+    queued = make_detector(table, args.batch_size, queue_size=len(events))
+    queued.start()
+    started = time.perf_counter()
+    for event in lookup_events:
+        queued.submit(event)
+    while queued.processed + queued.invalid < len(events):
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - started
+    queued.stop()
+    print(f"{'submit + consumer thread':<26} {len(events) / elapsed:>10.0f} {elapsed:>8.2f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "transactions.jsonl")
+        open(path, "w").close()
+        tailing = make_detector(table, args.batch_size, tail_path=path, tail_seconds=0.05)
+        tailing.start()
+        time.sleep(0.2)  # Let the tail open the file and seek to its end
+        started = time.perf_counter()
+        with open(path, "a") as handle:
+            for event in lookup_events:
+                handle.write(json.dumps(event) + "\n")
+        while tailing.processed + tailing.invalid < len(events):
+            time.sleep(0.005)
+        elapsed = time.perf_counter() - started
+        tailing.stop()
+        print(f"{'file tail (JSON lines)':<26} {len(events) / elapsed:>10.0f} {elapsed:>8.2f}")
+
+    tracemalloc.start()
+    measured = make_detector(table, args.batch_size)
+    run_batches(measured, events, args.batch_size)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    flagged = {violation.kiosk_id for violation in detector.violations(limit=len(events))}
+    by_rule = {}
+    for violation in detector.violations(limit=len(events)):
+        by_rule[violation.rule] = by_rule.get(violation.rule, 0) + 1
+    caught = len(flagged & violators)
+    print(f"\nflagged {len(flagged)} kiosks: {caught}/{len(violators)} violators, {len(flagged - violators)} others")
+    print(f"violations by rule: {by_rule}, suppressed by cooldown: {detector.suppressed}")
+    kiosks = measured.stats()["kiosks"]
+    print(f"memory {held / 1e6:.1f} MB for {kiosks} kiosks ({held / max(kiosks, 1) / 1e3:.1f} KB each)")
+
+if __name__ == "__main__":
+    main()
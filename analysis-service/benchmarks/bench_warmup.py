@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: time-to-first-forecast with and without model warm-up
+
+Each WARMUP_MODE runs in a fresh interpreter so library imports are cold.
+The child starts the app through its lifespan, waits for /health to return
+200 (as a load balancer would), then times the first ES/ARIMA/CatBoost
+forecast.
+
+Usage:
+    python benchmarks/bench_warmup.py --modes off,eager,background
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_child() -> None:
+    """Measure one cold start; prints a JSON line with timings"""
+    t0 = time.perf_counter()
+    sys.path.insert(0, ROOT)
+
+    import logging
+    logging.disable(logging.INFO)
+
+    from fastapi.testclient import TestClient
+    import main
+
+    body = {
+        "product_id": "warmup_bench",
+        "days": 14,
+        "models": ["ES", "ARIMA", "CatBoost"],
+        "historical_data": {
+            "dates": [f"2024-{1 + d // 28:02d}-{1 + d % 28:02d}" for d in range(56)],
+            "quantities": [100 + (d % 7) * 3 + (d % 5) for d in range(56)],
+            "prices": [25 + (d % 7) * 0.5 for d in range(56)]
+        }
+    }
+
+    with TestClient(main.app) as client:
+        started = time.perf_counter()
+        while client.get("/health").status_code == 503:
+            time.sleep(0.05)
+        ready = time.perf_counter()
+
+        response = client.post("/forecast", json=body)
+        response.raise_for_status()
+        first = time.perf_counter()
+
+        # A different series, so the fitted model cache cannot answer it
+        history = {**body["historical_data"], "quantities": [q + 1 for q in body["historical_data"]["quantities"]]}
+        response = client.post("/forecast", json={**body, "product_id": "warmup_bench_2", "historical_data": history})
+        second = time.perf_counter()
+
+    print(json.dumps({
+        "startup": started - t0,
+        "ready": ready - t0,
+        "first_forecast": first - ready,
+        "time_to_first_forecast": first - t0,
+        "second_forecast": second - first,
+        "models": response.json()["models_used"]
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark time-to-first-forecast by warm-up mode")
+    parser.add_argument("--modes", default="off,eager,background")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return
+
+    print(f"{'mode':<11} {'startup':>8} {'ready':>8} {'1st req':>8} {'to 1st':>8} {'2nd req':>8}  (seconds)")
+    for mode in args.modes.split(","):
+        env = {**os.environ, "WARMUP_MODE": mode, "MODEL_CACHE_DIR": ""}
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            env=env, cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:<11} {result['startup']:8.2f} {result['ready']:8.2f} "
+            f"{result['first_forecast']:8.2f} {result['time_to_first_forecast']:8.2f} "
+            f"{result['second_forecast']:8.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /compliance-check with inline Twilio sends vs the dispatch queue
+
+Runs a local fake Twilio Messages API (benchmarks/fake_twilio.py) with a
+fixed latency, a per-sender limit and injected 503s, then compares:
+
+1. Inline: what /compliance-check used to do per request - build a Twilio
+   client and send synchronously before responding.
+2. Queued: the service app with the WhatsApp dispatcher pointed at the fake
+   server; reports endpoint latency, the time until every message is
+   delivered, retries, and that resubmitting the same checks sends nothing.
+
+Usage:
+    python benchmarks/bench_whatsapp_dispatch.py --checks 500 --latency 0.2 --sender-rate 50 --error-rate 0.05
+"""
+
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import uvicorn
+
+from fake_twilio import create_fake_twilio
+
+def start_fake_twilio(app) -> str:
+    """Serve the fake API on a free local port from a background thread"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+def check_payload(i: int, prefix: str) -> dict:
+    return {
+        "kiosk_id": f"{prefix}_kiosk_{i % 40}",
+        "farmer_phone": f"+62{81 if prefix == 'queued' else 82}{i:08d}",
+        "transaction_details": {
+            "transaction_id": f"{prefix}_{i}",
+            "items": [{"name": "Urea", "quantity": 50, "unit": "kg", "price": 2250}]
+        },
+        "het_price": 2250
+    }
+
+def percentiles(samples: list) -> str:
+    ms = np.array(samples) * 1000
+    return f"p50 {np.percentile(ms, 50):7.2f} ms  p99 {np.percentile(ms, 99):7.2f} ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark queued vs inline WhatsApp verification sends")
+    parser.add_argument("--checks", type=int, default=500, help="Compliance checks for the queued run")
+    parser.add_argument("--inline-checks", type=int, default=50, help="Compliance checks for the inline run")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake Twilio latency per request (s)")
+    parser.add_argument("--sender-rate", type=float, default=50, help="Fake Twilio messages/s per sender before 429")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Share of fake Twilio requests failed with 503")
+    parser.add_argument("--dispatch-rate", type=float, default=45, help="Dispatcher messages/s per sender")
+    parser.add_argument("--connections", type=int, default=20, help="Dispatcher connection pool size")
+    args = parser.parse_args()
+
+    fake = create_fake_twilio(args.latency, args.sender_rate, args.error_rate)
+    base_url = start_fake_twilio(fake)
+
+    # Settings are read at import, so configure the service before loading it
+    os.environ.update({
+        "TWILIO_ACCOUNT_SID": "ACbench",
+        "TWILIO_AUTH_TOKEN": "bench",
+        "TWILIO_API_BASE_URL": base_url,
+        "WHATSAPP_RATE_PER_SECOND": str(args.dispatch_rate),
+        "WHATSAPP_BURST": str(int(args.dispatch_rate)),
+        "WHATSAPP_MAX_CONNECTIONS": str(args.connections),
+        "WHATSAPP_RETRY_BASE_SECONDS": "0.25",
+        "WARMUP_MODE": "off",
+        "ROUTE_EXECUTOR_BACKEND": "thread"
+    })
+    from fastapi.testclient import TestClient
+    from main import app
+    from models.compliance_monitor import ComplianceMonitor
+
+    # Inline: one Twilio client and one blocking send per check
+    latencies = []
+    started = time.perf_counter()
+    for i in range(args.inline_checks):
+        payload = check_payload(i, "inline")
+        begin = time.perf_counter()
+        monitor = ComplianceMonitor()
+        monitor.client.api.base_url = base_url
+        monitor.send_verification_request(
+            payload["farmer_phone"], payload["kiosk_id"],
+            {**payload["transaction_details"], "het_price": payload["het_price"]}
+        )
+        latencies.append(time.perf_counter() - begin)
+    inline_seconds = time.perf_counter() - started
+    print(f"inline  {args.inline_checks:>5} checks  endpoint {percentiles(latencies)}  "
+          f"{args.inline_checks / inline_seconds:7.1f} msg/s")
+
+    with TestClient(app) as client:
+        latencies = []
+        started = time.perf_counter()
+        for i in range(args.checks):
+            begin = time.perf_counter()
+            response = client.post("/compliance-check", json=check_payload(i, "queued"))
+            latencies.append(time.perf_counter() - begin)
+            assert response.json()["status"] == "queued", response.text
+        submitted_seconds = time.perf_counter() - started
+
+        while True:
+            stats = client.get("/metrics").json()["whatsapp_dispatch"]
+            if stats["sent"] + stats["failed"] >= args.checks:
+                break
+            time.sleep(0.02)
+        delivered_seconds = time.perf_counter() - started
+        print(f"queued  {args.checks:>5} checks  endpoint {percentiles(latencies)}  "
+              f"{args.checks / delivered_seconds:7.1f} msg/s  "
+              f"(all accepted in {submitted_seconds:.2f} s, delivered in {delivered_seconds:.2f} s)")
+        print(f"        sent {stats['sent']}, failed {stats['failed']}, retries {stats['retries']}, "
+              f"fake Twilio responses {dict(fake.state.responses)}")
+
+        # The same transactions again: answered from the idempotency index, nothing re-sent
+        duplicates = sum(
+            client.post("/compliance-check", json=check_payload(i, "queued")).json()["duplicate"]
+            for i in range(args.checks)
+        )
+        time.sleep(args.latency * 2)
+        queued = [n for (to, _), n in fake.state.deliveries.items() if to.startswith("whatsapp:+6281")]
+        print(f"resubmitted {args.checks}: {duplicates} duplicates, "
+              f"max deliveries per message {max(queued)}, messages delivered {len(queued)}")
+
+if __name__ == "__main__":
+    main()
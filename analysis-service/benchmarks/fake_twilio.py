@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Twilio Messages API
+
+Accepts POST /2010-04-01/Accounts/{sid}/Messages.json like Twilio does
+(form fields From, To, Body; 201 with a message SID), adds a fixed latency,
+answers 429 with Retry-After when a sender exceeds its per-second limit and
+fails a share of requests with 503. Counts messages per (To, Body) so
+duplicate deliveries can be checked.
+
+Point the service at it with TWILIO_API_BASE_URL=http://127.0.0.1:8099
+(any TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN).
+
+Usage:
+    python benchmarks/fake_twilio.py --port 8099 --latency 0.2 --sender-rate 50 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from urllib.parse import parse_qsl
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+def create_fake_twilio(latency: float = 0.2, sender_rate: float = 50, error_rate: float = 0.0, seed: int = 0) -> FastAPI:
+    """
+    Build the fake Messages API
+
+    Args:
+        latency: Seconds each request takes
+        sender_rate: Messages per second accepted per From number before 429s
+        error_rate: Share of requests failed with 503
+        seed: Random seed for the injected errors
+
+    Returns:
+        FastAPI app; ``app.state.deliveries`` counts accepted (To, Body) pairs
+    """
+    app = FastAPI(title="Fake Twilio")
+    app.state.deliveries = Counter()
+    app.state.responses = Counter()
+    rng = random.Random(seed)
+    windows = defaultdict(lambda: [0.0, 0])  # From -> [window start, count]
+
+    @app.post("/2010-04-01/Accounts/{account_sid}/Messages.json")
+    async def create_message(account_sid: str, request: Request):
+        form = dict(parse_qsl((await request.body()).decode()))
+        await asyncio.sleep(latency)
+
+        window = windows[form["From"]]
+        now = time.monotonic()
+        if now - window[0] >= 1:
+            window[0], window[1] = now, 0
+        if window[1] >= sender_rate:
+            app.state.responses[429] += 1
+            return JSONResponse({"code": 20429, "message": "Too Many Requests"}, status_code=429,
+                                headers={"Retry-After": "1"})
+        window[1] += 1
+
+        if rng.random() < error_rate:
+            app.state.responses[503] += 1
+            return JSONResponse({"code": 20503, "message": "Service Unavailable"}, status_code=503)
+
+        app.state.responses[201] += 1
+        app.state.deliveries[(form["To"], form["Body"])] += 1
+        return JSONResponse({
+            "sid": "SM" + uuid.uuid4().hex,
+            "account_sid": account_sid,
+            "from": form["From"],
+            "to": form["To"],
+            "status": "queued"
+        }, status_code=201)
+
+    return app
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a local fake Twilio Messages API")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--sender-rate", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    uvicorn.run(create_fake_twilio(args.latency, args.sender_rate, args.error_rate), port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Soak test: thread count and RSS over many /forecast requests
+
+Drives the app in-process through the lifespan (so the application-scoped
+engine, data processor and executor are used) and samples the live thread
+count and resident set size at regular intervals. Thread count must stay
+flat; RSS should level off once caches are full.
+
+Usage:
+    python benchmarks/soak_forecast.py --requests 10000 --sample-every 1000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+import main
+
+def rss_mib() -> float:
+    """Current resident set size in MiB (Linux /proc, falls back to peak RSS)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def make_request(i: int, history: int, products: int) -> dict:
+    """A small SMA/WMA forecast for one of `products` products"""
+    rng = np.random.default_rng(i)
+    return {
+        "product_id": f"soak_{i % products}",
+        "days": 7,
+        "models": ["SMA", "WMA"],
+        "historical_data": {
+            "dates": [f"2024-{1 + d // 28:02d}-{1 + d % 28:02d}" for d in range(history)],
+            "quantities": (100 + rng.normal(0, 5, history)).round(2).tolist(),
+            "prices": (25 + rng.normal(0, 1, history)).round(2).tolist()
+        }
+    }
+
+def main_soak():
+    parser = argparse.ArgumentParser(description="Soak test /forecast for thread and memory leaks")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--sample-every", type=int, default=1000)
+    parser.add_argument("--history", type=int, default=56)
+    parser.add_argument("--products", type=int, default=50)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    bodies = [make_request(i, args.history, args.products) for i in range(args.products * 2)]
+    samples = []
+
+    with TestClient(main.app) as client:
+        # Warm-up so one-off allocations are not counted as growth
+        client.post("/forecast", json=bodies[0]).raise_for_status()
+        start = time.perf_counter()
+        samples.append((0, threading.active_count(), rss_mib()))
+
+        for i in range(1, args.requests + 1):
+            response = client.post("/forecast", json=bodies[i % len(bodies)])
+            if response.status_code != 200:
+                raise SystemExit(f"Request {i} failed: {response.status_code} {response.text}")
+            if i % args.sample_every == 0:
+                samples.append((i, threading.active_count(), rss_mib()))
+
+        elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} requests in {elapsed:.1f}s ({args.requests / elapsed:.0f} req/s)")
+    print(f"{'requests':>9} {'threads':>8} {'rss MiB':>9}")
+    for count, threads, rss in samples:
+        print(f"{count:>9} {threads:>8} {rss:>9.1f}")
+
+    thread_counts = {threads for _, threads, _ in samples}
+    print(f"thread count range: {min(thread_counts)}-{max(thread_counts)}")
+    print(f"rss growth after first sample: {samples[-1][2] - samples[1][2] if len(samples) > 1 else 0.0:+.1f} MiB")
+    print(f"threads after shutdown: {threading.active_count()}")
+
+if __name__ == "__main__":
+    main_soak()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Road Graph Builder for Pukpuk
+Converts a road network edge list (e.g. exported from an OSM extract) into the
+CSR .npz file loaded by DISTANCE_PROVIDER=road_network.
+
+Input CSVs:
+    nodes: id, lat, lng
+    edges: from, to, length_m, speed_kmh (optional, default 30), oneway (optional, default true)
+
+Usage:
+    python build_road_graph.py --nodes nodes.csv --edges edges.csv --out data/road_graph.npz
+    python build_road_graph.py --synthetic --out data/road_graph.npz
+"""
+
+import argparse
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from models.road_network import RoadGraph, synthetic_road_graph
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPEED_KMH = 30.0  # Streets without a speed
+
+def graph_from_csv(nodes_path: str, edges_path: str) -> RoadGraph:
+    """
+    Build a road graph from node and edge CSVs
+
+    Args:
+        nodes_path: CSV with id, lat, lng columns
+        edges_path: CSV with from, to, length_m and optional speed_kmh, oneway columns
+
+    Returns:
+        RoadGraph
+    """
+    nodes = pd.read_csv(nodes_path)
+    edges = pd.read_csv(edges_path)
+
+    position = pd.Series(np.arange(len(nodes)), index=nodes["id"])
+    tails = position.reindex(edges["from"]).to_numpy()
+    heads = position.reindex(edges["to"]).to_numpy()
+    known = ~(np.isnan(tails) | np.isnan(heads))
+    if not known.all():
+        logger.warning(f"Dropping {int((~known).sum())} edges with unknown nodes")
+    edges = edges[known]
+    tails, heads = tails[known].astype(np.int64), heads[known].astype(np.int64)
+
+    meters = edges["length_m"].to_numpy(dtype=np.float64)
+    speed = edges["speed_kmh"].fillna(DEFAULT_SPEED_KMH).to_numpy(dtype=np.float64) \
+        if "speed_kmh" in edges else np.full(len(edges), DEFAULT_SPEED_KMH)
+    seconds = meters * 3.6 / speed
+    # Two-way streets contribute an edge in each direction
+    two_way = ~edges["oneway"].fillna(True).astype(bool).to_numpy() \
+        if "oneway" in edges else np.zeros(len(edges), dtype=bool)
+
+    return RoadGraph.from_edges(
+        nodes["lat"].to_numpy(), nodes["lng"].to_numpy(),
+        tails=np.concatenate([tails, heads[two_way]]),
+        heads=np.concatenate([heads, tails[two_way]]),
+        meters=np.concatenate([meters, meters[two_way]]),
+        seconds=np.concatenate([seconds, seconds[two_way]])
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the road graph for road network distances")
+    parser.add_argument("--nodes", help="Node CSV (id, lat, lng)")
+    parser.add_argument("--edges", help="Edge CSV (from, to, length_m, speed_kmh, oneway)")
+    parser.add_argument("--synthetic", action="store_true", help="Write the built-in grid test city instead")
+    parser.add_argument("--out", default="data/road_graph.npz")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        graph = synthetic_road_graph()
+    elif args.nodes and args.edges:
+        graph = graph_from_csv(args.nodes, args.edges)
+    else:
+        parser.error("--nodes and --edges, or --synthetic, are required")
+
+    if os.path.dirname(args.out):
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    graph.save(args.out)
+    logger.info(f"Wrote {args.out}: {graph.node_count} nodes, {graph.edge_count} edges "
+                f"({os.path.getsize(args.out) / 1e6:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
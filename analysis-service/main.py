@@ -3,25 +3,52 @@ Pukpuk Analysis Service
 A FastAPI-based service for agricultural demand forecasting using multiple ML models.
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from fastapi.openapi.utils import get_openapi
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple, Union
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from urllib.parse import parse_qsl
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
 import logging
 import os
+import queue
 from contextlib import asynccontextmanager
 
 # Import our custom modules
 from models.forecast_models import ForecastEngine
+from models.model_cache import get_model_cache
+from models.executor import ForecastExecutor, init_executor, get_executor, shutdown_executor
+from models.model_registry import get_model_registry
+from models.warmup import ModelWarmup, warm_up_models
 from models.data_processor import DataProcessor
-from models.routing_optimizer import RouteOptimizer
-from models.compliance_monitor import ComplianceMonitor
+from models.routing_optimizer import Location, RouteOptimizer, RouteResult, UnassignedStopsError, Vehicle, solve_routes
+from models.distance_cache import get_distance_cache
+from models.ndvi_store import get_ndvi_store
+from models.distance_provider import get_distance_provider
+from models.route_decomposition import resolve_decomposition, shutdown_cluster_pool
+from models.route_cache import RoutePlanKey, SearchBudget, get_route_cache, make_plan_key
+from models.compliance_monitor import verification_message
+from models.chat_parser import get_chat_parser
+from models.het_table import get_het_table
+from models.whatsapp_dispatch import DispatchQueueFull, WhatsAppDispatcher, transaction_idempotency_key
+from models.verification_tracker import VerificationTracker, get_verification_tracker
+from models.violation_detector import ViolationDetector, get_violation_detector
 from utils.config import settings
 from utils.logger import setup_logger
+from utils.columnar_codec import (
+    BINARY_MEDIA_TYPES, JSON_MEDIA_TYPE, CodecError, FrameEncoder,
+    decode_frames, encode_frames, media_type, negotiate
+)
 
 # Setup logging
 logger = setup_logger(__name__)
@@ -32,8 +59,69 @@ async def lifespan(app: FastAPI):
     # Startup
     try:
         logger.info("Starting Pukpuk Analysis Service")
-        # Test forecast engine initialization
-        engine = ForecastEngine()
+        # Application-scoped services shared by every request: one model-fitting
+        # pool, one forecast engine (and its fitted-model cache) and one data processor
+        # Process workers run the model warm-up as they start, before any task
+        warm_workers = settings.WARMUP_MODE != "off"
+        executor = init_executor(
+            initializer=warm_up_models if warm_workers else None,
+            initargs=(settings.WARMUP_MODELS,) if warm_workers else ()
+        )
+        app.state.forecast_engine = ForecastEngine(executor=executor)
+        app.state.data_processor = DataProcessor()
+        app.state.route_executor = ForecastExecutor(
+            backend=settings.ROUTE_EXECUTOR_BACKEND,
+            max_workers=settings.ROUTE_MAX_WORKERS,
+            name="route"
+        )
+        # Compliance verifications go out through a background WhatsApp queue;
+        # replies come back on the webhook and resolve tracked verifications
+        app.state.whatsapp_dispatcher = None
+        app.state.verification_tracker = None
+        # Checked transactions and replies stream into per-kiosk violation windows
+        detector = get_violation_detector()
+        detector.start()
+        app.state.violation_detector = detector
+        if settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN:
+            tracker = get_verification_tracker()
+            tracker.on_resolve = detector.observe_verification
+            tracker.start_sweeper()
+            app.state.verification_tracker = tracker
+            app.state.whatsapp_dispatcher = WhatsAppDispatcher(
+                account_sid=settings.TWILIO_ACCOUNT_SID,
+                auth_token=settings.TWILIO_AUTH_TOKEN,
+                sender=settings.TWILIO_WHATSAPP_NUMBER,
+                base_url=settings.TWILIO_API_BASE_URL,
+                max_connections=settings.WHATSAPP_MAX_CONNECTIONS,
+                rate_per_second=settings.WHATSAPP_RATE_PER_SECOND,
+                burst=settings.WHATSAPP_BURST,
+                batch_size=settings.WHATSAPP_BATCH_SIZE,
+                max_attempts=settings.WHATSAPP_MAX_ATTEMPTS,
+                retry_base_seconds=settings.WHATSAPP_RETRY_BASE_SECONDS,
+                queue_size=settings.WHATSAPP_QUEUE_SIZE,
+                job_ttl_seconds=settings.WHATSAPP_JOB_TTL_SECONDS,
+                on_failure=lambda job: tracker.cancel(job.job_id)
+            )
+            app.state.whatsapp_dispatcher.start()
+        else:
+            logger.warning("Twilio not configured - compliance verifications will not be sent")
+        # HET prices for compliance checks, reloaded when the table file changes
+        get_het_table().start_watcher()
+        # Load pretrained CatBoost artifacts and watch for new versions
+        if settings.MODEL_REGISTRY_ENABLED:
+            get_model_registry().start_watcher()
+        # Drop route locations nobody has asked for within the TTL
+        if settings.DISTANCE_CACHE_ENABLED:
+            get_distance_cache().evict_stale()
+        # Import heavy model libraries before the first request needs them
+        warmup = ModelWarmup(executor=executor)
+        app.state.warmup = warmup
+        if settings.WARMUP_MODE == "eager":
+            await asyncio.to_thread(warmup.run)
+        elif settings.WARMUP_MODE == "background":
+            warmup.start()
+        else:
+            warmup.disable()
         logger.info("Forecast engine initialized successfully")
         yield
     except Exception as e:
@@ -45,6 +133,35 @@ async def lifespan(app: FastAPI):
         yield
     finally:
         # Shutdown
+        get_het_table().stop_watcher()
+        if settings.MODEL_REGISTRY_ENABLED:
+            get_model_registry().stop_watcher()
+        if settings.DISTANCE_CACHE_ENABLED:
+            get_distance_cache().flush()
+        if settings.NDVI_STORE_ENABLED:
+            get_ndvi_store().flush()
+        app.state.forecast_engine = None
+        app.state.data_processor = None
+        route_executor = getattr(app.state, "route_executor", None)
+        if route_executor is not None:
+            # Don't wait out a running search; its worker exits when it finishes
+            route_executor.shutdown(wait=False)
+            app.state.route_executor = None
+        # Cluster workers started in this process (thread or inline route backend)
+        shutdown_cluster_pool()
+        whatsapp_dispatcher = getattr(app.state, "whatsapp_dispatcher", None)
+        if whatsapp_dispatcher is not None:
+            await whatsapp_dispatcher.stop()
+            app.state.whatsapp_dispatcher = None
+        verification_tracker = getattr(app.state, "verification_tracker", None)
+        if verification_tracker is not None:
+            verification_tracker.stop_sweeper()
+            app.state.verification_tracker = None
+        violation_detector = getattr(app.state, "violation_detector", None)
+        if violation_detector is not None:
+            violation_detector.stop()
+            app.state.violation_detector = None
+        shutdown_executor()
         logger.info("Shutting down Pukpuk Analysis Service")
 
 # Create FastAPI app
@@ -76,9 +193,24 @@ class DemandData(BaseModel):
     quantity: float = Field(..., gt=0, description="Demand quantity")
     price: float = Field(..., gt=0, description="Price per unit")
 
-class ForecastRequest(BaseModel):
+class HistoricalSeries(BaseModel):
+    """Columnar historical data, cheaper to validate and ingest than one object per row"""
+    dates: List[str] = Field(..., description="ISO date strings")
+    quantities: List[float] = Field(..., description="Demand quantities")
+    prices: List[float] = Field(..., description="Prices per unit")
+
+    @model_validator(mode="after")
+    def check_lengths(self) -> "HistoricalSeries":
+        if not len(self.dates) == len(self.quantities) == len(self.prices):
+            raise ValueError("dates, quantities and prices must have the same length")
+        return self
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+class ForecastOptions(BaseModel):
+    """Per-product forecast parameters shared by JSON and binary requests"""
     product_id: str = Field(..., description="Product identifier")
-    historical_data: List[DemandData] = Field(..., min_items=3, description="Historical demand data")
     days: int = Field(..., ge=1, le=365, description="Forecast horizon in days")
     selling_price: Optional[float] = Field(None, gt=0, description="Selling price for revenue calculation")
     date_from: Optional[str] = Field(None, description="Start date for historical data filter")
@@ -88,6 +220,21 @@ class ForecastRequest(BaseModel):
     scenario: Optional[str] = Field("realistic", description="Forecast scenario")
     location: Optional[Dict[str, float]] = Field(None, description="Location coordinates {'lat': float, 'lng': float} for NDVI data")
 
+class ForecastRequest(ForecastOptions):
+    historical_data: Union[List[DemandData], HistoricalSeries] = Field(
+        ...,
+        min_items=3,
+        description="Historical demand data as rows or as {dates, quantities, prices} arrays"
+    )
+
+class BatchForecastRequest(BaseModel):
+    items: List[ForecastRequest] = Field(
+        ...,
+        min_items=1,
+        max_items=settings.MAX_BATCH_ITEMS,
+        description="Per-product forecast requests"
+    )
+
 class ForecastDataPoint(BaseModel):
     date: str = Field(..., description="Forecast date")
     predicted_value: float = Field(..., description="Predicted demand/price")
@@ -112,12 +259,70 @@ class ForecastResponse(BaseModel):
     scenario: Optional[str] = Field(None, description="Forecast scenario used")
     metadata: Dict[str, Any] = Field(..., description="Additional forecast metadata")
 
+class TimeWindow(BaseModel):
+    start: str = Field(..., description="Opening time 'HH:MM'")
+    end: str = Field(..., description="Closing time 'HH:MM'")
+
+    @model_validator(mode="after")
+    def check_times(self) -> "TimeWindow":
+        opens, closes = self.times()
+        if closes <= opens:
+            raise ValueError(f"time window closes ({self.end}) before it opens ({self.start})")
+        return self
+
+    def times(self) -> Tuple[Any, Any]:
+        """Opening and closing times of day"""
+        return datetime.strptime(self.start, "%H:%M").time(), datetime.strptime(self.end, "%H:%M").time()
+
+class Warehouse(BaseModel):
+    id: str = Field(..., description="Warehouse identifier")
+    coordinates: Dict[str, float] = Field(..., description="Coordinates {'lat': float, 'lng': float}")
+    time_window: Optional[TimeWindow] = Field(None, description="Opening hours; vehicles leave and return within them")
+    service_minutes: float = Field(0, ge=0, description="Loading time before departure")
+
+class FleetVehicle(BaseModel):
+    capacity: float = Field(..., gt=0, description="Vehicle capacity in tons")
+    count: int = Field(1, ge=1, description="Number of identical vehicles of this type")
+    start_warehouse: Optional[str] = Field(None, description="Start warehouse id (defaults to the first warehouse)")
+    end_warehouse: Optional[str] = Field(None, description="End warehouse id (defaults to the start warehouse)")
+    cost_per_km: float = Field(1000, ge=0, description="Running cost in IDR per km")
+    fixed_cost: float = Field(0, ge=0, description="Cost in IDR when the vehicle is used")
+
 class RouteOptimizationRequest(BaseModel):
-    warehouse_location: Dict[str, float] = Field(..., description="Warehouse coordinates {'lat': float, 'lng': float}")
-    delivery_points: List[Dict[str, Any]] = Field(..., description="List of delivery points with coordinates and demands")
-    vehicle_capacity: float = Field(..., description="Vehicle capacity in tons")
+    warehouse_location: Optional[Dict[str, float]] = Field(None, description="Warehouse coordinates {'lat': float, 'lng': float}")
+    warehouses: Optional[List[Warehouse]] = Field(None, description="Multiple warehouses (replaces warehouse_location)")
+    delivery_points: List[Dict[str, Any]] = Field(
+        ..., description="Delivery points with coordinates, demand, optional service_minutes and time_window {'start', 'end'}"
+    )
+    vehicle_capacity: Optional[float] = Field(None, description="Vehicle capacity in tons")
     vehicle_count: int = Field(1, description="Number of vehicles available")
+    vehicles: Optional[List[FleetVehicle]] = Field(None, description="Mixed fleet (replaces vehicle_capacity and vehicle_count)")
+    start_time: Optional[datetime] = Field(None, description="Plan start (defaults to today at ROUTE_DEFAULT_START_TIME)")
     optimization_goal: str = Field("distance", description="Optimization goal: 'distance', 'time', 'cost', 'emissions'")
+    time_limit_seconds: Optional[float] = Field(
+        None, gt=0, le=settings.ROUTE_MAX_TIME_LIMIT_SECONDS,
+        description="Search time budget in seconds (defaults to ROUTE_TIME_LIMIT_SECONDS)"
+    )
+    solution_limit: Optional[int] = Field(None, ge=1, description="Stop the search after this many solutions")
+    decomposition: Optional[str] = Field(
+        None, description="Large-instance mode: 'none', 'auto', 'sweep' or 'kmeans' (defaults to ROUTE_DECOMPOSITION)"
+    )
+
+    @model_validator(mode="after")
+    def check_fleet(self) -> "RouteOptimizationRequest":
+        if self.warehouse_location is None and not self.warehouses:
+            raise ValueError("warehouse_location or warehouses is required")
+        if self.vehicle_capacity is None and not self.vehicles:
+            raise ValueError("vehicle_capacity or vehicles is required")
+        warehouse_ids = {w.id for w in self.warehouses} if self.warehouses else {"warehouse"}
+        for vehicle in self.vehicles or []:
+            for warehouse_id in (vehicle.start_warehouse, vehicle.end_warehouse):
+                if warehouse_id is not None and warehouse_id not in warehouse_ids:
+                    raise ValueError(f"unknown warehouse '{warehouse_id}'")
+        for point in self.delivery_points:
+            if point.get("time_window") is not None:
+                TimeWindow.model_validate(point["time_window"])
+        return self
 
 class RouteStop(BaseModel):
     location_id: str = Field(..., description="Location identifier")
@@ -145,57 +350,279 @@ class ComplianceCheckRequest(BaseModel):
     kiosk_id: str = Field(..., description="Kiosk identifier")
     farmer_phone: str = Field(..., description="Farmer's WhatsApp number with country code")
     transaction_details: Dict[str, Any] = Field(..., description="Transaction details")
-    het_price: float = Field(..., description="Maximum retail price (HET)")
+    het_price: Optional[float] = Field(
+        None, description="Maximum retail price (HET); looked up per item from the HET table when omitted"
+    )
+    region: Optional[str] = Field(None, description="Kiosk region for regional HET prices")
+    transaction_date: Optional[str] = Field(None, description="Transaction date (YYYY-MM-DD), default today")
+    idempotency_key: Optional[str] = Field(
+        None,
+        description="Key identifying this verification; defaults to a hash of the kiosk, phone and transaction "
+                    "when the transaction has a transaction_id or timestamp, otherwise every check is new"
+    )
+    response_window_hours: Optional[float] = Field(
+        None, gt=0, description="Hours the farmer has to reply before being flagged (default VERIFICATION_RESPONSE_WINDOW_HOURS)"
+    )
 
 class ComplianceCheckResponse(BaseModel):
     verification_sent: bool = Field(..., description="Whether verification was sent")
     transaction_parsed: bool = Field(..., description="Whether transaction was parsed successfully")
     parsed_transaction: Optional[Dict[str, Any]] = Field(None, description="Parsed transaction data")
-    status: str = Field(..., description="Check status")
+    status: str = Field(..., description="Check status: queued, sending, retrying, sent or failed")
+    job_id: Optional[str] = Field(None, description="Dispatch job id for GET /compliance-check/{job_id}")
+    duplicate: bool = Field(False, description="Whether the idempotency key matched an earlier check")
+
+class DispatchJobResponse(BaseModel):
+    job_id: str = Field(..., description="Dispatch job id")
+    idempotency_key: str = Field(..., description="Key identifying the verification")
+    to: str = Field(..., description="Recipient WhatsApp number")
+    status: str = Field(..., description="queued, sending, retrying, sent or failed")
+    attempts: int = Field(..., description="Send attempts so far")
+    message_sid: Optional[str] = Field(None, description="Twilio message SID once sent")
+    error: Optional[str] = Field(None, description="Last error")
+    created_at: float = Field(..., description="Submission time (unix seconds)")
+    updated_at: float = Field(..., description="Last status change (unix seconds)")
+    verification: Optional[Dict[str, Any]] = Field(
+        None, description="Reply tracking: status (pending, confirmed, violation, no_response, undelivered) and response"
+    )
 
 class ChatParseRequest(BaseModel):
     chat_message: str = Field(..., description="Raw chat message from kiosk")
+    region: Optional[str] = Field(None, description="Kiosk region for HET prices (national when omitted)")
 
 class ChatParseResponse(BaseModel):
     parsed: bool = Field(..., description="Whether parsing was successful")
     transaction_data: Optional[Dict[str, Any]] = Field(None, description="Parsed transaction data")
-    revenue_projection: Optional[List[RevenueProjection]] = Field(None, description="Revenue projections")
-    models_used: List[str] = Field(..., description="Models used in forecasting")
-    summary: str = Field(..., description="AI-generated summary in Markdown")
-    confidence: Optional[float] = Field(None, description="Overall forecast confidence")
-    scenario: Optional[str] = Field(None, description="Applied scenario")
-    metadata: Optional[Dict[str, Any]] = Field(None, description="Additional metadata")
+
+class BatchChatParseRequest(BaseModel):
+    messages: List[str] = Field(
+        ...,
+        min_items=1,
+        max_items=settings.MAX_CHAT_BATCH_MESSAGES,
+        description="Raw chat messages from kiosks"
+    )
+    region: Optional[str] = Field(None, description="Kiosk region for HET prices (national when omitted)")
+
+class PriceCheckItem(BaseModel):
+    name: str = Field(..., description="Product, e.g. UREA")
+    quantity: float = Field(0, description="Quantity sold")
+    unit: str = Field("kg", description="kg or sack")
+    price: float = Field(..., ge=0, description="Price charged per unit (Rp)")
+
+class PriceCheckTransaction(BaseModel):
+    transaction_id: Optional[str] = Field(None, description="Caller's transaction identifier")
+    kiosk_id: str = Field(..., description="Kiosk identifier")
+    region: Optional[str] = Field(None, description="Kiosk region (national HET when omitted)")
+    date: Optional[str] = Field(None, description="Transaction date (YYYY-MM-DD), default today")
+    items: List[PriceCheckItem] = Field(..., min_items=1, description="Items sold")
+
+class PriceCheckRequest(BaseModel):
+    transactions: List[PriceCheckTransaction] = Field(
+        ..., min_items=1, max_items=settings.MAX_CHAT_BATCH_MESSAGES, description="Transactions to check"
+    )
+    tolerance: Optional[float] = Field(None, ge=0, description="Fraction above HET accepted (default HET_TOLERANCE)")
+
+class NDVIObservation(BaseModel):
+    lat: float = Field(..., ge=-90, le=90, description="Latitude")
+    lng: float = Field(..., ge=-180, le=180, description="Longitude")
+    date: str = Field(..., description="Observation date (YYYY-MM-DD)")
+    ndvi: float = Field(..., ge=-1, le=1, description="NDVI value")
+
+class NDVIObservationsRequest(BaseModel):
+    observations: List[NDVIObservation] = Field(
+        ..., min_items=1, max_items=settings.NDVI_MAX_OBSERVATIONS, description="Satellite NDVI observations"
+    )
+
+class ComplianceEventsRequest(BaseModel):
+    events: List[Dict[str, Any]] = Field(
+        ..., min_items=1, max_items=settings.DETECTOR_QUEUE_SIZE,
+        description="Transaction events (kiosk_id, items, region, date) or reply events (type 'reply', kiosk_id, response)"
+    )
+
+class BatchChatParseResponse(BaseModel):
+    results: List[ChatParseResponse] = Field(..., description="One result per message, in request order")
+    parsed_count: int = Field(..., description="Messages with at least one item")
+    failed_count: int = Field(..., description="Messages without a recognizable item")
 
 # Dependency injection
-def get_forecast_engine() -> ForecastEngine:
-    """Dependency injection for forecast engine"""
-    return ForecastEngine()
+def get_forecast_engine(request: Request) -> ForecastEngine:
+    """Dependency injection for the application-scoped forecast engine"""
+    engine = getattr(request.app.state, "forecast_engine", None)
+    if engine is None:
+        raise HTTPException(status_code=503, detail="Forecast engine not initialized")
+    return engine
+
+def get_route_executor(request: Request) -> ForecastExecutor:
+    """Dependency injection for the application-scoped route solver pool"""
+    executor = getattr(request.app.state, "route_executor", None)
+    if executor is None:
+        raise HTTPException(status_code=503, detail="Route solver not initialized")
+    return executor
+
+def get_whatsapp_dispatcher(request: Request) -> Optional[WhatsAppDispatcher]:
+    """Dependency injection for the WhatsApp dispatch queue (None when Twilio is not configured)"""
+    return getattr(request.app.state, "whatsapp_dispatcher", None)
+
+def get_tracker(request: Request) -> Optional[VerificationTracker]:
+    """Dependency injection for the verification reply tracker (None when Twilio is not configured)"""
+    return getattr(request.app.state, "verification_tracker", None)
+
+def get_detector(request: Request) -> Optional[ViolationDetector]:
+    """Dependency injection for the streaming violation detector"""
+    return getattr(request.app.state, "violation_detector", None)
+
+def get_data_processor(request: Request) -> DataProcessor:
+    """Dependency injection for the application-scoped data processor"""
+    processor = getattr(request.app.state, "data_processor", None)
+    if processor is None:
+        raise HTTPException(status_code=503, detail="Data processor not initialized")
+    return processor
+
+# Binary request/response formats
+HISTORY_COLUMNS = {"date": "dates", "quantity": "quantities", "price": "prices"}
+FORECAST_FRAME_SCHEMA = {
+    "date": "timestamp",
+    "predicted_value": "float64",
+    "confidence_lower": "float64",
+    "confidence_upper": "float64",
+    "model_used": "string"
+}
+REQUEST_CONTENT_TYPES = {
+    JSON_MEDIA_TYPE: {},  # Filled with the model schema by custom_openapi
+    **{binary: {"schema": {"type": "string", "format": "binary"}} for binary in BINARY_MEDIA_TYPES}
+}
+
+def _request_validation_error(errors: List[Dict[str, Any]], prefix: Tuple[Any, ...] = ("body",)) -> RequestValidationError:
+    """Build a 422 error with FastAPI's body locations"""
+    return RequestValidationError([{**error, "loc": (*prefix, *error["loc"])} for error in errors])
+
+def _decode_request_frames(body: bytes, content_type: str) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    try:
+        return decode_frames(body, content_type)
+    except CodecError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {content_type} payload: {str(e)}")
+
+def _binary_forecast_request(
+    fields: Dict[str, Any],
+    columns: Dict[str, Any],
+    prefix: Tuple[Any, ...] = ("body",)
+) -> ForecastRequest:
+    """
+    Build a ForecastRequest from a decoded binary frame
 
-def get_data_processor() -> DataProcessor:
-    """Dependency injection for data processor"""
-    return DataProcessor()
+    Scalar fields go through normal validation; the history columns are kept
+    as the decoded NumPy arrays and cleaned by the DataProcessor.
+    """
+    missing = [name for name in HISTORY_COLUMNS if name not in columns]
+    if missing:
+        raise _request_validation_error(
+            [{"type": "missing", "loc": ("historical_data", name), "msg": "Column required", "input": None}
+             for name in missing],
+            prefix
+        )
+    lengths = {len(columns[name]) for name in HISTORY_COLUMNS}
+    if len(lengths) > 1:
+        raise _request_validation_error(
+            [{"type": "value_error", "loc": ("historical_data",), "msg": "Columns must have the same length", "input": None}],
+            prefix
+        )
+    if lengths.pop() < 3:
+        raise _request_validation_error(
+            [{"type": "too_short", "loc": ("historical_data",), "msg": "Need at least 3 data points", "input": None}],
+            prefix
+        )
 
-# API Endpoints
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "service": "analysis-service",
-        "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0"
+    try:
+        options = ForecastOptions.model_validate(fields)
+    except ValidationError as e:
+        raise _request_validation_error(e.errors(include_url=False), prefix)
+
+    history = HistoricalSeries.model_construct(
+        **{key: columns[name] for name, key in HISTORY_COLUMNS.items()}
+    )
+    return ForecastRequest.model_construct(**dict(options), historical_data=history)
+
+async def parse_forecast_request(request: Request) -> ForecastRequest:
+    """Read a forecast request as JSON, Arrow IPC or NumPy frames based on Content-Type"""
+    content_type = media_type(request.headers.get("content-type"))
+    body = await request.body()
+
+    if content_type in BINARY_MEDIA_TYPES:
+        frames = _decode_request_frames(body, content_type)
+        if len(frames) != 1:
+            raise HTTPException(status_code=400, detail=f"Expected one frame, got {len(frames)}")
+        return _binary_forecast_request(*frames[0])
+
+    if content_type != JSON_MEDIA_TYPE:
+        raise HTTPException(status_code=415, detail=f"Unsupported media type '{content_type}'")
+    try:
+        return ForecastRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise _request_validation_error(e.errors(include_url=False))
+
+async def parse_batch_request(request: Request) -> BatchForecastRequest:
+    """Read a batch request; binary payloads carry one frame per item"""
+    content_type = media_type(request.headers.get("content-type"))
+    body = await request.body()
+
+    if content_type in BINARY_MEDIA_TYPES:
+        frames = _decode_request_frames(body, content_type)
+        if not 1 <= len(frames) <= settings.MAX_BATCH_ITEMS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Expected between 1 and {settings.MAX_BATCH_ITEMS} frames, got {len(frames)}"
+            )
+        items = [
+            _binary_forecast_request(fields, columns, prefix=("body", "items", i))
+            for i, (fields, columns) in enumerate(frames)
+        ]
+        return BatchForecastRequest.model_construct(items=items)
+
+    if content_type != JSON_MEDIA_TYPE:
+        raise HTTPException(status_code=415, detail=f"Unsupported media type '{content_type}'")
+    try:
+        return BatchForecastRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise _request_validation_error(e.errors(include_url=False))
+
+def forecast_frame(response: ForecastResponse) -> Tuple[Dict[str, Any], Dict[str, List[Any]]]:
+    """Split a forecast response into scalar fields and forecast columns"""
+    fields = response.model_dump(mode="json", exclude={"forecast_data"})
+    points = response.forecast_data
+    columns = {
+        "date": [point.date for point in points],
+        "predicted_value": [point.predicted_value for point in points],
+        "confidence_lower": [point.confidence_lower for point in points],
+        "confidence_upper": [point.confidence_upper for point in points],
+        "model_used": [point.model_used for point in points]
     }
+    return fields, columns
 
 # API Endpoints
 @app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {
+async def health_check(request: Request):
+    """
+    Health check endpoint
+
+    Returns 503 with status 'warming' until model warm-up has finished, so
+    load balancers hold traffic until the first forecast will be fast. A
+    warm-up that failed reports status 'degraded' with its errors; the
+    service keeps serving, loading model libraries on first use.
+    """
+    warmup = getattr(request.app.state, "warmup", None)
+    body = {
         "status": "healthy",
         "service": "analysis-service",
         "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "warmup": warmup.status() if warmup is not None else {"state": "disabled"}
     }
+    if warmup is not None and not warmup.ready:
+        body["status"] = "warming"
+        return JSONResponse(status_code=503, content=body)
+    if warmup is not None and warmup.degraded:
+        body["status"] = "degraded"
+    return body
 
 # Helper functions for forecast generation
 def validate_historical_data(df: pd.DataFrame) -> None:
@@ -206,14 +633,20 @@ def validate_historical_data(df: pd.DataFrame) -> None:
             detail="Insufficient historical data. Need at least 3 data points."
         )
 
-def prepare_forecast_metadata(request: ForecastRequest, df: pd.DataFrame) -> Dict[str, Any]:
+def prepare_forecast_metadata(
+    request: ForecastRequest,
+    df: pd.DataFrame,
+    forecast_result: Dict[str, Any]
+) -> Dict[str, Any]:
     """Prepare metadata for forecast response"""
     return {
         "data_points": len(df),
         "forecast_horizon": request.days,
         "product_id": request.product_id,
         "generated_at": datetime.utcnow().isoformat(),
-        "scenario": request.scenario
+        "scenario": request.scenario,
+        "fit_modes": forecast_result.get("fit_modes", {}),
+        "model_versions": forecast_result.get("model_versions", {})
     }
 
 def calculate_revenue_if_needed(
@@ -231,71 +664,94 @@ def calculate_revenue_if_needed(
         )
     return None
 
-@app.post("/forecast", response_model=ForecastResponse)
-async def generate_forecast(
+async def run_forecast(
     request: ForecastRequest,
+    forecast_engine: ForecastEngine,
+    data_processor: DataProcessor
+) -> ForecastResponse:
+    """Run the full forecast pipeline for a single product"""
+    # Process and validate data
+    df = data_processor.process_historical_data(request.historical_data)
+    validate_historical_data(df)
+
+    # Fetch NDVI data if location provided
+    if request.location:
+        start_date = df['date'].min().strftime('%Y-%m-%d')
+        end_date = (df['date'].max() + timedelta(days=request.days)).strftime('%Y-%m-%d')
+        ndvi_df = data_processor.fetch_ndvi_data(
+            lat=request.location['lat'],
+            lng=request.location['lng'],
+            start_date=start_date,
+            end_date=end_date
+        )
+        df = data_processor.merge_ndvi_with_demand(df, ndvi_df)
+
+    # Generate forecast
+    forecast_result = await forecast_engine.generate_forecast(
+        df=df,
+        days=request.days,
+        models=request.models or ["ensemble"],
+        include_confidence=request.include_confidence,
+        scenario=request.scenario,
+        series_key=request.product_id,
+        product_id=request.product_id
+    )
+
+    # Calculate revenue projection if needed
+    revenue_projection = calculate_revenue_if_needed(forecast_engine, request, forecast_result, df)
+
+    # Generate AI summary and confidence
+    summary = forecast_engine.generate_summary(
+        forecast_data=forecast_result["forecast_data"],
+        historical_data=df,
+        models_used=forecast_result["models_used"],
+        scenario=request.scenario
+    )
+
+    confidence = forecast_engine.calculate_overall_confidence(
+        forecast_data=forecast_result["forecast_data"]
+    )
+
+    # Prepare response
+    metadata = prepare_forecast_metadata(request, df, forecast_result)
+    return ForecastResponse(
+        forecast_data=forecast_result["forecast_data"],
+        revenue_projection=revenue_projection,
+        models_used=forecast_result["models_used"],
+        summary=summary,
+        confidence=confidence,
+        scenario=request.scenario,
+        metadata=metadata
+    )
+
+@app.post(
+    "/forecast",
+    response_model=ForecastResponse,
+    openapi_extra={"requestBody": {"required": True, "content": REQUEST_CONTENT_TYPES}}
+)
+async def generate_forecast(
+    http_request: Request,
+    request: ForecastRequest = Depends(parse_forecast_request),
     forecast_engine: ForecastEngine = Depends(get_forecast_engine),
     data_processor: DataProcessor = Depends(get_data_processor)
 ):
     """
     Generate demand forecast using ensemble ML models
+
+    Accepts JSON, Arrow IPC stream or NumPy frame bodies (by Content-Type) and
+    answers in the format named by the Accept header, defaulting to JSON.
     """
     try:
         logger.info(f"Generating forecast for product {request.product_id}")
 
-        # Process and validate data
-        df = data_processor.process_historical_data(request.historical_data)
-        validate_historical_data(df)
-
-        # Fetch NDVI data if location provided
-        if request.location:
-            start_date = df['date'].min().strftime('%Y-%m-%d')
-            end_date = (df['date'].max() + timedelta(days=request.days)).strftime('%Y-%m-%d')
-            ndvi_df = data_processor.fetch_ndvi_data(
-                lat=request.location['lat'],
-                lng=request.location['lng'],
-                start_date=start_date,
-                end_date=end_date
-            )
-            df = data_processor.merge_ndvi_with_demand(df, ndvi_df)
-
-        # Generate forecast
-        forecast_result = await forecast_engine.generate_forecast(
-            df=df,
-            days=request.days,
-            models=request.models or ["ensemble"],
-            include_confidence=request.include_confidence,
-            scenario=request.scenario
-        )
-
-        # Calculate revenue projection if needed
-        revenue_projection = calculate_revenue_if_needed(forecast_engine, request, forecast_result, df)
-
-        # Generate AI summary and confidence
-        summary = forecast_engine.generate_summary(
-            forecast_data=forecast_result["forecast_data"],
-            historical_data=df,
-            models_used=forecast_result["models_used"],
-            scenario=request.scenario
-        )
-
-        confidence = forecast_engine.calculate_overall_confidence(
-            forecast_data=forecast_result["forecast_data"]
-        )
-
-        # Prepare response
-        metadata = prepare_forecast_metadata(request, df)
-        response = ForecastResponse(
-            forecast_data=forecast_result["forecast_data"],
-            revenue_projection=revenue_projection,
-            models_used=forecast_result["models_used"],
-            summary=summary,
-            confidence=confidence,
-            scenario=request.scenario,
-            metadata=metadata
-        )
+        response = await run_forecast(request, forecast_engine, data_processor)
 
         logger.info(f"Successfully generated forecast for product {request.product_id}")
+
+        accept = negotiate(http_request.headers.get("accept"))
+        if accept in BINARY_MEDIA_TYPES:
+            content = encode_frames(accept, FORECAST_FRAME_SCHEMA, [forecast_frame(response)])
+            return Response(content=content, media_type=accept)
         return response
 
     except Exception as e:
@@ -305,85 +761,312 @@ async def generate_forecast(
             detail=f"Forecast generation failed: {str(e)}"
         )
 
-@app.post("/optimize-route", response_model=RouteOptimizationResponse)
-async def optimize_delivery_route(request: RouteOptimizationRequest):
-    """Optimize delivery routes using Vehicle Routing Problem solver"""
-    try:
-        logger.info("Starting route optimization")
+@app.post(
+    "/forecast/batch",
+    openapi_extra={"requestBody": {"required": True, "content": REQUEST_CONTENT_TYPES}}
+)
+async def generate_batch_forecast(
+    http_request: Request,
+    request: BatchForecastRequest = Depends(parse_batch_request),
+    forecast_engine: ForecastEngine = Depends(get_forecast_engine),
+    data_processor: DataProcessor = Depends(get_data_processor)
+):
+    """
+    Generate forecasts for many products in one call.
+
+    Every (product, model) fit is scheduled on the engine's bounded worker
+    pool. Results are streamed back as newline-delimited JSON, one line per
+    product, in completion order. With an Arrow or NumPy frame Accept header
+    each product is streamed as one record batch or frame instead.
+    """
+    logger.info(f"Generating batch forecast for {len(request.items)} products")
+
+    async def forecast_item(item: ForecastRequest) -> Dict[str, Any]:
+        try:
+            response = await run_forecast(item, forecast_engine, data_processor)
+            return {
+                "product_id": item.product_id,
+                "status": "success",
+                "forecast": response
+            }
+        except Exception as e:
+            error = getattr(e, "detail", None) or str(e)
+            logger.warning(f"Batch forecast failed for product {item.product_id}: {error}")
+            return {
+                "product_id": item.product_id,
+                "status": "error",
+                "error": error
+            }
 
-        # Initialize route optimizer
-        optimizer = RouteOptimizer()
+    accept = negotiate(http_request.headers.get("accept"))
+    encoder = FrameEncoder(accept, FORECAST_FRAME_SCHEMA) if accept in BINARY_MEDIA_TYPES else None
+
+    def encode_result(result: Dict[str, Any]) -> Union[str, bytes]:
+        forecast = result.pop("forecast", None)
+        if encoder is None:
+            if forecast is not None:
+                result["forecast"] = forecast.model_dump()
+            return json.dumps(result, default=str) + "\n"
+        if forecast is None:
+            return encoder.encode(result, {})
+        fields, columns = forecast_frame(forecast)
+        return encoder.encode({**result, **fields}, columns)
+
+    async def stream_results():
+        tasks = [asyncio.ensure_future(forecast_item(item)) for item in request.items]
+        try:
+            if encoder is not None:
+                yield encoder.start()
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                yield encode_result(result)
+            if encoder is not None:
+                yield encoder.close()
+        finally:
+            # Client disconnected mid-stream: stop scheduling the remaining fits
+            for task in tasks:
+                task.cancel()
+        logger.info(f"Batch forecast completed for {len(request.items)} products")
+
+    media = accept if encoder is not None else "application/x-ndjson"
+    return StreamingResponse(stream_results(), media_type=media)
+
+def route_plan_start(request: RouteOptimizationRequest) -> datetime:
+    """Time that stop times and time windows are measured from"""
+    if request.start_time is not None:
+        return request.start_time
+    start = datetime.strptime(settings.ROUTE_DEFAULT_START_TIME, "%H:%M").time()
+    return datetime.combine(datetime.now().date(), start)
+
+def window_minutes(window: Optional[TimeWindow], plan_start: datetime) -> Optional[Tuple[float, float]]:
+    """Convert a same-day HH:MM window to minutes after the plan start"""
+    if window is None:
+        return None
+    opens, closes = (
+        (datetime.combine(plan_start.date(), t) - plan_start).total_seconds() / 60 for t in window.times()
+    )
+    if closes < 0:
+        raise ValueError(f"time window {window.start}-{window.end} closes before the plan start")
+    return max(opens, 0.0), closes
+
+def route_locations(
+    request: RouteOptimizationRequest,
+    plan_start: datetime
+) -> Tuple[List[Location], List[Location], Optional[List[Vehicle]]]:
+    """
+    Convert request data to warehouse, delivery and vehicle objects
 
-        # Convert request data to Location objects
-        warehouse = Location(
+    Returns:
+        Tuple of (warehouses, delivery points, fleet); the fleet is None for a
+        single warehouse with identical vehicles
+    """
+    if request.warehouses:
+        warehouses = [
+            Location(
+                id=w.id,
+                lat=w.coordinates["lat"],
+                lng=w.coordinates["lng"],
+                demand=0,
+                service_minutes=w.service_minutes,
+                time_window=window_minutes(w.time_window, plan_start)
+            )
+            for w in request.warehouses
+        ]
+    else:
+        warehouses = [Location(
             id="warehouse",
             lat=request.warehouse_location["lat"],
             lng=request.warehouse_location["lng"],
             demand=0
+        )]
+
+    delivery_locations = []
+    for point in request.delivery_points:
+        window = point.get("time_window")
+        delivery_locations.append(Location(
+            id=point.get("id", f"point_{len(delivery_locations)}"),
+            lat=point["coordinates"]["lat"],
+            lng=point["coordinates"]["lng"],
+            demand=point.get("demand", 0),
+            service_minutes=point.get("service_minutes", 0),
+            time_window=window_minutes(TimeWindow.model_validate(window), plan_start) if window else None
+        ))
+
+    if not request.vehicles and len(warehouses) == 1:
+        return warehouses, delivery_locations, None
+
+    by_id = {w.id: w for w in warehouses}
+    vehicles = []
+    if request.vehicles:
+        for spec in request.vehicles:
+            start = by_id[spec.start_warehouse] if spec.start_warehouse else warehouses[0]
+            end = by_id[spec.end_warehouse] if spec.end_warehouse else start
+            for _ in range(spec.count):
+                vehicles.append(Vehicle(
+                    id=len(vehicles),
+                    capacity=spec.capacity,
+                    start_location=start,
+                    end_location=end,
+                    cost_per_km=spec.cost_per_km,
+                    fixed_cost=spec.fixed_cost
+                ))
+    else:
+        # Identical vehicles spread over the warehouses
+        for i in range(request.vehicle_count):
+            vehicles.append(Vehicle(
+                id=i,
+                capacity=request.vehicle_capacity,
+                start_location=warehouses[i % len(warehouses)]
+            ))
+
+    return warehouses, delivery_locations, vehicles
+
+class RouteJob(NamedTuple):
+    """A prepared route request"""
+    arguments: Dict[str, Any]  # solve_routes keyword arguments
+    plan_start: datetime
+    plan_key: Optional[RoutePlanKey]  # None when the route plan cache is disabled
+    budget: SearchBudget
+    cached_routes: Optional[List[RouteResult]]  # Routes of an identical earlier request
+
+async def route_solve_arguments(request: RouteOptimizationRequest) -> RouteJob:
+    """
+    Build the solver task arguments for a route request
+
+    The distance matrix is built here, in the API process, so the distance
+    cache has a single writer however many solver workers run. An identical
+    earlier request searched with at least this request's time and solution
+    limits is answered from the route plan cache without a matrix or a
+    search; a similar one, or an identical one searched for less, seeds the
+    search with its routes.
+
+    Returns:
+        RouteJob
+    """
+    plan_start = route_plan_start(request)
+    warehouses, delivery_locations, vehicles = route_locations(request, plan_start)
+    optimizer = RouteOptimizer(
+        distance_cache=get_distance_cache() if settings.DISTANCE_CACHE_ENABLED else None,
+        distance_provider=get_distance_provider()
+    )
+
+    if vehicles is not None:
+        locations, _, _ = optimizer.fleet_locations(vehicles, delivery_locations)
+        decomposition = None
+    else:
+        locations = warehouses + delivery_locations
+        decomposition = resolve_decomposition(
+            request.decomposition or settings.ROUTE_DECOMPOSITION,
+            len(delivery_locations),
+            settings.ROUTE_DECOMPOSITION_THRESHOLD
         )
 
-        delivery_locations = []
-        for point in request.delivery_points:
-            delivery_locations.append(Location(
-                id=point.get("id", f"point_{len(delivery_locations)}"),
-                lat=point["coordinates"]["lat"],
-                lng=point["coordinates"]["lng"],
-                demand=point.get("demand", 0)
+    budget = SearchBudget(request.time_limit_seconds or settings.ROUTE_TIME_LIMIT_SECONDS, request.solution_limit)
+    plan_key, cached_routes, initial_routes = None, None, None
+    if settings.ROUTE_CACHE_ENABLED:
+        fleet = vehicles or [
+            Vehicle(id=i, capacity=request.vehicle_capacity, start_location=warehouses[0])
+            for i in range(request.vehicle_count)
+        ]
+        plan_key = make_plan_key(fleet, delivery_locations, request.optimization_goal, decomposition)
+        cached_routes = get_route_cache().get(plan_key, budget)
+        if cached_routes is None:
+            initial_routes = get_route_cache().similar(plan_key)
+
+    # Time windows and service times need the travel-time matrix too
+    matrix = None
+    if cached_routes is None:
+        with_time = request.optimization_goal == "time" or optimizer.needs_time_dimension(locations)
+        matrix = await asyncio.to_thread(optimizer.build_matrix, locations, with_time)
+
+    arguments = {
+        "warehouse": warehouses[0],
+        "delivery_points": delivery_locations,
+        "vehicle_capacity": request.vehicle_capacity,
+        "vehicle_count": request.vehicle_count,
+        "optimization_goal": request.optimization_goal,
+        "matrix": matrix,
+        "time_limit_seconds": budget.time_limit_seconds,
+        "solution_limit": budget.solution_limit,
+        "decomposition": decomposition,
+        "cluster_size": settings.ROUTE_CLUSTER_SIZE,
+        "cluster_workers": settings.ROUTE_CLUSTER_WORKERS,
+        "vehicles": vehicles,
+        "initial_routes": initial_routes
+    }
+    return RouteJob(arguments, plan_start, plan_key, budget, cached_routes)
+
+def route_response(routes: List[RouteResult], delivery_count: int, plan_start: datetime) -> RouteOptimizationResponse:
+    """Convert solver routes to the response format"""
+    response_routes = []
+    total_distance = 0
+    total_cost = 0
+    total_emissions = 0
+
+    for route in routes:
+        stops = []
+        for stop, arrival, departure in zip(route.stops, route.arrival_minutes, route.departure_minutes):
+            stops.append(RouteStop(
+                location_id=stop.id,
+                coordinates={"lat": stop.lat, "lng": stop.lng},
+                demand=stop.demand,
+                arrival_time=(plan_start + timedelta(minutes=arrival)).isoformat(timespec="seconds"),
+                departure_time=(plan_start + timedelta(minutes=departure)).isoformat(timespec="seconds")
             ))
 
-        # Optimize routes
-        routes = optimizer.optimize_routes(
-            warehouse=warehouse,
-            delivery_points=delivery_locations,
-            vehicle_capacity=request.vehicle_capacity,
-            vehicle_count=request.vehicle_count,
-            optimization_goal=request.optimization_goal
-        )
+        response_routes.append(Route(
+            vehicle_id=route.vehicle_id,
+            stops=stops,
+            total_distance=round(route.total_distance, 2),
+            total_time=round(route.total_time, 2),
+            total_cost=round(route.total_cost, 2),
+            emissions=round(route.emissions, 2)
+        ))
+
+        total_distance += route.total_distance
+        total_cost += route.total_cost
+        total_emissions += route.emissions
+
+    optimization_summary = f"Optimized {len(response_routes)} routes for {delivery_count} delivery points. " \
+                          f"Total distance: {round(total_distance, 2)} km, " \
+                          f"Total cost: IDR {round(total_cost, 2)}, " \
+                          f"Total emissions: {round(total_emissions, 2)} kg CO2"
+
+    return RouteOptimizationResponse(
+        routes=response_routes,
+        total_distance=round(total_distance, 2),
+        total_cost=round(total_cost, 2),
+        total_emissions=round(total_emissions, 2),
+        optimization_summary=optimization_summary
+    )
 
-        # Convert to response format
-        response_routes = []
-        total_distance = 0
-        total_cost = 0
-        total_emissions = 0
-
-        for route in routes:
-            stops = []
-            for stop in route.stops:
-                stops.append(RouteStop(
-                    location_id=stop.id,
-                    coordinates={"lat": stop.lat, "lng": stop.lng},
-                    demand=stop.demand
-                ))
+@app.post("/optimize-route", response_model=RouteOptimizationResponse)
+async def optimize_delivery_route(
+    request: RouteOptimizationRequest,
+    route_executor: ForecastExecutor = Depends(get_route_executor)
+):
+    """Optimize delivery routes using Vehicle Routing Problem solver"""
+    try:
+        logger.info("Starting route optimization")
 
-            response_routes.append(Route(
-                vehicle_id=route.vehicle_id,
-                stops=stops,
-                total_distance=round(route.total_distance, 2),
-                total_time=round(route.total_time, 2),
-                total_cost=round(route.total_cost, 2),
-                emissions=round(route.emissions, 2)
-            ))
+        job = await route_solve_arguments(request)
 
-            total_distance += route.total_distance
-            total_cost += route.total_cost
-            total_emissions += route.emissions
-
-        optimization_summary = f"Optimized {len(response_routes)} routes for {len(delivery_locations)} delivery points. " \
-                              f"Total distance: {round(total_distance, 2)} km, " \
-                              f"Total cost: IDR {round(total_cost, 2)}, " \
-                              f"Total emissions: {round(total_emissions, 2)} kg CO2"
-
-        response = RouteOptimizationResponse(
-            routes=response_routes,
-            total_distance=round(total_distance, 2),
-            total_cost=round(total_cost, 2),
-            total_emissions=round(total_emissions, 2),
-            optimization_summary=optimization_summary
-        )
+        if job.cached_routes is not None:
+            logger.info("Route plan answered from the cache")
+            routes = job.cached_routes
+        else:
+            # The search runs on the route pool, so other requests keep being served
+            routes = await route_executor.run(solve_routes, **job.arguments)
+            if job.plan_key is not None:
+                get_route_cache().put(job.plan_key, routes, job.budget)
+        response = route_response(routes, len(job.arguments["delivery_points"]), job.plan_start)
 
         logger.info("Route optimization completed successfully")
         return response
 
+    except UnassignedStopsError as e:
+        logger.warning(f"Route optimization left stops unassigned: {str(e)}")
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"Route optimization failed: {str(e)}")
         raise HTTPException(
@@ -391,38 +1074,167 @@ async def optimize_delivery_route(request: RouteOptimizationRequest):
             detail=f"Route optimization failed: {str(e)}"
         )
 
+@app.post("/optimize-route/stream")
+async def stream_route_optimization(
+    request: RouteOptimizationRequest,
+    route_executor: ForecastExecutor = Depends(get_route_executor)
+):
+    """
+    Optimize delivery routes, streaming each improved solution as NDJSON
+
+    Emits a 'solution' line for every improvement found during the search
+    (at most one per ROUTE_STREAM_MIN_INTERVAL_SECONDS, the latest held-back
+    improvement following once it has passed), then a 'final' line
+    with the best routes, or an 'error' line if the solve fails. Closing the
+    connection stops the search at its next solution. A request answered
+    from the route plan cache streams only its 'final' line.
+    """
+    try:
+        job = await route_solve_arguments(request)
+    except Exception as e:
+        logger.error(f"Route optimization failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Route optimization failed: {str(e)}")
+
+    plan_start = job.plan_start
+    delivery_count = len(job.arguments["delivery_points"])
+
+    def line(payload: Dict[str, Any]) -> bytes:
+        return (json.dumps(payload) + "\n").encode()
+
+    if job.cached_routes is not None:
+        final = line({
+            "event": "final",
+            "solutions": 0,
+            "cached": True,
+            **route_response(job.cached_routes, delivery_count, plan_start).model_dump()
+        })
+        return StreamingResponse(iter([final]), media_type="application/x-ndjson")
+
+    events, cancel = route_executor.channel()
+    task = asyncio.ensure_future(route_executor.run(
+        solve_routes,
+        **job.arguments,
+        events=events,
+        cancel=cancel,
+        min_solution_interval=settings.ROUTE_STREAM_MIN_INTERVAL_SECONDS
+    ))
+
+    async def stream_solutions():
+        solution_count = 0
+        try:
+            # Events are queued before the task returns, so an empty queue after it is done is final
+            while not (task.done() and events.empty()):
+                try:
+                    _, routes, objective, elapsed = await asyncio.to_thread(events.get, True, 0.2)
+                except queue.Empty:
+                    continue
+                solution_count += 1
+                yield line({
+                    "event": "solution",
+                    "solution": solution_count,
+                    "objective": objective,
+                    "elapsed_seconds": round(elapsed, 3),
+                    **route_response(routes, delivery_count, plan_start).model_dump()
+                })
+
+            try:
+                routes = await task
+            except Exception as e:
+                logger.error(f"Route optimization failed: {str(e)}")
+                yield line({"event": "error", "detail": f"Route optimization failed: {str(e)}"})
+                return
+            if job.plan_key is not None:
+                get_route_cache().put(job.plan_key, routes, job.budget)
+            yield line({
+                "event": "final",
+                "solutions": solution_count,
+                "cached": False,
+                **route_response(routes, delivery_count, plan_start).model_dump()
+            })
+            logger.info(f"Streamed route optimization completed after {solution_count} improvements")
+        finally:
+            # Client disconnected mid-search: stop at the next solution
+            cancel.set()
+
+    return StreamingResponse(stream_solutions(), media_type="application/x-ndjson")
+
 @app.post("/compliance-check", response_model=ComplianceCheckResponse)
-async def check_compliance(request: ComplianceCheckRequest):
-    """Send compliance verification via WhatsApp"""
+async def check_compliance(
+    request: ComplianceCheckRequest,
+    dispatcher: Optional[WhatsAppDispatcher] = Depends(get_whatsapp_dispatcher),
+    tracker: Optional[VerificationTracker] = Depends(get_tracker),
+    detector: Optional[ViolationDetector] = Depends(get_detector)
+):
+    """Queue a compliance verification via WhatsApp; poll GET /compliance-check/{job_id} for delivery"""
     try:
         logger.info(f"Processing compliance check for kiosk {request.kiosk_id}")
 
-        monitor = ComplianceMonitor()
-
         # Parse transaction if not already parsed
         parsed_transaction = request.transaction_details
         transaction_parsed = True
 
-        # Send verification
-        verification_sent = monitor.send_verification_request(
-            farmer_phone=request.farmer_phone,
-            kiosk_name=request.kiosk_id,
-            transaction_details={
-                **parsed_transaction,
-                'het_price': request.het_price
-            }
+        if dispatcher is None:
+            logger.warning("WhatsApp dispatcher not available - skipping verification")
+            return ComplianceCheckResponse(
+                verification_sent=False,
+                transaction_parsed=transaction_parsed,
+                parsed_transaction=parsed_transaction,
+                status="failed"
+            )
+
+        transaction_details = {**parsed_transaction}
+        if request.het_price is not None:
+            transaction_details['het_price'] = request.het_price
+        else:
+            items = [dict(item, region=request.region, date=request.transaction_date)
+                     for item in transaction_details.get('items', [])]
+            het = get_het_table().check_items(items)["het_price"]
+            transaction_details['items'] = [
+                {**item, 'het_price': None if np.isnan(price) else float(price)}
+                for item, price in zip(transaction_details.get('items', []), het)
+            ]
+        idempotency_key = request.idempotency_key or transaction_idempotency_key(
+            request.kiosk_id, request.farmer_phone, transaction_details
+        )
+        # A failed earlier job is replaced, so it is a retry rather than a duplicate
+        previous = dispatcher.find(idempotency_key)
+        duplicate = previous is not None and previous.status != "failed"
+        job = dispatcher.submit(
+            to=request.farmer_phone,
+            body=verification_message(request.kiosk_id, transaction_details),
+            idempotency_key=idempotency_key
         )
+        if not duplicate and tracker is not None:
+            tracker.register(
+                verification_id=job.job_id,
+                phone=request.farmer_phone,
+                kiosk_id=request.kiosk_id,
+                transaction_details=transaction_details,
+                window_hours=request.response_window_hours or settings.VERIFICATION_RESPONSE_WINDOW_HOURS
+            )
+        if previous is None and detector is not None:  # A retried transaction was already seen
+            detector.submit({
+                "kiosk_id": request.kiosk_id,
+                "transaction_id": job.job_id,
+                "region": request.region,
+                "date": request.transaction_date,
+                **transaction_details
+            })
 
         response = ComplianceCheckResponse(
-            verification_sent=verification_sent,
+            verification_sent=job.status == "sent",
             transaction_parsed=transaction_parsed,
             parsed_transaction=parsed_transaction,
-            status="verification_sent" if verification_sent else "failed"
+            status=job.status,
+            job_id=job.job_id,
+            duplicate=duplicate
         )
 
-        logger.info(f"Compliance check completed: {response.status}")
+        logger.info(f"Compliance check {response.status}: job {job.job_id}")
         return response
 
+    except DispatchQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Compliance check failed: {str(e)}")
         raise HTTPException(
@@ -430,14 +1242,96 @@ async def check_compliance(request: ComplianceCheckRequest):
             detail=f"Compliance check failed: {str(e)}"
         )
 
+@app.get("/compliance-check/{job_id}", response_model=DispatchJobResponse)
+async def compliance_check_status(
+    job_id: str,
+    dispatcher: Optional[WhatsAppDispatcher] = Depends(get_whatsapp_dispatcher),
+    tracker: Optional[VerificationTracker] = Depends(get_tracker)
+):
+    """Delivery status of a queued compliance verification and the farmer's reply"""
+    job = dispatcher.get(job_id) if dispatcher is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown compliance check job: {job_id}")
+    verification = tracker.get(job_id) if tracker is not None else None
+    return DispatchJobResponse(
+        **job.to_dict(),
+        verification={
+            "status": verification.status,
+            "response": verification.response,
+            "expires_at": verification.expires_at,
+            "resolved_at": verification.resolved_at
+        } if verification is not None else None
+    )
+
+@app.get("/compliance/flags")
+async def compliance_flags(limit: int = 100, tracker: Optional[VerificationTracker] = Depends(get_tracker)):
+    """Most recently flagged verifications: price violations (NO replies) and non-responders"""
+    if tracker is None:
+        return {"enabled": False, "flags": []}
+    return {"enabled": True, "flags": [v.to_dict() for v in tracker.flagged_verifications(min(max(limit, 1), 1000))]}
+
+@app.post("/compliance/events", status_code=202)
+async def submit_compliance_events(
+    request: ComplianceEventsRequest,
+    detector: Optional[ViolationDetector] = Depends(get_detector)
+):
+    """Queue kiosk transactions and replies for streaming violation detection"""
+    if detector is None:
+        raise HTTPException(status_code=503, detail="Violation detector not running")
+    accepted = sum(detector.submit(event) for event in request.events)
+    return {"accepted": accepted, "dropped": len(request.events) - accepted}
+
+@app.get("/compliance/violations")
+async def compliance_violations(
+    kiosk_id: Optional[str] = None,
+    limit: int = 100,
+    detector: Optional[ViolationDetector] = Depends(get_detector)
+):
+    """Most recent violations raised by the streaming detector"""
+    if detector is None:
+        return {"enabled": False, "violations": []}
+    violations = detector.violations(kiosk_id, min(max(limit, 1), 1000))
+    return {"enabled": True, "violations": [violation.to_dict() for violation in violations]}
+
+@app.get("/compliance/kiosks/{kiosk_id}")
+async def compliance_kiosk_stats(kiosk_id: str, detector: Optional[ViolationDetector] = Depends(get_detector)):
+    """Rolling price and reply statistics the detector keeps for a kiosk"""
+    stats = detector.kiosk_stats(kiosk_id) if detector is not None else None
+    if stats is None:
+        raise HTTPException(status_code=404, detail=f"No transactions seen for kiosk {kiosk_id}")
+    return {"kiosk_id": kiosk_id, **stats}
+
+def twilio_signature(auth_token: str, url: str, params: List[Tuple[str, str]]) -> str:
+    """Twilio request signature: base64 HMAC-SHA1 of the URL followed by the sorted form fields"""
+    payload = url + "".join(key + value for key, value in sorted(params))
+    digest = hmac.new(auth_token.encode(), payload.encode(), hashlib.sha1).digest()
+    return base64.b64encode(digest).decode()
+
+@app.post("/webhooks/whatsapp")
+async def whatsapp_webhook(request: Request, tracker: Optional[VerificationTracker] = Depends(get_tracker)):
+    """Inbound WhatsApp messages from Twilio; YES/NO replies resolve pending verifications"""
+    params = parse_qsl((await request.body()).decode(), keep_blank_values=True)
+    if settings.TWILIO_WEBHOOK_VALIDATE and settings.TWILIO_AUTH_TOKEN:
+        expected = twilio_signature(settings.TWILIO_AUTH_TOKEN, settings.TWILIO_WEBHOOK_URL or str(request.url), params)
+        if not hmac.compare_digest(expected, request.headers.get("X-Twilio-Signature", "")):
+            raise HTTPException(status_code=403, detail="Invalid Twilio signature")
+
+    form = dict(params)
+    if tracker is not None and form.get("From") and "Body" in form:
+        tracker.record_reply(form["From"], form["Body"])
+    # Empty TwiML: acknowledge without replying to the farmer
+    return Response(content="<?xml version=\"1.0\" encoding=\"UTF-8\"?><Response></Response>",
+                    media_type="application/xml")
+
 @app.post("/parse-chat", response_model=ChatParseResponse)
 async def parse_chat_message(request: ChatParseRequest):
     """Parse transaction details from kiosk chat message"""
     try:
         logger.info("Parsing chat message for transaction data")
 
-        monitor = ComplianceMonitor()
-        transaction_data = monitor.parse_chat_transaction(request.chat_message)
+        transaction_data = get_chat_parser().parse(request.chat_message)
+        if transaction_data is not None:
+            get_het_table().fill_prices(transaction_data["items"], region=request.region)
 
         response = ChatParseResponse(
             parsed=transaction_data is not None,
@@ -454,6 +1348,128 @@ async def parse_chat_message(request: ChatParseRequest):
             detail=f"Chat parsing failed: {str(e)}"
         )
 
+@app.post("/parse-chat/batch", response_model=BatchChatParseResponse)
+async def parse_chat_batch(request: BatchChatParseRequest):
+    """Parse transaction details from many kiosk chat messages in one call"""
+    try:
+        # Parsing is CPU-bound; keep the event loop free for other requests
+        parsed = await asyncio.to_thread(get_chat_parser().parse_many, request.messages)
+        # One vectorized HET lookup for every item in the batch
+        get_het_table().fill_prices(
+            [item for data in parsed if data is not None for item in data["items"]], region=request.region
+        )
+        parsed_count = sum(data is not None for data in parsed)
+        logger.info(f"Batch chat parsing completed: {parsed_count}/{len(parsed)} parsed")
+        return BatchChatParseResponse(
+            results=[ChatParseResponse(parsed=data is not None, transaction_data=data) for data in parsed],
+            parsed_count=parsed_count,
+            failed_count=len(parsed) - parsed_count
+        )
+
+    except Exception as e:
+        logger.error(f"Batch chat parsing failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch chat parsing failed: {str(e)}"
+        )
+
+@app.post("/compliance/price-check")
+async def check_prices(request: PriceCheckRequest, detector: Optional[ViolationDetector] = Depends(get_detector)):
+    """Check charged prices against the HET table for a batch of transactions"""
+    table = get_het_table()
+    if table.snapshot is None:
+        raise HTTPException(status_code=503, detail="HET table not loaded")
+
+    rows = [
+        (t, {"name": item.name, "unit": item.unit, "price": item.price, "region": t.region, "date": t.date})
+        for t in request.transactions for item in t.items
+    ]
+    tolerance = settings.HET_TOLERANCE if request.tolerance is None else request.tolerance
+    try:
+        checked = table.check_items([item for _, item in rows], tolerance=tolerance)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid price check: {str(e)}")
+
+    results, position = [], 0
+    for transaction in request.transactions:
+        end = position + len(transaction.items)
+        het = checked["het_price"][position:end]
+        violation = checked["violation"][position:end]
+        overcharge = checked["overcharge"][position:end]
+        quantities = np.array([item.quantity for item in transaction.items], dtype=np.float64)
+        results.append({
+            "transaction_id": transaction.transaction_id,
+            "kiosk_id": transaction.kiosk_id,
+            "violation": bool(violation.any()),
+            "overcharge_total": float((overcharge * quantities).sum()),
+            "items": [
+                {
+                    "name": item.name,
+                    "unit": item.unit,
+                    "price": item.price,
+                    "het_price": None if np.isnan(h) else float(h),
+                    "violation": bool(v),
+                    "overcharge": float(o)
+                }
+                for item, h, v, o in zip(transaction.items, het, violation, overcharge)
+            ]
+        })
+        position = end
+
+    if detector is not None:
+        for transaction, result in zip(request.transactions, results):
+            detector.submit({
+                "kiosk_id": transaction.kiosk_id,
+                "transaction_id": transaction.transaction_id,
+                "items": result["items"]
+            })
+
+    return {
+        "results": results,
+        "violations": sum(result["violation"] for result in results),
+        "unknown_items": int(np.isnan(checked["het_price"]).sum()),
+        "tolerance": tolerance
+    }
+
+@app.get("/ndvi")
+async def ndvi_series(
+    lat: float,
+    lng: float,
+    start_date: str,
+    end_date: str,
+    data_processor: DataProcessor = Depends(get_data_processor)
+):
+    """Daily NDVI for the grid cell containing a location"""
+    try:
+        if pd.Timestamp(end_date) < pd.Timestamp(start_date):
+            raise ValueError("end_date is before start_date")
+        df_ndvi = data_processor.fetch_ndvi_data(lat, lng, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid NDVI request: {str(e)}")
+    return {
+        "lat": lat,
+        "lng": lng,
+        "dates": df_ndvi['date'].dt.strftime('%Y-%m-%d').tolist(),
+        "ndvi": df_ndvi['ndvi'].tolist(),
+        "sources": df_ndvi['source'].tolist() if 'source' in df_ndvi else []
+    }
+
+@app.post("/ndvi/observations")
+async def ingest_ndvi_observations(request: NDVIObservationsRequest):
+    """Store satellite NDVI observations; they replace synthetic values for their cells and days"""
+    if not settings.NDVI_STORE_ENABLED:
+        raise HTTPException(status_code=503, detail="NDVI store disabled")
+    observations = request.observations
+    try:
+        stored = await asyncio.to_thread(
+            get_ndvi_store().write,
+            [o.lat for o in observations], [o.lng for o in observations],
+            [o.date for o in observations], [o.ndvi for o in observations]
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid NDVI observations: {str(e)}")
+    return {"stored": stored, "skipped": len(observations) - stored}
+
 @app.get("/models")
 async def list_available_models():
     """List all available forecasting models"""
@@ -495,9 +1511,78 @@ async def list_available_models():
                 "description": "Machine learning model",
                 "type": "ml"
             }
-        ]
+        ],
+        "registry": get_model_registry().list_versions() if settings.MODEL_REGISTRY_ENABLED else []
     }
 
+@app.get("/metrics")
+async def service_metrics(request: Request):
+    """
+    Model-fitting and route pool queue depth, busy workers, cache and WhatsApp dispatch counters
+
+    The pools' busy_workers and queue_depth are estimated from in_flight
+    tasks, not read from the pool.
+    """
+    route_executor = getattr(request.app.state, "route_executor", None)
+    whatsapp_dispatcher = getattr(request.app.state, "whatsapp_dispatcher", None)
+    verification_tracker = getattr(request.app.state, "verification_tracker", None)
+    violation_detector = getattr(request.app.state, "violation_detector", None)
+    return {
+        "executor": get_executor().stats(),
+        "route_executor": route_executor.stats() if route_executor is not None else None,
+        "model_cache": model_cache_metrics(),
+        "distance_cache": get_distance_cache().stats() if settings.DISTANCE_CACHE_ENABLED else {"enabled": False},
+        "ndvi_store": get_ndvi_store().stats() if settings.NDVI_STORE_ENABLED else {"enabled": False},
+        "route_cache": get_route_cache().stats() if settings.ROUTE_CACHE_ENABLED else {"enabled": False},
+        "whatsapp_dispatch": whatsapp_dispatcher.stats() if whatsapp_dispatcher is not None else {"enabled": False},
+        "verifications": verification_tracker.stats() if verification_tracker is not None else {"enabled": False},
+        "het_table": get_het_table().stats(),
+        "violation_detector": violation_detector.stats() if violation_detector is not None else {"enabled": False},
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+def model_cache_metrics() -> Dict[str, Any]:
+    """
+    Fitted model cache counters of the API process
+
+    With the process backend each worker fits and caches models in its own
+    memory, which these counters do not include; the response says so.
+    """
+    if not settings.MODEL_CACHE_ENABLED:
+        return {"enabled": False}
+    stats = {"enabled": True, "scope": "api_process", **get_model_cache().stats()}
+    if get_executor().backend == "process":
+        stats["note"] = "forecasts run in worker processes with their own caches; counters cover only the API process"
+    return stats
+
+@app.get("/models/cache")
+async def model_cache_stats():
+    """Fitted model cache hit, miss and eviction counters"""
+    return model_cache_metrics()
+
+def custom_openapi() -> Dict[str, Any]:
+    """OpenAPI schema that also documents request models parsed by dependencies"""
+    if app.openapi_schema:
+        return app.openapi_schema
+    schema = get_openapi(
+        title=app.title,
+        version=app.version,
+        description=app.description,
+        routes=app.routes
+    )
+    components = schema.setdefault("components", {}).setdefault("schemas", {})
+    ref_template = "#/components/schemas/{model}"
+    for path, model in (("/forecast", ForecastRequest), ("/forecast/batch", BatchForecastRequest)):
+        model_schema = model.model_json_schema(ref_template=ref_template)
+        components.update(model_schema.pop("$defs", {}))
+        components[model.__name__] = model_schema
+        content = schema["paths"][path]["post"]["requestBody"]["content"]
+        content[JSON_MEDIA_TYPE] = {"schema": {"$ref": ref_template.format(model=model.__name__)}}
+    app.openapi_schema = schema
+    return schema
+
+app.openapi = custom_openapi
+
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
@@ -0,0 +1,218 @@
+"""
+Compiled parser for kiosk chat transaction reports
+"""
+
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Product aliases as written in kiosk chats, by canonical product name
+PRODUCT_ALIASES = {
+    "UREA": ["urea", "pupuk urea"],
+    "NPK": ["npk", "pupuk npk", "npk phonska", "phonska"],
+    "SP36": ["sp36", "sp-36", "sp 36"],
+    "ZA": ["za", "pupuk za"]
+}
+
+# Unit words by the unit reported for an item
+UNIT_ALIASES = {
+    "sack": ["sack", "sacks", "sak", "zak", "karung", "bag", "bags"],
+    "kg": ["kg", "kgs", "kilo", "kilos", "kilogram", "kilograms"]
+}
+
+# Clause separators: each clause is paired on its own ("3 sacks of urea and 5 NPK")
+SEPARATORS = [",", ";", "\n", "+", "&", "and", "dan", "serta"]
+
+BUYER_TITLES = {"mr": "Mr.", "mrs": "Mrs.", "ms": "Ms.", "pak": "Pak", "bapak": "Bapak", "bu": "Bu", "ibu": "Ibu"}
+
+# One pass over the lowercased message: words (letters then letters/digits, so
+# 'sp36' stays whole), hyphen-joined digit groups (fertilizer grades such as
+# '15-15-15'), quantities with decimal or thousands separators, and separator
+# symbols; everything else (spaces, '-', ':', '.') is skipped
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9]*|\d+(?:-\d+)+|\d+(?:[.,]\d+)*|[,;\n+&]")
+
+class ChatTransactionParser:
+    """
+    Parses transaction items and the buyer from kiosk chat messages
+
+    The lowercased message is tokenized once by a single precompiled
+    alternation regex (words, quantities, separator symbols). Tokens are
+    classified with dictionary lookups: product aliases of one or more words
+    ('pupuk urea', 'sp-36') are matched longest first, and units, separators
+    and buyer titles by vocabulary. Tokens are grouped into clauses. In each
+    clause, quantities are paired with product mentions in order when their
+    counts match. Otherwise each product takes the closest unused quantity
+    before it that has a unit ("10 sak NPK"), or else the nearest unused
+    quantity. A unit directly after a quantity belongs to that item. Without
+    one, the item uses the clause's unit, then the message's unit, then kg.
+    Hyphen-joined digit groups right after a product are its grade
+    ("NPK 15-15-15") and are not quantities. Quantities accept decimal commas
+    ("2,5"), thousands dots ("1.000") and both together ("1,000.50").
+    """
+
+    def __init__(self, product_aliases: Dict[str, List[str]] = PRODUCT_ALIASES,
+                 unit_aliases: Dict[str, List[str]] = UNIT_ALIASES):
+        # Single tokens map straight to their kind; multi-word product aliases
+        # are indexed by their first token, longest first
+        self.vocabulary: Dict[str, Tuple[str, Any]] = {}
+        for unit, aliases in unit_aliases.items():
+            self.vocabulary.update((alias, ("unit", unit)) for alias in aliases)
+        self.vocabulary.update((separator, ("separator", None)) for separator in SEPARATORS)
+        self.vocabulary.update((title, ("title", label)) for title, label in BUYER_TITLES.items())
+        self.phrases: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        for name, aliases in product_aliases.items():
+            for alias in aliases:
+                words = TOKEN_PATTERN.findall(alias.lower())
+                if len(words) == 1:
+                    self.vocabulary[words[0]] = ("product", name)
+                else:
+                    self.phrases.setdefault(words[0], []).append((tuple(words[1:]), name))
+        for phrases in self.phrases.values():
+            phrases.sort(key=lambda phrase: len(phrase[0]), reverse=True)
+
+    @staticmethod
+    def parse_quantity(text: str) -> float:
+        """'3' -> 3, '2,5' -> 2.5, '1.000' -> 1000, '1,000.50' / '1.000,50' -> 1000.5"""
+        if text.isdigit():
+            return int(text)
+        if "." in text and "," in text:
+            # Both separators: the last one is the decimal point
+            point = max(text.rfind("."), text.rfind(","))
+            return float(f"{re.sub(r'[.,]', '', text[:point])}.{text[point + 1:]}")
+        groups = re.split(r"[.,]", text)
+        if len(groups) > 1 and all(len(group) == 3 for group in groups[1:]):
+            return int("".join(groups))
+        if len(groups) == 2:
+            return float(f"{groups[0]}.{groups[1]}")
+        return int(groups[0])
+
+    def tokenize(self, message: str) -> Tuple[List[List[Tuple[str, Any]]], Optional[str]]:
+        """
+        Split a message into clauses of (kind, value) tokens
+
+        Returns:
+            Clauses of ('product', name), ('quantity', number) and
+            ('unit', unit) tokens, and the buyer name if one was found
+        """
+        tokens = TOKEN_PATTERN.findall(message.lower())
+        vocabulary, phrases = self.vocabulary, self.phrases
+        clause: List[Tuple[str, Any]] = []
+        clauses = [clause]
+        buyer = None
+        i, count = 0, len(tokens)
+        while i < count:
+            token = tokens[i]
+            i += 1
+            if token[0].isdigit():
+                if "-" in token:
+                    # A grade right after a product ("npk 15-15-15"); otherwise
+                    # a range ("10-12 sak"), which counts as its first number
+                    if clause and clause[-1][0] == "product":
+                        continue
+                    token = token.split("-", 1)[0]
+                clause.append(("quantity", self.parse_quantity(token)))
+                continue
+            if token in phrases:
+                for rest, name in phrases[token]:
+                    if tuple(tokens[i:i + len(rest)]) == rest:
+                        clause.append(("product", name))
+                        i += len(rest)
+                        break
+                else:
+                    rest = None
+                if rest is not None:
+                    continue
+            entry = vocabulary.get(token)
+            if entry is None:
+                continue
+            kind = entry[0]
+            if kind == "product" or kind == "unit":
+                clause.append(entry)
+            elif kind == "separator":
+                if clause:
+                    clause = []
+                    clauses.append(clause)
+            elif buyer is None and i < count and tokens[i].isalpha():
+                buyer = f"{entry[1]} {tokens[i].title()}"
+                i += 1
+        return clauses, buyer
+
+    def parse_items(self, clauses: List[List[Tuple[str, Any]]]) -> List[Dict[str, Any]]:
+        """Pair quantities and units with product mentions, clause by clause"""
+        message_unit = next((value for clause in clauses for kind, value in clause if kind == "unit"), "kg")
+        items = []
+        for clause in clauses:
+            products, quantities, clause_unit = [], [], None
+            for position, (kind, value) in enumerate(clause):
+                if kind == "product":
+                    products.append(position)
+                elif kind == "quantity":
+                    quantities.append(position)
+                elif clause_unit is None:
+                    clause_unit = value
+            if not products or not quantities:
+                continue
+            clause_unit = clause_unit or message_unit
+
+            if len(products) == len(quantities):
+                pairs = zip(products, quantities)
+            else:
+                pairs, unused = [], set(quantities)
+                for product in products:
+                    if not unused:
+                        break
+                    # A quantity with its unit before the product ("10 sak npk") wins;
+                    # otherwise the nearest, on a tie the one before the product
+                    with_unit = [q for q in unused if q < product and clause[q + 1][0] == "unit"]
+                    if with_unit:
+                        quantity = max(with_unit)
+                    else:
+                        quantity = min(unused, key=lambda q: (abs(q - product), q > product))
+                    unused.discard(quantity)
+                    pairs.append((product, quantity))
+
+            last = len(clause) - 1
+            for product, quantity in pairs:
+                follows = clause[quantity + 1] if quantity < last else None
+                items.append({
+                    "name": clause[product][1],
+                    "quantity": clause[quantity][1],
+                    "unit": follows[1] if follows is not None and follows[0] == "unit" else clause_unit,
+                    "price": 0  # To be filled from HET database
+                })
+        return items
+
+    def parse(self, chat_message: str) -> Optional[Dict[str, Any]]:
+        """
+        Parse transaction details from a kiosk chat message
+
+        Args:
+            chat_message: Raw chat message, e.g. "just sold 3 sacks of Urea and 5 NPK to Mr. Budi"
+
+        Returns:
+            Parsed transaction data or None if no item was found
+        """
+        clauses, buyer = self.tokenize(chat_message)
+        items = self.parse_items(clauses)
+        if not items:
+            return None
+        return {
+            "items": items,
+            "buyer_name": buyer,
+            "timestamp": datetime.utcnow().isoformat(),
+            "raw_message": chat_message
+        }
+
+    def parse_many(self, chat_messages: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Parse a batch of messages; unparseable ones are None"""
+        parse = self.parse
+        return [parse(message) for message in chat_messages]
+
+_chat_parser: Optional[ChatTransactionParser] = None
+
+def get_chat_parser() -> ChatTransactionParser:
+    """Return the shared parser, compiling its pattern on first use"""
+    global _chat_parser
+    if _chat_parser is None:
+        _chat_parser = ChatTransactionParser()
+    return _chat_parser
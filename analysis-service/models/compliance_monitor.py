@@ -7,6 +7,9 @@ from typing import Dict, Any, Optional
 from datetime import datetime
 import os
 
+from models.chat_parser import get_chat_parser
+from models.verification_tracker import get_verification_tracker
+
 # Import Twilio (lazy loading)
 twilio_available = True
 try:
@@ -17,6 +20,37 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+def verification_message(kiosk_name: str, transaction_details: Dict[str, Any]) -> str:
+    """
+    Format the WhatsApp verification text for a transaction
+
+    Args:
+        kiosk_name: Name of the kiosk
+        transaction_details: Details of the transaction (items and het_price)
+
+    Returns:
+        Message body
+    """
+    # Format transaction details
+    items = transaction_details.get('items', [])
+    total_amount = sum(item.get('quantity', 0) * item.get('price', 0) for item in items)
+    # A single HET for the transaction, or per-item HET prices from the HET table
+    het_line = f"\nMaximum Retail Price (HET): Rp{transaction_details['het_price']:,}\n" \
+        if transaction_details.get('het_price') is not None else ""
+
+    return f"""PUKPUK Price Verification
+
+Dear Farmer,
+
+We detected a fertilizer purchase at {kiosk_name} kiosk:
+{chr(10).join([f"- {item.get('quantity', 0)} {item.get('unit', 'kg')} {item.get('name', 'Unknown')} @ Rp{item.get('price', 0):,}/kg" + (f" (HET Rp{item['het_price']:,.0f})" if item.get('het_price') else "") for item in items])}
+
+Total: Rp{total_amount:,}
+{het_line}
+Did you pay according to HET prices?
+
+Reply YES or NO"""
+
 class ComplianceMonitor:
     """Monitor fertilizer price compliance using WhatsApp verification"""
 
@@ -49,24 +83,7 @@ class ComplianceMonitor:
             return False
 
         try:
-            # Format transaction details
-            items = transaction_details.get('items', [])
-            total_amount = sum(item.get('quantity', 0) * item.get('price', 0) for item in items)
-
-            message = f"""PUKPUK Price Verification
-
-Dear Farmer,
-
-We detected a fertilizer purchase at {kiosk_name} kiosk:
-{chr(10).join([f"- {item.get('quantity', 0)} {item.get('unit', 'kg')} {item.get('name', 'Unknown')} @ Rp{item.get('price', 0):,}/kg" for item in items])}
-
-Total: Rp{total_amount:,}
-
-Maximum Retail Price (HET): Rp{transaction_details.get('het_price', 0):,}
-
-Did you pay according to HET prices?
-
-Reply YES or NO"""
+            message = verification_message(kiosk_name, transaction_details)
 
             # Send WhatsApp message
             message_response = self.client.messages.create(
@@ -89,6 +106,9 @@ Reply YES or NO"""
         """
         Check if farmer responded to verification request
 
+        Replies are delivered by the WhatsApp webhook and indexed by phone
+        number, so this is a local lookup rather than a Twilio message listing.
+
         Args:
             farmer_phone: Farmer's phone number
             expected_response_window: Hours to wait for response
@@ -96,31 +116,8 @@ Reply YES or NO"""
         Returns:
             'YES', 'NO', or None if no response
         """
-        if not self.client:
-            return None
-
         try:
-            # Get recent messages from farmer
-            messages = self.client.messages.list(
-                from_=f'whatsapp:{farmer_phone}',
-                to=f'whatsapp:{self.whatsapp_number}',
-                limit=10
-            )
-
-            # Find most recent response
-            for message in messages:
-                # Check if message is recent (within response window)
-                message_time = message.date_sent
-                hours_diff = (datetime.utcnow() - message_time).total_seconds() / 3600
-
-                if hours_diff <= expected_response_window:
-                    response = message.body.strip().upper()
-                    if response in ['YES', 'NO']:
-                        logger.info(f"Verification response from {farmer_phone}: {response}")
-                        return response
-
-            return None
-
+            return get_verification_tracker().latest_response(farmer_phone, expected_response_window)
         except Exception as e:
             logger.error(f"Error checking verification response: {str(e)}")
             return None
@@ -161,62 +158,7 @@ Reply YES or NO"""
             Parsed transaction data or None if parsing failed
         """
         try:
-            # Simple NLP parsing for transaction messages
-            # Expected format: "Reporting admin, just sold X sacks of Urea and Y sacks of NPK to Mr. Budi"
-
-            message = chat_message.lower()
-
-            # Extract quantities and products
-            items = []
-
-            # Look for fertilizer types and quantities
-            fertilizer_patterns = {
-                'urea': ['urea', 'pupuk urea'],
-                'npk': ['npk', 'pupuk npk'],
-                'sp36': ['sp36', 'sp-36'],
-                'za': ['za', 'pupuk za']
-            }
-
-            for fertilizer, patterns in fertilizer_patterns.items():
-                for pattern in patterns:
-                    if pattern in message:
-                        # Try to extract quantity (simple regex would be better in production)
-                        words = message.split()
-                        for i, word in enumerate(words):
-                            if word.isdigit() and i > 0:
-                                try:
-                                    quantity = int(word)
-                                    unit = 'sack' if 'sack' in message else 'kg'
-                                    items.append({
-                                        'name': fertilizer.upper(),
-                                        'quantity': quantity,
-                                        'unit': unit,
-                                        'price': 0  # To be filled from HET database
-                                    })
-                                    break
-                                except ValueError:
-                                    continue
-                        break
-
-            # Extract buyer name
-            buyer_name = None
-            if 'mr.' in message or 'mrs.' in message or 'ms.' in message:
-                # Simple extraction
-                name_start = message.find('mr.') or message.find('mrs.') or message.find('ms.')
-                if name_start != -1:
-                    name_part = message[name_start:].split()[0:2]  # First two words
-                    buyer_name = ' '.join(name_part).title()
-
-            if items:
-                return {
-                    'items': items,
-                    'buyer_name': buyer_name,
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'raw_message': chat_message
-                }
-
-            return None
-
+            return get_chat_parser().parse(chat_message)
         except Exception as e:
             logger.error(f"Error parsing chat transaction: {str(e)}")
-            return None
\ No newline at end of file
+            return None
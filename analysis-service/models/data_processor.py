@@ -4,83 +4,73 @@ Data processing utilities for Pukpuk Analysis Service
 
 import pandas as pd
 import numpy as np
+import warnings
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Mapping, Sequence, Tuple, Union
 import requests
 from utils.logger import setup_logger
 from utils.config import settings
+from models.ndvi_store import get_ndvi_store, grid_cell, synthetic_ndvi, to_day_range
+from models.exogenous import ExogenousSource, join_exogenous
 
 logger = setup_logger(__name__)
 
+# Accepted input layouts for historical demand data
+ROW_KEYS = ('date', 'quantity', 'price')
+COLUMNAR_KEYS = ('dates', 'quantities', 'prices')
+
 class DataProcessor:
     """Handles data processing and validation for forecasting"""
 
     def __init__(self):
         self.logger = logger
 
-    def process_historical_data(self, historical_data: List[Dict[str, Any]]) -> pd.DataFrame:
+    def process_historical_data(self, historical_data: Union[Sequence[Any], Mapping[str, Any], Any]) -> pd.DataFrame:
         """
         Process and validate historical demand data
 
         Args:
-            historical_data: List of demand data points
+            historical_data: Either a list of rows (dicts or Pydantic models with
+                date, quantity and price) or columnar arrays
+                ``{"dates": [...], "quantities": [...], "prices": [...]}``
 
         Returns:
-            Processed pandas DataFrame
+            Processed pandas DataFrame with datetime64 date and float64 value columns
         """
         try:
-            self.logger.info(f"Processing {len(historical_data)} historical data points")
-
-            # Handle Pydantic model instances - convert to dict if needed
-            processed_data = []
-            for i, item in enumerate(historical_data):
-                if hasattr(item, 'model_dump'):  # Pydantic v2
-                    processed_data.append(item.model_dump())
-                    self.logger.info(f"Item {i}: Converted Pydantic v2 model")
-                elif hasattr(item, 'dict'):  # Pydantic v1
-                    processed_data.append(item.dict())
-                    self.logger.info(f"Item {i}: Converted Pydantic v1 model")
-                else:
-                    processed_data.append(item)
-                    self.logger.info(f"Item {i}: Already dict - {type(item)}")
-
-            self.logger.info(f"Processed data sample: {processed_data[0] if processed_data else 'None'}")
-
-            # Convert to DataFrame
-            df = pd.DataFrame(processed_data)
-
-            self.logger.info(f"DataFrame columns: {list(df.columns)}")
-            self.logger.info(f"DataFrame shape: {df.shape}")
-
-            # Validate required columns
-            required_columns = ['date', 'quantity', 'price']
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                self.logger.error(f"Missing columns: {missing_columns}")
-                raise ValueError(f"Missing required columns: {missing_columns}")
-
-            # Convert date column
-            df['date'] = pd.to_datetime(df['date'])
-
-            # Validate data types and ranges
-            df['quantity'] = pd.to_numeric(df['quantity'], errors='coerce')
-            df['price'] = pd.to_numeric(df['price'], errors='coerce')
-
-            # Remove invalid data
-            df = df.dropna(subset=['quantity', 'price'])
-            df = df[df['quantity'] > 0]
-            df = df[df['price'] > 0]
-
-            # Sort by date
-            df = df.sort_values('date').reset_index(drop=True)
-
-            # Remove duplicates based on date
-            df = df.drop_duplicates(subset=['date'], keep='last')
+            dates, quantities, prices = self._extract_columns(historical_data)
+            self.logger.info(f"Processing {len(dates)} historical data points")
+
+            dates = self._to_datetime_array(dates)
+            quantities = self._to_float_array(quantities)
+            prices = self._to_float_array(prices)
+
+            # One validation pass: drop missing dates and non-positive or missing values
+            valid = ~np.isnat(dates) & (quantities > 0) & (prices > 0)
+            if not valid.all():
+                dates, quantities, prices = dates[valid], quantities[valid], prices[valid]
+
+            # Sort by date, keeping the last occurrence of duplicate dates.
+            # Already strictly increasing input (the common case) is left as is.
+            if len(dates) > 1 and not (dates[1:] > dates[:-1]).all():
+                order = np.argsort(dates, kind='stable')
+                dates, quantities, prices = dates[order], quantities[order], prices[order]
+                keep = np.ones(len(dates), dtype=bool)
+                keep[:-1] = dates[1:] != dates[:-1]
+                dates, quantities, prices = dates[keep], quantities[keep], prices[keep]
 
             # Limit data points if too many
-            if len(df) > settings.MAX_DATA_POINTS:
-                self.logger.warning(f"Limiting data from {len(df)} to {settings.MAX_DATA_POINTS} points")
-                df = df.tail(settings.MAX_DATA_POINTS)
+            if len(dates) > settings.MAX_DATA_POINTS:
+                self.logger.warning(f"Limiting data from {len(dates)} to {settings.MAX_DATA_POINTS} points")
+                dates = dates[-settings.MAX_DATA_POINTS:]
+                quantities = quantities[-settings.MAX_DATA_POINTS:]
+                prices = prices[-settings.MAX_DATA_POINTS:]
+
+            # Binary payloads decode to read-only views of the request body; copy
+            # those once here so callers can modify the frame in place
+            columns = [np.array(values) if not values.flags.writeable else values
+                       for values in (dates, quantities, prices)]
+            df = pd.DataFrame(dict(zip(('date', 'quantity', 'price'), columns)), copy=False)
 
             self.logger.info(f"Successfully processed {len(df)} data points")
             return df
@@ -89,6 +79,85 @@ class DataProcessor:
             self.logger.error(f"Data processing failed: {str(e)}")
             raise
 
+    def _extract_columns(self, historical_data: Any) -> Tuple[Sequence[Any], Sequence[Any], Sequence[Any]]:
+        """Split row-wise or columnar input into date, quantity and price sequences"""
+        if all(hasattr(historical_data, col) for col in COLUMNAR_KEYS):  # Columnar Pydantic model
+            historical_data = {col: getattr(historical_data, col) for col in COLUMNAR_KEYS}
+
+        if isinstance(historical_data, Mapping):
+            missing_columns = [col for col in COLUMNAR_KEYS if col not in historical_data]
+            if missing_columns:
+                raise ValueError(f"Missing required columns: {missing_columns}")
+            dates, quantities, prices = (historical_data[col] for col in COLUMNAR_KEYS)
+            if not len(dates) == len(quantities) == len(prices):
+                raise ValueError("dates, quantities and prices must have the same length")
+            return dates, quantities, prices
+
+        rows = list(historical_data)
+        if not rows:
+            return [], [], []
+
+        # Read attributes straight off Pydantic rows instead of dumping each one
+        if hasattr(rows[0], 'model_dump') or hasattr(rows[0], 'dict'):
+            try:
+                return (
+                    [row.date for row in rows],
+                    [row.quantity for row in rows],
+                    [row.price for row in rows]
+                )
+            except AttributeError as e:
+                raise ValueError(f"Missing required columns: {str(e)}")
+
+        missing_columns = [col for col in ROW_KEYS if col not in rows[0]]
+        if missing_columns:
+            raise ValueError(f"Missing required columns: {missing_columns}")
+        try:
+            return (
+                [row['date'] for row in rows],
+                [row['quantity'] for row in rows],
+                [row['price'] for row in rows]
+            )
+        except KeyError as e:
+            raise ValueError(f"Missing required columns: [{str(e)}]")
+
+    def _to_datetime_array(self, values: Sequence[Any]) -> np.ndarray:
+        """
+        Convert dates to datetime64[ns], using NumPy's ISO parser when possible
+
+        Timezone-aware dates are converted to naive UTC. Missing dates become
+        NaT and are dropped later; a date that is present but cannot be
+        parsed raises ValueError.
+        """
+        if isinstance(values, np.ndarray) and values.dtype.kind == 'i' and values.dtype.itemsize == 8:
+            # Epoch nanoseconds from a binary payload: reinterpret without copying
+            return values.view('datetime64[ns]')
+        try:
+            # NumPy parses a timezone suffix ('Z', '+07:00') with a deprecation
+            # warning; leave those strings to pandas instead
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                parsed = np.asarray(values, dtype='datetime64[ns]')
+            if not any('timezone' in str(warning.message) for warning in caught):
+                return parsed
+        except (ValueError, TypeError):
+            pass
+
+        # Non-ISO strings, timezone-aware strings or mixed types: parse each value on its own
+        series = pd.Series(values)
+        parsed = pd.to_datetime(series, format='mixed', errors='coerce', utc=True).dt.tz_localize(None)
+        unparseable = parsed.isna() & series.notna()
+        if unparseable.any():
+            example = series[unparseable].iloc[0]
+            raise ValueError(f"{int(unparseable.sum())} unparseable dates (first: {example!r})")
+        return parsed.to_numpy(dtype='datetime64[ns]')
+
+    def _to_float_array(self, values: Sequence[Any]) -> np.ndarray:
+        """Convert values to float64, coercing unparseable entries to NaN"""
+        try:
+            return np.asarray(values, dtype=np.float64)
+        except (ValueError, TypeError):
+            return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+
     def validate_data_quality(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
         Validate data quality and return metrics
@@ -213,37 +282,22 @@ class DataProcessor:
         try:
             self.logger.info(f"Fetching NDVI data for coordinates ({lat}, {lng}) from {start_date} to {end_date}")
 
-            # In production, this would call a satellite API like:
-            # - NASA MODIS API
-            # - Sentinel Hub API
-            # - Google Earth Engine
-            # For now, we'll generate synthetic NDVI data based on seasonal patterns
-
-            date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-            ndvi_data = []
-
-            for date in date_range:
-                # Simulate NDVI based on Indonesian agricultural seasons
-                # NDVI typically ranges from -1 to 1, with higher values indicating healthier vegetation
-                day_of_year = date.dayofyear
-
-                # Base NDVI with seasonal variation (higher in wet season)
-                base_ndvi = 0.3 + 0.4 * np.sin(2 * np.pi * day_of_year / 365)
-
-                # Add some noise and location-specific variation
-                noise = np.random.normal(0, 0.1)
-                location_factor = (lat - (-6.2)) * 0.01  # Slight variation by latitude
-
-                ndvi_value = np.clip(base_ndvi + noise + location_factor, -1, 1)
-
-                ndvi_data.append({
-                    'date': date,
-                    'ndvi': round(ndvi_value, 4),
+            # In production, satellite values (NASA MODIS, Sentinel Hub, Google
+            # Earth Engine) are written into the NDVI store; days without one
+            # get a synthetic value from Indonesian seasonal patterns. NDVI
+            # ranges from -1 to 1, higher for healthier vegetation.
+            if settings.NDVI_STORE_ENABLED:
+                df_ndvi = get_ndvi_store().frame(lat, lng, start_date, end_date)
+            else:
+                days = to_day_range(start_date, end_date)
+                cell = grid_cell(lat, lng, settings.NDVI_GRID_DEGREES)
+                df_ndvi = pd.DataFrame({
+                    'date': days.astype('datetime64[D]').astype('datetime64[ns]'),
+                    'ndvi': synthetic_ndvi(cell, cell[0] * settings.NDVI_GRID_DEGREES, days),
                     'latitude': lat,
-                    'longitude': lng
+                    'longitude': lng,
+                    'source': 'synthetic'
                 })
-
-            df_ndvi = pd.DataFrame(ndvi_data)
             self.logger.info(f"Generated {len(df_ndvi)} NDVI data points")
             return df_ndvi
 
@@ -268,17 +322,12 @@ class DataProcessor:
 
             # Ensure date columns are datetime
             demand_df['date'] = pd.to_datetime(demand_df['date'])
-            ndvi_df['date'] = pd.to_datetime(ndvi_df['date'])
 
-            # Merge on date
-            merged_df = demand_df.merge(ndvi_df[['date', 'ndvi']], on='date', how='left')
-
-            # Forward fill missing NDVI values (satellite data might not be daily)
-            merged_df['ndvi'] = merged_df['ndvi'].fillna(method='ffill')
-
-            # If still missing, use seasonal average
-            if merged_df['ndvi'].isna().any():
-                merged_df['ndvi'] = merged_df['ndvi'].fillna(merged_df['ndvi'].mean())
+            # Latest NDVI observed on or before each demand date (satellite data
+            # might not be daily); demand dates before the first observation get
+            # the mean NDVI
+            source = ExogenousSource.from_frame('ndvi', ndvi_df, ['ndvi'], direction='backward', fill='mean')
+            merged_df = join_exogenous(demand_df, [source])
 
             self.logger.info(f"Merged data has {len(merged_df)} rows with NDVI data")
             return merged_df
@@ -286,3 +335,24 @@ class DataProcessor:
         except Exception as e:
             self.logger.error(f"NDVI merge failed: {str(e)}")
             return demand_df
+
+    def merge_exogenous(self, demand_df: pd.DataFrame, sources: Sequence[ExogenousSource]) -> pd.DataFrame:
+        """
+        As-of join exogenous series (weather, market prices, economic indicators) onto demand data
+
+        Args:
+            demand_df: Demand data DataFrame with a date column
+            sources: Sources prepared with ExogenousSource.from_frame, each with
+                its own tolerance, direction and fill policy
+
+        Returns:
+            Demand data with every source's columns added
+        """
+        try:
+            merged_df = join_exogenous(demand_df, sources)
+            self.logger.info(f"Joined {len(sources)} exogenous sources onto {len(merged_df)} rows")
+            return merged_df
+
+        except Exception as e:
+            self.logger.error(f"Exogenous join failed: {str(e)}")
+            return demand_df
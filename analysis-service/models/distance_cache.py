@@ -0,0 +1,377 @@
+"""
+Persistent location registry and distance cache for route optimization
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.logger import setup_logger
+from utils.config import settings
+from models.distance_matrix import DEFAULT_SPEED_KMH, DistanceMatrix, meters_to_seconds
+from models.distance_provider import DistanceProvider, HaversineProvider, get_distance_provider
+
+logger = setup_logger(__name__)
+
+@dataclass
+class RegisteredLocation:
+    """A location's slot in the on-disk distance matrix"""
+    row: int
+    lat: float
+    lng: float
+    last_used: float
+
+def location_key(location_id: str, lat: float, lng: float) -> str:
+    """Stable registry key; moving a location gives it a new key"""
+    return f"{location_id}@{lat:.6f},{lng:.6f}"
+
+class DistanceCache:
+    """
+    Pairwise distances for known locations, stored in a memory-mapped matrix
+
+    Every registered location owns one row and column of an int32 meters
+    matrix kept in ``meters.int32`` under ``cache_dir``; the id-to-row map
+    lives in ``locations.json``. A request's matrix is a fancy-index gather
+    of its rows, and only locations not seen before are computed, as one
+    block of rows and columns from the distance provider. Providers with
+    their own travel times get a second matrix, ``seconds.int32``; a cache
+    written by a different provider (or road graph) is rebuilt. The matrix doubles in capacity as locations are
+    added, up to ``max_locations``; beyond that the least recently used
+    locations are evicted and their rows reused. Locations unused for
+    ``ttl_seconds`` are evicted by ``evict_stale``.
+
+    The registry is persisted at most every ``persist_seconds`` (and on
+    ``flush``), except when rows are reused or the matrix grows, which is
+    persisted at once so a stale registry never points at overwritten rows.
+    The cache is meant for a single writer process.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_locations: int = 8192,
+        ttl_seconds: float = 30 * 24 * 3600,
+        initial_capacity: int = 256,
+        persist_seconds: float = 30.0,
+        provider: Optional[DistanceProvider] = None
+    ):
+        self.logger = logger
+        self.cache_dir = cache_dir
+        self.provider = provider or HaversineProvider()
+        self.max_locations = max_locations
+        self.ttl_seconds = ttl_seconds
+        self.persist_seconds = persist_seconds
+        self._dirty = False
+        self._persisted_at = time.time()
+        self._lock = threading.Lock()
+        self._locations: Dict[str, RegisteredLocation] = {}
+        self._free_rows: List[int] = []
+        self._capacity = 0
+        self._meters: Optional[np.memmap] = None
+        self._seconds: Optional[np.memmap] = None
+        # Coordinates by row, so new rows are computed without walking the registry
+        self._row_lats = np.zeros(0)
+        self._row_lngs = np.zeros(0)
+        self._row_used = np.zeros(0, dtype=bool)
+
+        self.location_hits = 0
+        self.location_misses = 0
+        self.pairs_served = 0
+        self.pairs_computed = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load(initial_capacity)
+
+    @property
+    def matrix_path(self) -> str:
+        return os.path.join(self.cache_dir, "meters.int32")
+
+    @property
+    def seconds_path(self) -> str:
+        return os.path.join(self.cache_dir, "seconds.int32")
+
+    @property
+    def registry_path(self) -> str:
+        return os.path.join(self.cache_dir, "locations.json")
+
+    def matrix_for(
+        self,
+        ids: Sequence[str],
+        lats: Sequence[float],
+        lngs: Sequence[float],
+        with_time: bool = False,
+        speed_kmh: float = DEFAULT_SPEED_KMH
+    ) -> DistanceMatrix:
+        """
+        Distance matrix for a request, registering unseen locations
+
+        Args:
+            ids: Location ids in solver node order
+            lats: Latitudes in degrees
+            lngs: Longitudes in degrees
+            with_time: Also derive the travel-time matrix in seconds (always
+                gathered when the provider has its own travel times)
+            speed_kmh: Average speed for derived travel times
+
+        Returns:
+            DistanceMatrix gathered from the cache
+        """
+        keys = [location_key(i, lat, lng) for i, lat, lng in zip(ids, lats, lngs)]
+        if len(set(keys)) > self.max_locations:
+            raise ValueError(f"Request has more than {self.max_locations} distinct locations")
+
+        with self._lock:
+            now = time.time()
+            missing = {}
+            for key, lat, lng in zip(keys, lats, lngs):
+                entry = self._locations.get(key)
+                if entry is None:
+                    missing.setdefault(key, (float(lat), float(lng)))
+                else:
+                    entry.last_used = now
+            self.location_hits += len(keys) - len(missing)
+            self.location_misses += len(missing)
+
+            if missing:
+                self._add_locations(missing, now, protected=set(keys))
+            self._dirty = True
+            if now - self._persisted_at >= self.persist_seconds:
+                self._persist()
+
+            rows = np.fromiter((self._locations[key].row for key in keys), dtype=np.intp, count=len(keys))
+            # Flat take over row * capacity + col beats 2-D fancy indexing on a wide matrix
+            flat_index = rows[:, None] * self._capacity + rows[None, :]
+            meters = np.asarray(self._meters).reshape(-1).take(flat_index)
+            seconds = np.asarray(self._seconds).reshape(-1).take(flat_index) if self._seconds is not None else None
+            self.pairs_served += len(keys) ** 2
+
+        if seconds is None and with_time:
+            seconds = meters_to_seconds(meters, speed_kmh)
+        return DistanceMatrix(meters=meters, seconds=seconds, speed_kmh=speed_kmh)
+
+    def evict_stale(self, max_age_seconds: Optional[float] = None) -> int:
+        """
+        Drop locations not used within ``max_age_seconds`` (default: the TTL)
+
+        Returns:
+            Number of evicted locations
+        """
+        max_age = self.ttl_seconds if max_age_seconds is None else max_age_seconds
+        cutoff = time.time() - max_age
+        with self._lock:
+            stale = [key for key, entry in self._locations.items() if entry.last_used < cutoff]
+            self._evict(stale)
+            if stale:
+                self._persist()
+        if stale:
+            self.logger.info(f"Evicted {len(stale)} stale locations from distance cache")
+        return len(stale)
+
+    def flush(self) -> None:
+        """Persist the matrix and registry to disk"""
+        with self._lock:
+            if self._dirty:
+                self._persist()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return location and pair hit counters"""
+        with self._lock:
+            lookups = self.location_hits + self.location_misses
+            return {
+                "locations": len(self._locations),
+                "capacity": self._capacity,
+                "max_locations": self.max_locations,
+                "location_hits": self.location_hits,
+                "location_misses": self.location_misses,
+                "hit_rate": round(self.location_hits / lookups, 4) if lookups else 0.0,
+                "pairs_served": self.pairs_served,
+                "pairs_computed": self.pairs_computed,
+                "evictions": self.evictions,
+                "provider": self.provider.name,
+                "cache_dir": self.cache_dir
+            }
+
+    def _add_locations(self, missing: Dict[str, Tuple[float, float]], now: float, protected: set) -> None:
+        """Assign rows to new locations and compute their rows and columns"""
+        reusing = bool(self._free_rows)
+        overflow = len(self._locations) + len(missing) - self.max_locations
+        if overflow > 0:
+            # Full: reuse the rows of the least recently used locations not in this request
+            candidates = sorted(
+                (entry.last_used, key) for key, entry in self._locations.items() if key not in protected
+            )
+            self._evict([key for _, key in candidates[:overflow]])
+            reusing = True
+        needed = len(missing) - len(self._free_rows)
+
+        if needed > 0:
+            used_rows = len(self._locations) + len(self._free_rows)
+            if used_rows + needed > self._capacity:
+                self._grow(used_rows + needed)
+            self._free_rows.extend(range(used_rows, used_rows + needed))
+
+        if reusing:
+            # Record the evictions before their rows are overwritten
+            self._persist()
+
+        self._free_rows.sort(reverse=True)
+        new_rows = []
+        for key, (lat, lng) in missing.items():
+            row = self._free_rows.pop()
+            self._locations[key] = RegisteredLocation(row=row, lat=lat, lng=lng, last_used=now)
+            new_rows.append(row)
+        new_rows = np.array(new_rows, dtype=np.intp)
+        self._row_lats[new_rows] = [lat for lat, _ in missing.values()]
+        self._row_lngs[new_rows] = [lng for _, lng in missing.values()]
+        self._row_used[new_rows] = True
+
+        # Provider blocks: new locations to every registered location, and
+        # previously registered locations to the new ones
+        all_rows = np.flatnonzero(self._row_used)
+        is_old = ~np.isin(all_rows, new_rows)
+        old_rows = all_rows[is_old]
+        new_lats, new_lngs = self._row_lats[new_rows], self._row_lngs[new_rows]
+        out_meters, out_seconds = self.provider.legs(
+            new_lats, new_lngs, self._row_lats[all_rows], self._row_lngs[all_rows]
+        )
+        if self.provider.symmetric:
+            in_meters, in_seconds = out_meters[:, is_old].T, out_seconds[:, is_old].T
+        else:
+            in_meters, in_seconds = self.provider.legs(
+                self._row_lats[old_rows], self._row_lngs[old_rows], new_lats, new_lngs
+            )
+        self._meters[np.ix_(new_rows, all_rows)] = out_meters
+        self._meters[np.ix_(old_rows, new_rows)] = in_meters
+        if self._seconds is not None:
+            self._seconds[np.ix_(new_rows, all_rows)] = out_seconds
+            self._seconds[np.ix_(old_rows, new_rows)] = in_seconds
+        self.pairs_computed += out_meters.size + in_meters.size
+        self._dirty = True
+
+    def _evict(self, keys: List[str]) -> None:
+        for key in keys:
+            entry = self._locations.pop(key)
+            self._free_rows.append(entry.row)
+            self._row_used[entry.row] = False
+        self.evictions += len(keys)
+
+    def _grow(self, required: int) -> None:
+        """Double the matrix capacity until it fits ``required`` rows"""
+        capacity = max(self._capacity, 1)
+        while capacity < required:
+            capacity *= 2
+        capacity = min(max(capacity, required), max(self.max_locations, required))
+
+        self._meters = self._grow_file(self.matrix_path, self._meters, capacity)
+        if self.provider.travel_times:
+            self._seconds = self._grow_file(self.seconds_path, self._seconds, capacity)
+        self._resize_rows(capacity)
+        self.logger.info(f"Distance cache capacity grown from {self._capacity} to {capacity} locations")
+        self._capacity = capacity
+        self._save_registry()
+
+    def _grow_file(self, path: str, current: Optional[np.memmap], capacity: int) -> np.memmap:
+        """Copy a matrix into a larger file and map it"""
+        tmp_path = path + ".tmp"
+        grown = np.memmap(tmp_path, dtype=np.int32, mode="w+", shape=(capacity, capacity))
+        if current is not None and self._capacity:
+            grown[:self._capacity, :self._capacity] = current
+        del current
+        grown.flush()
+        del grown
+        os.replace(tmp_path, path)
+        return np.memmap(path, dtype=np.int32, mode="r+", shape=(capacity, capacity))
+
+    def _resize_rows(self, capacity: int) -> None:
+        size = len(self._row_used)
+        self._row_lats = np.concatenate([self._row_lats, np.zeros(capacity - size)])
+        self._row_lngs = np.concatenate([self._row_lngs, np.zeros(capacity - size)])
+        self._row_used = np.concatenate([self._row_used, np.zeros(capacity - size, dtype=bool)])
+
+    def _load(self, initial_capacity: int) -> None:
+        """Open an existing cache or create an empty one"""
+        if os.path.exists(self.registry_path) and os.path.exists(self.matrix_path):
+            try:
+                with open(self.registry_path) as f:
+                    registry = json.load(f)
+                capacity = int(registry["capacity"])
+                if registry.get("provider", HaversineProvider.name) != self.provider.fingerprint():
+                    raise ValueError("built with a different distance provider")
+                if os.path.getsize(self.matrix_path) != capacity * capacity * 4:
+                    raise ValueError("matrix size does not match registry")
+                if self.provider.travel_times and not (
+                    os.path.exists(self.seconds_path) and os.path.getsize(self.seconds_path) == capacity * capacity * 4
+                ):
+                    raise ValueError("travel-time matrix missing or truncated")
+                self._capacity = capacity
+                self._locations = {
+                    key: RegisteredLocation(**entry) for key, entry in registry["locations"].items()
+                }
+                used = {entry.row for entry in self._locations.values()}
+                high = max(used) + 1 if used else 0
+                self._free_rows = [row for row in range(high) if row not in used]
+                self._meters = np.memmap(self.matrix_path, dtype=np.int32, mode="r+", shape=(capacity, capacity))
+                if self.provider.travel_times:
+                    self._seconds = np.memmap(self.seconds_path, dtype=np.int32, mode="r+", shape=(capacity, capacity))
+                self._resize_rows(capacity)
+                for entry in self._locations.values():
+                    self._row_lats[entry.row] = entry.lat
+                    self._row_lngs[entry.row] = entry.lng
+                    self._row_used[entry.row] = True
+                self.logger.info(f"Loaded distance cache with {len(self._locations)} locations")
+                return
+            except Exception as e:
+                self.logger.warning(f"Distance cache at {self.cache_dir} unreadable, rebuilding: {str(e)}")
+                self._locations = {}
+                self._free_rows = []
+                self._row_lats = np.zeros(0)
+                self._row_lngs = np.zeros(0)
+                self._row_used = np.zeros(0, dtype=bool)
+
+        self._capacity = 0
+        self._meters = None
+        self._seconds = None
+        self._grow(min(initial_capacity, self.max_locations))
+
+    def _persist(self) -> None:
+        """Write matrix pages, then the registry that points at them"""
+        if self._meters is not None:
+            self._meters.flush()
+        if self._seconds is not None:
+            self._seconds.flush()
+        self._save_registry()
+        self._dirty = False
+        self._persisted_at = time.time()
+
+    def _save_registry(self) -> None:
+        tmp_path = self.registry_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "capacity": self._capacity,
+                "provider": self.provider.fingerprint(),
+                "locations": {key: entry.__dict__ for key, entry in self._locations.items()}
+            }, f)
+        os.replace(tmp_path, self.registry_path)
+
+# Process-wide cache shared by route optimizers
+_distance_cache: Optional[DistanceCache] = None
+_distance_cache_lock = threading.Lock()
+
+def get_distance_cache() -> DistanceCache:
+    """Return the process-wide distance cache, opening it on first use"""
+    global _distance_cache
+    with _distance_cache_lock:
+        if _distance_cache is None:
+            _distance_cache = DistanceCache(
+                cache_dir=settings.DISTANCE_CACHE_DIR,
+                max_locations=settings.DISTANCE_CACHE_MAX_LOCATIONS,
+                ttl_seconds=settings.DISTANCE_CACHE_TTL_SECONDS,
+                provider=get_distance_provider()
+            )
+        return _distance_cache
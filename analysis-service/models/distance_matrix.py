@@ -0,0 +1,85 @@
+"""
+Vectorized distance and travel-time matrices for route optimization
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+DEFAULT_SPEED_KMH = 50.0  # Average truck speed used for travel-time estimates
+
+@dataclass
+class DistanceMatrix:
+    """Pairwise distances (and optionally travel times) between route locations"""
+    meters: np.ndarray  # int32 [n, n], truncated to whole meters
+    seconds: Optional[np.ndarray] = None  # int32 [n, n] at speed_kmh
+    speed_kmh: float = DEFAULT_SPEED_KMH
+
+    @property
+    def size(self) -> int:
+        return self.meters.shape[0]
+
+    def route_km(self, nodes: Sequence[int]) -> float:
+        """Length in km of a path visiting ``nodes`` in order"""
+        nodes = np.asarray(nodes, dtype=np.intp)
+        if len(nodes) < 2:
+            return 0.0
+        return float(self.meters[nodes[:-1], nodes[1:]].sum(dtype=np.int64)) / 1000
+
+def haversine_km(
+    lats_a: np.ndarray,
+    lngs_a: np.ndarray,
+    lats_b: Optional[np.ndarray] = None,
+    lngs_b: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Great-circle distances in km between every point in A and every point in B
+
+    Args:
+        lats_a, lngs_a: Coordinates in degrees, shape [n]
+        lats_b, lngs_b: Coordinates in degrees, shape [m]; defaults to A
+
+    Returns:
+        float64 array of shape [n, m]
+    """
+    lat_a = np.radians(np.asarray(lats_a, dtype=np.float64))[:, None]
+    lng_a = np.radians(np.asarray(lngs_a, dtype=np.float64))[:, None]
+    if lats_b is None:
+        lat_b, lng_b = lat_a.T, lng_a.T
+    else:
+        lat_b = np.radians(np.asarray(lats_b, dtype=np.float64))[None, :]
+        lng_b = np.radians(np.asarray(lngs_b, dtype=np.float64))[None, :]
+
+    sin_dlat = np.sin((lat_b - lat_a) / 2)
+    sin_dlng = np.sin((lng_b - lng_a) / 2)
+    a = sin_dlat ** 2 + np.cos(lat_a) * np.cos(lat_b) * sin_dlng ** 2
+    np.clip(a, 0.0, 1.0, out=a)
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+def meters_to_seconds(meters: np.ndarray, speed_kmh: float = DEFAULT_SPEED_KMH) -> np.ndarray:
+    """Travel time in whole seconds for a meters matrix at a constant speed"""
+    return (meters.astype(np.float64) * (3.6 / speed_kmh)).astype(np.int32)
+
+def build_distance_matrix(
+    lats: Sequence[float],
+    lngs: Sequence[float],
+    with_time: bool = False,
+    speed_kmh: float = DEFAULT_SPEED_KMH
+) -> DistanceMatrix:
+    """
+    Build the int32 meters matrix (and travel-time matrix) for a set of points
+
+    Args:
+        lats: Latitudes in degrees, depot first
+        lngs: Longitudes in degrees, depot first
+        with_time: Also build the travel-time matrix in seconds
+        speed_kmh: Average speed for travel times
+
+    Returns:
+        DistanceMatrix
+    """
+    meters = (haversine_km(lats, lngs) * 1000).astype(np.int32)
+    seconds = meters_to_seconds(meters, speed_kmh) if with_time else None
+    return DistanceMatrix(meters=meters, seconds=seconds, speed_kmh=speed_kmh)
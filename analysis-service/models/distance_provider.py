@@ -0,0 +1,112 @@
+"""
+Pluggable sources of pairwise distances and travel times for route optimization
+"""
+
+import threading
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.distance_matrix import (
+    DEFAULT_SPEED_KMH, DistanceMatrix, haversine_km, meters_to_seconds
+)
+from utils.logger import setup_logger
+from utils.config import settings
+
+logger = setup_logger(__name__)
+
+class DistanceProvider:
+    """
+    Source of pairwise distances and travel times
+
+    Subclasses implement ``legs``. ``symmetric`` providers return the same
+    distance in both directions, so callers may reuse a block's transpose;
+    providers with ``travel_times`` return their own seconds rather than
+    meters at a constant speed, and the distance cache stores them.
+    """
+
+    name = "base"
+    symmetric = False
+    travel_times = False
+
+    def fingerprint(self) -> str:
+        """Identifies the provider and its data, so caches built from another source are not reused"""
+        return self.name
+
+    def legs(
+        self,
+        lats_a: Sequence[float],
+        lngs_a: Sequence[float],
+        lats_b: Sequence[float],
+        lngs_b: Sequence[float]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Distances and travel times from every point in A to every point in B
+
+        Args:
+            lats_a, lngs_a: Origin coordinates in degrees, shape [n]
+            lats_b, lngs_b: Destination coordinates in degrees, shape [m]
+
+        Returns:
+            Tuple of int32 meters and int32 seconds, each of shape [n, m]
+        """
+        raise NotImplementedError
+
+    def matrix(self, lats: Sequence[float], lngs: Sequence[float], with_time: bool = False) -> DistanceMatrix:
+        """
+        Square distance matrix (and travel-time matrix) for a set of points
+
+        Args:
+            lats: Latitudes in degrees, depot first
+            lngs: Longitudes in degrees, depot first
+            with_time: Also return travel times (always returned by providers with travel_times)
+
+        Returns:
+            DistanceMatrix
+        """
+        meters, seconds = self.legs(lats, lngs, lats, lngs)
+        if not (with_time or self.travel_times):
+            seconds = None
+        return DistanceMatrix(meters=meters, seconds=seconds, speed_kmh=DEFAULT_SPEED_KMH)
+
+class HaversineProvider(DistanceProvider):
+    """Straight-line distances, with travel times at a constant average speed"""
+
+    name = "haversine"
+    symmetric = True
+
+    def __init__(self, speed_kmh: float = DEFAULT_SPEED_KMH):
+        self.speed_kmh = speed_kmh
+
+    def legs(self, lats_a, lngs_a, lats_b, lngs_b) -> Tuple[np.ndarray, np.ndarray]:
+        meters = (haversine_km(lats_a, lngs_a, lats_b, lngs_b) * 1000).astype(np.int32)
+        return meters, meters_to_seconds(meters, self.speed_kmh)
+
+# Process-wide provider selected by DISTANCE_PROVIDER
+_distance_provider: Optional[DistanceProvider] = None
+_distance_provider_lock = threading.Lock()
+
+def get_distance_provider() -> DistanceProvider:
+    """
+    Return the configured distance provider, loading it on first use
+
+    'road_network' loads the graph at ROAD_GRAPH_PATH ('synthetic' builds the
+    test graph); if scipy or the graph is unavailable the service falls back
+    to straight-line distances.
+    """
+    global _distance_provider
+    with _distance_provider_lock:
+        if _distance_provider is None:
+            _distance_provider = HaversineProvider()
+            if settings.DISTANCE_PROVIDER == "road_network":
+                from models.road_network import load_road_network_provider
+                try:
+                    _distance_provider = load_road_network_provider(
+                        settings.ROAD_GRAPH_PATH,
+                        access_speed_kmh=settings.ROAD_ACCESS_SPEED_KMH
+                    )
+                except Exception as e:
+                    logger.warning(f"Road network unavailable, using straight-line distances: {str(e)}")
+            elif settings.DISTANCE_PROVIDER != "haversine":
+                logger.warning(f"Unknown DISTANCE_PROVIDER '{settings.DISTANCE_PROVIDER}', using haversine")
+        return _distance_provider
@@ -0,0 +1,244 @@
+"""
+Execution backends for model fitting in Pukpuk Analysis Service
+"""
+
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from utils.logger import setup_logger
+from utils.config import settings
+
+logger = setup_logger(__name__)
+
+EXECUTOR_BACKENDS = ("thread", "process", "inline")
+
+def _wait_for_workers(barrier: Any, timeout: float) -> int:
+    """Start-up task: block until every worker holds one, then report this worker"""
+    barrier.wait(timeout)
+    return os.getpid()
+
+class ForecastExecutor:
+    """
+    Shared pool that runs model fitting (or route solving) tasks
+
+    Backends:
+        thread: ThreadPoolExecutor, cheap to submit but limited by the GIL
+        process: ProcessPoolExecutor, true parallelism; tasks and arguments must be picklable
+        inline: runs tasks directly on the caller, useful for debugging and tiny deployments
+
+    For the process backend, ``initializer(*initargs)`` runs in every worker
+    process as it starts, before it takes any task, so per-process warm-up
+    reaches each of them. A worker that dies breaks the whole pool: every
+    task still in it fails with BrokenProcessPool, and the next submission
+    replaces the pool with a fresh one whose workers run the initializer
+    again.
+    """
+
+    def __init__(self, backend: str = "thread", max_workers: int = 4, name: str = "forecast",
+                 initializer: Optional[Callable[..., Any]] = None, initargs: Sequence[Any] = ()):
+        if backend not in EXECUTOR_BACKENDS:
+            raise ValueError(f"Unknown executor backend '{backend}', expected one of {EXECUTOR_BACKENDS}")
+
+        self.logger = logger
+        self.backend = backend
+        self.max_workers = max_workers
+        self.name = name
+        self._pool: Optional[Executor] = None
+        self._manager = None
+
+        if backend == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        elif backend == "process":
+            self._initializer = initializer
+            self._initargs = tuple(initargs)
+            self._pool = self._process_pool()
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._replaced = 0
+
+        self.logger.info(f"{name.capitalize()} executor started: backend={backend}, max_workers={max_workers}")
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a task on the backend and await its result
+
+        Args:
+            fn: Task callable (module-level for the process backend)
+            *args: Positional arguments for fn
+            **kwargs: Keyword arguments for fn
+
+        Returns:
+            Task result
+        """
+        self._task_started()
+
+        if self._pool is None:
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                self._task_finished(failed=True)
+                raise
+            self._task_finished(failed=False)
+            return result
+
+        try:
+            future = self._submit(partial(fn, *args, **kwargs))
+        except Exception:
+            self._task_finished(failed=True)
+            raise
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        # Spawn avoids forking a parent that already runs event loop and pool threads
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self._initializer,
+            initargs=self._initargs
+        )
+
+    def _submit(self, task: Callable[[], Any]) -> Future:
+        """Submit to the pool, replacing a process pool broken by a dead worker"""
+        pool = self._pool
+        try:
+            return pool.submit(task)
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is pool:
+                    self.logger.warning(f"{self.name.capitalize()} process pool broken by a dead worker; starting a new one")
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self._pool = self._process_pool()
+                    self._replaced += 1
+                pool = self._pool
+            return pool.submit(task)
+
+    def start_workers(self, timeout: float = 300) -> int:
+        """
+        Start every process worker now and wait until each has initialized
+
+        One task per worker is submitted and the tasks wait on a shared
+        barrier, so they can only finish once they run concurrently on
+        ``max_workers`` distinct workers, each past its ``initializer``.
+
+        Args:
+            timeout: Seconds to wait for the workers
+
+        Returns:
+            Number of distinct worker processes started (0 for thread and
+            inline backends)
+        """
+        if self.backend != "process":
+            return 0
+        with multiprocessing.get_context("spawn").Manager() as manager:
+            barrier = manager.Barrier(self.max_workers)
+            futures = [self._submit(partial(_wait_for_workers, barrier, timeout)) for _ in range(self.max_workers)]
+            return len({future.result() for future in futures})
+
+    def channel(self) -> Tuple[Any, Any]:
+        """
+        Create a (queue, event) pair a running task can report progress through
+
+        Process workers get manager proxies, which pickle into the task's
+        arguments; thread and inline tasks share plain queue and event objects.
+        """
+        if self.backend != "process":
+            return queue.Queue(), threading.Event()
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+        return self._manager.Queue(), self._manager.Event()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return queue depth and worker utilisation
+
+        ``busy_workers`` and ``queue_depth`` are not measured on the pool;
+        they split ``in_flight`` (submitted tasks not yet finished) at
+        ``max_workers``. ``pool_restarts`` counts process pools replaced
+        after a worker died.
+        """
+        with self._lock:
+            in_flight = self._in_flight
+            return {
+                "backend": self.backend,
+                "max_workers": self.max_workers,
+                "in_flight": in_flight,
+                "busy_workers": min(in_flight, self.max_workers),
+                "queue_depth": max(0, in_flight - self.max_workers),
+                "completed": self._completed,
+                "failed": self._failed,
+                "pool_restarts": self._replaced
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool, optionally waiting for running tasks"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            if self._manager is not None:
+                self._manager.shutdown()
+                self._manager = None
+            self.logger.info(f"{self.name.capitalize()} executor stopped: backend={self.backend}")
+
+    def _task_started(self) -> None:
+        with self._lock:
+            self._in_flight += 1
+
+    def _task_finished(self, failed: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def _on_done(self, future: Future) -> None:
+        self._task_finished(failed=future.cancelled() or future.exception() is not None)
+
+# Process-wide executor, created by the application lifespan
+_executor: Optional[ForecastExecutor] = None
+_executor_lock = threading.Lock()
+
+def init_executor(backend: Optional[str] = None, max_workers: Optional[int] = None,
+                  initializer: Optional[Callable[..., Any]] = None, initargs: Sequence[Any] = ()) -> ForecastExecutor:
+    """Create the shared executor, replacing any previous one"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ForecastExecutor(
+            backend=backend or settings.FORECAST_EXECUTOR_BACKEND,
+            max_workers=max_workers or settings.FORECAST_MAX_WORKERS,
+            initializer=initializer,
+            initargs=initargs
+        )
+        return _executor
+
+def get_executor() -> ForecastExecutor:
+    """Return the shared executor, creating it with configured defaults if needed"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ForecastExecutor(
+                backend=settings.FORECAST_EXECUTOR_BACKEND,
+                max_workers=settings.FORECAST_MAX_WORKERS
+            )
+        return _executor
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Shut down the shared executor"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
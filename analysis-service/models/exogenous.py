@@ -0,0 +1,229 @@
+"""
+As-of joins of exogenous series (NDVI, weather, market prices, economic indicators) onto demand frames
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+DIRECTIONS = ("backward", "forward", "nearest")
+NAT = np.iinfo(np.int64).min
+DAY_NS = 24 * 3600 * 10 ** 9
+
+def to_ns(dates: Any) -> np.ndarray:
+    """Dates as int64 nanoseconds since 1970 (NaT as int64 min)"""
+    if isinstance(dates, np.ndarray) and dates.dtype.kind == "M":
+        return dates.astype("datetime64[ns]").view(np.int64)
+    series = dates if isinstance(dates, pd.Series) else pd.Series(dates)
+    if series.dtype.kind != "M":
+        series = pd.to_datetime(series)
+    return series.to_numpy(dtype="datetime64[ns]").view(np.int64)
+
+@dataclass(frozen=True)
+class _Block:
+    """Columns of a source that share the same observation dates"""
+    columns: Tuple[str, ...]
+    dates: np.ndarray   # int64 ns, sorted ascending, unique
+    values: np.ndarray  # float64, (len(dates), len(columns))
+
+@dataclass(frozen=True)
+class ExogenousSource:
+    """
+    An exogenous series prepared for as-of joins
+
+    Build with ``from_frame``: rows are sorted by date once, duplicate dates
+    keep the last row, and each column drops its own missing observations,
+    so a join takes the latest value actually observed. Columns with the
+    same gaps share one date array.
+
+    Attributes:
+        name: Source name, used in error messages
+        blocks: Column groups with their sorted dates and values
+        tolerance_ns: Largest gap between a row and the observation it takes (None: unlimited)
+        direction: 'backward' (latest at or before the row), 'forward' or 'nearest'
+        fill: Value for rows without an observation within the tolerance:
+            'none' (NaN), 'mean' (the column mean) or a number
+        means: Column means, for the 'mean' fill
+    """
+    name: str
+    blocks: Tuple[_Block, ...]
+    tolerance_ns: Optional[int]
+    direction: str
+    fill: Union[str, float]
+    means: Dict[str, float]
+
+    @property
+    def columns(self) -> List[str]:
+        return [column for block in self.blocks for column in block.columns]
+
+    @classmethod
+    def from_frame(
+        cls,
+        name: str,
+        frame: pd.DataFrame,
+        columns: Optional[Sequence[str]] = None,
+        date_column: str = "date",
+        tolerance: Optional[Union[str, pd.Timedelta, float]] = None,
+        direction: str = "backward",
+        fill: Union[str, float] = "none"
+    ) -> "ExogenousSource":
+        """
+        Prepare a source from a DataFrame
+
+        Args:
+            name: Source name
+            frame: Observations with a date column
+            columns: Value columns (default: every numeric column but the date)
+            date_column: Name of the date column
+            tolerance: Largest gap as a Timedelta, a pandas offset string ('3D')
+                or a number of days; None for no limit
+            direction: 'backward', 'forward' or 'nearest'
+            fill: 'none', 'mean' or a constant
+
+        Returns:
+            ExogenousSource
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown as-of direction for {name}: {direction}")
+        if isinstance(fill, str) and fill not in ("none", "mean"):
+            raise ValueError(f"Unknown fill policy for {name}: {fill}")
+        if date_column not in frame.columns:
+            raise ValueError(f"Source {name} has no '{date_column}' column")
+        if columns is None:
+            columns = [c for c in frame.select_dtypes(include="number").columns if c != date_column]
+        missing = [column for column in columns if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Source {name} is missing columns: {', '.join(missing)}")
+
+        if tolerance is None:
+            tolerance_ns = None
+        elif isinstance(tolerance, (int, float)):
+            tolerance_ns = int(tolerance * DAY_NS)
+        else:
+            tolerance_ns = int(pd.Timedelta(tolerance).value)
+
+        dates = to_ns(frame[date_column])
+        values = frame[list(columns)].to_numpy(dtype=np.float64, na_value=np.nan)
+        keep = dates != NAT
+        dates, values = dates[keep], values[keep]
+        order = np.argsort(dates, kind="stable")
+        dates, values = dates[order], values[order]
+
+        # Group columns by their missing-value pattern; each group drops its gaps
+        groups: Dict[bytes, List[int]] = {}
+        present = ~np.isnan(values)
+        for index in range(len(columns)):
+            groups.setdefault(np.packbits(present[:, index]).tobytes(), []).append(index)
+        blocks = []
+        for indexes in groups.values():
+            rows = present[:, indexes[0]]
+            block_dates, block_values = dates[rows], values[rows][:, indexes]
+            # Duplicate dates: the last row wins
+            last = np.append(block_dates[1:] != block_dates[:-1], True)
+            blocks.append(_Block(
+                tuple(columns[i] for i in indexes), block_dates[last], np.asfortranarray(block_values[last])
+            ))
+
+        with np.errstate(invalid="ignore"):
+            means = {
+                column: float(np.nanmean(values[:, i])) if present[:, i].any() else float("nan")
+                for i, column in enumerate(columns)
+            }
+        return cls(name, tuple(blocks), tolerance_ns, direction, fill, means)
+
+def _match(source_dates: np.ndarray, targets: np.ndarray, direction: str,
+           tolerance_ns: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Index of the observation each target takes, and whether it is within tolerance"""
+    count = source_dates.size
+    if count == 0:
+        return np.zeros(targets.size, dtype=np.intp), np.zeros(targets.size, dtype=bool)
+    if direction == "backward":
+        index = np.searchsorted(source_dates, targets, side="right") - 1  # Last observation at or before
+        found = index >= 0
+    elif direction == "forward":
+        index = np.searchsorted(source_dates, targets, side="left")  # First observation at or after
+        found = index < count
+    else:
+        before = np.searchsorted(source_dates, targets, side="right") - 1
+        after = before + 1  # Dates are unique, so this is the first observation after
+        has_before, has_after = before >= 0, after < count
+        far = np.iinfo(np.int64).max
+        gap_before = np.where(has_before, targets - source_dates[np.clip(before, 0, None)], far)
+        gap_after = np.where(has_after, source_dates[np.clip(after, None, count - 1)] - targets, far)
+        index = np.where(gap_after < gap_before, after, before)  # Ties take the earlier observation
+        found = has_before | has_after
+    index = np.clip(index, 0, count - 1)
+    if tolerance_ns is not None:
+        found &= np.abs(source_dates[index] - targets) <= tolerance_ns
+    found &= targets != NAT
+    return index, found
+
+def asof_block(target_dates: Any, sources: Sequence[ExogenousSource]) -> Tuple[List[str], np.ndarray]:
+    """
+    As-of join every source onto the target dates
+
+    The targets are converted once; each source block costs one or two
+    ``np.searchsorted`` calls and one gather per column, written straight
+    into a single preallocated array, whatever the order of the targets.
+
+    Args:
+        target_dates: Row dates (any order)
+        sources: Prepared sources
+
+    Returns:
+        Column names and a float64 (rows, columns) array in column-major order
+    """
+    targets = to_ns(target_dates)
+    names = [column for source in sources for column in source.columns]
+    if len(set(names)) != len(names):
+        duplicated = sorted({column for column in names if names.count(column) > 1})
+        raise ValueError(f"Columns provided by more than one source: {', '.join(duplicated)}")
+    out = np.empty((targets.size, len(names)), dtype=np.float64, order="F")
+    position = 0
+    for source in sources:
+        for block in source.blocks:
+            index, found = _match(block.dates, targets, source.direction, source.tolerance_ns)
+            missing = ~found
+            for offset, column in enumerate(block.columns):
+                target = out[:, position]
+                if block.dates.size:
+                    np.take(block.values[:, offset], index, out=target)
+                if source.fill == "none":
+                    target[missing] = np.nan
+                elif source.fill == "mean":
+                    target[missing] = source.means[column]
+                else:
+                    target[missing] = float(source.fill)
+                position += 1
+    return names, out
+
+def asof_columns(target_dates: Any, sources: Sequence[ExogenousSource]) -> Dict[str, np.ndarray]:
+    """Column name -> values aligned with the target dates (see ``asof_block``)"""
+    names, block = asof_block(target_dates, sources)
+    return {name: block[:, i] for i, name in enumerate(names)}
+
+def join_exogenous(frame: pd.DataFrame, sources: Sequence[ExogenousSource], date_column: str = "date") -> pd.DataFrame:
+    """
+    Add the columns of every source to a frame in one pass
+
+    Joined values land in one float64 block that becomes a single DataFrame
+    block without copying, attached with one concat, so the frame is copied
+    once however many sources there are. Columns the frame already has are
+    replaced.
+
+    Args:
+        frame: Demand frame with a date column
+        sources: Prepared sources
+        date_column: Name of the date column in ``frame``
+
+    Returns:
+        New DataFrame with the exogenous columns appended
+    """
+    names, values = asof_block(frame[date_column], sources)
+    if not names:
+        return frame.copy()
+    block = pd.DataFrame(values, index=frame.index, columns=names, copy=False)
+    kept = frame.drop(columns=[column for column in names if column in frame.columns])
+    return pd.concat([kept, block], axis=1)
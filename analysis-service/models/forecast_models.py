@@ -5,10 +5,10 @@ Forecasting models for Pukpuk Analysis Service
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from dataclasses import dataclass
+from functools import partial
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 import traceback
 
 # Import ML libraries (lazy loading to avoid startup issues)
@@ -38,10 +38,24 @@ def _import_catboost():
 
 from utils.logger import setup_logger
 from utils.config import settings
+from models.model_cache import get_model_cache, make_cache_key, series_fingerprint
+from models.executor import ForecastExecutor, get_executor
+from models.model_registry import ModelArtifact, get_model_registry
 
 logger = setup_logger(__name__)
 
-logger = setup_logger(__name__)
+# Hyperparameters shared by model construction and cache keys
+ES_PARAMS = {"seasonal": "add", "seasonal_periods": 7}
+ARIMA_PARAMS = {"order": (5, 1, 0)}
+
+SEASON_LABELS = np.array(['Q1', 'Q2', 'Q3', 'Q4'])
+
+# Recent quantities a direct CatBoost origin needs for its lags (lag 0, 1 and 7)
+DIRECT_LAG_WINDOW = 8
+
+def _season_labels(months: np.ndarray) -> np.ndarray:
+    """Vectorized equivalent of pd.cut(month, bins=[0, 3, 6, 9, 12], labels=['Q1', 'Q2', 'Q3', 'Q4'])"""
+    return SEASON_LABELS[(np.asarray(months) - 1) // 3]
 
 @dataclass
 class ForecastResult:
@@ -50,13 +64,57 @@ class ForecastResult:
     confidence_lower: Optional[List[float]] = None
     confidence_upper: Optional[List[float]] = None
     model_name: str = ""
+    fit_mode: str = "full"  # 'full', 'incremental', 'cached' or 'pretrained'
+    model_version: Optional[str] = None  # Registry artifact version for pretrained models
+
+@dataclass
+class SeriesPayload:
+    """Compact NumPy representation of a historical series for executor tasks"""
+    dates: np.ndarray  # int64 nanoseconds since epoch
+    columns: Dict[str, np.ndarray]  # float64 value columns
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SeriesPayload":
+        """Pack the date column and numeric columns of a DataFrame"""
+        columns = {
+            col: df[col].to_numpy(dtype=np.float64)
+            for col in df.columns
+            if col != 'date' and pd.api.types.is_numeric_dtype(df[col])
+        }
+        return cls(dates=df['date'].values.astype('datetime64[ns]').view(np.int64), columns=columns)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Rebuild the DataFrame the model methods consume"""
+        return pd.DataFrame({'date': self.dates.view('datetime64[ns]'), **self.columns})
+
+# Engine used by executor tasks; one per worker process for the process backend
+_task_engine: Optional["ForecastEngine"] = None
+
+def run_model_forecast(
+    model_name: str,
+    payload: SeriesPayload,
+    days: int,
+    include_confidence: bool,
+    series_key: Optional[str] = None,
+    product_id: Optional[str] = None
+) -> ForecastResult:
+    """Executor entry point: run one model forecast on a compact series payload"""
+    global _task_engine
+    if _task_engine is None:
+        _task_engine = ForecastEngine()
+    method = getattr(_task_engine, f'_generate_{model_name.lower()}_forecast')
+    kwargs = {"series_key": series_key}
+    if model_name.lower() == 'catboost':
+        kwargs["product_id"] = product_id
+    return method(payload.to_frame(), days, include_confidence, **kwargs)
 
 class ForecastEngine:
     """Main forecasting engine with multiple models"""
 
-    def __init__(self):
+    def __init__(self, executor: Optional[ForecastExecutor] = None):
         self.logger = logger
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.executor = executor
+        self.model_cache = get_model_cache() if settings.MODEL_CACHE_ENABLED else None
 
     async def generate_forecast(
         self,
@@ -64,7 +122,9 @@ class ForecastEngine:
         days: int,
         models: List[str],
         include_confidence: bool = True,
-        scenario: str = "realistic"
+        scenario: str = "realistic",
+        series_key: Optional[str] = None,
+        product_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate forecast using specified models
@@ -75,6 +135,9 @@ class ForecastEngine:
             models: List of model names to use
             include_confidence: Whether to include confidence intervals
             scenario: Forecast scenario (optimistic, pessimistic, realistic)
+            series_key: Stable series identifier (e.g. product id) enabling
+                incremental updates when new rows are appended
+            product_id: Product identifier used to select a pretrained model
 
         Returns:
             Dictionary with forecast results
@@ -87,7 +150,16 @@ class ForecastEngine:
             adjusted_df = self._apply_scenario_adjustment(df, scenario_multiplier)
 
             # Generate model forecasts
-            model_results = await self._generate_model_forecasts(adjusted_df, days, models, include_confidence)
+            lineage_key = f"{series_key}:{scenario}" if series_key else None
+            model_results = await self._generate_model_forecasts(
+                adjusted_df, days, models, include_confidence, lineage_key, product_id
+            )
+            fit_modes = {name: result.fit_mode for name, result in model_results.items()}
+            model_versions = {
+                name: result.model_version
+                for name, result in model_results.items()
+                if result.model_version
+            }
 
             # Handle fallback if no models succeeded
             if not model_results:
@@ -104,7 +176,9 @@ class ForecastEngine:
             return {
                 "forecast_data": final_forecast,
                 "models_used": list(model_results.keys()),
-                "scenario": scenario
+                "scenario": scenario,
+                "fit_modes": fit_modes,
+                "model_versions": model_versions
             }
 
         except Exception as e:
@@ -122,21 +196,27 @@ class ForecastEngine:
         df: pd.DataFrame,
         days: int,
         models: List[str],
-        include_confidence: bool
+        include_confidence: bool,
+        series_key: Optional[str] = None,
+        product_id: Optional[str] = None
     ) -> Dict[str, ForecastResult]:
         """Generate forecasts from individual models"""
         forecast_tasks = []
         model_results = {}
+        executor = self.executor or get_executor()
+        payload = SeriesPayload.from_frame(df)
 
         # Create forecast tasks for each model
         for model_name in models:
             if model_name.lower() != 'ensemble' and hasattr(self, f'_generate_{model_name.lower()}_forecast'):
-                task = asyncio.get_event_loop().run_in_executor(
-                    self.executor,
-                    getattr(self, f'_generate_{model_name.lower()}_forecast'),
-                    df.copy(),
+                task = executor.run(
+                    run_model_forecast,
+                    model_name,
+                    payload,
                     days,
-                    include_confidence
+                    include_confidence,
+                    series_key,
+                    product_id
                 )
                 forecast_tasks.append((model_name, task))
 
@@ -164,6 +244,118 @@ class ForecastEngine:
         """Check if ensemble forecast should be generated"""
         return 'ensemble' in [m.lower() for m in models]
 
+    def _series_arrays(self, df: pd.DataFrame, columns: List[str]) -> List[np.ndarray]:
+        """Extract the date column and value columns that identify a fitted series"""
+        arrays = [df['date'].values.astype('datetime64[ns]')]
+        arrays.extend(df[col].to_numpy(dtype=float) for col in columns if col in df.columns)
+        return arrays
+
+    def _find_series_continuation(
+        self,
+        previous_arrays: List[np.ndarray],
+        arrays: List[np.ndarray]
+    ) -> Optional[int]:
+        """
+        Check whether a series continues a previously fitted one
+
+        The new series must end later than the previous one and agree with it
+        on every overlapping date. It may start at the same date (rows were
+        appended) or later (a sliding window such as "last 100 rows").
+
+        Returns:
+            Offset into the previous series where the new series starts, or None
+        """
+        if len(previous_arrays) != len(arrays):
+            return None
+
+        previous_dates, dates = previous_arrays[0], arrays[0]
+        if len(dates) == 0 or len(previous_dates) == 0 or dates[-1] <= previous_dates[-1]:
+            return None
+
+        offset = int(np.searchsorted(previous_dates, dates[0]))
+        if offset >= len(previous_dates) or previous_dates[offset] != dates[0]:
+            return None
+
+        overlap = len(previous_dates) - offset
+        for previous, current in zip(previous_arrays, arrays):
+            if not np.array_equal(previous[offset:], current[:overlap]):
+                return None
+
+        return offset
+
+    def _fit_or_reuse(
+        self,
+        model_name: str,
+        df: pd.DataFrame,
+        columns: List[str],
+        params: Dict[str, Any],
+        full_fit: Callable[[pd.DataFrame], Any],
+        incremental_fit: Optional[Callable[[Any, pd.DataFrame, int, int], Any]] = None,
+        series_key: Optional[str] = None
+    ) -> Tuple[Any, str]:
+        """
+        Return a fitted model for the series, refitting only when needed
+
+        Tries, in order: an exact cache hit on the series fingerprint, an
+        incremental update of the last model fitted for ``series_key``, and
+        finally a full fit.
+
+        Args:
+            model_name: Model name used in cache keys
+            df: Historical data DataFrame
+            columns: Value columns the fit depends on
+            params: Hyperparameters the fit depends on
+            full_fit: Fits a model from scratch on df
+            incremental_fit: Updates a previous fit with (previous, df, offset, previous_length)
+            series_key: Stable series identifier for incremental updates
+
+        Returns:
+            Tuple of (fitted model, fit mode)
+        """
+        if self.model_cache is None:
+            return full_fit(df), "full"
+
+        arrays = self._series_arrays(df, columns)
+        present_columns = [col for col in columns if col in df.columns]
+        cache_key = make_cache_key(model_name, series_fingerprint(arrays), params)
+
+        fitted = self.model_cache.get(cache_key)
+        if fitted is not None:
+            return fitted, "cached"
+
+        lineage_key = None
+        previous = None
+        if series_key and settings.INCREMENTAL_FIT_ENABLED:
+            lineage_key = make_cache_key(
+                model_name,
+                f"lineage:{series_key}",
+                {**params, "columns": present_columns}
+            )
+            previous = self.model_cache.get(lineage_key, track_stats=False)
+
+        fit_mode = "full"
+        updates = 0
+        if (previous is not None and incremental_fit is not None
+                and previous['updates'] < settings.INCREMENTAL_MAX_UPDATES):
+            offset = self._find_series_continuation(previous['arrays'], arrays)
+            if offset is not None:
+                try:
+                    fitted = incremental_fit(previous['fitted'], df, offset, len(previous['arrays'][0]))
+                    fit_mode = "incremental"
+                    updates = previous['updates'] + 1
+                except Exception as e:
+                    self.logger.warning(f"Incremental {model_name} update failed, refitting: {str(e)}")
+                    fitted = None
+
+        if fitted is None:
+            fitted = full_fit(df)
+
+        self.model_cache.put(cache_key, fitted)
+        if lineage_key is not None:
+            self.model_cache.put(lineage_key, {'fitted': fitted, 'arrays': arrays, 'updates': updates})
+
+        return fitted, fit_mode
+
     def _get_scenario_multiplier(self, scenario: str) -> float:
         """Get multiplier for scenario adjustment"""
         multipliers = {
@@ -177,7 +369,8 @@ class ForecastEngine:
         self,
         df: pd.DataFrame,
         days: int,
-        include_confidence: bool = True
+        include_confidence: bool = True,
+        series_key: Optional[str] = None
     ) -> ForecastResult:
         """Simple Moving Average forecast"""
         try:
@@ -212,7 +405,8 @@ class ForecastEngine:
         self,
         df: pd.DataFrame,
         days: int,
-        include_confidence: bool = True
+        include_confidence: bool = True,
+        series_key: Optional[str] = None
     ) -> ForecastResult:
         """Weighted Moving Average forecast"""
         try:
@@ -250,7 +444,8 @@ class ForecastEngine:
         self,
         df: pd.DataFrame,
         days: int,
-        include_confidence: bool = True
+        include_confidence: bool = True,
+        series_key: Optional[str] = None
     ) -> ForecastResult:
         """Exponential Smoothing forecast"""
         try:
@@ -263,11 +458,13 @@ class ForecastEngine:
             if len(df) < 7:
                 raise ValueError("Insufficient data for Exponential Smoothing")
 
-            # Prepare data for exponential smoothing
-            ts_data = df.set_index('date')['price']
-
-            model = ExponentialSmoothing(ts_data, seasonal='add', seasonal_periods=7)
-            fitted_model = model.fit()
+            # Reuse or update a previous fit of the series if available
+            fitted_model, fit_mode = self._fit_or_reuse(
+                "ES", df, ['price'], ES_PARAMS,
+                full_fit=self._fit_es_model,
+                incremental_fit=self._update_es_model,
+                series_key=series_key
+            )
 
             forecast = fitted_model.forecast(days)
             values = forecast.values.tolist()
@@ -292,7 +489,8 @@ class ForecastEngine:
                 values=values,
                 confidence_lower=confidence_lower,
                 confidence_upper=confidence_upper,
-                model_name="ES"
+                model_name="ES",
+                fit_mode=fit_mode
             )
 
         except Exception as e:
@@ -303,7 +501,8 @@ class ForecastEngine:
         self,
         df: pd.DataFrame,
         days: int,
-        include_confidence: bool = True
+        include_confidence: bool = True,
+        series_key: Optional[str] = None
     ) -> ForecastResult:
         """ARIMA forecast"""
         try:
@@ -316,11 +515,13 @@ class ForecastEngine:
             if len(df) < 10:
                 raise ValueError("Insufficient data for ARIMA")
 
-            # Prepare data
-            ts_data = df.set_index('date')['price']
-
-            model = ARIMA(ts_data, order=(5, 1, 0))
-            fitted_model = model.fit()
+            # Reuse or update a previous fit of the series if available
+            fitted_model, fit_mode = self._fit_or_reuse(
+                "ARIMA", df, ['price'], ARIMA_PARAMS,
+                full_fit=self._fit_arima_model,
+                incremental_fit=self._update_arima_model,
+                series_key=series_key
+            )
 
             forecast = fitted_model.forecast(days)
             values = forecast.values.tolist()
@@ -345,18 +546,79 @@ class ForecastEngine:
                 values=values,
                 confidence_lower=confidence_lower,
                 confidence_upper=confidence_upper,
-                model_name="ARIMA"
+                model_name="ARIMA",
+                fit_mode=fit_mode
             )
 
         except Exception as e:
             self.logger.error(f"ARIMA forecast failed: {str(e)}")
             raise
 
+    def _fit_es_model(self, df: pd.DataFrame) -> Any:
+        """Fit Holt-Winters exponential smoothing from scratch"""
+        ts_data = df.set_index('date')['price']
+        model = ExponentialSmoothing(ts_data, **ES_PARAMS)
+        return model.fit()
+
+    def _update_es_model(self, previous: Any, df: pd.DataFrame, offset: int, previous_length: int) -> Any:
+        """
+        Update a Holt-Winters fit with new observations
+
+        Keeps the previously estimated smoothing parameters and runs one
+        filtering pass, starting from the level and seasonal states the
+        previous fit had just before the new series begins. The initial
+        states are prepended to the filtered ones, so a window shifted by
+        fewer rows than one season is seeded the same way.
+        """
+        params = previous.params
+        seasonal_periods = ES_PARAMS['seasonal_periods']
+
+        # Index t of these arrays holds the state before observation t of the previous series
+        levels = np.concatenate(([params['initial_level']], np.asarray(previous.level)))
+        seasons = np.concatenate((np.asarray(params['initial_seasons']), np.asarray(previous.season)))
+        initial_level = levels[offset]
+        initial_seasonal = seasons[offset:offset + seasonal_periods]
+
+        ts_data = df.set_index('date')['price']
+        model = ExponentialSmoothing(
+            ts_data,
+            **ES_PARAMS,
+            initialization_method='known',
+            initial_level=initial_level,
+            initial_seasonal=initial_seasonal
+        )
+        return model.fit(
+            smoothing_level=params['smoothing_level'],
+            smoothing_seasonal=params['smoothing_seasonal'],
+            optimized=False
+        )
+
+    def _fit_arima_model(self, df: pd.DataFrame) -> Any:
+        """Fit ARIMA from scratch"""
+        ts_data = df.set_index('date')['price']
+        model = ARIMA(ts_data, **ARIMA_PARAMS)
+        return model.fit()
+
+    def _update_arima_model(self, previous: Any, df: pd.DataFrame, offset: int, previous_length: int) -> Any:
+        """
+        Update an ARIMA fit with new observations
+
+        Keeps the previously estimated parameters and re-runs the state-space
+        filter: appended rows go through ``append``, a shifted window through
+        ``apply``.
+        """
+        ts_data = df.set_index('date')['price']
+        if offset == 0:
+            return previous.append(ts_data.iloc[previous_length:], refit=False)
+        return previous.apply(ts_data, refit=False)
+
     def _generate_catboost_forecast(
         self,
         df: pd.DataFrame,
         days: int,
-        include_confidence: bool = True
+        include_confidence: bool = True,
+        series_key: Optional[str] = None,
+        product_id: Optional[str] = None
     ) -> ForecastResult:
         """CatBoost forecast with NDVI integration"""
         try:
@@ -371,82 +633,42 @@ class ForecastEngine:
 
             self.logger.info("Generating CatBoost forecast with NDVI integration")
 
-            # Prepare features for CatBoost
-            feature_df = df.copy()
-
-            # Add NDVI as a feature if available
-            if 'ndvi' in feature_df.columns:
-                self.logger.info("Using NDVI data in CatBoost forecast")
-                # NDVI is a leading indicator - shift it forward to predict future demand
-                feature_df['ndvi_leading'] = feature_df['ndvi'].shift(-7)  # 7-day lead time
-                feature_df['ndvi_trend'] = feature_df['ndvi'].rolling(7).mean()
-            else:
-                self.logger.info("No NDVI data available, using price-based features only")
-
-            # Create categorical features
-            feature_df['month'] = feature_df['date'].dt.month
-            feature_df['day_of_week'] = feature_df['date'].dt.dayofweek
-            feature_df['season'] = pd.cut(feature_df['date'].dt.month,
-                                        bins=[0, 3, 6, 9, 12],
-                                        labels=['Q1', 'Q2', 'Q3', 'Q4'])
-
-            # Select features for training
-            feature_cols = ['price', 'month', 'day_of_week', 'season']
-            if 'ndvi' in feature_df.columns:
-                feature_cols.extend(['ndvi', 'ndvi_leading', 'ndvi_trend'])
-
-            # Prepare training data
-            train_df = feature_df[feature_cols + ['quantity']].dropna()
-
-            if len(train_df) < 5:
-                raise ValueError("Insufficient training data after feature engineering")
-
-            X = train_df[feature_cols]
-            y = train_df['quantity']
-
-            # Convert categorical columns
-            cat_features = ['season']
-            if 'season' in X.columns:
-                X['season'] = X['season'].astype(str)
-
-            # Train CatBoost model
-            model = CatBoostRegressor(
-                iterations=100,
-                learning_rate=0.1,
-                depth=6,
-                verbose=False,
-                cat_features=cat_features if cat_features else None
-            )
-
-            model.fit(X, y)
-
-            # Generate forecast
-            last_features = X.iloc[-1:].copy()
+            # Serve a pretrained registry model when one covers this product
+            fitted = None
+            model_version = None
+            artifact = self._resolve_pretrained_catboost(product_id)
+            if artifact is not None:
+                try:
+                    fitted = self._pretrained_catboost_state(artifact, df)
+                    fit_mode = "pretrained"
+                    model_version = artifact.version
+                except ValueError as e:
+                    self.logger.warning(
+                        f"Pretrained CatBoost {artifact.name} unusable for {product_id}, fitting per request: {str(e)}"
+                    )
+
+            # Otherwise reuse or warm-start a previous fit of the series if available
+            if fitted is None:
+                catboost_params = self._get_catboost_params()
+                strategy = settings.CATBOOST_HORIZON_STRATEGY
+                fit_catboost = self._fit_catboost_direct_model if strategy == "direct" else self._fit_catboost_model
+                fitted, fit_mode = self._fit_or_reuse(
+                    "CatBoost", df, ['price', 'quantity', 'ndvi'], {**catboost_params, "horizon_strategy": strategy},
+                    full_fit=partial(fit_catboost, catboost_params=catboost_params),
+                    incremental_fit=partial(
+                        self._update_catboost_model, catboost_params=catboost_params, fit=fit_catboost
+                    ),
+                    series_key=series_key
+                )
 
-            # Update date-based features for future dates
-            values = []
-            for i in range(days):
-                # Update seasonal features
-                future_date = df['date'].max() + pd.Timedelta(days=i+1)
-                last_features['month'] = future_date.month
-                last_features['day_of_week'] = future_date.dayofweek
-                last_features['season'] = pd.cut([future_date.month], bins=[0, 3, 6, 9, 12],
-                                               labels=['Q1', 'Q2', 'Q3', 'Q4'])[0]
-
-                # Update NDVI if available (use recent trend)
-                if 'ndvi' in feature_df.columns:
-                    recent_ndvi = feature_df['ndvi'].tail(7).mean()
-                    last_features['ndvi'] = recent_ndvi
-                    last_features['ndvi_leading'] = recent_ndvi
-                    last_features['ndvi_trend'] = recent_ndvi
-
-                # Make prediction
-                pred = model.predict(last_features)[0]
-                values.append(float(max(0, pred)))  # Ensure non-negative
+            # Score the whole horizon with a single predict call
+            future_dates = pd.date_range(df['date'].max() + pd.Timedelta(days=1), periods=days, freq='D')
+            predictions = self._predict_catboost(fitted, future_dates)
+            values = np.maximum(predictions, 0).astype(float).tolist()  # Ensure non-negative
 
             # Simple confidence intervals based on historical variance
-            if include_confidence and len(y) > 1:
-                std_dev = y.std()
+            if include_confidence and fitted['train_size'] > 1:
+                std_dev = fitted['target_std']
                 confidence_lower = [max(0, v - std_dev) for v in values]
                 confidence_upper = [v + std_dev for v in values]
             else:
@@ -457,13 +679,350 @@ class ForecastEngine:
                 values=values,
                 confidence_lower=confidence_lower,
                 confidence_upper=confidence_upper,
-                model_name="CatBoost"
+                model_name="CatBoost",
+                fit_mode=fit_mode,
+                model_version=model_version
             )
 
         except Exception as e:
             self.logger.error(f"CatBoost forecast failed: {str(e)}")
             raise
 
+    def _resolve_pretrained_catboost(self, product_id: Optional[str]) -> Optional[ModelArtifact]:
+        """Look up the registry artifact serving a product, if the registry is enabled"""
+        if not settings.MODEL_REGISTRY_ENABLED:
+            return None
+        registry = get_model_registry()
+        # The lifespan runs the watcher in the API process; worker processes poll here instead
+        registry.refresh()
+        return registry.resolve(product_id)
+
+    def _pretrained_catboost_state(self, artifact: ModelArtifact, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Build forecasting state for a pretrained model without training
+
+        Args:
+            artifact: Registry artifact to serve
+            df: Historical data DataFrame
+
+        Returns:
+            Fitted CatBoost state in the shape produced by the fit functions
+
+        Raises:
+            ValueError: If the series cannot produce the features the model expects
+        """
+        if artifact.strategy == "direct":
+            features = self._build_catboost_direct_features(df)
+            available = features['feature_names']
+        else:
+            features = self._build_catboost_features(df)
+            available = list(features['X'].columns)
+
+        missing = [name for name in artifact.feature_names if name not in available]
+        if missing:
+            raise ValueError(f"series lacks features {missing}")
+
+        if artifact.strategy == "direct":
+            return {
+                'model': artifact.model,
+                'strategy': 'direct',
+                'feature_names': artifact.feature_names,
+                'origin_features': features['origin_features'],
+                'recent_quantity': features['recent_quantity'],
+                # Artifacts exported before the sidecar recorded it were trained on these offsets
+                'max_horizon': artifact.max_horizon or max(settings.CATBOOST_DIRECT_HORIZONS),
+                'target_std': features['target_std'],
+                'train_size': features['train_size']
+            }
+
+        return {
+            'model': artifact.model,
+            'last_features': features['last_features'][artifact.feature_names],
+            'recent_ndvi': features['recent_ndvi'],
+            'target_std': features['y'].std(),
+            'train_size': len(features['y'])
+        }
+
+    def _get_catboost_params(self) -> Dict[str, Any]:
+        """CatBoost hyperparameters used for serving-time fits"""
+        return {
+            "iterations": settings.CATBOOST_ITERATIONS,
+            "learning_rate": settings.CATBOOST_LEARNING_RATE,
+            "depth": settings.CATBOOST_DEPTH,
+            "verbose": settings.CATBOOST_VERBOSE
+        }
+
+    def _build_catboost_features(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Engineer CatBoost training features (last-features strategy)
+
+        Args:
+            df: Historical data DataFrame
+
+        Returns:
+            Dictionary with feature matrix X, target y and forecasting state
+        """
+        # Prepare features for CatBoost
+        feature_df = df.copy()
+
+        # Add NDVI as a feature if available
+        if 'ndvi' in feature_df.columns:
+            self.logger.info("Using NDVI data in CatBoost forecast")
+            # NDVI is a leading indicator - shift it forward to predict future demand
+            feature_df['ndvi_leading'] = feature_df['ndvi'].shift(-7)  # 7-day lead time
+            feature_df['ndvi_trend'] = feature_df['ndvi'].rolling(7).mean()
+        else:
+            self.logger.info("No NDVI data available, using price-based features only")
+
+        # Create categorical features
+        feature_df['month'] = feature_df['date'].dt.month
+        feature_df['day_of_week'] = feature_df['date'].dt.dayofweek
+        feature_df['season'] = _season_labels(feature_df['date'].dt.month)
+
+        # Select features for training
+        feature_cols = ['price', 'month', 'day_of_week', 'season']
+        if 'ndvi' in feature_df.columns:
+            feature_cols.extend(['ndvi', 'ndvi_leading', 'ndvi_trend'])
+
+        # Prepare training data
+        train_df = feature_df[feature_cols + ['quantity']].dropna()
+
+        if len(train_df) < 5:
+            raise ValueError("Insufficient training data after feature engineering")
+
+        X = train_df[feature_cols].copy()
+        y = train_df['quantity']
+
+        return {
+            'X': X,
+            'y': y,
+            'last_features': X.iloc[-1:].copy(),
+            'recent_ndvi': feature_df['ndvi'].tail(7).mean() if 'ndvi' in feature_df.columns else None
+        }
+
+    def _fit_catboost_model(
+        self,
+        df: pd.DataFrame,
+        catboost_params: Dict[str, Any],
+        init_model: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Engineer features and fit a CatBoost model
+
+        Args:
+            df: Historical data DataFrame
+            catboost_params: CatBoostRegressor hyperparameters
+            init_model: Previously fitted model to continue boosting from
+
+        Returns:
+            Dictionary with the fitted model and the state needed to forecast from it
+        """
+        features = self._build_catboost_features(df)
+        X, y = features['X'], features['y']
+
+        # Train CatBoost model
+        model = CatBoostRegressor(**catboost_params, cat_features=['season'])
+        model.fit(X, y, init_model=init_model)
+
+        return {
+            'model': model,
+            'last_features': features['last_features'],
+            'recent_ndvi': features['recent_ndvi'],
+            'target_std': y.std(),
+            'train_size': len(y)
+        }
+
+    def _build_catboost_direct_features(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Engineer direct multi-horizon training features
+
+        Each training row pairs the lag features known at an origin date with
+        the quantity observed ``horizon`` days later, so one model predicts
+        every horizon up to the longest trained one from the last observed
+        row without feeding predictions back in as lags (longer forecasts
+        continue recursively, see ``_predict_catboost``).
+
+        Args:
+            df: Historical data DataFrame
+
+        Returns:
+            Dictionary with feature matrix X, target y and forecasting state
+        """
+        quantity = df['quantity'].reset_index(drop=True)
+        dates = df['date'].values.astype('datetime64[D]')
+
+        # Features known at each origin date
+        origin = pd.DataFrame({
+            'price': df['price'].to_numpy(dtype=float),
+            'quantity_lag_0': quantity.values,
+            'quantity_lag_1': quantity.shift(1).values,
+            'quantity_lag_7': quantity.shift(7).values,
+            'quantity_rolling_mean_7': quantity.rolling(7).mean().values
+        })
+        if 'ndvi' in df.columns:
+            ndvi = df['ndvi'].reset_index(drop=True)
+            origin['ndvi'] = ndvi.values
+            origin['ndvi_trend'] = ndvi.rolling(7).mean().values
+
+        # Stack one block of (origin, target) pairs per row offset
+        origin_values = origin.to_numpy()
+        blocks = []
+        for step in settings.CATBOOST_DIRECT_HORIZONS:
+            if step >= len(df):
+                break
+            origin_idx = np.arange(len(df) - step)
+            target_idx = origin_idx + step
+            target_dates = pd.DatetimeIndex(dates[target_idx])
+            block = pd.DataFrame(origin_values[origin_idx], columns=origin.columns)
+            block['horizon'] = (dates[target_idx] - dates[origin_idx]).astype(np.int64)
+            block['month'] = target_dates.month
+            block['day_of_week'] = target_dates.dayofweek
+            block['season'] = _season_labels(target_dates.month)
+            block['quantity'] = quantity.values[target_idx]
+            blocks.append(block)
+
+        if not blocks:
+            raise ValueError("Insufficient data for direct multi-horizon CatBoost")
+
+        train_df = pd.concat(blocks, ignore_index=True).dropna()
+        if len(train_df) < 5:
+            raise ValueError("Insufficient training data after feature engineering")
+
+        feature_cols = list(origin.columns) + ['horizon', 'month', 'day_of_week', 'season']
+
+        return {
+            'X': train_df[feature_cols],
+            'y': train_df['quantity'],
+            'feature_names': feature_cols,
+            'origin_features': origin.iloc[-1:].reset_index(drop=True),
+            'recent_quantity': quantity.values[-DIRECT_LAG_WINDOW:].astype(float),
+            'max_horizon': int(train_df['horizon'].max()),
+            'target_std': quantity.std(),
+            'train_size': len(quantity)
+        }
+
+    def _fit_catboost_direct_model(
+        self,
+        df: pd.DataFrame,
+        catboost_params: Dict[str, Any],
+        init_model: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Fit a direct multi-horizon CatBoost model
+
+        Args:
+            df: Historical data DataFrame
+            catboost_params: CatBoostRegressor hyperparameters
+            init_model: Previously fitted model to continue boosting from
+
+        Returns:
+            Dictionary with the fitted model and the state needed to forecast from it
+        """
+        features = self._build_catboost_direct_features(df)
+
+        model = CatBoostRegressor(**catboost_params, cat_features=['season'])
+        model.fit(features['X'], features['y'], init_model=init_model)
+
+        return {
+            'model': model,
+            'strategy': 'direct',
+            'feature_names': features['feature_names'],
+            'origin_features': features['origin_features'],
+            'recent_quantity': features['recent_quantity'],
+            'max_horizon': features['max_horizon'],
+            'target_std': features['target_std'],
+            'train_size': features['train_size']
+        }
+
+    def _update_catboost_model(
+        self,
+        previous: Dict[str, Any],
+        df: pd.DataFrame,
+        offset: int,
+        previous_length: int,
+        catboost_params: Dict[str, Any],
+        fit: Optional[Callable[..., Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Warm-start CatBoost from the previous model with a few extra trees"""
+        fit = fit or self._fit_catboost_model
+        incremental_params = {**catboost_params, "iterations": settings.CATBOOST_INCREMENTAL_ITERATIONS}
+        return fit(df, incremental_params, init_model=previous['model'])
+
+    def _predict_catboost(self, fitted: Dict[str, Any], future_dates: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Predict every forecast date
+
+        The vectorized strategy, and the direct one within its longest trained
+        horizon, score the whole horizon with one predict call. Trees cannot
+        extrapolate past the horizons a direct model was trained on, so beyond
+        ``max_horizon`` the forecast continues recursively: the origin moves to
+        the last predicted day, its quantity lags are taken from the
+        predictions, and the next block of up to ``max_horizon`` days is
+        predicted from there.
+
+        Args:
+            fitted: Fitted CatBoost state
+            future_dates: Dates to forecast
+
+        Returns:
+            Raw predictions, one per date
+        """
+        model = fitted['model']
+        max_horizon = fitted.get('max_horizon')
+        if fitted.get('strategy') != 'direct' or not max_horizon or len(future_dates) <= max_horizon:
+            return model.predict(self._build_catboost_future_features(fitted, future_dates))
+
+        origin = fitted['origin_features']
+        # Observed then predicted quantities, NaN-padded so the lags always exist
+        history = np.concatenate([np.full(DIRECT_LAG_WINDOW, np.nan), fitted['recent_quantity']])
+        blocks = []
+        for start in range(0, len(future_dates), max_horizon):
+            block_dates = future_dates[start:start + max_horizon]
+            block = model.predict(self._build_catboost_future_features({**fitted, 'origin_features': origin}, block_dates))
+            blocks.append(block)
+            history = np.concatenate([history, block])[-DIRECT_LAG_WINDOW:]
+            origin = origin.copy()
+            origin['quantity_lag_0'] = history[-1]
+            origin['quantity_lag_1'] = history[-2]
+            origin['quantity_lag_7'] = history[-8]
+            origin['quantity_rolling_mean_7'] = history[-7:].mean()
+        return np.concatenate(blocks)
+
+    def _build_catboost_future_features(self, fitted: Dict[str, Any], future_dates: pd.DatetimeIndex) -> pd.DataFrame:
+        """
+        Build the feature matrix for every forecast date in one step
+
+        Args:
+            fitted: Fitted CatBoost state from _fit_catboost_model or _fit_catboost_direct_model
+            future_dates: Dates to forecast
+
+        Returns:
+            One feature row per future date, in training column order
+        """
+        days = len(future_dates)
+
+        if fitted.get('strategy') == 'direct':
+            base = fitted['origin_features']
+            future = base.loc[base.index.repeat(days)].reset_index(drop=True)
+            future['horizon'] = np.arange(1, days + 1)
+            feature_names = fitted['feature_names']
+        else:
+            base = fitted['last_features']
+            future = base.loc[base.index.repeat(days)].reset_index(drop=True)
+            feature_names = list(base.columns)
+
+            # Hold NDVI at its recent trend over the horizon
+            if fitted['recent_ndvi'] is not None:
+                future['ndvi'] = fitted['recent_ndvi']
+                future['ndvi_leading'] = fitted['recent_ndvi']
+                future['ndvi_trend'] = fitted['recent_ndvi']
+
+        future['month'] = future_dates.month
+        future['day_of_week'] = future_dates.dayofweek
+        future['season'] = _season_labels(future_dates.month)
+
+        return future[feature_names]
+
     def _generate_fallback_forecast(self, df: pd.DataFrame, days: int) -> ForecastResult:
         """Fallback forecast using simple average"""
         try:
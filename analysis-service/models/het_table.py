@@ -0,0 +1,287 @@
+"""
+HET (maximum retail price) table for fertilizer compliance checks
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+from utils.config import settings
+
+logger = setup_logger(__name__)
+
+NATIONAL_REGION = "*"  # Rows that apply wherever no regional price is set
+DATE_BITS = 20  # Low bits of the composite key hold days since 1970 (about 2870 years)
+REQUIRED_COLUMNS = ("product", "region", "effective_date", "het_price")
+
+@dataclass(frozen=True)
+class HETSnapshot:
+    """
+    One loaded version of the HET table
+
+    Rows are sorted by a composite int64 key
+    ``((product_code * n_regions + region_code) << DATE_BITS) | days`` so a
+    point-in-time lookup is one ``np.searchsorted`` for the last row at or
+    before the requested day, and a batch of lookups is one vectorized call.
+    Prices are Rp per kg.
+    """
+    products: Dict[str, int]
+    regions: Dict[str, int]
+    keys: np.ndarray    # int64, sorted
+    prices: np.ndarray  # float64, Rp/kg
+    source: str
+    mtime: float
+
+    @property
+    def row_count(self) -> int:
+        return int(self.keys.size)
+
+    def _codes(self, values: Sequence[Optional[str]], codes: Dict[str, int]) -> np.ndarray:
+        """Codes for names (case-insensitive); unknown names get -1"""
+        return np.fromiter(
+            (codes.get(str(v).strip().upper(), -1) if v is not None else -1 for v in values),
+            dtype=np.int64, count=len(values)
+        )
+
+    def _search(self, product_codes: np.ndarray, region_codes: np.ndarray, days: np.ndarray) -> np.ndarray:
+        """Price per row, NaN where no row for the product and region took effect by that day"""
+        group = product_codes * len(self.regions) + region_codes
+        query = (group << DATE_BITS) | days
+        index = np.searchsorted(self.keys, query, side="right") - 1
+        safe = np.clip(index, 0, None)
+        found = (index >= 0) & ((self.keys[safe] >> DATE_BITS) == group) & (product_codes >= 0) & (region_codes >= 0)
+        return np.where(found, self.prices[safe], np.nan)
+
+    def lookup_many(
+        self,
+        products: Sequence[str],
+        regions: Sequence[Optional[str]],
+        dates: Sequence[Any]
+    ) -> np.ndarray:
+        """
+        HET per kg for each (product, region, date), falling back to the national price
+
+        Args:
+            products: Product names (e.g. 'UREA')
+            regions: Region names, or None for the national price
+            dates: Dates (anything pandas parses; None means today)
+
+        Returns:
+            float64 array, NaN where the product has no HET in effect
+        """
+        count = len(products)
+        if count == 0 or self.keys.size == 0:
+            return np.full(count, np.nan)
+        product_codes = self._codes(products, self.products)
+        region_codes = self._codes(regions, self.regions)
+        days = to_days(dates)
+
+        prices = self._search(product_codes, region_codes, days)
+        national = self.regions.get(NATIONAL_REGION)
+        missing = np.isnan(prices)
+        if national is not None and missing.any():
+            prices[missing] = self._search(
+                product_codes[missing], np.full(int(missing.sum()), national, dtype=np.int64), days[missing]
+            )
+        return prices
+
+    def lookup(self, product: str, region: Optional[str] = None, date: Any = None) -> Optional[float]:
+        """HET per kg for one product, or None when none is in effect"""
+        price = self.lookup_many([product], [region], [date])[0]
+        return None if np.isnan(price) else float(price)
+
+def to_days(dates: Sequence[Any]) -> np.ndarray:
+    """Days since 1970 as int64; missing dates are today"""
+    days = None
+    if len(dates) and isinstance(dates[0], (str, type(None))):
+        # ISO date strings (what requests carry) convert fastest in NumPy
+        try:
+            days = np.array(dates, dtype="datetime64[D]")
+        except (ValueError, TypeError):
+            days = None
+    if days is None:
+        days = pd.to_datetime(pd.Series(list(dates), dtype=object), errors="coerce").to_numpy(dtype="datetime64[D]")
+    missing = np.isnat(days)
+    if missing.any():
+        days[missing] = np.datetime64("today", "D")
+    return days.astype(np.int64)
+
+def unit_kg(units: Sequence[Optional[str]]) -> np.ndarray:
+    """Kilograms per reported unit: HET_SACK_KG for sacks, 1 otherwise"""
+    return np.array([settings.HET_SACK_KG if unit == "sack" else 1.0 for unit in units], dtype=np.float64)
+
+def read_het_frame(path: str) -> pd.DataFrame:
+    """Read a HET table from CSV or Parquet"""
+    if path.endswith(".parquet"):
+        frame = pd.read_parquet(path)
+    else:
+        frame = pd.read_csv(path, dtype={"product": str, "region": str})
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValueError(f"HET table {path} is missing columns: {', '.join(missing)}")
+    return frame
+
+def build_snapshot(frame: pd.DataFrame, source: str = "", mtime: float = 0.0) -> HETSnapshot:
+    """
+    Index a HET frame
+
+    Args:
+        frame: Columns product, region ('*' for national), effective_date, het_price (Rp/kg)
+        source: File the frame was read from
+        mtime: Modification time of the file
+
+    Returns:
+        HETSnapshot
+    """
+    frame = frame.dropna(subset=["product", "effective_date", "het_price"]).copy()
+    frame["product"] = frame["product"].astype(str).str.strip().str.upper()
+    frame["region"] = frame["region"].fillna(NATIONAL_REGION).astype(str).str.strip().str.upper()
+    frame["days"] = pd.to_datetime(frame["effective_date"]).to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+    products = {name: code for code, name in enumerate(sorted(frame["product"].unique()))}
+    regions = {name: code for code, name in enumerate(sorted(frame["region"].unique()))}
+    group = frame["product"].map(products).to_numpy(np.int64) * len(regions) + frame["region"].map(regions).to_numpy(np.int64)
+    keys = (group << DATE_BITS) | frame["days"].to_numpy(np.int64)
+    prices = frame["het_price"].to_numpy(np.float64)
+
+    # Sort by key; a later row for the same product, region and day replaces an earlier one
+    order = np.argsort(keys, kind="stable")
+    keys, prices = keys[order], prices[order]
+    last = np.append(keys[1:] != keys[:-1], True)
+    return HETSnapshot(products, regions, keys[last], prices[last], source, mtime)
+
+class HETTable:
+    """
+    HET table loaded from a CSV or Parquet file and reloaded when it changes
+
+    Readers use the current immutable ``HETSnapshot``; a reload builds a new
+    snapshot and swaps the reference, so lookups never see a partial table.
+    """
+
+    def __init__(self, path: str, reload_seconds: float = 30):
+        self.logger = logger
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self.snapshot: Optional[HETSnapshot] = None
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.reloads = 0
+
+    def load(self) -> bool:
+        """
+        (Re)load the table if the file changed since the last load
+
+        Returns:
+            True if a new snapshot was loaded
+        """
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            if self.snapshot is None:
+                self.logger.warning(f"HET table {self.path} not found - price lookups disabled")
+            return False
+        if self.snapshot is not None and self.snapshot.mtime == mtime:
+            return False
+        try:
+            snapshot = build_snapshot(read_het_frame(self.path), self.path, mtime)
+        except Exception as e:
+            self.logger.error(f"Failed to load HET table {self.path}: {str(e)}")
+            return False
+        self.snapshot = snapshot
+        self.reloads += 1
+        self.logger.info(f"Loaded HET table {self.path}: {snapshot.row_count} prices, "
+                         f"{len(snapshot.products)} products, {len(snapshot.regions)} regions")
+        return True
+
+    def start_watcher(self) -> None:
+        """Poll the file for changes"""
+        if self._watcher is not None or self.reload_seconds <= 0:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="het-table-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        """Stop the hot-reload thread"""
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.reload_seconds):
+            self.load()
+
+    def lookup(self, product: str, region: Optional[str] = None, date: Any = None) -> Optional[float]:
+        """HET in Rp/kg for a product in a region on a date (national price if no regional one)"""
+        snapshot = self.snapshot
+        return snapshot.lookup(product, region, date) if snapshot is not None else None
+
+    def check_items(self, items: List[Dict[str, Any]], tolerance: float = 0.0) -> Dict[str, np.ndarray]:
+        """
+        Compare item prices against the HET in one vectorized pass
+
+        Args:
+            items: Dicts with product/name, region, date, unit and price (Rp per unit)
+            tolerance: Fraction above the HET still accepted
+
+        Returns:
+            Arrays het_price (Rp per the item's unit, NaN when unknown),
+            violation (bool) and overcharge (Rp per unit, 0 when compliant)
+        """
+        snapshot = self.snapshot
+        count = len(items)
+        if snapshot is None:
+            het = np.full(count, np.nan)
+        else:
+            het = snapshot.lookup_many(
+                [item.get("product") or item.get("name") for item in items],
+                [item.get("region") for item in items],
+                [item.get("date") for item in items]
+            ) * unit_kg([item.get("unit") for item in items])
+        prices = np.array([item.get("price") or 0.0 for item in items], dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            violation = prices > het * (1 + tolerance)
+        overcharge = np.where(violation, prices - het, 0.0)
+        return {"het_price": het, "violation": violation, "overcharge": overcharge}
+
+    def fill_prices(self, items: List[Dict[str, Any]], region: Optional[str] = None, date: Any = None) -> List[Dict[str, Any]]:
+        """Set each parsed item's missing price to the HET for its unit (left at 0 when unknown)"""
+        snapshot = self.snapshot
+        if snapshot is None or not items:
+            return items
+        het = snapshot.lookup_many(
+            [item["name"] for item in items], [region] * len(items), [date] * len(items)
+        ) * unit_kg([item.get("unit") for item in items])
+        for item, price in zip(items, het):
+            if not item.get("price") and not np.isnan(price):
+                item["price"] = float(price)
+        return items
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self.snapshot
+        return {
+            "source": self.path,
+            "loaded": snapshot is not None,
+            "rows": snapshot.row_count if snapshot is not None else 0,
+            "products": sorted(snapshot.products) if snapshot is not None else [],
+            "regions": len(snapshot.regions) if snapshot is not None else 0,
+            "reloads": self.reloads
+        }
+
+_het_table: Optional[HETTable] = None
+_het_table_lock = threading.Lock()
+
+def get_het_table() -> HETTable:
+    """Return the process-wide HET table, loading it on first use"""
+    global _het_table
+    with _het_table_lock:
+        if _het_table is None:
+            _het_table = HETTable(settings.HET_TABLE_PATH, reload_seconds=settings.HET_RELOAD_SECONDS)
+            _het_table.load()
+        return _het_table
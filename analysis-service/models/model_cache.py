@@ -0,0 +1,268 @@
+"""
+Fitted model cache for Pukpuk Analysis Service
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+# Import joblib (optional, only needed for disk spill)
+joblib_available = True
+try:
+    import joblib
+except ImportError:
+    joblib_available = False
+
+from utils.logger import setup_logger
+from utils.config import settings
+
+logger = setup_logger(__name__)
+
+@dataclass
+class CacheEntry:
+    """A fitted model and the time it was stored"""
+    model: Any
+    created_at: float
+
+def series_fingerprint(arrays: Iterable[np.ndarray]) -> str:
+    """Hash the raw bytes of one or more series into a stable fingerprint"""
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str(array.dtype).encode())
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+def make_cache_key(model_name: str, fingerprint: str, params: Dict[str, Any]) -> str:
+    """Build a cache key from model name, hyperparameters and series fingerprint"""
+    params_part = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.blake2b(
+        f"{model_name}|{params_part}|{fingerprint}".encode(),
+        digest_size=16
+    ).hexdigest()
+
+SPILL_SWEEP_SECONDS = 60  # Least time between spill directory sweeps while under budget
+
+class FittedModelCache:
+    """
+    LRU/TTL cache of fitted forecasting models with optional joblib spill to disk
+
+    Spilled files are swept at startup and, on writes, at most once every
+    ``SPILL_SWEEP_SECONDS`` or as soon as the directory exceeds
+    ``max_spill_bytes``: expired files are deleted, then the oldest ones until
+    the directory is back under budget.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 3600,
+        spill_dir: Optional[str] = None,
+        max_spill_bytes: Optional[int] = None
+    ):
+        self.logger = logger
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.spill_dir = spill_dir if spill_dir and joblib_available else None
+        self.max_spill_bytes = max_spill_bytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.spill_bytes = 0
+        self.spill_removed = 0
+        self._swept_at = 0.0
+
+        if spill_dir and not joblib_available:
+            self.logger.warning("joblib not available - model cache disk spill disabled")
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            self.sweep_disk()
+
+    def get(self, key: str, track_stats: bool = True) -> Optional[Any]:
+        """
+        Look up a fitted model
+
+        Args:
+            key: Cache key from make_cache_key
+            track_stats: Count this lookup in the hit/miss counters
+
+        Returns:
+            Fitted model, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry.created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    if track_stats:
+                        self.hits += 1
+                    return entry.model
+                del self._entries[key]
+                self.evictions += 1
+
+        model = self._load_from_disk(key, now)
+        with self._lock:
+            if model is None:
+                if track_stats:
+                    self.misses += 1
+                return None
+            if track_stats:
+                self.hits += 1
+                self.disk_hits += 1
+        self._store(key, CacheEntry(model=model, created_at=now))
+        return model
+
+    def put(self, key: str, model: Any) -> None:
+        """
+        Store a fitted model
+
+        Args:
+            key: Cache key from make_cache_key
+            model: Fitted model object
+        """
+        self._store(key, CacheEntry(model=model, created_at=time.time()))
+        self._write_to_disk(key, model)
+
+    def clear(self) -> None:
+        """Drop all in-memory entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit, miss and eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "spill_dir": self.spill_dir,
+                "spill_bytes": self.spill_bytes,
+                "max_spill_bytes": self.max_spill_bytes,
+                "spill_removed": self.spill_removed
+            }
+
+    def sweep_disk(self) -> int:
+        """
+        Delete expired spill files, then the oldest ones over the size budget
+
+        Files whose key is never looked up again would otherwise stay forever.
+        Several processes may share the directory, so files that vanish
+        mid-sweep are skipped.
+
+        Returns:
+            Number of files removed
+        """
+        if not self.spill_dir:
+            return 0
+        with self._sweep_lock:
+            now = time.time()
+            files = []
+            for entry in os.scandir(self.spill_dir):
+                if not entry.name.endswith(".joblib"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+            files.sort()  # Oldest first
+            total = sum(size for _, size, _ in files)
+            removed = 0
+            for mtime, size, path in files:
+                over_budget = self.max_spill_bytes is not None and total > self.max_spill_bytes
+                if now - mtime <= self.ttl_seconds and not over_budget:
+                    break  # Sorted by age, so every remaining file is newer
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+            self.spill_bytes = total
+            self.spill_removed += removed
+            self._swept_at = now
+        if removed:
+            self.logger.info(f"Model cache sweep removed {removed} spilled models, {total} bytes left")
+        return removed
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        """Insert an entry and evict least recently used ones over capacity"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _spill_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, f"{key}.joblib")
+
+    def _write_to_disk(self, key: str, model: Any) -> None:
+        """Persist a fitted model so it survives eviction and restarts"""
+        if not self.spill_dir:
+            return
+        try:
+            path = self._spill_path(key)
+            joblib.dump(model, path)
+            self.spill_bytes += os.path.getsize(path)
+        except Exception as e:
+            self.logger.warning(f"Model cache spill failed for {key}: {str(e)}")
+            return
+        over_budget = self.max_spill_bytes is not None and self.spill_bytes > self.max_spill_bytes
+        if over_budget or time.time() - self._swept_at >= SPILL_SWEEP_SECONDS:
+            self.sweep_disk()
+
+    def _load_from_disk(self, key: str, now: float) -> Optional[Any]:
+        """Load a spilled model if present and not expired"""
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        try:
+            if not os.path.exists(path):
+                return None
+            if now - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                return None
+            return joblib.load(path)
+        except Exception as e:
+            self.logger.warning(f"Model cache load failed for {key}: {str(e)}")
+            return None
+
+# Global cache shared by all forecast engines in this process
+_model_cache: Optional[FittedModelCache] = None
+_model_cache_lock = threading.Lock()
+
+def get_model_cache() -> FittedModelCache:
+    """Return the process-wide fitted model cache, creating it on first use"""
+    global _model_cache
+    with _model_cache_lock:
+        if _model_cache is None:
+            _model_cache = FittedModelCache(
+                max_entries=settings.MODEL_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.MODEL_CACHE_TTL_SECONDS,
+                spill_dir=settings.MODEL_CACHE_DIR,
+                max_spill_bytes=settings.MODEL_CACHE_DIR_MAX_MB * 1024 * 1024
+            )
+        return _model_cache
@@ -0,0 +1,302 @@
+"""
+Pretrained CatBoost model registry for Pukpuk Analysis Service
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.logger import setup_logger
+from utils.config import settings
+
+logger = setup_logger(__name__)
+
+# Features the serving path can build, per horizon strategy
+SERVING_FEATURES = {
+    "vectorized": {"price", "month", "day_of_week", "season", "ndvi", "ndvi_leading", "ndvi_trend"},
+    "direct": {
+        "price", "quantity_lag_0", "quantity_lag_1", "quantity_lag_7", "quantity_rolling_mean_7",
+        "ndvi", "ndvi_trend", "horizon", "month", "day_of_week", "season"
+    }
+}
+
+VERSION_PART = re.compile(r"\d+|[a-z]+")
+
+def version_key(version: str) -> Tuple[Tuple[int, Any], ...]:
+    """
+    Sort key for artifact versions
+
+    Numeric runs compare as numbers and letter runs as text, separators are
+    ignored, so "2024.10.1" > "2024.9.1", "v10" > "v9" and timestamps such
+    as "20240601120000" order by time.
+    """
+    # Tag numbers and words so they never compare with each other
+    return tuple(
+        (1, int(part)) if part.isdigit() else (0, part)
+        for part in VERSION_PART.findall(version.lower())
+    )
+
+@dataclass
+class ModelArtifact:
+    """A loaded pretrained CatBoost model and its sidecar metadata"""
+    name: str
+    version: str
+    scope: str  # 'global', 'product' or 'category'
+    scope_id: Optional[str]
+    strategy: str
+    feature_names: List[str]
+    model: Any
+    path: str
+    products: List[str] = field(default_factory=list)
+    training_date: Optional[str] = None
+    max_horizon: Optional[int] = None  # Longest horizon a direct model was trained on
+    loaded_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+    def describe(self) -> Dict[str, Any]:
+        """Summary used by the /models endpoint"""
+        return {
+            "name": self.name,
+            "version": self.version,
+            "scope": self.scope,
+            "scope_id": self.scope_id,
+            "strategy": self.strategy,
+            "feature_names": self.feature_names,
+            "training_date": self.training_date,
+            "loaded_at": self.loaded_at
+        }
+
+class ModelRegistry:
+    """
+    Versioned pretrained CatBoost artifacts loaded from a directory
+
+    Each artifact is a native CatBoost ``<name>.cbm`` file with a
+    ``<name>.json`` sidecar::
+
+        {"version": "2024.06.01", "scope": "product", "scope_id": "urea",
+         "strategy": "vectorized", "feature_names": ["price", "month", ...]}
+
+    ``scope`` is ``global``, ``product`` (scope_id is a product id) or
+    ``category`` (scope_id names the category, ``products`` lists members).
+    The newest version per scope wins. Direct-strategy artifacts also record
+    ``max_horizon``, the longest horizon they were trained on.
+    """
+
+    def __init__(self, registry_dir: str, reload_seconds: float = 30):
+        self.logger = logger
+        self.registry_dir = registry_dir
+        self.reload_seconds = reload_seconds
+        self._artifacts: Dict[str, ModelArtifact] = {}
+        self._signatures: Dict[str, Tuple[float, int, float, int]] = {}
+        self._lock = threading.Lock()
+        self._scan_lock = threading.Lock()
+        self._watcher_lock = threading.Lock()
+        self._scanned_at = -math.inf
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def load(self) -> int:
+        """
+        Scan the registry directory and (re)load new or changed artifacts
+
+        Returns:
+            Number of artifacts loaded or reloaded
+        """
+        with self._scan_lock:
+            self._scanned_at = time.monotonic()
+            return self._scan()
+
+    def refresh(self) -> int:
+        """
+        Reload changed artifacts if the last scan is older than reload_seconds
+
+        For processes without a watcher thread (forecast workers of the
+        process backend). A scan already running in another thread is not
+        waited for.
+
+        Returns:
+            Number of artifacts loaded or reloaded
+        """
+        if self.reload_seconds <= 0 or time.monotonic() - self._scanned_at < self.reload_seconds:
+            return 0
+        if not self._scan_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._scanned_at = time.monotonic()
+            return self._scan()
+        finally:
+            self._scan_lock.release()
+
+    def _scan(self) -> int:
+        # Caller holds _scan_lock
+        if not os.path.isdir(self.registry_dir):
+            return 0
+
+        names = sorted(
+            os.path.splitext(f)[0] for f in os.listdir(self.registry_dir) if f.endswith(".cbm")
+        )
+        loaded = 0
+        seen = set()
+
+        for name in names:
+            model_path = os.path.join(self.registry_dir, f"{name}.cbm")
+            meta_path = os.path.join(self.registry_dir, f"{name}.json")
+            if not os.path.exists(meta_path):
+                self.logger.warning(f"Skipping model artifact {name}: missing {name}.json sidecar")
+                continue
+
+            seen.add(name)
+            signature = self._signature(model_path, meta_path)
+            if self._signatures.get(name) == signature:
+                continue
+
+            artifact = self._load_artifact(name, model_path, meta_path)
+            self._signatures[name] = signature
+            with self._lock:
+                if artifact is None:
+                    self._artifacts.pop(name, None)
+                else:
+                    self._artifacts[name] = artifact
+                    loaded += 1
+
+        # Drop artifacts whose files were removed
+        with self._lock:
+            for name in list(self._artifacts):
+                if name not in seen:
+                    self.logger.info(f"Unloading removed model artifact {name}")
+                    del self._artifacts[name]
+        for name in list(self._signatures):
+            if name not in seen:
+                del self._signatures[name]
+
+        if loaded:
+            self.logger.info(f"Loaded {loaded} CatBoost artifact(s) from {self.registry_dir}")
+        return loaded
+
+    def resolve(self, product_id: Optional[str]) -> Optional[ModelArtifact]:
+        """
+        Find the artifact that serves a product
+
+        Product-scoped artifacts win over category-scoped ones, which win over
+        global ones. Within a scope the newest version (by ``version_key``)
+        is used.
+        """
+        with self._lock:
+            artifacts = list(self._artifacts.values())
+
+        candidates = {"product": [], "category": [], "global": []}
+        for artifact in artifacts:
+            if artifact.scope == "product" and product_id and artifact.scope_id == product_id:
+                candidates["product"].append(artifact)
+            elif artifact.scope == "category" and product_id and product_id in artifact.products:
+                candidates["category"].append(artifact)
+            elif artifact.scope == "global":
+                candidates["global"].append(artifact)
+
+        for scope in ("product", "category", "global"):
+            if candidates[scope]:
+                return max(candidates[scope], key=lambda a: (version_key(a.version), a.name))
+        return None
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """Describe every loaded artifact"""
+        with self._lock:
+            return [a.describe() for a in sorted(self._artifacts.values(), key=lambda a: (a.scope, a.name))]
+
+    def start_watcher(self) -> None:
+        """Poll the registry directory for new or changed artifacts"""
+        with self._watcher_lock:
+            if self._watcher is not None or self.reload_seconds <= 0:
+                return
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name="model-registry-watcher", daemon=True)
+            self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        """Stop the hot-reload thread"""
+        with self._watcher_lock:
+            self._stop.set()
+            if self._watcher is not None:
+                self._watcher.join(timeout=5)
+                self._watcher = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.reload_seconds):
+            try:
+                self.load()
+            except Exception as e:
+                self.logger.error(f"Model registry reload failed: {str(e)}")
+
+    def _signature(self, model_path: str, meta_path: str) -> Tuple[float, int, float, int]:
+        model_stat = os.stat(model_path)
+        meta_stat = os.stat(meta_path)
+        return (model_stat.st_mtime, model_stat.st_size, meta_stat.st_mtime, meta_stat.st_size)
+
+    def _load_artifact(self, name: str, model_path: str, meta_path: str) -> Optional[ModelArtifact]:
+        """Load and validate one artifact, returning None if it cannot serve"""
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+
+            strategy = meta.get("strategy", "vectorized")
+            feature_names = list(meta.get("feature_names", []))
+            scope = meta.get("scope", "global")
+
+            if strategy not in SERVING_FEATURES:
+                raise ValueError(f"unknown strategy '{strategy}'")
+            if scope not in ("global", "product", "category"):
+                raise ValueError(f"unknown scope '{scope}'")
+            unsupported = set(feature_names) - SERVING_FEATURES[strategy]
+            if not feature_names or unsupported:
+                raise ValueError(f"features not produced by the serving path: {sorted(unsupported)}")
+
+            from catboost import CatBoostRegressor
+
+            model = CatBoostRegressor()
+            model.load_model(model_path, format="cbm")
+
+            if list(model.feature_names_) != feature_names:
+                raise ValueError(
+                    f"model features {list(model.feature_names_)} do not match sidecar {feature_names}"
+                )
+
+            artifact = ModelArtifact(
+                name=name,
+                version=str(meta.get("version", "0")),
+                scope=scope,
+                scope_id=meta.get("scope_id"),
+                strategy=strategy,
+                feature_names=feature_names,
+                model=model,
+                path=model_path,
+                products=list(meta.get("products", [])),
+                training_date=meta.get("training_date"),
+                max_horizon=int(meta["max_horizon"]) if meta.get("max_horizon") else None
+            )
+            self.logger.info(f"Loaded model artifact {name} version {artifact.version} ({scope})")
+            return artifact
+
+        except Exception as e:
+            self.logger.error(f"Rejected model artifact {name}: {str(e)}")
+            return None
+
+# Process-wide registry
+_model_registry: Optional[ModelRegistry] = None
+_model_registry_lock = threading.Lock()
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide model registry, loading it on first use"""
+    global _model_registry
+    with _model_registry_lock:
+        if _model_registry is None:
+            _model_registry = ModelRegistry(
+                registry_dir=settings.MODEL_REGISTRY_DIR,
+                reload_seconds=settings.MODEL_REGISTRY_RELOAD_SECONDS
+            )
+            _model_registry.load()
+        return _model_registry
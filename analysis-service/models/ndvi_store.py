@@ -0,0 +1,364 @@
+"""
+Grid-cell NDVI time series: synthetic generator and memory-mapped store
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+from utils.config import settings
+
+logger = setup_logger(__name__)
+
+# Day flags in the store
+MISSING, SYNTHETIC, SATELLITE = 0, 1, 2
+SOURCE_DTYPE = pd.CategoricalDtype(["synthetic", "satellite"])  # Codes are flag - SYNTHETIC
+
+def grid_cell(lat: float, lng: float, resolution: float) -> Tuple[int, int]:
+    """Grid cell (row, col) of a coordinate on a ``resolution``-degree grid"""
+    return int(round(lat / resolution)), int(round(lng / resolution))
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer: a well-mixed uint64 hash of each element"""
+    with np.errstate(over="ignore"):
+        z = x + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+def synthetic_ndvi(cell: Tuple[int, int], lat: float, days: np.ndarray) -> np.ndarray:
+    """
+    Synthetic NDVI for a grid cell on the given days
+
+    Seasonal base (higher in the wet season) plus a latitude offset and
+    N(0, 0.1) noise. The noise is a hash of the cell and the day rather than
+    a random draw, so a day has the same value in any requested range and
+    forecasts for a location are reproducible.
+
+    Args:
+        cell: Grid cell (row, col)
+        lat: Latitude used for the location offset (the cell centre)
+        days: Days since 1970 (int64)
+
+    Returns:
+        float64 NDVI in [-1, 1], rounded to 4 decimals
+    """
+    days = np.asarray(days, dtype=np.int64)
+    day_of_year = (days - days.astype("datetime64[D]").astype("datetime64[Y]").astype("datetime64[D]").astype(np.int64)) + 1
+    base = 0.3 + 0.4 * np.sin(2 * np.pi * day_of_year / 365)
+
+    seed = np.uint64(((cell[0] & 0xFFFFFFFF) << 32) | (cell[1] & 0xFFFFFFFF))
+    first = _splitmix64(seed ^ (days.astype(np.uint64) << np.uint64(1)))
+    second = _splitmix64(first)
+    # Box-Muller on two uniforms from the top 53 bits; u1 is in (0, 1]
+    u1 = ((first >> np.uint64(11)).astype(np.float64) + 1.0) / 2.0 ** 53
+    u2 = (second >> np.uint64(11)).astype(np.float64) / 2.0 ** 53
+    noise = 0.1 * np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+
+    location_factor = (lat - (-6.2)) * 0.01  # Slight variation by latitude
+    return np.round(np.clip(base + noise + location_factor, -1, 1), 4)
+
+def to_day_range(start_date: str, end_date: str) -> np.ndarray:
+    """Days since 1970 from start_date to end_date inclusive"""
+    start = np.datetime64(pd.Timestamp(start_date).date(), "D").astype(np.int64)
+    end = np.datetime64(pd.Timestamp(end_date).date(), "D").astype(np.int64)
+    return np.arange(start, end + 1, dtype=np.int64)
+
+class NDVIStore:
+    """
+    Daily NDVI per grid cell, stored in memory-mapped files
+
+    Coordinates are snapped to a ``resolution``-degree grid. Each cell owns
+    one row of a float32 ``values.f4`` matrix and a uint8 ``flags.u1``
+    matrix (missing, synthetic or satellite) covering every day from
+    ``start_date`` to ``end_date``; the cell-to-row map lives in
+    ``cells.json``. A request reads its day slice and generates only the
+    days not stored yet, so overlapping date ranges reuse the cached days.
+    Satellite observations written with ``write`` replace synthetic values
+    for their days. Days outside the store window are generated on the fly.
+
+    The matrices double in rows as cells are added, up to ``max_cells``;
+    beyond that the least recently used cells are evicted and their rows
+    reused. The registry is persisted at most every ``persist_seconds`` (and
+    on ``flush``). The store is meant for a single writer process.
+    """
+
+    def __init__(
+        self,
+        store_dir: str,
+        resolution: float = 0.05,
+        start_date: str = "2000-01-01",
+        end_date: str = "2059-12-31",
+        max_cells: int = 4096,
+        initial_capacity: int = 64,
+        persist_seconds: float = 30.0
+    ):
+        self.logger = logger
+        self.store_dir = store_dir
+        self.resolution = resolution
+        self.first_day = int(to_day_range(start_date, start_date)[0])
+        self.days = int(to_day_range(start_date, end_date).size)
+        self.max_cells = max_cells
+        self.persist_seconds = persist_seconds
+        self._lock = threading.Lock()
+        self._cells: Dict[str, Dict[str, Any]] = {}  # key -> {"row", "last_used"}
+        self._free_rows: List[int] = []
+        self._capacity = 0
+        self._values: Optional[np.memmap] = None
+        self._flags: Optional[np.memmap] = None
+        self._dirty = False
+        self._persisted_at = time.time()
+
+        self.days_served = 0
+        self.days_generated = 0
+        self.satellite_days = 0
+        self.evictions = 0
+
+        os.makedirs(store_dir, exist_ok=True)
+        self._load(initial_capacity)
+
+    @property
+    def values_path(self) -> str:
+        return os.path.join(self.store_dir, "values.f4")
+
+    @property
+    def flags_path(self) -> str:
+        return os.path.join(self.store_dir, "flags.u1")
+
+    @property
+    def registry_path(self) -> str:
+        return os.path.join(self.store_dir, "cells.json")
+
+    def _fingerprint(self) -> Dict[str, Any]:
+        return {"resolution": self.resolution, "first_day": self.first_day, "days": self.days}
+
+    def cell_center(self, cell: Tuple[int, int]) -> Tuple[float, float]:
+        return cell[0] * self.resolution, cell[1] * self.resolution
+
+    def series(self, lat: float, lng: float, start_date: str, end_date: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Daily NDVI for the grid cell containing a coordinate
+
+        Args:
+            lat: Latitude
+            lng: Longitude
+            start_date: Start date (YYYY-MM-DD)
+            end_date: End date (YYYY-MM-DD), inclusive
+
+        Returns:
+            Days since 1970 (int64), NDVI values (float64) and day flags
+            (uint8: SYNTHETIC or SATELLITE)
+        """
+        cell = grid_cell(lat, lng, self.resolution)
+        center_lat = self.cell_center(cell)[0]
+        days = to_day_range(start_date, end_date)
+        offsets = days - self.first_day
+        inside = (offsets >= 0) & (offsets < self.days)
+        values = np.empty(days.size)
+        flags = np.full(days.size, SYNTHETIC, dtype=np.uint8)
+
+        with self._lock:
+            if inside.any():
+                lo, hi = int(offsets[inside][0]), int(offsets[inside][-1]) + 1
+                row = self._row(cell)
+                stored_flags = np.asarray(self._flags[row, lo:hi])
+                stored_values = np.asarray(self._values[row, lo:hi], dtype=np.float64)
+                missing = stored_flags == MISSING
+                if missing.any():
+                    generated = synthetic_ndvi(cell, center_lat, np.arange(lo, hi)[missing] + self.first_day)
+                    stored_values[missing] = generated
+                    stored_flags = stored_flags.copy()
+                    stored_flags[missing] = SYNTHETIC
+                    missing_offsets = np.flatnonzero(missing) + lo
+                    self._values[row, missing_offsets] = generated
+                    self._flags[row, missing_offsets] = SYNTHETIC
+                    self.days_generated += int(missing.sum())
+                    self._dirty = True
+                values[inside] = np.round(stored_values, 4)
+                flags[inside] = stored_flags
+                self.days_served += hi - lo
+            self._maybe_persist()
+
+        if not inside.all():
+            values[~inside] = synthetic_ndvi(cell, center_lat, days[~inside])
+        return days, values, flags
+
+    def frame(self, lat: float, lng: float, start_date: str, end_date: str) -> pd.DataFrame:
+        """``series`` as a DataFrame with date, ndvi, latitude, longitude and source columns"""
+        days, values, flags = self.series(lat, lng, start_date, end_date)
+        return pd.DataFrame({
+            "date": days.astype("datetime64[D]").astype("datetime64[ns]"),
+            "ndvi": values,
+            "latitude": lat,
+            "longitude": lng,
+            "source": pd.Categorical.from_codes(flags.astype(np.int8) - SYNTHETIC, dtype=SOURCE_DTYPE)
+        })
+
+    def write(self, lats: Sequence[float], lngs: Sequence[float], dates: Sequence[Any], values: Sequence[float]) -> int:
+        """
+        Store satellite NDVI observations, replacing synthetic values for their days
+
+        Args:
+            lats: Latitudes
+            lngs: Longitudes
+            dates: Observation dates
+            values: NDVI values in [-1, 1]
+
+        Returns:
+            Number of observations stored (those outside the store window are skipped)
+        """
+        days = pd.to_datetime(pd.Series(list(dates))).to_numpy(dtype="datetime64[D]").astype(np.int64)
+        values = np.clip(np.asarray(values, dtype=np.float64), -1, 1)
+        offsets = days - self.first_day
+        inside = (offsets >= 0) & (offsets < self.days)
+        cells = [grid_cell(lat, lng, self.resolution) for lat, lng in zip(lats, lngs)]
+        with self._lock:
+            rows = np.array([self._row(cell) if keep else -1 for cell, keep in zip(cells, inside)], dtype=np.intp)
+            self._values[rows[inside], offsets[inside]] = values[inside]
+            self._flags[rows[inside], offsets[inside]] = SATELLITE
+            stored = int(inside.sum())
+            self.satellite_days += stored
+            self._dirty = True
+            self._maybe_persist()
+        return stored
+
+    def flush(self) -> None:
+        """Persist the matrices and registry to disk"""
+        with self._lock:
+            if self._dirty:
+                self._persist()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cells": len(self._cells),
+                "capacity": self._capacity,
+                "max_cells": self.max_cells,
+                "resolution_degrees": self.resolution,
+                "days_served": self.days_served,
+                "days_generated": self.days_generated,
+                "reuse_rate": round(1 - self.days_generated / self.days_served, 4) if self.days_served else 0.0,
+                "satellite_days": self.satellite_days,
+                "evictions": self.evictions,
+                "store_dir": self.store_dir
+            }
+
+    def _row(self, cell: Tuple[int, int]) -> int:
+        """Row of a cell, assigning one (and evicting the least recently used cell) if needed"""
+        key = f"{cell[0]}:{cell[1]}"
+        entry = self._cells.get(key)
+        now = time.time()
+        if entry is None:
+            if len(self._cells) >= self.max_cells:
+                oldest = min(self._cells, key=lambda k: self._cells[k]["last_used"])
+                self._free_rows.append(self._cells.pop(oldest)["row"])
+                self.evictions += 1
+                self._persist()  # Record the eviction before its row is overwritten
+            if not self._free_rows:
+                used = len(self._cells)
+                if used >= self._capacity:
+                    self._grow(used + 1)
+                self._free_rows.append(used)
+            row = self._free_rows.pop()
+            # The row may hold an evicted or unregistered cell's days
+            self._flags[row, :] = MISSING
+            entry = self._cells[key] = {"row": row, "last_used": now}
+            self._dirty = True
+        entry["last_used"] = now
+        return entry["row"]
+
+    def _grow(self, required: int) -> None:
+        """Double the row capacity until it fits ``required`` cells"""
+        capacity = max(self._capacity, 1)
+        while capacity < required:
+            capacity *= 2
+        capacity = min(capacity, max(self.max_cells, required))
+        self._values = self._grow_file(self.values_path, self._values, np.float32, capacity)
+        self._flags = self._grow_file(self.flags_path, self._flags, np.uint8, capacity)
+        self.logger.info(f"NDVI store capacity grown from {self._capacity} to {capacity} cells")
+        self._capacity = capacity
+        self._save_registry()
+
+    def _grow_file(self, path: str, current: Optional[np.memmap], dtype: Any, capacity: int) -> np.memmap:
+        """Copy a matrix into a larger file and map it"""
+        tmp_path = path + ".tmp"
+        grown = np.memmap(tmp_path, dtype=dtype, mode="w+", shape=(capacity, self.days))
+        if current is not None and self._capacity:
+            grown[:self._capacity] = current
+        del current
+        grown.flush()
+        del grown
+        os.replace(tmp_path, path)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=(capacity, self.days))
+
+    def _load(self, initial_capacity: int) -> None:
+        """Open an existing store or create an empty one"""
+        if all(os.path.exists(path) for path in (self.registry_path, self.values_path, self.flags_path)):
+            try:
+                with open(self.registry_path) as f:
+                    registry = json.load(f)
+                if registry.get("grid") != self._fingerprint():
+                    raise ValueError("built with a different grid or date window")
+                capacity = int(registry["capacity"])
+                if os.path.getsize(self.values_path) != capacity * self.days * 4 or \
+                        os.path.getsize(self.flags_path) != capacity * self.days:
+                    raise ValueError("matrix size does not match registry")
+                self._capacity = capacity
+                self._cells = registry["cells"]
+                used = {entry["row"] for entry in self._cells.values()}
+                high = max(used) + 1 if used else 0
+                self._free_rows = sorted((row for row in range(high) if row not in used), reverse=True)
+                self._values = np.memmap(self.values_path, dtype=np.float32, mode="r+", shape=(capacity, self.days))
+                self._flags = np.memmap(self.flags_path, dtype=np.uint8, mode="r+", shape=(capacity, self.days))
+                self.logger.info(f"Loaded NDVI store with {len(self._cells)} cells")
+                return
+            except Exception as e:
+                self.logger.warning(f"NDVI store at {self.store_dir} unreadable, rebuilding: {str(e)}")
+                self._cells = {}
+                self._free_rows = []
+
+        self._capacity = 0
+        self._values = None
+        self._flags = None
+        self._grow(min(initial_capacity, self.max_cells))
+
+    def _maybe_persist(self) -> None:
+        if self._dirty and time.time() - self._persisted_at >= self.persist_seconds:
+            self._persist()
+
+    def _persist(self) -> None:
+        """Write matrix pages, then the registry that points at them"""
+        self._values.flush()
+        self._flags.flush()
+        self._save_registry()
+        self._dirty = False
+        self._persisted_at = time.time()
+
+    def _save_registry(self) -> None:
+        tmp_path = self.registry_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"capacity": self._capacity, "grid": self._fingerprint(), "cells": self._cells}, f)
+        os.replace(tmp_path, self.registry_path)
+
+_ndvi_store: Optional[NDVIStore] = None
+_ndvi_store_lock = threading.Lock()
+
+def get_ndvi_store() -> NDVIStore:
+    """Return the process-wide NDVI store, opening it on first use"""
+    global _ndvi_store
+    with _ndvi_store_lock:
+        if _ndvi_store is None:
+            _ndvi_store = NDVIStore(
+                store_dir=settings.NDVI_STORE_DIR,
+                resolution=settings.NDVI_GRID_DEGREES,
+                start_date=settings.NDVI_STORE_START,
+                end_date=settings.NDVI_STORE_END,
+                max_cells=settings.NDVI_MAX_CELLS
+            )
+        return _ndvi_store
@@ -0,0 +1,237 @@
+"""
+Route plan cache for Pukpuk Analysis Service
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional
+
+from models.distance_cache import location_key
+from models.routing_optimizer import Location, RouteResult, Vehicle
+from utils.logger import setup_logger
+from utils.config import settings
+
+logger = setup_logger(__name__)
+
+class RoutePlanKey(NamedTuple):
+    """Identifies a route request: the whole problem, its fleet, and its stops"""
+    problem: str
+    fleet: str
+    stops: FrozenSet[str]
+
+class SearchBudget(NamedTuple):
+    """How long a plan was searched for"""
+    time_limit_seconds: float
+    solution_limit: Optional[int] = None  # None: no solution limit
+
+    def covers(self, other: "SearchBudget") -> bool:
+        """Whether a search with this budget went at least as far as one with ``other``"""
+        if self.time_limit_seconds < other.time_limit_seconds:
+            return False
+        if self.solution_limit is None:
+            return True
+        return other.solution_limit is not None and self.solution_limit >= other.solution_limit
+
+@dataclass
+class CachedPlan:
+    """Solved routes for one request, the search budget they got and the time they were stored"""
+    key: RoutePlanKey
+    routes: List[RouteResult]
+    budget: SearchBudget
+    created_at: float
+
+def _location_fields(location: Location) -> List[Any]:
+    return [
+        location_key(location.id, location.lat, location.lng),
+        location.demand,
+        location.service_minutes,
+        list(location.time_window) if location.time_window is not None else None
+    ]
+
+def make_plan_key(vehicles: List[Vehicle], delivery_points: List[Location], optimization_goal: str,
+                  decomposition: Optional[str] = None) -> RoutePlanKey:
+    """
+    Build the cache key for a route request
+
+    The fleet part covers the goal, the depots and every vehicle's capacity
+    and costs; the problem part adds each stop's position, demand, service
+    time and window, independent of the order stops were listed in, and the
+    decomposition method, since a decomposed solve is a different search.
+
+    Args:
+        vehicles: Fleet, in solver vehicle order
+        delivery_points: Delivery locations
+        optimization_goal: 'distance', 'time', 'cost', or 'emissions'
+        decomposition: 'sweep', 'kmeans' or None for a monolithic solve
+
+    Returns:
+        RoutePlanKey
+    """
+    fleet = json.dumps([optimization_goal] + [
+        [
+            _location_fields(vehicle.start_location),
+            _location_fields(vehicle.end_location or vehicle.start_location),
+            vehicle.capacity,
+            vehicle.cost_per_km,
+            vehicle.fixed_cost
+        ]
+        for vehicle in vehicles
+    ], default=str)
+    fleet_hash = hashlib.blake2b(fleet.encode(), digest_size=16).hexdigest()
+
+    stops = json.dumps(sorted(_location_fields(point) for point in delivery_points), default=str)
+    problem_hash = hashlib.blake2b(f"{fleet_hash}|{decomposition}|{stops}".encode(), digest_size=16).hexdigest()
+
+    return RoutePlanKey(
+        problem=problem_hash,
+        fleet=fleet_hash,
+        stops=frozenset(location_key(point.id, point.lat, point.lng) for point in delivery_points)
+    )
+
+def plan_stop_keys(routes: List[RouteResult]) -> List[List[str]]:
+    """Delivery point keys per vehicle, depots excluded, as optimize_fleet's initial_routes"""
+    return [
+        [location_key(stop.id, stop.lat, stop.lng) for stop in route.stops[1:-1]]
+        for route in routes
+    ]
+
+class RoutePlanCache:
+    """
+    LRU/TTL cache of solved route plans
+
+    ``get`` returns the routes of an identical earlier request whose search
+    budget covers the request's, so a plan from a short or solution-limited
+    search is never served as the answer to a longer one. ``similar`` finds
+    the plan for the same fleet whose stop set overlaps the request's most
+    (Jaccard similarity of at least ``min_similarity``), to seed the search
+    with instead of a cheapest-arc first solution; an identical plan with a
+    smaller budget is picked up there as a warm start.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600, min_similarity: float = 0.8):
+        self.logger = logger
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.min_similarity = min_similarity
+        self._entries: "OrderedDict[str, CachedPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.warm_starts = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: RoutePlanKey, budget: SearchBudget) -> Optional[List[RouteResult]]:
+        """
+        Look up the routes of an identical request
+
+        Args:
+            key: Key from make_plan_key
+            budget: Search budget of the request
+
+        Returns:
+            Cached routes, or None on a miss or if the cached plan was
+            searched with a smaller budget
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key.problem)
+            if entry is not None:
+                if now - entry.created_at <= self.ttl_seconds:
+                    if not entry.budget.covers(budget):
+                        return None
+                    self._entries.move_to_end(key.problem)
+                    self.hits += 1
+                    return entry.routes
+                del self._entries[key.problem]
+                self.evictions += 1
+            return None
+
+    def similar(self, key: RoutePlanKey) -> Optional[List[List[str]]]:
+        """
+        Find a previous plan to warm-start a request from
+
+        Args:
+            key: Key from make_plan_key
+
+        Returns:
+            Delivery point keys per vehicle of the closest cached plan for the
+            same fleet, or None if no plan is similar enough
+        """
+        now = time.time()
+        best, best_similarity = None, self.min_similarity
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.key.fleet != key.fleet or now - entry.created_at > self.ttl_seconds:
+                    continue
+                union = len(entry.key.stops | key.stops)
+                similarity = len(entry.key.stops & key.stops) / union if union else 0.0
+                if similarity >= best_similarity:
+                    best, best_similarity = entry, similarity
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best.key.problem)
+            self.warm_starts += 1
+
+        self.logger.info(f"Warm-starting route search from a cached plan ({best_similarity:.0%} of stops shared)")
+        return plan_stop_keys(best.routes)
+
+    def put(self, key: RoutePlanKey, routes: List[RouteResult], budget: SearchBudget) -> None:
+        """
+        Store the routes solved for a request
+
+        Args:
+            key: Key from make_plan_key
+            routes: Routes, one per vehicle in solver order
+            budget: Search budget the routes were solved with
+        """
+        if not routes:
+            return
+        with self._lock:
+            self._entries[key.problem] = CachedPlan(key=key, routes=routes, budget=budget, created_at=time.time())
+            self._entries.move_to_end(key.problem)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all cached plans"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit, warm start, miss and eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.warm_starts + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "min_similarity": self.min_similarity,
+                "hits": self.hits,
+                "warm_starts": self.warm_starts,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+# Global cache for the API process
+_route_cache: Optional[RoutePlanCache] = None
+_route_cache_lock = threading.Lock()
+
+def get_route_cache() -> RoutePlanCache:
+    """Return the process-wide route plan cache, creating it on first use"""
+    global _route_cache
+    with _route_cache_lock:
+        if _route_cache is None:
+            _route_cache = RoutePlanCache(
+                max_entries=settings.ROUTE_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.ROUTE_CACHE_TTL_SECONDS,
+                min_similarity=settings.ROUTE_CACHE_MIN_SIMILARITY
+            )
+        return _route_cache
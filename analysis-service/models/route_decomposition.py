@@ -0,0 +1,394 @@
+"""
+Cluster-first, route-second decomposition for large routing instances
+"""
+
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Import scikit-learn (optional, only needed for k-means clustering)
+sklearn_available = True
+try:
+    from sklearn.cluster import KMeans
+except ImportError:
+    sklearn_available = False
+
+logger = logging.getLogger(__name__)
+
+DECOMPOSITION_METHODS = ("sweep", "kmeans")
+REPAIR_NEIGHBORS = 10  # Nearest stops inspected when relocating across clusters
+
+@dataclass
+class ClusterPlan:
+    """Stops (global node indices, depot excluded) and the vehicles serving them"""
+    nodes: np.ndarray
+    vehicle_count: int
+
+@dataclass
+class ClusterSolution:
+    """Routes for one cluster, as global node indices without the depot"""
+    routes: List[List[int]]
+    dropped: List[int] = field(default_factory=list)
+
+def resolve_decomposition(method: Optional[str], stop_count: int, threshold: int) -> Optional[str]:
+    """
+    Pick the decomposition method for a request
+
+    Args:
+        method: 'none', 'auto', 'sweep' or 'kmeans' (None means 'none')
+        stop_count: Number of delivery points
+        threshold: Stop count above which 'auto' decomposes
+
+    Returns:
+        'sweep', 'kmeans' or None for a single monolithic model
+    """
+    if method in (None, "none"):
+        return None
+    if method == "auto":
+        return "sweep" if stop_count > threshold else None
+    if method not in DECOMPOSITION_METHODS:
+        raise ValueError(f"Unknown decomposition '{method}', expected 'none', 'auto' or one of {DECOMPOSITION_METHODS}")
+    return method
+
+def _vehicle_groups(vehicle_count: int, weights: np.ndarray) -> np.ndarray:
+    """Split vehicles over clusters in proportion to weights, at least one each"""
+    k = len(weights)
+    groups = np.ones(k, dtype=np.int64)
+    spare = vehicle_count - k
+    if spare > 0:
+        share = weights / weights.sum() * vehicle_count if weights.sum() > 0 else np.full(k, vehicle_count / k)
+        extra = np.maximum(share - 1, 0)
+        extra = extra / extra.sum() * spare if extra.sum() > 0 else np.full(k, spare / k)
+        # Largest remainder rounding
+        floors = np.floor(extra).astype(np.int64)
+        remainder = spare - floors.sum()
+        floors[np.argsort(floors - extra)[:remainder]] += 1
+        groups += floors
+    return groups
+
+def plan_clusters(
+    lats: np.ndarray,
+    lngs: np.ndarray,
+    demands: np.ndarray,
+    vehicle_count: int,
+    method: str = "sweep",
+    cluster_size: int = 200
+) -> List[ClusterPlan]:
+    """
+    Partition delivery points into clusters and give each a share of the fleet
+
+    ``sweep`` orders stops by polar angle around the depot and cuts the sweep
+    so each cluster's demand matches its vehicles' share of the fleet, which
+    keeps clusters capacity-balanced. ``kmeans`` groups stops geographically
+    and then sizes each cluster's fleet by its demand.
+
+    Args:
+        lats, lngs: Coordinates of all nodes, depot at index 0
+        demands: Demand of all nodes, depot at index 0
+        vehicle_count: Vehicles available in total
+        method: 'sweep' or 'kmeans'
+        cluster_size: Target number of stops per cluster
+
+    Returns:
+        List of ClusterPlan, one per non-empty cluster
+    """
+    stops = np.arange(1, len(lats))
+    k = max(1, min(vehicle_count, math.ceil(len(stops) / cluster_size)))
+    if k == 1:
+        return [ClusterPlan(nodes=stops, vehicle_count=vehicle_count)]
+
+    # Local equirectangular projection around the depot, in degrees of latitude
+    x = (lngs[stops] - lngs[0]) * math.cos(math.radians(lats[0]))
+    y = lats[stops] - lats[0]
+    stop_demands = demands[stops].astype(np.float64)
+
+    if method == "kmeans" and not sklearn_available:
+        logger.warning("scikit-learn not available, using sweep clustering")
+        method = "sweep"
+
+    if method == "kmeans":
+        labels = KMeans(n_clusters=k, n_init=3, random_state=0).fit_predict(np.column_stack([x, y]))
+        members = [stops[labels == c] for c in range(k)]
+        members = [m for m in members if len(m)]
+        weights = np.array([demands[m].sum() if demands[m].sum() > 0 else len(m) for m in members], dtype=np.float64)
+        groups = _vehicle_groups(vehicle_count, weights)
+        return [ClusterPlan(nodes=m, vehicle_count=int(g)) for m, g in zip(members, groups)]
+
+    # Sweep: start right after the widest empty angular gap so no cluster straddles it
+    angles = np.arctan2(y, x)
+    order = np.argsort(angles)
+    sorted_angles = angles[order]
+    gaps = np.diff(np.concatenate([sorted_angles, sorted_angles[:1] + 2 * np.pi]))
+    order = np.roll(order, -((int(np.argmax(gaps)) + 1) % len(order)))
+
+    groups = _vehicle_groups(vehicle_count, np.ones(k))
+    weights = stop_demands[order] if stop_demands.sum() > 0 else np.ones(len(order))
+    cumulative = np.cumsum(weights)
+    targets = cumulative[-1] * np.cumsum(groups)[:-1] / vehicle_count
+    cuts = np.searchsorted(cumulative, targets, side="right")
+    chunks = np.split(stops[order], cuts)
+    return [ClusterPlan(nodes=c, vehicle_count=int(g)) for c, g in zip(chunks, groups) if len(c)]
+
+def solve_cluster(
+    locations: list,
+    nodes: np.ndarray,
+    arc_costs: np.ndarray,
+    vehicle_capacity: float,
+    vehicle_count: int,
+    time_limit_seconds: float
+) -> ClusterSolution:
+    """
+    Solve one cluster's VRP; module-level so process workers can run it
+
+    Stops are optional with a large penalty, so a cluster whose demand
+    exceeds its vehicles drops stops for the repair step instead of failing.
+
+    Args:
+        locations: Depot followed by the cluster's stops
+        nodes: Global node indices of the cluster's stops
+        arc_costs: Cost matrix over ``locations``
+        vehicle_capacity: Capacity per vehicle
+        vehicle_count: Vehicles assigned to the cluster
+        time_limit_seconds: Search budget
+
+    Returns:
+        ClusterSolution in global node indices
+    """
+    from models.routing_optimizer import RouteOptimizer
+
+    optimizer = RouteOptimizer()
+    manager, routing = optimizer.build_routing_model(locations, arc_costs, vehicle_capacity, vehicle_count)
+    penalty = int(arc_costs.max()) * len(locations) + 1
+    for node in range(1, len(locations)):
+        routing.AddDisjunction([manager.NodeToIndex(node)], penalty)
+
+    solution = routing.SolveWithParameters(optimizer.search_parameters(time_limit_seconds))
+    if not solution:
+        return ClusterSolution(routes=[[] for _ in range(vehicle_count)], dropped=[int(n) for n in nodes])
+
+    routes = []
+    visited = set()
+    for vehicle_id in range(vehicle_count):
+        route = []
+        index = solution.Value(routing.NextVar(routing.Start(vehicle_id)))
+        while not routing.IsEnd(index):
+            local = manager.IndexToNode(index)
+            route.append(int(nodes[local - 1]))
+            visited.add(local)
+            index = solution.Value(routing.NextVar(index))
+        routes.append(route)
+
+    dropped = [int(nodes[local - 1]) for local in range(1, len(locations)) if local not in visited]
+    return ClusterSolution(routes=routes, dropped=dropped)
+
+def _insertion_cost(path: np.ndarray, node: int, costs: np.ndarray) -> Tuple[int, int]:
+    """Cheapest position (and added cost) for inserting node into a depot-to-depot path"""
+    deltas = costs[path[:-1], node] + costs[node, path[1:]] - costs[path[:-1], path[1:]]
+    position = int(np.argmin(deltas))
+    return position, int(deltas[position])
+
+def stitch_and_repair(
+    solutions: Sequence[ClusterSolution],
+    costs: np.ndarray,
+    demands: np.ndarray,
+    vehicle_capacity: float
+) -> Tuple[List[List[int]], List[int]]:
+    """
+    Combine cluster routes into one fleet plan and repair cluster boundaries
+
+    Dropped stops are inserted at their cheapest feasible position in any
+    route. Then each stop whose nearest neighbours are served by another
+    route is moved there when that lowers the total cost, which fixes stops
+    the partition put on the wrong side of a boundary.
+
+    Args:
+        solutions: Per-cluster solutions
+        costs: Arc cost matrix over all nodes, depot at index 0
+        demands: Demand of all nodes
+        vehicle_capacity: Capacity per vehicle
+
+    Returns:
+        Tuple of (routes as node lists without the depot, unassigned stops)
+    """
+    routes = [list(route) for solution in solutions for route in solution.routes]
+    loads = [float(demands[route].sum()) if route else 0.0 for route in routes]
+    route_of = np.full(len(demands), -1, dtype=np.int64)
+    for r, route in enumerate(routes):
+        route_of[route] = r
+
+    def path(r: int) -> np.ndarray:
+        return np.array([0] + routes[r] + [0], dtype=np.intp)
+
+    # Reinsert stops the cluster solves could not fit
+    unassigned = []
+    for node in (n for solution in solutions for n in solution.dropped):
+        best = None
+        for r in range(len(routes)):
+            if loads[r] + demands[node] > vehicle_capacity:
+                continue
+            position, delta = _insertion_cost(path(r), node, costs)
+            if best is None or delta < best[2]:
+                best = (r, position, delta)
+        if best is None:
+            unassigned.append(node)
+            continue
+        r, position, _ = best
+        routes[r].insert(position, node)
+        loads[r] += demands[node]
+        route_of[node] = r
+
+    # Relocate boundary stops to a neighbouring route when it is cheaper
+    moved = 0
+    neighbor_count = min(REPAIR_NEIGHBORS, len(demands) - 2)
+    if neighbor_count > 0:
+        for node in range(1, len(demands)):
+            r = route_of[node]
+            if r < 0:
+                continue
+            row = costs[node].copy()
+            row[[0, node]] = np.iinfo(row.dtype).max
+            neighbors = np.argpartition(row, neighbor_count)[:neighbor_count]
+            candidates = {int(route_of[n]) for n in neighbors if route_of[n] >= 0 and route_of[n] != r}
+            if not candidates:
+                continue
+
+            current = path(r)
+            position = routes[r].index(node) + 1
+            prev, nxt = current[position - 1], current[position + 1]
+            removal_gain = costs[prev, node] + costs[node, nxt] - costs[prev, nxt]
+
+            best = None
+            for candidate in candidates:
+                if loads[candidate] + demands[node] > vehicle_capacity:
+                    continue
+                insert_at, delta = _insertion_cost(path(candidate), node, costs)
+                if delta < removal_gain and (best is None or delta < best[2]):
+                    best = (candidate, insert_at, delta)
+            if best is None:
+                continue
+
+            candidate, insert_at, _ = best
+            routes[r].remove(node)
+            routes[candidate].insert(insert_at, node)
+            loads[r] -= demands[node]
+            loads[candidate] += demands[node]
+            route_of[node] = candidate
+            moved += 1
+
+    logger.info(f"Stitched {len(routes)} routes: reinserted {sum(len(s.dropped) for s in solutions) - len(unassigned)} dropped stops, "
+                f"relocated {moved} boundary stops, {len(unassigned)} unassigned")
+    return routes, unassigned
+
+# Cluster solve pool of this process: long-lived, so a request does not pay
+# for spawning workers and importing OR-Tools inside its search budget
+_cluster_pool: Optional[ProcessPoolExecutor] = None
+_cluster_pool_workers = 0
+_cluster_pool_lock = threading.Lock()
+
+def _warm_worker() -> bool:
+    """Import the solver in a pool worker ahead of its first cluster"""
+    import models.routing_optimizer  # noqa: F401
+    return True
+
+def get_cluster_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Return the cluster solve pool, spawning and warming its workers on first use
+
+    Args:
+        workers: Number of worker processes
+
+    Returns:
+        ProcessPoolExecutor shared by later decomposed solves in this process
+    """
+    global _cluster_pool, _cluster_pool_workers
+    with _cluster_pool_lock:
+        if _cluster_pool is None or _cluster_pool_workers != workers:
+            if _cluster_pool is not None:
+                _cluster_pool.shutdown(wait=False)
+            # Spawn avoids forking a parent that may run an event loop and pool threads
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            started = time.monotonic()
+            for future in [pool.submit(_warm_worker) for _ in range(workers)]:
+                future.result()
+            logger.info(f"Cluster pool started: {workers} workers in {time.monotonic() - started:.1f}s")
+            _cluster_pool, _cluster_pool_workers = pool, workers
+        return _cluster_pool
+
+def shutdown_cluster_pool() -> None:
+    """Stop the cluster solve pool, if one was started"""
+    global _cluster_pool, _cluster_pool_workers
+    with _cluster_pool_lock:
+        if _cluster_pool is not None:
+            _cluster_pool.shutdown(wait=False, cancel_futures=True)
+            _cluster_pool, _cluster_pool_workers = None, 0
+
+def solve_decomposed(
+    locations: list,
+    arc_costs: np.ndarray,
+    vehicle_capacity: float,
+    vehicle_count: int,
+    method: str,
+    time_limit_seconds: float,
+    cluster_size: int = 200,
+    workers: int = 1
+) -> Tuple[List[List[int]], List[int]]:
+    """
+    Cluster the stops, solve every cluster, then stitch and repair
+
+    Clusters are solved in up to ``workers`` processes of the long-lived
+    cluster pool. The time left after clustering (and, on first use,
+    starting the pool) is split so all solve waves plus repair fit in
+    ``time_limit_seconds``; each cluster still gets at least one second.
+
+    Args:
+        locations: Depot followed by all delivery points
+        arc_costs: Cost matrix over ``locations``
+        vehicle_capacity: Capacity per vehicle
+        vehicle_count: Vehicles available in total
+        method: 'sweep' or 'kmeans'
+        time_limit_seconds: Total search budget
+        cluster_size: Target number of stops per cluster
+        workers: Parallel cluster solves
+
+    Returns:
+        Tuple of (routes per vehicle as node lists without the depot, unassigned stops)
+    """
+    started = time.monotonic()
+    lats = np.array([loc.lat for loc in locations])
+    lngs = np.array([loc.lng for loc in locations])
+    demands = np.array([int(loc.demand) for loc in locations], dtype=np.int64)
+
+    plans = plan_clusters(lats, lngs, demands, vehicle_count, method, cluster_size)
+    workers = max(1, min(workers, len(plans)))
+    pool = get_cluster_pool(workers) if workers > 1 else None
+    waves = math.ceil(len(plans) / workers)
+    remaining = time_limit_seconds - (time.monotonic() - started)
+    cluster_limit = max(1.0, remaining * 0.9 / waves)
+    logger.info(f"Decomposed {len(locations) - 1} stops into {len(plans)} {method} clusters, "
+                f"{workers} workers, {cluster_limit:.1f}s per cluster")
+
+    tasks = []
+    for plan in plans:
+        local = np.concatenate([[0], plan.nodes])
+        tasks.append({
+            "locations": [locations[i] for i in local],
+            "nodes": plan.nodes,
+            "arc_costs": arc_costs[np.ix_(local, local)],
+            "vehicle_capacity": vehicle_capacity,
+            "vehicle_count": plan.vehicle_count,
+            "time_limit_seconds": cluster_limit
+        })
+
+    if pool is not None:
+        solutions = [future.result() for future in [pool.submit(solve_cluster, **task) for task in tasks]]
+    else:
+        solutions = [solve_cluster(**task) for task in tasks]
+
+    return stitch_and_repair(solutions, arc_costs, demands, vehicle_capacity)
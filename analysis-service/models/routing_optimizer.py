@@ -2,11 +2,21 @@
 Routing optimization using Google OR-Tools
 """
 
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
 import logging
-from dataclasses import dataclass
+import math
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 
+import numpy as np
+
+from models.distance_matrix import DEFAULT_SPEED_KMH, DistanceMatrix, meters_to_seconds
+from models.distance_cache import DistanceCache, location_key
+from models.distance_provider import DistanceProvider, HaversineProvider
+from models.route_decomposition import solve_decomposed
+
 # Import OR-Tools (lazy loading)
 ortools_available = True
 try:
@@ -17,18 +27,27 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+SOLVER_TIME_LIMIT_SECONDS = 30
+DEFAULT_COST_PER_KM = 1000  # IDR
+MIN_HORIZON_MINUTES = 24 * 60
+
 @dataclass
 class Location:
     id: str
     lat: float
     lng: float
     demand: float = 0
+    service_minutes: float = 0
+    time_window: Optional[Tuple[float, float]] = None  # (open, close) in minutes after the plan start
 
 @dataclass
 class Vehicle:
     id: int
     capacity: float
     start_location: Location
+    end_location: Optional[Location] = None  # Defaults to start_location
+    cost_per_km: float = DEFAULT_COST_PER_KM
+    fixed_cost: float = 0  # IDR when the vehicle is used
 
 @dataclass
 class RouteResult:
@@ -38,18 +57,35 @@ class RouteResult:
     total_time: float
     total_cost: float
     emissions: float
+    arrival_minutes: List[float] = field(default_factory=list)  # Per stop, after the plan start
+    departure_minutes: List[float] = field(default_factory=list)
+
+class UnassignedStopsError(ValueError):
+    """Delivery points the fleet could not take; args are kept picklable for process workers"""
+
+    def __init__(self, location_ids: List[str]):
+        super().__init__(location_ids)
+        self.location_ids = location_ids
+
+    def __str__(self) -> str:
+        shown = ", ".join(str(location_id) for location_id in self.location_ids[:20])
+        more = f" and {len(self.location_ids) - 20} more" if len(self.location_ids) > 20 else ""
+        return f"{len(self.location_ids)} delivery points exceed the fleet capacity and could not be routed: {shown}{more}"
 
 class RouteOptimizer:
     """Vehicle Routing Problem optimizer using Google OR-Tools"""
 
-    def __init__(self):
+    def __init__(self,
+                 distance_cache: Optional[DistanceCache] = None,
+                 distance_provider: Optional[DistanceProvider] = None):
         if not ortools_available:
             raise ImportError("Google OR-Tools not available. Install with: pip install ortools")
+        self.distance_cache = distance_cache
+        # Without a cache, matrices come straight from the provider (straight-line by default)
+        self.distance_provider = distance_provider or HaversineProvider()
 
     def calculate_distance(self, loc1: Location, loc2: Location) -> float:
         """Calculate distance between two locations using Haversine formula"""
-        import math
-
         R = 6371  # Earth's radius in km
 
         lat1_rad = math.radians(loc1.lat)
@@ -65,82 +101,79 @@ class RouteOptimizer:
 
         return R * c
 
-    def optimize_routes(self,
-                       warehouse: Location,
-                       delivery_points: List[Location],
-                       vehicle_capacity: float,
-                       vehicle_count: int = 1,
-                       optimization_goal: str = "distance") -> List[RouteResult]:
+    def build_matrix(self, locations: List[Location], with_time: bool = False) -> DistanceMatrix:
         """
-        Solve Vehicle Routing Problem
+        Build the meters (and travel-time) matrix for a list of locations
+
+        With a distance cache, rows for known locations are gathered from the
+        cache and only new locations are computed by the cache's provider.
 
         Args:
-            warehouse: Starting location (depot)
-            delivery_points: List of delivery locations
-            vehicle_capacity: Capacity per vehicle
-            vehicle_count: Number of vehicles
+            locations: Locations in solver node order, depot first
+            with_time: Also build the travel-time matrix in seconds
+
+        Returns:
+            DistanceMatrix with int32 meters and optional int32 seconds
+        """
+        lats = np.fromiter((loc.lat for loc in locations), dtype=np.float64, count=len(locations))
+        lngs = np.fromiter((loc.lng for loc in locations), dtype=np.float64, count=len(locations))
+        if self.distance_cache is not None:
+            ids = [loc.id for loc in locations]
+            return self.distance_cache.matrix_for(ids, lats, lngs, with_time=with_time, speed_kmh=DEFAULT_SPEED_KMH)
+        return self.distance_provider.matrix(lats, lngs, with_time=with_time)
+
+    def arc_cost_matrix(self, matrix: DistanceMatrix, optimization_goal: str) -> np.ndarray:
+        """
+        Integer arc costs for the optimization goal
+
+        Args:
+            matrix: Distance matrix for the request
             optimization_goal: 'distance', 'time', 'cost', or 'emissions'
 
         Returns:
-            List of optimized routes
+            int64 cost matrix
+        """
+        meters = matrix.meters.astype(np.int64)
+        if optimization_goal == "time":
+            seconds = matrix.seconds if matrix.seconds is not None else \
+                meters_to_seconds(matrix.meters, matrix.speed_kmh)
+            return seconds.astype(np.int64)
+        if optimization_goal == "cost":
+            return meters * 1000  # Assume 1000 IDR per km, scaled to integers
+        if optimization_goal == "emissions":
+            return meters * 100  # 0.1 kg CO2 per km, scaled to integers
+        return meters
+
+    def build_routing_model(self,
+                            locations: List[Location],
+                            arc_costs: np.ndarray,
+                            vehicle_capacity: float,
+                            vehicle_count: int) -> tuple:
         """
+        Create the OR-Tools routing model with matrix-backed callbacks
 
-        # Create locations list with depot first
-        locations = [warehouse] + delivery_points
-        num_locations = len(locations)
+        Arc costs and demands are registered as a transit matrix and a unary
+        transit vector, so OR-Tools evaluates them in C++ instead of calling
+        back into Python for every arc during local search.
 
-        # Create distance matrix
-        distance_matrix = []
-        for i in range(num_locations):
-            row = []
-            for j in range(num_locations):
-                distance = self.calculate_distance(locations[i], locations[j])
-                row.append(int(distance * 1000))  # Convert to meters for OR-Tools
-            distance_matrix.append(row)
+        Args:
+            locations: Locations in solver node order, depot first
+            arc_costs: Integer arc cost matrix for the optimization goal
+            vehicle_capacity: Capacity per vehicle
+            vehicle_count: Number of vehicles
 
-        # Create routing model
-        manager = pywrapcp.RoutingIndexManager(num_locations, vehicle_count, 0)
+        Returns:
+            Tuple of (RoutingIndexManager, RoutingModel)
+        """
+        manager = pywrapcp.RoutingIndexManager(len(locations), vehicle_count, 0)
         routing = pywrapcp.RoutingModel(manager)
 
-        # Define cost function
-        def distance_callback(from_index, to_index):
-            from_node = manager.IndexToNode(from_index)
-            to_node = manager.IndexToNode(to_index)
-            return distance_matrix[from_node][to_node]
-
-        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
-
-        # Set cost function
-        if optimization_goal == "distance":
-            routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
-        elif optimization_goal == "time":
-            # Assume 50 km/h average speed
-            def time_callback(from_index, to_index):
-                distance = distance_callback(from_index, to_index)
-                return int(distance / 50 * 3600)  # Convert to seconds
-            time_callback_index = routing.RegisterTransitCallback(time_callback)
-            routing.SetArcCostEvaluatorOfAllVehicles(time_callback_index)
-        elif optimization_goal == "cost":
-            # Assume cost per km
-            def cost_callback(from_index, to_index):
-                distance = distance_callback(from_index, to_index)
-                return int(distance * 1000)  # Assume 1000 IDR per km
-            cost_callback_index = routing.RegisterTransitCallback(cost_callback)
-            routing.SetArcCostEvaluatorOfAllVehicles(cost_callback_index)
-        elif optimization_goal == "emissions":
-            # CO2 emissions per km (rough estimate)
-            def emissions_callback(from_index, to_index):
-                distance = distance_callback(from_index, to_index)
-                return int(distance * 0.1 * 1000)  # 0.1 kg CO2 per km
-            emissions_callback_index = routing.RegisterTransitCallback(emissions_callback)
-            routing.SetArcCostEvaluatorOfAllVehicles(emissions_callback_index)
+        # Define cost function for the optimization goal
+        transit_callback_index = routing.RegisterTransitMatrix(arc_costs.tolist())
+        routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
         # Add capacity constraint
-        def demand_callback(from_index):
-            from_node = manager.IndexToNode(from_index)
-            return int(locations[from_node].demand)
-
-        demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+        demand_callback_index = routing.RegisterUnaryTransitVector([int(loc.demand) for loc in locations])
         routing.AddDimensionWithVehicleCapacity(
             demand_callback_index,
             0,  # null capacity slack
@@ -149,7 +182,21 @@ class RouteOptimizer:
             'Capacity'
         )
 
-        # Set search parameters
+        return manager, routing
+
+    def search_parameters(self,
+                          time_limit_seconds: float = SOLVER_TIME_LIMIT_SECONDS,
+                          solution_limit: Optional[int] = None):
+        """
+        Guided local search from a cheapest-arc first solution
+
+        Args:
+            time_limit_seconds: Wall-clock search budget
+            solution_limit: Stop after this many solutions, if set
+
+        Returns:
+            RoutingSearchParameters
+        """
         search_parameters = pywrapcp.DefaultRoutingSearchParameters()
         search_parameters.first_solution_strategy = (
             routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
@@ -157,61 +204,594 @@ class RouteOptimizer:
         search_parameters.local_search_metaheuristic = (
             routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
         )
-        search_parameters.time_limit.seconds = 30  # 30 second time limit
+        search_parameters.time_limit.FromMilliseconds(int(time_limit_seconds * 1000))
+        if solution_limit is not None:
+            search_parameters.solution_limit = solution_limit
+        return search_parameters
+
+    def needs_time_dimension(self, locations: List[Location]) -> bool:
+        """Whether any location has a time window or a service time"""
+        return any(loc.time_window is not None or loc.service_minutes > 0 for loc in locations)
+
+    def fleet_locations(self,
+                        vehicles: List[Vehicle],
+                        delivery_points: List[Location]) -> Tuple[List[Location], List[int], List[int]]:
+        """
+        Solver node order for a fleet: each distinct depot once, then the delivery points
+
+        Args:
+            vehicles: Fleet with start (and optional end) depots
+            delivery_points: List of delivery locations
+
+        Returns:
+            Tuple of (locations, start node per vehicle, end node per vehicle)
+        """
+        depots: List[Location] = []
+        depot_nodes: Dict[str, int] = {}
+
+        def depot_node(location: Location) -> int:
+            if location.id not in depot_nodes:
+                depot_nodes[location.id] = len(depots)
+                depots.append(location)
+            return depot_nodes[location.id]
+
+        starts = [depot_node(vehicle.start_location) for vehicle in vehicles]
+        ends = [depot_node(vehicle.end_location or vehicle.start_location) for vehicle in vehicles]
+        return depots + delivery_points, starts, ends
+
+    def build_fleet_model(self,
+                          locations: List[Location],
+                          starts: List[int],
+                          ends: List[int],
+                          vehicles: List[Vehicle],
+                          matrix: DistanceMatrix,
+                          optimization_goal: str) -> tuple:
+        """
+        Create a routing model for a multi-depot, heterogeneous fleet
+
+        Every callback is a precomputed matrix or vector registered natively.
+        Under the 'cost' goal each distinct per-km rate gets its own arc cost
+        matrix and vehicles carry their fixed cost. If any location has a time
+        window or service time, a 'Time' dimension is added whose transit is
+        travel seconds plus service seconds at the origin, with waiting allowed.
+
+        Args:
+            locations: Depots followed by delivery points (see fleet_locations)
+            starts: Start node per vehicle
+            ends: End node per vehicle
+            vehicles: Fleet
+            matrix: Distance matrix over locations (with seconds for time windows)
+            optimization_goal: 'distance', 'time', 'cost', or 'emissions'
+
+        Returns:
+            Tuple of (RoutingIndexManager, RoutingModel)
+        """
+        manager = pywrapcp.RoutingIndexManager(len(locations), len(vehicles), starts, ends)
+        routing = pywrapcp.RoutingModel(manager)
+
+        # Define cost function for the optimization goal
+        if optimization_goal == "cost":
+            meters = matrix.meters.astype(np.int64)
+            evaluators: Dict[int, int] = {}
+            for vehicle_index, vehicle in enumerate(vehicles):
+                # IDR per km, scaled by 1000 like the uniform cost goal
+                rate = int(round(vehicle.cost_per_km))
+                if rate not in evaluators:
+                    evaluators[rate] = routing.RegisterTransitMatrix((meters * rate).tolist())
+                routing.SetArcCostEvaluatorOfVehicle(evaluators[rate], vehicle_index)
+                routing.SetFixedCostOfVehicle(int(vehicle.fixed_cost * 1000), vehicle_index)
+        else:
+            arc_costs = self.arc_cost_matrix(matrix, optimization_goal)
+            routing.SetArcCostEvaluatorOfAllVehicles(routing.RegisterTransitMatrix(arc_costs.tolist()))
+
+        # Add capacity constraint
+        demand_callback_index = routing.RegisterUnaryTransitVector([int(loc.demand) for loc in locations])
+        routing.AddDimensionWithVehicleCapacity(
+            demand_callback_index,
+            0,  # null capacity slack
+            [int(vehicle.capacity) for vehicle in vehicles],  # vehicle capacities
+            True,  # start cumul to zero
+            'Capacity'
+        )
+
+        if self.needs_time_dimension(locations):
+            seconds = matrix.seconds if matrix.seconds is not None else \
+                meters_to_seconds(matrix.meters, matrix.speed_kmh)
+            service = np.array([int(loc.service_minutes * 60) for loc in locations], dtype=np.int64)
+            transit = seconds.astype(np.int64) + service[:, None]
+            horizon = int(max(
+                [MIN_HORIZON_MINUTES] + [loc.time_window[1] for loc in locations if loc.time_window is not None]
+            ) * 60)
+
+            time_callback_index = routing.RegisterTransitMatrix(transit.tolist())
+            routing.AddDimension(
+                time_callback_index,
+                horizon,  # allow waiting for a window to open
+                horizon,
+                False,  # vehicles may leave the depot later than the plan start
+                'Time'
+            )
+            time_dimension = routing.GetDimensionOrDie('Time')
+
+            depot_nodes = set(starts) | set(ends)
+            for node, loc in enumerate(locations):
+                if loc.time_window is None or node in depot_nodes:
+                    continue
+                time_dimension.CumulVar(manager.NodeToIndex(node)).SetRange(
+                    int(loc.time_window[0] * 60), int(loc.time_window[1] * 60)
+                )
+
+            for vehicle_index in range(len(vehicles)):
+                # Depot opening hours bound when vehicles leave and return
+                for index, node in ((routing.Start(vehicle_index), starts[vehicle_index]),
+                                    (routing.End(vehicle_index), ends[vehicle_index])):
+                    window = locations[node].time_window
+                    if window is not None:
+                        time_dimension.CumulVar(index).SetRange(int(window[0] * 60), int(window[1] * 60))
+                    routing.AddVariableMinimizedByFinalizer(time_dimension.CumulVar(index))
+
+        return manager, routing
+
+    def optimize_routes(self,
+                       warehouse: Location,
+                       delivery_points: List[Location],
+                       vehicle_capacity: float,
+                       vehicle_count: int = 1,
+                       optimization_goal: str = "distance",
+                       time_limit_seconds: float = SOLVER_TIME_LIMIT_SECONDS,
+                       solution_limit: Optional[int] = None,
+                       matrix: Optional[DistanceMatrix] = None,
+                       on_solution: Optional[Callable[[List[RouteResult], int, float], Optional[bool]]] = None,
+                       min_solution_interval: float = 0.0,
+                       cancel: Optional[Any] = None,
+                       decomposition: Optional[str] = None,
+                       cluster_size: int = 200,
+                       cluster_workers: int = 1,
+                       initial_routes: Optional[List[List[str]]] = None) -> List[RouteResult]:
+        """
+        Solve Vehicle Routing Problem
+
+        Args:
+            warehouse: Starting location (depot)
+            delivery_points: List of delivery locations
+            vehicle_capacity: Capacity per vehicle
+            vehicle_count: Number of vehicles
+            optimization_goal: 'distance', 'time', 'cost', or 'emissions'
+            time_limit_seconds: Wall-clock search budget
+            solution_limit: Stop after this many solutions, if set
+            matrix: Precomputed distance matrix for [warehouse] + delivery_points
+            on_solution: Called with (routes, objective, elapsed seconds) for each
+                improved solution during the search; returning True stops the search
+            min_solution_interval: Minimum seconds between on_solution calls; the
+                latest improvement held back by it is sent once the interval passes
+            cancel: Event checked at every solution; once set the search stops
+            decomposition: 'sweep' or 'kmeans' to solve clusters of stops
+                separately and stitch them (on_solution is not called), or
+                None for one model over all stops
+            cluster_size: Target stops per cluster when decomposing
+            cluster_workers: Clusters solved in parallel processes
+            initial_routes: Previous plan to start the search from (see
+                optimize_fleet); ignored when decomposing
+
+        Returns:
+            List of optimized routes
+
+        Raises:
+            UnassignedStopsError: A decomposed solve could not fit every
+                delivery point on the fleet
+        """
+        vehicles = [Vehicle(id=i, capacity=vehicle_capacity, start_location=warehouse) for i in range(vehicle_count)]
+
+        # Create locations list with depot first
+        locations = [warehouse] + delivery_points
+
+        if decomposition is not None and self.needs_time_dimension(locations):
+            logger.warning("Decomposition does not support time windows; solving one model")
+            decomposition = None
+
+        if decomposition is None:
+            return self.optimize_fleet(
+                delivery_points, vehicles, optimization_goal,
+                time_limit_seconds=time_limit_seconds,
+                solution_limit=solution_limit,
+                matrix=matrix,
+                on_solution=on_solution,
+                min_solution_interval=min_solution_interval,
+                cancel=cancel,
+                initial_routes=initial_routes
+            )
+
+        # Distance matrix (int32 meters) shared by the solver and the route metrics
+        if matrix is None:
+            matrix = self.build_matrix(locations, with_time=optimization_goal == "time")
+        arc_costs = self.arc_cost_matrix(matrix, optimization_goal)
+
+        node_routes, unassigned = solve_decomposed(
+            locations, arc_costs, vehicle_capacity, vehicle_count, decomposition,
+            time_limit_seconds, cluster_size=cluster_size, workers=cluster_workers
+        )
+        if unassigned:
+            # Routing the rest would silently drop these deliveries from the plan
+            raise UnassignedStopsError([locations[node].id for node in unassigned])
+        return [
+            self._route_result(vehicle, [0] + route + [0], locations, matrix)
+            for vehicle, route in zip(vehicles, node_routes)
+        ]
+
+    def optimize_fleet(self,
+                       delivery_points: List[Location],
+                       vehicles: List[Vehicle],
+                       optimization_goal: str = "distance",
+                       time_limit_seconds: float = SOLVER_TIME_LIMIT_SECONDS,
+                       solution_limit: Optional[int] = None,
+                       matrix: Optional[DistanceMatrix] = None,
+                       on_solution: Optional[Callable[[List[RouteResult], int, float], Optional[bool]]] = None,
+                       min_solution_interval: float = 0.0,
+                       cancel: Optional[Any] = None,
+                       initial_routes: Optional[List[List[str]]] = None) -> List[RouteResult]:
+        """
+        Solve a multi-depot, heterogeneous-fleet VRP with optional time windows
+
+        Args:
+            delivery_points: List of delivery locations
+            vehicles: Fleet with per-vehicle depots, capacity and cost
+            optimization_goal: 'distance', 'time', 'cost', or 'emissions'
+            time_limit_seconds: Wall-clock search budget
+            solution_limit: Stop after this many solutions, if set
+            matrix: Precomputed distance matrix in fleet_locations order
+            on_solution: Called with (routes, objective, elapsed seconds) for each
+                improved solution during the search; returning True stops the search
+            min_solution_interval: Minimum seconds between on_solution calls; the
+                latest improvement held back by it is sent once the interval passes
+            cancel: Event checked at every solution; once set the search stops
+            initial_routes: Delivery point keys (see location_key) per vehicle
+                from a previous plan; the search starts from it instead of a
+                cheapest-arc first solution when it can be made feasible
+
+        Returns:
+            List of optimized routes, one per vehicle
+        """
+        locations, starts, ends = self.fleet_locations(vehicles, delivery_points)
+
+        # Distance matrix (int32 meters) shared by the solver and the route metrics
+        if matrix is None:
+            with_time = optimization_goal == "time" or self.needs_time_dimension(locations)
+            matrix = self.build_matrix(locations, with_time=with_time)
+
+        # Create routing model
+        manager, routing = self.build_fleet_model(locations, starts, ends, vehicles, matrix, optimization_goal)
+
+        drop_pending = None
+        if on_solution is not None or cancel is not None:
+            started = time.perf_counter()
+            best = {"objective": None, "emitted_at": -math.inf, "pending": None, "timer": None, "stop": False}
+            emit_lock = threading.Lock()
+
+            def emit(routes, objective, elapsed):
+                # Caller holds emit_lock
+                best["emitted_at"] = time.perf_counter() - started
+                if on_solution(routes, objective, elapsed):
+                    best["stop"] = True
+
+            def flush():
+                # Trailing emit once the interval has passed, even if the search finds nothing better
+                with emit_lock:
+                    best["timer"] = None
+                    if best["pending"] is None:
+                        return
+                    next_nodes, objective, elapsed = best["pending"]
+                    best["pending"] = None
+                    routes = self._collect_routes(
+                        routing, manager, locations, matrix, vehicles, next_nodes.__getitem__
+                    )
+                    emit(routes, objective, elapsed)
+
+            def solution_callback():
+                if best["stop"] or (cancel is not None and cancel.is_set()):
+                    routing.solver().FinishCurrentSearch()
+                    return
+                if on_solution is None:
+                    return
+                # Local search reports every accepted move; only surface improvements
+                objective = routing.CostVar().Value()
+                if best["objective"] is not None and objective >= best["objective"]:
+                    return
+                best["objective"] = objective
+                elapsed = time.perf_counter() - started
+                with emit_lock:
+                    wait = best["emitted_at"] + min_solution_interval - elapsed
+                    if wait <= 0:
+                        best["pending"] = None
+                        if best["timer"] is not None:
+                            best["timer"].cancel()
+                            best["timer"] = None
+                        routes = self._collect_routes(
+                            routing, manager, locations, matrix, vehicles,
+                            lambda index: routing.NextVar(index).Value()
+                        )
+                        emit(routes, objective, elapsed)
+                    else:
+                        # Variable values only hold during the callback, so keep a copy for the trailing emit
+                        next_nodes = [routing.NextVar(index).Value() for index in range(routing.Size())]
+                        best["pending"] = (next_nodes, objective, elapsed)
+                        if best["timer"] is None:
+                            best["timer"] = threading.Timer(wait, flush)
+                            best["timer"].daemon = True
+                            best["timer"].start()
+                if best["stop"]:
+                    routing.solver().FinishCurrentSearch()
+
+            def drop_pending():
+                # The final result supersedes a pending improvement; no event may follow the return
+                with emit_lock:
+                    best["pending"] = None
+                    if best["timer"] is not None:
+                        best["timer"].cancel()
+                        best["timer"] = None
+
+            routing.AddAtSolutionCallback(solution_callback)
+
+        search_parameters = self.search_parameters(time_limit_seconds, solution_limit)
+        initial_assignment = None
+        if initial_routes:
+            seed = self.warm_start_routes(
+                initial_routes, locations, starts, ends, vehicles, matrix,
+                first_delivery=len(locations) - len(delivery_points)
+            )
+            if seed is not None:
+                routing.CloseModelWithParameters(search_parameters)
+                initial_assignment = routing.ReadAssignmentFromRoutes(
+                    [[manager.NodeToIndex(node) for node in route] for route in seed], True
+                )
+            if initial_assignment is None:
+                logger.info("Previous plan is infeasible for this request; solving from scratch")
 
         # Solve the problem
-        solution = routing.SolveWithParameters(search_parameters)
+        try:
+            if initial_assignment is not None:
+                solution = routing.SolveFromAssignmentWithParameters(initial_assignment, search_parameters)
+            else:
+                solution = routing.SolveWithParameters(search_parameters)
+        finally:
+            if drop_pending is not None:
+                drop_pending()
 
         if solution:
-            routes = []
-            total_distance = 0
-            total_cost = 0
-            total_emissions = 0
-
-            for vehicle_id in range(vehicle_count):
-                route_stops = []
-                index = routing.Start(vehicle_id)
-
-                while not routing.IsEnd(index):
-                    node_index = manager.IndexToNode(index)
-                    location = locations[node_index]
-                    route_stops.append(location)
-                    index = solution.Value(routing.NextVar(index))
-
-                # Add depot as final stop
-                route_stops.append(warehouse)
-
-                # Calculate route metrics
-                route_distance = 0
-                route_demand = 0
-                for i in range(len(route_stops) - 1):
-                    dist = self.calculate_distance(route_stops[i], route_stops[i+1])
-                    route_distance += dist
-                    route_demand += route_stops[i].demand
-
-                # Estimate time (50 km/h average)
-                route_time = route_distance / 50
-
-                # Estimate cost (IDR per km)
-                route_cost = route_distance * 1000
-
-                # Estimate emissions (kg CO2)
-                route_emissions = route_distance * 0.1
-
-                routes.append(RouteResult(
-                    vehicle_id=vehicle_id,
-                    stops=route_stops,
-                    total_distance=route_distance,
-                    total_time=route_time,
-                    total_cost=route_cost,
-                    emissions=route_emissions
-                ))
-
-                total_distance += route_distance
-                total_cost += route_cost
-                total_emissions += route_emissions
-
-            return routes
+            return self._collect_routes(
+                routing, manager, locations, matrix, vehicles,
+                lambda index: solution.Value(routing.NextVar(index))
+            )
         else:
             logger.warning("No solution found for VRP")
-            return []
\ No newline at end of file
+            return []
+
+    def warm_start_routes(self,
+                          initial_routes: List[List[str]],
+                          locations: List[Location],
+                          starts: List[int],
+                          ends: List[int],
+                          vehicles: List[Vehicle],
+                          matrix: DistanceMatrix,
+                          first_delivery: int) -> Optional[List[List[int]]]:
+        """
+        Map a previous plan onto this request's solver nodes
+
+        Stops that are no longer requested are dropped. Each new stop is
+        inserted where it adds the least distance on a vehicle with spare
+        capacity; time windows are left to ReadAssignmentFromRoutes to check.
+
+        Args:
+            initial_routes: Delivery point keys per vehicle from a previous plan
+            locations: Depots followed by delivery points (see fleet_locations)
+            starts: Start node per vehicle
+            ends: End node per vehicle
+            vehicles: Fleet
+            matrix: Distance matrix over locations
+            first_delivery: Node of the first delivery point
+
+        Returns:
+            Delivery nodes per vehicle, or None if a new stop fits no vehicle
+        """
+        nodes_by_key = {
+            location_key(loc.id, loc.lat, loc.lng): node
+            for node, loc in enumerate(locations[first_delivery:], start=first_delivery)
+        }
+        demands = np.array([loc.demand for loc in locations], dtype=np.float64)
+
+        routes: List[List[int]] = []
+        placed = set()
+        for vehicle_index in range(len(vehicles)):
+            route = []
+            previous = initial_routes[vehicle_index] if vehicle_index < len(initial_routes) else []
+            for key in previous:
+                node = nodes_by_key.get(key)
+                if node is not None and node not in placed:
+                    placed.add(node)
+                    route.append(node)
+            routes.append(route)
+        loads = [float(demands[route].sum()) for route in routes]
+
+        for node in range(first_delivery, len(locations)):
+            if node in placed:
+                continue
+            best = None
+            for vehicle_index, route in enumerate(routes):
+                if loads[vehicle_index] + demands[node] > vehicles[vehicle_index].capacity:
+                    continue
+                path = np.array([starts[vehicle_index]] + route + [ends[vehicle_index]], dtype=np.intp)
+                added = (matrix.meters[path[:-1], node].astype(np.int64) + matrix.meters[node, path[1:]]
+                         - matrix.meters[path[:-1], path[1:]])
+                position = int(np.argmin(added))
+                if best is None or added[position] < best[0]:
+                    best = (added[position], vehicle_index, position)
+            if best is None:
+                return None
+            _, vehicle_index, position = best
+            routes[vehicle_index].insert(position, node)
+            loads[vehicle_index] += demands[node]
+
+        return routes
+
+    def _collect_routes(self,
+                        routing,
+                        manager,
+                        locations: List[Location],
+                        matrix: DistanceMatrix,
+                        vehicles: List[Vehicle],
+                        next_index: Callable[[int], int]) -> List[RouteResult]:
+        """Walk each vehicle's NextVar chain and compute route metrics"""
+        routes = []
+        for vehicle_index, vehicle in enumerate(vehicles):
+            route_nodes = []
+            index = routing.Start(vehicle_index)
+
+            while not routing.IsEnd(index):
+                route_nodes.append(manager.IndexToNode(index))
+                index = next_index(index)
+
+            # Add the end depot as final stop
+            route_nodes.append(manager.IndexToNode(index))
+            routes.append(self._route_result(vehicle, route_nodes, locations, matrix))
+
+        return routes
+
+    def _schedule(self,
+                  route_nodes: List[int],
+                  locations: List[Location],
+                  matrix: DistanceMatrix) -> Tuple[List[float], List[float]]:
+        """
+        Earliest arrival and departure minutes along a route
+
+        Vehicles leave when the start depot opens, wait for windows to open
+        and spend each stop's service time there. Uses the travel seconds the
+        solver's time dimension used, so times respect the windows it enforced.
+        """
+        nodes = np.asarray(route_nodes, dtype=np.intp)
+        if matrix.seconds is not None:
+            legs = matrix.seconds[nodes[:-1], nodes[1:]] / 60
+        else:
+            legs = matrix.meters[nodes[:-1], nodes[1:]] * (3.6 / matrix.speed_kmh) / 60
+
+        first = locations[route_nodes[0]]
+        clock = first.time_window[0] if first.time_window is not None else 0.0
+        arrivals = [clock]
+        departures = [clock + first.service_minutes]
+        clock = departures[0]
+
+        for leg, node in zip(legs.tolist(), route_nodes[1:]):
+            location = locations[node]
+            arrival = clock + leg
+            start = max(arrival, location.time_window[0]) if location.time_window is not None else arrival
+            arrivals.append(arrival)
+            clock = start + location.service_minutes
+            departures.append(clock)
+
+        # The vehicle finishes on arrival at its end depot
+        departures[-1] = arrivals[-1]
+        return arrivals, departures
+
+    def _route_result(self,
+                      vehicle: Vehicle,
+                      route_nodes: List[int],
+                      locations: List[Location],
+                      matrix: DistanceMatrix) -> RouteResult:
+        """Route metrics and stop times for a depot-to-depot node sequence"""
+        route_stops = [locations[node] for node in route_nodes]
+
+        # Calculate route metrics from the same matrix the solver used
+        route_distance = matrix.route_km(route_nodes)
+
+        # Driving plus service and waiting time, in hours
+        arrivals, departures = self._schedule(route_nodes, locations, matrix)
+        route_time = (arrivals[-1] - departures[0]) / 60 if len(route_nodes) > 2 else 0.0
+
+        # Estimate cost (IDR per km, plus the vehicle's fixed cost when it is used)
+        route_cost = route_distance * vehicle.cost_per_km
+        if len(route_nodes) > 2:
+            route_cost += vehicle.fixed_cost
+
+        # Estimate emissions (kg CO2)
+        route_emissions = route_distance * 0.1
+
+        return RouteResult(
+            vehicle_id=vehicle.id,
+            stops=route_stops,
+            total_distance=route_distance,
+            total_time=route_time,
+            total_cost=route_cost,
+            emissions=route_emissions,
+            arrival_minutes=arrivals,
+            departure_minutes=departures
+        )
+
+def solve_routes(warehouse: Location,
+                 delivery_points: List[Location],
+                 vehicle_capacity: float,
+                 vehicle_count: int,
+                 optimization_goal: str,
+                 matrix: DistanceMatrix,
+                 time_limit_seconds: float = SOLVER_TIME_LIMIT_SECONDS,
+                 solution_limit: Optional[int] = None,
+                 events: Optional[Any] = None,
+                 cancel: Optional[Any] = None,
+                 min_solution_interval: float = 0.0,
+                 decomposition: Optional[str] = None,
+                 cluster_size: int = 200,
+                 cluster_workers: int = 1,
+                 vehicles: Optional[List[Vehicle]] = None,
+                 initial_routes: Optional[List[List[str]]] = None) -> List[RouteResult]:
+    """
+    Solve a VRP on a pool worker
+
+    Module-level so process workers can run it. The matrix is built by the
+    caller, so the distance cache is only ever written by the API process.
+
+    Args:
+        matrix: Distance matrix for [warehouse] + delivery_points, or in
+            fleet_locations order when vehicles are given
+        vehicles: Multi-depot or heterogeneous fleet; replaces warehouse,
+            vehicle_capacity and vehicle_count (decomposition is not used)
+        events: Queue receiving ('solution', routes, objective, elapsed) for each improvement
+        cancel: Event that stops the search at the next solution once set
+        initial_routes: Delivery point keys per vehicle of a cached plan to start from
+        (other arguments as for RouteOptimizer.optimize_routes)
+
+    Returns:
+        List of optimized routes
+    """
+    on_solution = None
+    if events is not None:
+        def on_solution(routes, objective, elapsed):
+            events.put(("solution", routes, objective, elapsed))
+
+    if vehicles is not None:
+        return RouteOptimizer().optimize_fleet(
+            delivery_points=delivery_points,
+            vehicles=vehicles,
+            optimization_goal=optimization_goal,
+            time_limit_seconds=time_limit_seconds,
+            solution_limit=solution_limit,
+            matrix=matrix,
+            on_solution=on_solution,
+            min_solution_interval=min_solution_interval,
+            cancel=cancel,
+            initial_routes=initial_routes
+        )
+
+    return RouteOptimizer().optimize_routes(
+        warehouse=warehouse,
+        delivery_points=delivery_points,
+        vehicle_capacity=vehicle_capacity,
+        vehicle_count=vehicle_count,
+        optimization_goal=optimization_goal,
+        time_limit_seconds=time_limit_seconds,
+        solution_limit=solution_limit,
+        matrix=matrix,
+        on_solution=on_solution,
+        min_solution_interval=min_solution_interval,
+        cancel=cancel,
+        decomposition=decomposition,
+        cluster_size=cluster_size,
+        cluster_workers=cluster_workers,
+        initial_routes=initial_routes
+    )
@@ -0,0 +1,353 @@
+"""
+Outstanding WhatsApp verifications and the farmers' replies to them
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from utils.logger import setup_logger
+from utils.config import settings
+
+logger = setup_logger(__name__)
+
+# Accepted reply words (the message asks for YES or NO; YA/TIDAK are the Indonesian equivalents)
+REPLY_WORDS = {"YES": "YES", "YA": "YES", "NO": "NO", "TIDAK": "NO"}
+
+# Verification states; everything except 'pending' is final
+VERIFICATION_STATES = ("pending", "confirmed", "violation", "no_response", "undelivered")
+FLAGGED_STATES = ("violation", "no_response")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS verifications (
+    verification_id TEXT PRIMARY KEY,
+    phone TEXT NOT NULL,
+    kiosk_id TEXT NOT NULL,
+    transaction_json TEXT NOT NULL,
+    sent_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    status TEXT NOT NULL,
+    response TEXT,
+    resolved_at REAL
+);
+CREATE INDEX IF NOT EXISTS verifications_status ON verifications (status, expires_at);
+"""
+
+def normalize_phone(phone: str) -> str:
+    """Strip the 'whatsapp:' channel prefix and spacing so senders and recipients compare equal"""
+    phone = phone.strip()
+    if phone.startswith("whatsapp:"):
+        phone = phone[len("whatsapp:"):]
+    return phone.replace(" ", "").replace("-", "")
+
+def parse_reply(body: str) -> Optional[str]:
+    """Return 'YES' or 'NO' for a verification reply, or None for any other text"""
+    return REPLY_WORDS.get(body.strip().rstrip(".!").upper())
+
+@dataclass
+class PendingVerification:
+    """A verification sent to a farmer and its outcome"""
+    verification_id: str
+    phone: str
+    kiosk_id: str
+    transaction_details: Dict[str, Any]
+    sent_at: float
+    expires_at: float
+    status: str = "pending"
+    response: Optional[str] = None
+    resolved_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+class VerificationTracker:
+    """
+    Matches farmers' YES/NO replies to the verifications sent to them
+
+    Outstanding verifications are written to a SQLite database (one row
+    each, transaction details as compact JSON) and indexed in memory by
+    phone number, so a reply arriving on the webhook resolves the farmer's
+    oldest pending verification with dictionary lookups instead of listing
+    messages from Twilio. YES confirms the transaction and NO flags a price
+    violation. A background sweeper flags verifications with no reply by
+    their deadline as 'no_response' and drops resolved rows after the
+    retention period. Pending rows are reloaded into the index at startup.
+    ``on_resolve`` is called with each verification as it is resolved.
+    """
+
+    def __init__(self, db_path: str, sweep_seconds: float = 60, retention_days: float = 90,
+                 on_resolve: Optional[Callable[[PendingVerification], None]] = None):
+        self.logger = logger
+        self.db_path = db_path
+        self.on_resolve = on_resolve
+        self.sweep_seconds = sweep_seconds
+        self.retention_seconds = retention_days * 24 * 3600
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+        self._lock = threading.Lock()
+        self._by_id: Dict[str, PendingVerification] = {}
+        self._by_phone: Dict[str, Deque[str]] = {}
+        self._deadlines: List[Tuple[float, str]] = []
+        self._latest: Dict[str, Tuple[str, float]] = {}  # phone -> (reply, time)
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+
+        self.replies = 0
+        self.unmatched_replies = 0
+        self.flagged = 0
+        self._load()
+
+    def _load(self) -> None:
+        """Index the pending verifications left in the database"""
+        rows = self._db.execute(
+            "SELECT verification_id, phone, kiosk_id, transaction_json, sent_at, expires_at "
+            "FROM verifications WHERE status = 'pending' ORDER BY sent_at"
+        ).fetchall()
+        for verification_id, phone, kiosk_id, transaction_json, sent_at, expires_at in rows:
+            self._index(PendingVerification(
+                verification_id, phone, kiosk_id, json.loads(transaction_json), sent_at, expires_at
+            ))
+        if rows:
+            self.logger.info(f"Loaded {len(rows)} pending verifications from {self.db_path}")
+
+    def _index(self, verification: PendingVerification) -> None:
+        self._by_id[verification.verification_id] = verification
+        self._by_phone.setdefault(verification.phone, deque()).append(verification.verification_id)
+        heapq.heappush(self._deadlines, (verification.expires_at, verification.verification_id))
+
+    def _unindex(self, verification: PendingVerification) -> None:
+        """Remove a verification from the pending index (its deadline entry is skipped lazily)"""
+        self._by_id.pop(verification.verification_id, None)
+        queue = self._by_phone.get(verification.phone)
+        if queue is not None:
+            try:
+                queue.remove(verification.verification_id)
+            except ValueError:
+                pass
+            if not queue:
+                del self._by_phone[verification.phone]
+
+    def _resolve(self, verification: PendingVerification, status: str, response: Optional[str], now: float) -> None:
+        verification.status = status
+        verification.response = response
+        verification.resolved_at = now
+        self._db.execute(
+            "UPDATE verifications SET status = ?, response = ?, resolved_at = ? WHERE verification_id = ?",
+            (status, response, now, verification.verification_id)
+        )
+        if status in FLAGGED_STATES:
+            self.flagged += 1
+        if status == "violation":
+            self.logger.warning(f"Compliance violation flagged for kiosk {verification.kiosk_id}: "
+                                f"{verification.phone} replied NO")
+        if self.on_resolve is not None:
+            try:
+                self.on_resolve(verification)
+            except Exception as e:
+                self.logger.error(f"Verification resolve hook failed: {str(e)}")
+
+    def register(
+        self,
+        verification_id: str,
+        phone: str,
+        kiosk_id: str,
+        transaction_details: Dict[str, Any],
+        window_hours: float
+    ) -> PendingVerification:
+        """
+        Record a verification awaiting the farmer's reply
+
+        Args:
+            verification_id: Id of the verification (the dispatch job id)
+            phone: Farmer's phone number
+            kiosk_id: Kiosk the transaction was reported by
+            transaction_details: Transaction details sent for verification
+            window_hours: Hours the farmer has to reply before being flagged
+
+        Returns:
+            PendingVerification
+        """
+        now = time.time()
+        verification = PendingVerification(
+            verification_id=verification_id,
+            phone=normalize_phone(phone),
+            kiosk_id=kiosk_id,
+            transaction_details=transaction_details,
+            sent_at=now,
+            expires_at=now + window_hours * 3600
+        )
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO verifications "
+                "(verification_id, phone, kiosk_id, transaction_json, sent_at, expires_at, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, 'pending')",
+                (verification_id, verification.phone, kiosk_id,
+                 json.dumps(transaction_details, separators=(",", ":"), default=str),
+                 verification.sent_at, verification.expires_at)
+            )
+            self._index(verification)
+        return verification
+
+    def record_reply(self, phone: str, body: str) -> Optional[PendingVerification]:
+        """
+        Apply an inbound WhatsApp message to the sender's oldest pending verification
+
+        Args:
+            phone: Sender ('whatsapp:+62...' or '+62...')
+            body: Message text
+
+        Returns:
+            The resolved verification, or None if the text is not a YES/NO
+            reply or the sender has nothing pending
+        """
+        reply = parse_reply(body)
+        if reply is None:
+            return None
+        phone = normalize_phone(phone)
+        now = time.time()
+        with self._lock:
+            self.replies += 1
+            self._latest[phone] = (reply, now)
+            queue = self._by_phone.get(phone)
+            if not queue:
+                self.unmatched_replies += 1
+                return None
+            verification = self._by_id[queue[0]]
+            self._unindex(verification)
+            self._resolve(verification, "confirmed" if reply == "YES" else "violation", reply, now)
+        self.logger.info(f"Verification response from {phone}: {reply}")
+        return verification
+
+    def cancel(self, verification_id: str, reason: str = "undelivered") -> None:
+        """Stop waiting for a reply to a verification that never reached the farmer"""
+        with self._lock:
+            verification = self._by_id.get(verification_id)
+            if verification is not None:
+                self._unindex(verification)
+                self._resolve(verification, reason, None, time.time())
+
+    def latest_response(self, phone: str, window_hours: float) -> Optional[str]:
+        """The farmer's most recent YES/NO reply within the window, if any"""
+        with self._lock:
+            latest = self._latest.get(normalize_phone(phone))
+        if latest is None or time.time() - latest[1] > window_hours * 3600:
+            return None
+        return latest[0]
+
+    def get(self, verification_id: str) -> Optional[PendingVerification]:
+        """Look up a verification, pending or resolved"""
+        with self._lock:
+            verification = self._by_id.get(verification_id)
+        if verification is not None:
+            return verification
+        row = self._db.execute(
+            "SELECT verification_id, phone, kiosk_id, transaction_json, sent_at, expires_at, status, response, resolved_at "
+            "FROM verifications WHERE verification_id = ?", (verification_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return PendingVerification(row[0], row[1], row[2], json.loads(row[3]), *row[4:])
+
+    def flagged_verifications(self, limit: int = 100) -> List[PendingVerification]:
+        """Most recently flagged verifications (price violations and non-responders)"""
+        rows = self._db.execute(
+            "SELECT verification_id, phone, kiosk_id, transaction_json, sent_at, expires_at, status, response, resolved_at "
+            f"FROM verifications WHERE status IN ({','.join('?' * len(FLAGGED_STATES))}) "
+            "ORDER BY resolved_at DESC LIMIT ?", (*FLAGGED_STATES, limit)
+        ).fetchall()
+        return [PendingVerification(row[0], row[1], row[2], json.loads(row[3]), *row[4:]) for row in rows]
+
+    def sweep(self) -> int:
+        """
+        Flag pending verifications past their deadline and purge old resolved rows
+
+        Returns:
+            Number of verifications flagged as 'no_response'
+        """
+        now = time.time()
+        expired = 0
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    _, verification_id = heapq.heappop(self._deadlines)
+                    verification = self._by_id.get(verification_id)
+                    if verification is None:
+                        continue  # Already answered or cancelled
+                    self._unindex(verification)
+                    self._resolve(verification, "no_response", None, now)
+                    expired += 1
+                self._db.execute(
+                    "DELETE FROM verifications WHERE status != 'pending' AND resolved_at < ?",
+                    (now - self.retention_seconds,)
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            stale = [phone for phone, (_, at) in self._latest.items() if now - at > self.retention_seconds]
+            for phone in stale:
+                del self._latest[phone]
+        return expired
+
+    def start_sweeper(self) -> None:
+        """Flag non-responders every ``sweep_seconds``"""
+        if self._sweeper is not None or self.sweep_seconds <= 0:
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep_loop, name="verification-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        """Stop the sweeper thread"""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=5)
+            self._sweeper = None
+
+    def _sweep_loop(self) -> None:
+        while not self._stop.wait(self.sweep_seconds):
+            try:
+                flagged = self.sweep()
+                if flagged:
+                    self.logger.warning(f"Flagged {flagged} verifications without a reply")
+            except Exception as e:
+                self.logger.error(f"Verification sweep failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pending count and reply counters"""
+        with self._lock:
+            return {
+                "pending": len(self._by_id),
+                "pending_phones": len(self._by_phone),
+                "replies": self.replies,
+                "unmatched_replies": self.unmatched_replies,
+                "flagged": self.flagged
+            }
+
+_verification_tracker: Optional[VerificationTracker] = None
+_verification_tracker_lock = threading.Lock()
+
+def get_verification_tracker() -> VerificationTracker:
+    """Return the process-wide verification tracker, opening its database on first use"""
+    global _verification_tracker
+    with _verification_tracker_lock:
+        if _verification_tracker is None:
+            _verification_tracker = VerificationTracker(
+                db_path=settings.VERIFICATION_DB_PATH,
+                sweep_seconds=settings.VERIFICATION_SWEEP_SECONDS,
+                retention_days=settings.VERIFICATION_RETENTION_DAYS
+            )
+        return _verification_tracker
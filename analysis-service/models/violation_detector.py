@@ -0,0 +1,482 @@
+"""
+Streaming compliance violation detection over kiosk transactions
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+from models.het_table import HETTable, get_het_table, unit_kg
+from utils.logger import setup_logger
+from utils.config import settings
+
+logger = setup_logger(__name__)
+
+# Rules and their severity
+RULE_SEVERITY = {
+    "over_het": "high",         # A transaction priced above the HET
+    "over_het_rate": "high",    # Too many of a kiosk's recent transactions above the HET
+    "no_replies": "high",       # Too many farmers answered NO to the price verification
+    "price_anomaly": "medium"   # Price/HET ratio far outside the kiosk's usual range
+}
+MIN_RATIO_STD = 0.01  # Floor for the ratio spread, so kiosks always at the HET do not alert on rounding
+
+class RingBuffer:
+    """
+    Fixed-size window of floats with running sum and sum of squares
+
+    Values live in a preallocated ``array('d')``, so a window costs 8 bytes
+    per slot regardless of traffic. Pushing is O(1); the sums are recomputed
+    once per lap so floating-point drift cannot accumulate.
+    """
+    __slots__ = ("values", "size", "position", "count", "total", "total_sq")
+
+    def __init__(self, size: int):
+        self.values = array("d", bytes(8 * size))
+        self.size = size
+        self.position = 0
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, value: float) -> None:
+        position = self.position
+        if self.count == self.size:
+            old = self.values[position]
+            self.total -= old
+            self.total_sq -= old * old
+        else:
+            self.count += 1
+        self.values[position] = value
+        self.total += value
+        self.total_sq += value * value
+        position += 1
+        if position == self.size:
+            position = 0
+            self.total = sum(self.values)
+            self.total_sq = sum(v * v for v in self.values)
+        self.position = position
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        if not self.count:
+            return 0.0
+        mean = self.total / self.count
+        return max(self.total_sq / self.count - mean * mean, 0.0) ** 0.5
+
+class KioskWindow:
+    """Rolling statistics for one kiosk"""
+    __slots__ = ("ratios", "over", "replies", "transactions", "violations", "last_seen", "alerted")
+
+    def __init__(self, window: int, reply_window: int):
+        self.ratios = RingBuffer(window)         # Highest item price/HET ratio per transaction
+        self.over = RingBuffer(window)           # 1 if the transaction was above the HET
+        self.replies = RingBuffer(reply_window)  # 1 for a NO reply, 0 for YES
+        self.transactions = 0
+        self.violations = 0
+        self.last_seen = 0.0
+        self.alerted: Dict[str, float] = {}      # rule -> time of the last violation raised
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "transactions": self.transactions,
+            "violations": self.violations,
+            "window": self.ratios.count,
+            "mean_price_ratio": round(self.ratios.mean, 4),
+            "price_ratio_std": round(self.ratios.std, 4),
+            "over_het_share": round(self.over.mean, 4),
+            "replies": self.replies.count,
+            "no_reply_share": round(self.replies.mean, 4),
+            "last_seen": self.last_seen
+        }
+
+@dataclass
+class Violation:
+    """A violation raised by the detector"""
+    kiosk_id: str
+    rule: str
+    severity: str
+    value: float
+    threshold: float
+    transaction_id: Optional[str] = None
+    detected_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+class ViolationDetector:
+    """
+    Raises compliance violations from a stream of kiosk transactions and replies
+
+    Events are dicts. A transaction event has ``kiosk_id``, ``items``
+    (name, unit, price and optionally het_price per unit) and optionally
+    ``transaction_id``, ``region``, ``date`` and a per-kg ``het_price``. A
+    reply event has ``"type": "reply"``, ``kiosk_id`` and ``response``
+    (YES/NO). Items without a HET are priced from the HET table in one
+    vectorized lookup per batch.
+
+    Each kiosk keeps fixed-size ring buffers of its recent price/HET ratios,
+    over-HET flags and NO replies, so memory per kiosk is bounded; the
+    least recently seen kiosks are dropped beyond ``max_kiosks``. A rule
+    that fires for a kiosk stays quiet for ``cooldown_seconds``.
+
+    Events arrive through ``submit`` (a bounded in-process queue drained by
+    a consumer thread in batches) or by tailing a JSON-lines file.
+    """
+
+    def __init__(
+        self,
+        het_table: Optional[HETTable] = None,
+        window: int = 200,
+        reply_window: int = 50,
+        min_samples: int = 20,
+        min_replies: int = 5,
+        tolerance: float = 0.0,
+        over_het_share: float = 0.2,
+        no_reply_share: float = 0.3,
+        zscore: float = 4.0,
+        cooldown_seconds: float = 3600,
+        max_kiosks: int = 100000,
+        max_violations: int = 1000,
+        queue_size: int = 100000,
+        batch_size: int = 1000,
+        tail_path: str = "",
+        tail_seconds: float = 1.0
+    ):
+        self.logger = logger
+        self.het_table = het_table
+        self.window = window
+        self.reply_window = reply_window
+        self.min_samples = min_samples
+        self.min_replies = min_replies
+        self.tolerance = tolerance
+        self.over_het_share = over_het_share
+        self.no_reply_share = no_reply_share
+        self.zscore = zscore
+        self.cooldown_seconds = cooldown_seconds
+        self.max_kiosks = max_kiosks
+        self.batch_size = batch_size
+        self.tail_path = tail_path
+        self.tail_seconds = tail_seconds
+
+        self._kiosks: "OrderedDict[str, KioskWindow]" = OrderedDict()
+        self._violations: Deque[Violation] = deque(maxlen=max_violations)
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+        self.processed = 0
+        self.dropped = 0
+        self.invalid = 0
+        self.raised = 0
+        self.suppressed = 0
+        self.evicted = 0
+
+    def _kiosk(self, kiosk_id: str, now: float) -> KioskWindow:
+        kiosks = self._kiosks
+        stats = kiosks.get(kiosk_id)
+        if stats is None:
+            stats = kiosks[kiosk_id] = KioskWindow(self.window, self.reply_window)
+            if len(kiosks) > self.max_kiosks:
+                kiosks.popitem(last=False)
+                self.evicted += 1
+        else:
+            kiosks.move_to_end(kiosk_id)
+        stats.last_seen = now
+        return stats
+
+    def _raise(self, found: List[Violation], stats: KioskWindow, kiosk_id: str, rule: str,
+               value: float, threshold: float, transaction_id: Optional[str], now: float) -> None:
+        last = stats.alerted.get(rule)
+        if last is not None and now - last < self.cooldown_seconds:
+            self.suppressed += 1
+            return
+        stats.alerted[rule] = now
+        stats.violations += 1
+        found.append(Violation(kiosk_id, rule, RULE_SEVERITY[rule], round(value, 4), threshold, transaction_id, now))
+
+    def _ratios(self, transactions: List[Dict[str, Any]]) -> np.ndarray:
+        """Highest item price/HET ratio per transaction (NaN when no item has a HET)"""
+        items = [(t, item) for t in transactions for item in t.get("items") or ()]
+        if not items:
+            return np.full(len(transactions), np.nan)
+        units = unit_kg([item.get("unit") for _, item in items])
+        prices = np.array([item.get("price") or 0.0 for _, item in items], dtype=np.float64)
+        het = np.array([
+            item["het_price"] if item.get("het_price")
+            else t["het_price"] * kg if t.get("het_price") else np.nan
+            for (t, item), kg in zip(items, units)
+        ], dtype=np.float64)
+
+        missing = np.isnan(het)
+        snapshot = self.het_table.snapshot if self.het_table is not None else None
+        if snapshot is not None and missing.any():
+            rows = [items[i] for i in np.flatnonzero(missing)]
+            het[missing] = snapshot.lookup_many(
+                [item.get("name") for _, item in rows],
+                [t.get("region") for t, _ in rows],
+                [t.get("date") for t, _ in rows]
+            ) * units[missing]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratios = np.where(het > 0, prices / het, np.nan)
+        counts = np.array([len(t.get("items") or ()) for t in transactions])
+        result = np.full(len(transactions), np.nan)
+        has_items = counts > 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[has_items]
+        with np.errstate(invalid="ignore"):
+            result[has_items] = np.fmax.reduceat(ratios, starts)
+        return result
+
+    def process_many(self, events: List[Dict[str, Any]]) -> List[Violation]:
+        """
+        Update kiosk statistics with a batch of events and apply the rules
+
+        Args:
+            events: Transaction and reply events, in arrival order
+
+        Returns:
+            Violations raised by the batch
+        """
+        valid = []
+        for event in events:
+            if isinstance(event, dict) and event.get("kiosk_id"):
+                valid.append(event)
+            else:
+                self.invalid += 1
+        transactions = [event for event in valid if event.get("type", "transaction") == "transaction"]
+        ratios = iter(self._ratios(transactions).tolist()) if transactions else iter(())
+
+        found: List[Violation] = []
+        limit = 1 + self.tolerance
+        now = time.time()
+        with self._lock:
+            for event in valid:
+                kiosk_id = str(event["kiosk_id"])
+                stats = self._kiosk(kiosk_id, now)
+                kind = event.get("type", "transaction")
+                if kind == "reply":
+                    response = str(event.get("response") or "").upper()
+                    if response not in ("YES", "NO"):
+                        self.invalid += 1
+                        continue
+                    replies = stats.replies
+                    replies.push(1.0 if response == "NO" else 0.0)
+                    if replies.count >= self.min_replies and replies.mean >= self.no_reply_share:
+                        self._raise(found, stats, kiosk_id, "no_replies", replies.mean, self.no_reply_share, None, now)
+                    continue
+                if kind != "transaction":
+                    self.invalid += 1
+                    continue
+
+                ratio = next(ratios)
+                stats.transactions += 1
+                if ratio != ratio:  # NaN: no item with a known HET
+                    continue
+                transaction_id = event.get("transaction_id")
+                window = stats.ratios
+                # Score against the window before this transaction joins it
+                if window.count >= self.min_samples:
+                    score = (ratio - window.mean) / max(window.std, MIN_RATIO_STD)
+                    if score >= self.zscore:
+                        self._raise(found, stats, kiosk_id, "price_anomaly", score, self.zscore, transaction_id, now)
+                window.push(ratio)
+                over = ratio > limit
+                stats.over.push(1.0 if over else 0.0)
+                if over:
+                    self._raise(found, stats, kiosk_id, "over_het", ratio, limit, transaction_id, now)
+                    share = stats.over.mean
+                    if stats.over.count >= self.min_samples and share >= self.over_het_share:
+                        self._raise(found, stats, kiosk_id, "over_het_rate", share, self.over_het_share,
+                                    transaction_id, now)
+            self.processed += len(valid)
+            self.raised += len(found)
+            self._violations.extend(found)
+
+        for violation in found:
+            self.logger.warning(f"Compliance violation for kiosk {violation.kiosk_id}: {violation.rule} "
+                                f"({violation.value} vs {violation.threshold})")
+        return found
+
+    def process(self, event: Dict[str, Any]) -> List[Violation]:
+        """Process a single event"""
+        return self.process_many([event])
+
+    def submit(self, event: Dict[str, Any]) -> bool:
+        """
+        Queue an event for the consumer thread
+
+        Returns:
+            False if the queue is full and the event was dropped
+        """
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def observe_verification(self, verification: Any) -> None:
+        """Feed a resolved verification's YES/NO reply into its kiosk's reply window"""
+        if verification.response in ("YES", "NO"):
+            self.submit({"type": "reply", "kiosk_id": verification.kiosk_id, "response": verification.response})
+
+    def start(self) -> None:
+        """Start the queue consumer, and the file tail when ``tail_path`` is set"""
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads.append(threading.Thread(target=self._consume, name="violation-detector", daemon=True))
+        if self.tail_path:
+            self._threads.append(threading.Thread(target=self._tail, name="violation-detector-tail", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop the threads and process whatever is still queued"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+        while self._drain():
+            pass
+
+    def _drain(self, batch: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Process up to ``batch_size`` queued events (after ``batch``) in one pass"""
+        batch = batch or []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.process_many(batch)
+        return len(batch)
+
+    def _consume(self) -> None:
+        while not self._stop.is_set():
+            try:
+                event = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._drain([event])
+            except Exception as e:
+                self.logger.error(f"Violation detection failed: {str(e)}")
+
+    def _tail(self) -> None:
+        """
+        Follow a JSON-lines file, reopening it when rotated or truncated
+
+        Lines already in the file at startup are skipped; a file created or
+        replaced later is read from its start.
+        """
+        handle, inode, pending, skip_existing = None, None, b"", True
+        while not self._stop.is_set():
+            try:
+                if handle is None:
+                    handle = open(self.tail_path, "rb")
+                    inode = os.fstat(handle.fileno()).st_ino
+                    if skip_existing:
+                        handle.seek(0, os.SEEK_END)
+                    pending = b""
+                skip_existing = False
+                chunk = handle.read(1 << 20)
+                if not chunk:
+                    status = os.stat(self.tail_path)
+                    if status.st_ino != inode or status.st_size < handle.tell():
+                        handle.close()
+                        handle = open(self.tail_path, "rb")
+                        inode = status.st_ino
+                        pending = b""
+                        continue
+                    self._stop.wait(self.tail_seconds)
+                    continue
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                events = []
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        self.invalid += 1
+                for start in range(0, len(events), self.batch_size):
+                    self.process_many(events[start:start + self.batch_size])
+            except FileNotFoundError:
+                handle, skip_existing = None, False
+                self._stop.wait(self.tail_seconds)
+            except Exception as e:
+                self.logger.error(f"Failed to tail {self.tail_path}: {str(e)}")
+                self._stop.wait(self.tail_seconds)
+        if handle is not None:
+            handle.close()
+
+    def violations(self, kiosk_id: Optional[str] = None, limit: int = 100) -> List[Violation]:
+        """Most recent violations first, optionally for one kiosk"""
+        with self._lock:
+            recent = list(self._violations)
+        if kiosk_id is not None:
+            recent = [violation for violation in recent if violation.kiosk_id == kiosk_id]
+        return recent[::-1][:limit]
+
+    def kiosk_stats(self, kiosk_id: str) -> Optional[Dict[str, Any]]:
+        """Rolling statistics for a kiosk, or None if it has not been seen"""
+        with self._lock:
+            stats = self._kiosks.get(kiosk_id)
+            return stats.to_dict() if stats is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kiosks": len(self._kiosks),
+            "queued": self._queue.qsize(),
+            "processed": self.processed,
+            "violations": self.raised,
+            "suppressed": self.suppressed,
+            "dropped": self.dropped,
+            "invalid": self.invalid,
+            "evicted_kiosks": self.evicted,
+            "tail_path": self.tail_path or None
+        }
+
+_violation_detector: Optional[ViolationDetector] = None
+_violation_detector_lock = threading.Lock()
+
+def get_violation_detector() -> ViolationDetector:
+    """Return the process-wide violation detector"""
+    global _violation_detector
+    with _violation_detector_lock:
+        if _violation_detector is None:
+            _violation_detector = ViolationDetector(
+                het_table=get_het_table(),
+                window=settings.DETECTOR_WINDOW,
+                reply_window=settings.DETECTOR_REPLY_WINDOW,
+                min_samples=settings.DETECTOR_MIN_SAMPLES,
+                min_replies=settings.DETECTOR_MIN_REPLIES,
+                tolerance=settings.HET_TOLERANCE,
+                over_het_share=settings.DETECTOR_OVER_HET_SHARE,
+                no_reply_share=settings.DETECTOR_NO_REPLY_SHARE,
+                zscore=settings.DETECTOR_ZSCORE,
+                cooldown_seconds=settings.DETECTOR_COOLDOWN_SECONDS,
+                max_kiosks=settings.DETECTOR_MAX_KIOSKS,
+                max_violations=settings.DETECTOR_MAX_VIOLATIONS,
+                queue_size=settings.DETECTOR_QUEUE_SIZE,
+                batch_size=settings.DETECTOR_BATCH_SIZE,
+                tail_path=settings.DETECTOR_TAIL_PATH,
+                tail_seconds=settings.DETECTOR_TAIL_SECONDS
+            )
+        return _violation_detector
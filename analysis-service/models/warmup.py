@@ -0,0 +1,149 @@
+"""
+Model library warm-up for Pukpuk Analysis Service
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+from utils.config import settings
+from models.executor import ForecastExecutor
+
+logger = setup_logger(__name__)
+
+WARMUP_MODES = ("background", "eager", "off")
+
+def _dummy_history(length: int = 42) -> pd.DataFrame:
+    """Small weekly-seasonal series every model can fit"""
+    t = np.arange(length)
+    return pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=length, freq="D"),
+        "quantity": 100 + 10 * np.sin(2 * np.pi * t / 7) + (t % 5),
+        "price": 25 + np.sin(2 * np.pi * t / 7)
+    })
+
+def warm_up_models(models: List[str], errors: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+    """
+    Import model libraries and run one tiny fit per model
+
+    Module-level so the process pool can run it as its worker initializer.
+    Fits bypass the fitted model cache so dummy series never show up in cache
+    statistics.
+
+    Args:
+        models: Model names, e.g. ['ES', 'ARIMA', 'CatBoost']
+        errors: Receives the error message of each model whose fit failed
+
+    Returns:
+        Seconds spent per model
+    """
+    from models.forecast_models import ForecastEngine
+
+    engine = ForecastEngine()
+    engine.model_cache = None
+    df = _dummy_history()
+    timings = {}
+
+    for model_name in models:
+        method = getattr(engine, f"_generate_{model_name.lower()}_forecast", None)
+        if method is None:
+            logger.warning(f"Skipping warm-up for unknown model {model_name}")
+            if errors is not None:
+                errors[model_name] = "unknown model"
+            continue
+        start = time.perf_counter()
+        try:
+            method(df, 7, True)
+        except Exception as e:
+            # A missing optional library must not block startup
+            logger.warning(f"Warm-up fit for {model_name} failed: {str(e)}")
+            if errors is not None:
+                errors[model_name] = str(e)
+        timings[model_name] = round(time.perf_counter() - start, 3)
+
+    return timings
+
+class ModelWarmup:
+    """Runs warm-up once per process and reports its progress for /health"""
+
+    def __init__(self, executor: Optional[ForecastExecutor] = None, models: Optional[List[str]] = None):
+        self.logger = logger
+        self.executor = executor
+        self.models = models if models is not None else settings.WARMUP_MODELS
+        self.state = "pending"  # 'pending', 'warming', 'ready', 'degraded' or 'disabled'
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.started_at: Optional[str] = None
+        self.duration: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether warm-up has finished (or is off), so traffic can be served"""
+        return self.state in ("ready", "degraded", "disabled")
+
+    @property
+    def degraded(self) -> bool:
+        """Whether warm-up finished with a failed fit or worker start"""
+        return self.state == "degraded"
+
+    def run(self) -> None:
+        """Warm up synchronously in the calling thread"""
+        self.state = "warming"
+        self.started_at = datetime.utcnow().isoformat()
+        start = time.perf_counter()
+        self.logger.info(f"Warming up models: {self.models}")
+
+        errors: Dict[str, str] = {}
+        try:
+            self.timings = warm_up_models(self.models, errors)
+            # Process workers warm themselves in the pool initializer before
+            # taking a task; start them now and wait until all of them have
+            if self.executor is not None:
+                self.executor.start_workers()
+        except Exception as e:
+            self.logger.error(f"Model warm-up failed: {str(e)}")
+            errors["warmup"] = str(e)
+        finally:
+            self.duration = round(time.perf_counter() - start, 3)
+            self.errors = errors
+            # Serve traffic even after a failed warm-up; requests fall back to
+            # lazy imports, but /health reports the failure
+            self.state = "degraded" if errors else "ready"
+            if errors:
+                self.logger.warning(f"Model warm-up degraded after {self.duration}s: {errors}")
+            else:
+                self.logger.info(f"Model warm-up finished in {self.duration}s: {self.timings}")
+
+    def start(self) -> None:
+        """Warm up on a background thread"""
+        if self._thread is not None:
+            return
+        self.state = "warming"
+        self._thread = threading.Thread(target=self.run, name="model-warmup", daemon=True)
+        self._thread.start()
+
+    def disable(self) -> None:
+        """Skip warm-up; libraries are imported by the first request that needs them"""
+        self.state = "disabled"
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait for a background warm-up to finish"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """Warm-up progress for the health endpoint"""
+        return {
+            "state": self.state,
+            "models": self.models,
+            "started_at": self.started_at,
+            "duration_seconds": self.duration,
+            "timings": self.timings,
+            "errors": self.errors
+        }
@@ -0,0 +1,365 @@
+"""
+Background WhatsApp dispatch for compliance verifications
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Job states; 'retrying' jobs wait for their backoff before being queued again
+JOB_STATES = ("queued", "sending", "retrying", "sent", "failed")
+FINISHED_STATES = ("sent", "failed")
+
+class DispatchQueueFull(Exception):
+    """Raised when the dispatch queue cannot take another message"""
+
+@dataclass
+class DispatchJob:
+    """One WhatsApp message and its delivery state"""
+    job_id: str
+    idempotency_key: str
+    sender: str
+    to: str
+    body: str
+    status: str = "queued"
+    attempts: int = 0
+    message_sid: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Job state without the message body"""
+        state = asdict(self)
+        del state["body"]
+        return state
+
+# Transaction fields that identify one purchase (the chat parser sets 'timestamp')
+TRANSACTION_ID_FIELDS = ("transaction_id", "timestamp")
+
+def transaction_idempotency_key(kiosk_id: str, farmer_phone: str, transaction_details: Dict[str, Any]) -> str:
+    """
+    Key for a transaction, so a resubmitted check does not message the farmer twice
+
+    The key is a hash of the kiosk, phone and transaction, which must carry a
+    ``transaction_id`` or ``timestamp``. Without one, two identical purchases
+    are indistinguishable from a resubmit, so each call gets a new key and
+    nothing is de-duplicated; retrying clients should then send their own key.
+    """
+    if not any(transaction_details.get(name) for name in TRANSACTION_ID_FIELDS):
+        return uuid.uuid4().hex
+    payload = json.dumps([kiosk_id, farmer_phone, transaction_details], sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+class TokenBucket:
+    """Async token bucket allowing ``rate`` acquisitions per second with bursts up to ``burst``"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class WhatsAppDispatcher:
+    """
+    Queue that sends WhatsApp messages through the Twilio REST API in the background
+
+    Messages are submitted with an idempotency key and return a job at once;
+    a second submit with the same key returns the existing job instead of
+    sending again. One dispatcher task drains the queue in batches of up to
+    ``batch_size`` and sends them over a shared, pooled ``httpx.AsyncClient``
+    with at most ``max_connections`` requests in flight and each sender
+    number limited to ``rate_per_second`` (bursts up to ``burst``).
+    Rate-limited (429), server (5xx) and transport errors are retried with
+    jittered exponential backoff, honouring Retry-After, up to
+    ``max_attempts`` sends; other errors fail the job, and ``on_failure``
+    is called with it. Finished jobs are kept for ``job_ttl_seconds`` for
+    status lookups and de-duplication.
+    """
+
+    def __init__(
+        self,
+        account_sid: str,
+        auth_token: str,
+        sender: str,
+        base_url: str = "https://api.twilio.com",
+        max_connections: int = 20,
+        rate_per_second: float = 10.0,
+        burst: int = 20,
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 60.0,
+        queue_size: int = 10000,
+        job_ttl_seconds: float = 24 * 3600,
+        timeout_seconds: float = 10.0,
+        on_failure: Optional[Callable[[DispatchJob], None]] = None
+    ):
+        self.logger = logger
+        self.account_sid = account_sid
+        self.sender = sender
+        self.base_url = base_url
+        self.max_connections = max_connections
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.job_ttl_seconds = job_ttl_seconds
+        self.on_failure = on_failure
+
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            auth=(account_sid, auth_token),
+            timeout=timeout_seconds,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self._queue: "asyncio.Queue[DispatchJob]" = asyncio.Queue(maxsize=queue_size)
+        self._slots = asyncio.Semaphore(max_connections)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._jobs: Dict[str, DispatchJob] = {}
+        self._jobs_by_key: Dict[str, str] = {}
+        self._in_flight: set = set()
+        self._retry_handles: set = set()
+        self._runner: Optional[asyncio.Task] = None
+        self._pruned_at = time.time()
+
+        self.submitted = 0
+        self.duplicates = 0
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+
+    @property
+    def messages_path(self) -> str:
+        return f"/2010-04-01/Accounts/{self.account_sid}/Messages.json"
+
+    def start(self) -> None:
+        """Start the dispatcher task on the running event loop"""
+        if self._runner is None:
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+            self.logger.info(f"WhatsApp dispatcher started: {self.base_url}, "
+                             f"{self.rate_per_second}/s per sender, {self.max_connections} connections")
+
+    async def stop(self, drain_seconds: float = 5.0) -> None:
+        """
+        Stop dispatching, waiting up to ``drain_seconds`` for queued messages
+
+        Messages still queued or waiting for a retry afterwards are marked failed.
+        """
+        deadline = time.monotonic() + drain_seconds
+        while (self._queue.qsize() or self._in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        for task in list(self._in_flight):
+            task.cancel()
+        for handle in list(self._retry_handles):
+            handle.cancel()
+        for job in self._jobs.values():
+            if job.status not in FINISHED_STATES:
+                self._finish(job, "failed", error="dispatcher stopped before sending")
+        await self._client.aclose()
+        self.logger.info("WhatsApp dispatcher stopped")
+
+    def submit(self, to: str, body: str, idempotency_key: str) -> DispatchJob:
+        """
+        Queue a message, or return the job already holding ``idempotency_key``
+
+        A job holding the key that ended ``failed`` is replaced by a new one,
+        so resubmitting retries it.
+
+        Args:
+            to: Recipient phone number with country code
+            body: Message text
+            idempotency_key: Key identifying the message (e.g. one per transaction)
+
+        Returns:
+            DispatchJob
+
+        Raises:
+            DispatchQueueFull: The queue is at capacity
+        """
+        self._prune()
+        existing = self.find(idempotency_key)
+        if existing is not None and existing.status != "failed":
+            self.duplicates += 1
+            return existing
+
+        job = DispatchJob(
+            job_id=uuid.uuid4().hex,
+            idempotency_key=idempotency_key,
+            sender=self.sender,
+            to=to,
+            body=body
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise DispatchQueueFull(f"WhatsApp dispatch queue is full ({self._queue.maxsize} messages)")
+        self._jobs[job.job_id] = job
+        self._jobs_by_key[idempotency_key] = job.job_id
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[DispatchJob]:
+        """Look up a job by id"""
+        return self._jobs.get(job_id)
+
+    def find(self, idempotency_key: str) -> Optional[DispatchJob]:
+        """Look up the job holding an idempotency key"""
+        job_id = self._jobs_by_key.get(idempotency_key)
+        return self._jobs.get(job_id) if job_id is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and delivery counters"""
+        return {
+            "queued": self._queue.qsize(),
+            "in_flight": len(self._in_flight),
+            "retrying": len(self._retry_handles),
+            "jobs": len(self._jobs),
+            "submitted": self.submitted,
+            "duplicates": self.duplicates,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rate_per_second": self.rate_per_second,
+            "max_connections": self.max_connections
+        }
+
+    async def _run(self) -> None:
+        """Drain the queue in batches, starting a send per message as connection slots free up"""
+        while True:
+            batch: List[DispatchJob] = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            for job in batch:
+                await self._slots.acquire()
+                task = asyncio.create_task(self._send(job))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, job: DispatchJob) -> None:
+        """Send one message, then mark it sent, failed or due for a retry"""
+        try:
+            bucket = self._buckets.get(job.sender)
+            if bucket is None:
+                bucket = self._buckets[job.sender] = TokenBucket(self.rate_per_second, self.burst)
+            await bucket.acquire()
+
+            job.status = "sending"
+            job.attempts += 1
+            job.updated_at = time.time()
+            try:
+                response = await self._client.post(self.messages_path, data={
+                    "From": f"whatsapp:{job.sender}",
+                    "To": f"whatsapp:{job.to}",
+                    "Body": job.body
+                })
+            except httpx.TransportError as e:
+                self._retry(job, f"{type(e).__name__}: {str(e)}")
+                return
+
+            if response.status_code in (200, 201):
+                job.message_sid = response.json().get("sid")
+                self._finish(job, "sent")
+                self.logger.info(f"Verification message sent to {job.to}, SID: {job.message_sid}")
+            elif response.status_code == 429 or response.status_code >= 500:
+                self._retry(job, f"HTTP {response.status_code}", response.headers.get("Retry-After"))
+            else:
+                self._finish(job, "failed", error=f"HTTP {response.status_code}: {response.text[:200]}")
+        except Exception as e:
+            self._finish(job, "failed", error=str(e))
+        finally:
+            self._slots.release()
+
+    def _retry(self, job: DispatchJob, error: str, retry_after: Optional[str] = None) -> None:
+        """Schedule another attempt after a backoff, or fail the job when attempts are used up"""
+        if job.attempts >= self.max_attempts:
+            self._finish(job, "failed", error=f"{error} after {job.attempts} attempts")
+            return
+
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (job.attempts - 1))
+        delay *= random.uniform(0.5, 1.0)
+        try:
+            delay = max(delay, float(retry_after)) if retry_after is not None else delay
+        except ValueError:
+            pass
+
+        job.status = "retrying"
+        job.error = error
+        job.updated_at = time.time()
+        self.retries += 1
+
+        def requeue():
+            self._retry_handles.discard(handle)
+            try:
+                job.status = "queued"
+                self._queue.put_nowait(job)
+            except asyncio.QueueFull:
+                self._finish(job, "failed", error=f"{error}; queue full on retry")
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retry_handles.add(handle)
+
+    def _finish(self, job: DispatchJob, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.updated_at = time.time()
+        if status == "sent":
+            self.sent += 1
+        else:
+            self.failed += 1
+            self.logger.error(f"WhatsApp message to {job.to} failed: {error}")
+            if self.on_failure is not None:
+                try:
+                    self.on_failure(job)
+                except Exception as e:
+                    self.logger.error(f"WhatsApp failure callback error: {str(e)}")
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than the TTL, at most once a minute"""
+        now = time.time()
+        if now - self._pruned_at < 60:
+            return
+        self._pruned_at = now
+        expired = [
+            job for job in self._jobs.values()
+            if job.status in FINISHED_STATES and now - job.updated_at > self.job_ttl_seconds
+        ]
+        for job in expired:
+            del self._jobs[job.job_id]
+            if self._jobs_by_key.get(job.idempotency_key) == job.job_id:
+                del self._jobs_by_key[job.idempotency_key]
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the kiosk chat transaction parser
+"""
+
+from models.chat_parser import ChatTransactionParser
+
+parser = ChatTransactionParser()
+
+def items(message: str):
+    parsed = parser.parse(message)
+    return [(item["name"], item["quantity"], item["unit"]) for item in parsed["items"]]
+
+def test_grade_after_product_is_not_a_quantity():
+    assert items("sold 10 sak NPK 15-15-15 to Pak Budi") == [("NPK", 10, "sack")]
+    assert items("npk 16-16-16 20 sak") == [("NPK", 20, "sack")]
+    assert parser.parse("sold 10 sak NPK 15-15-15 to Pak Budi")["buyer_name"] == "Pak Budi"
+
+def test_quantity_with_unit_before_product_wins():
+    assert items("sold 10 sak NPK 2") == [("NPK", 10, "sack")]
+
+def test_mixed_separators():
+    assert ChatTransactionParser.parse_quantity("1,000.50") == 1000.5
+    assert ChatTransactionParser.parse_quantity("1.000,50") == 1000.5
+    assert ChatTransactionParser.parse_quantity("1.000") == 1000
+    assert ChatTransactionParser.parse_quantity("2,5") == 2.5
+    assert items("sold 1,000.50 kg urea") == [("UREA", 1000.5, "kg")]
+
+def test_multiple_items():
+    assert items("just sold 3 sacks of Urea and 5 NPK to Mr. Budi") == [("UREA", 3, "sack"), ("NPK", 5, "sack")]
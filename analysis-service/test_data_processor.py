@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Regression tests for historical data ingest
+"""
+
+import warnings
+
+import pytest
+
+from models.data_processor import DataProcessor
+
+processor = DataProcessor()
+
+def dates(values):
+    df = processor.process_historical_data({
+        "dates": values, "quantities": [1] * len(values), "prices": [1] * len(values)
+    })
+    return [str(date.date()) for date in df['date']]
+
+def test_mixed_date_formats_keep_every_row():
+    assert dates(["01/02/2024", "2024-01-04"]) == ["2024-01-02", "2024-01-04"]
+
+def test_timezone_suffix_parses_as_utc_without_warning():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert dates(["2024-01-04T00:00:00Z", "2024-01-05T03:00:00+07:00"]) == ["2024-01-04", "2024-01-04"]
+
+def test_unparseable_dates_are_rejected():
+    with pytest.raises(ValueError, match="1 unparseable dates"):
+        dates(["2024-01-04T00:00:00Z", "not a date"])
+
+def test_missing_dates_are_dropped():
+    assert dates(["2024-01-04", None, "2024-01-05"]) == ["2024-01-04", "2024-01-05"]
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Regression tests for incremental model updates on shifted windows
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from models.forecast_models import ForecastEngine, _import_statsmodels
+from models.model_cache import FittedModelCache
+
+_import_statsmodels()
+warnings.filterwarnings("ignore")
+
+def history(length: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    t = np.arange(length)
+    return pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=length, freq="D"),
+        "price": 25 + 2 * np.sin(2 * np.pi * t / 7) + rng.normal(0, 0.5, length)
+    })
+
+def test_es_window_shifted_by_less_than_a_season_updates_incrementally():
+    full = history(120)
+    for shift in (1, 3, 6, 7):
+        engine = ForecastEngine()
+        engine.model_cache = FittedModelCache()
+        engine._generate_es_forecast(full.iloc[:100], 7, False, series_key="product")
+        window = full.iloc[shift:100 + shift].reset_index(drop=True)
+        assert engine._generate_es_forecast(window, 7, False, series_key="product").fit_mode == "incremental"
+
+def test_es_update_continues_the_previous_states():
+    full = history(110)
+    engine = ForecastEngine()
+    previous = engine._fit_es_model(full.iloc[:100])
+    updated = engine._update_es_model(previous, full.iloc[3:103].reset_index(drop=True), 3, 100)
+    np.testing.assert_allclose(
+        np.asarray(updated.fittedvalues)[:97], np.asarray(previous.fittedvalues)[3:]
+    )
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Regression tests for streamed route solutions
+"""
+
+import queue
+import random
+import threading
+import time
+
+from models.routing_optimizer import Location, RouteOptimizer, solve_routes
+
+TIME_LIMIT_SECONDS = 5
+MIN_SOLUTION_INTERVAL = 0.25
+
+def problem(stops: int = 30):
+    rng = random.Random(1)
+    warehouse = Location("warehouse", -6.2, 106.8)
+    delivery_points = [
+        Location(f"stop-{i}", -6.2 + rng.uniform(-0.1, 0.1), 106.8 + rng.uniform(-0.1, 0.1), demand=1)
+        for i in range(stops)
+    ]
+    matrix = RouteOptimizer().build_matrix([warehouse] + delivery_points)
+    return dict(
+        warehouse=warehouse, delivery_points=delivery_points, vehicle_capacity=10,
+        vehicle_count=4, optimization_goal="distance", matrix=matrix
+    )
+
+def test_suppressed_improvements_stream_before_the_time_limit():
+    events = queue.Queue()
+    cancel = threading.Event()
+    received = []
+
+    def consume():
+        # Stop the search once improvements are flowing, as a client disconnect would
+        while len(received) < 2:
+            _, _, objective, _ = events.get()
+            received.append(objective)
+        cancel.set()
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    started = time.perf_counter()
+    routes = solve_routes(
+        **problem(), time_limit_seconds=TIME_LIMIT_SECONDS, events=events, cancel=cancel,
+        min_solution_interval=MIN_SOLUTION_INTERVAL
+    )
+    elapsed = time.perf_counter() - started
+
+    consumer.join(1)
+    assert routes
+    assert len(received) == 2
+    assert received[1] < received[0]
+    assert elapsed < TIME_LIMIT_SECONDS / 2
+
+def test_cancel_stops_the_search_without_emitting():
+    events = queue.Queue()
+    cancel = threading.Event()
+    cancel.set()
+    started = time.perf_counter()
+    solve_routes(**problem(), time_limit_seconds=TIME_LIMIT_SECONDS, events=events, cancel=cancel)
+    assert time.perf_counter() - started < TIME_LIMIT_SECONDS / 2
+    assert events.empty()
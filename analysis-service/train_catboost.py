@@ -10,8 +10,9 @@ from catboost import CatBoostRegressor, Pool
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import joblib
+import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import logging
 
 # Setup logging
@@ -24,6 +25,8 @@ class CatBoostTrainer:
     def __init__(self):
         self.model = None
         self.feature_names = None
+        self.strategy = "vectorized"
+        self.max_horizon = None
 
     def generate_artificial_data(self, n_samples: int = 1000) -> pd.DataFrame:
         """
@@ -254,6 +257,93 @@ class CatBoostTrainer:
 
         logger.info(f"Model loaded from {filepath}")
 
+    def train_serving_model(self, df: pd.DataFrame, strategy: str = "vectorized", **kwargs) -> CatBoostRegressor:
+        """
+        Train a quantity model on exactly the features the service builds at request time
+
+        Args:
+            df: Historical data with date, quantity, price and optional ndvi columns
+            strategy: Horizon strategy the artifact will serve ('vectorized' or 'direct')
+            **kwargs: Additional CatBoost parameters
+
+        Returns:
+            Trained CatBoost model
+        """
+        from models.forecast_models import ForecastEngine
+
+        engine = ForecastEngine()
+        if strategy == "direct":
+            features = engine._build_catboost_direct_features(df)
+        else:
+            features = engine._build_catboost_features(df)
+
+        params = {
+            'iterations': 500,
+            'learning_rate': 0.1,
+            'depth': 6,
+            'random_seed': 42,
+            'verbose': 100
+        }
+        params.update(kwargs)
+
+        model = CatBoostRegressor(**params, cat_features=['season'])
+        model.fit(features['X'], features['y'])
+
+        self.model = model
+        self.feature_names = list(features['X'].columns)
+        self.strategy = strategy
+        self.max_horizon = features.get('max_horizon')
+
+        logger.info(f"Trained serving CatBoost model with {model.tree_count_} trees ({strategy})")
+        return model
+
+    def export_registry_artifact(
+        self,
+        registry_dir: str,
+        name: str,
+        version: str,
+        scope: str = "global",
+        scope_id: Optional[str] = None,
+        products: Optional[List[str]] = None
+    ) -> str:
+        """
+        Export the model as a registry artifact (.cbm plus .json sidecar)
+
+        Args:
+            registry_dir: Directory the service loads artifacts from
+            name: Artifact file name without extension
+            version: Version string; the newest version per scope is served
+            scope: 'global', 'product' or 'category'
+            scope_id: Product id or category name for scoped artifacts
+            products: Product ids covered by a category artifact
+
+        Returns:
+            Path of the exported .cbm file
+        """
+        if self.model is None:
+            raise ValueError("Model not trained yet")
+
+        os.makedirs(registry_dir, exist_ok=True)
+        model_path = os.path.join(registry_dir, f"{name}.cbm")
+        meta_path = os.path.join(registry_dir, f"{name}.json")
+
+        # Write the sidecar last so the service never sees a half-written pair
+        self.model.save_model(model_path, format="cbm")
+        with open(meta_path, "w") as f:
+            json.dump({
+                "version": version,
+                "scope": scope,
+                "scope_id": scope_id,
+                "products": products or [],
+                "strategy": self.strategy,
+                "max_horizon": self.max_horizon,
+                "feature_names": self.feature_names,
+                "training_date": datetime.now().isoformat()
+            }, f, indent=2)
+
+        logger.info(f"Registry artifact {name} version {version} exported to {registry_dir}")
+        return model_path
+
     def predict(self, features: pd.DataFrame) -> np.ndarray:
         """
         Make predictions with trained model
@@ -310,6 +400,17 @@ def main():
     logger.info(f"Model saved to: {model_path}")
     logger.info(f"Test Metrics: {metrics}")
 
+    # Export a serving model to the registry the service loads at startup
+    from utils.config import settings
+
+    serving_trainer = CatBoostTrainer()
+    serving_trainer.train_serving_model(df[['date', 'quantity', 'price']])
+    serving_trainer.export_registry_artifact(
+        registry_dir=settings.MODEL_REGISTRY_DIR,
+        name="catboost_global",
+        version=datetime.now().strftime("%Y%m%d%H%M%S")
+    )
+
     return trainer
 
 if __name__ == "__main__":
@@ -0,0 +1,301 @@
+"""
+Columnar binary codecs for forecast requests and responses
+
+Two formats are supported besides JSON:
+
+Arrow IPC stream (``application/vnd.apache.arrow.stream``)
+    One record batch per forecast item. Scalar request/response fields travel
+    as JSON in the batch's custom metadata under ``fields``; the series travel
+    as columns.
+
+NumPy frames (``application/x-pukpuk-numpy``)
+    A sequence of frames, one per forecast item::
+
+        b"PKNP" | uint32 LE header length | JSON header (space padded to 8 bytes)
+        | column 0 bytes | column 1 bytes | ...
+
+    The header holds ``fields``, ``length`` and ``columns`` (a list of
+    ``[name, dtype]`` pairs with little-endian 8-byte dtypes such as ``<i8``
+    and ``<f8``). Dates are int64 nanoseconds since the epoch.
+
+Decoding returns NumPy arrays that view the request body wherever the column
+type allows it, so no per-point Python objects are created.
+"""
+
+import io
+import json
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Import pyarrow (optional, only needed for the Arrow format)
+pyarrow_available = True
+try:
+    import pyarrow as pa
+except ImportError:
+    pyarrow_available = False
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+NUMPY_MEDIA_TYPE = "application/x-pukpuk-numpy"
+BINARY_MEDIA_TYPES = (ARROW_MEDIA_TYPE, NUMPY_MEDIA_TYPE)
+
+NUMPY_FRAME_MAGIC = b"PKNP"
+_FRAME_PREFIX = struct.Struct("<4sI")
+_ALLOWED_DTYPES = ("<i8", "<f8")
+
+# A decoded frame: scalar fields and named columns
+Frame = Tuple[Dict[str, Any], Dict[str, np.ndarray]]
+
+class CodecError(ValueError):
+    """Raised when a binary payload cannot be decoded"""
+
+def media_type(header_value: Optional[str]) -> str:
+    """Strip parameters from a Content-Type header value"""
+    if not header_value:
+        return JSON_MEDIA_TYPE
+    return header_value.split(";", 1)[0].strip().lower()
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the response media type from an Accept header, defaulting to JSON"""
+    if not accept:
+        return JSON_MEDIA_TYPE
+    for part in accept.split(","):
+        candidate = media_type(part)
+        if candidate in BINARY_MEDIA_TYPES or candidate == JSON_MEDIA_TYPE:
+            return candidate
+    return JSON_MEDIA_TYPE
+
+def decode_frames(body: bytes, content_type: str) -> List[Frame]:
+    """Decode a binary request body into frames"""
+    if content_type == ARROW_MEDIA_TYPE:
+        return decode_arrow_stream(body)
+    if content_type == NUMPY_MEDIA_TYPE:
+        return decode_numpy_frames(body)
+    raise CodecError(f"Unsupported media type '{content_type}'")
+
+class FrameEncoder:
+    """Incremental encoder so streamed responses can be written frame by frame"""
+
+    def __init__(self, content_type: str, schema: Dict[str, str]):
+        """
+        Args:
+            content_type: ARROW_MEDIA_TYPE or NUMPY_MEDIA_TYPE
+            schema: Column name to kind ('timestamp', 'float64' or 'string')
+        """
+        if content_type == ARROW_MEDIA_TYPE and not pyarrow_available:
+            raise CodecError("pyarrow not available - Arrow format disabled")
+        self.content_type = content_type
+        self.schema = schema
+        self._sink: Optional[io.BytesIO] = None
+        self._writer = None
+
+        if content_type == ARROW_MEDIA_TYPE:
+            self._arrow_schema = pa.schema([
+                (name, _ARROW_TYPES[kind]) for name, kind in schema.items()
+            ])
+            self._sink = io.BytesIO()
+            self._writer = pa.ipc.new_stream(self._sink, self._arrow_schema)
+
+    def encode(self, fields: Dict[str, Any], columns: Dict[str, Any]) -> bytes:
+        """Encode one frame; returns the bytes to send for it"""
+        if self.content_type == NUMPY_MEDIA_TYPE:
+            numeric = {
+                name: _to_numpy_column(columns.get(name, []), kind)
+                for name, kind in self.schema.items()
+                if kind != "string"
+            }
+            # String columns have no raw representation; carry them in the header
+            extra = {
+                name: list(columns.get(name, []))
+                for name, kind in self.schema.items()
+                if kind == "string"
+            }
+            return encode_numpy_frame({**fields, **extra}, numeric)
+
+        arrays = [
+            _to_arrow_column(columns.get(name, []), kind)
+            for name, kind in self.schema.items()
+        ]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=self._arrow_schema)
+        self._writer.write_batch(batch, custom_metadata={"fields": json.dumps(fields, default=str)})
+        return self._drain()
+
+    def start(self) -> bytes:
+        """Bytes that precede the first frame (the Arrow schema message)"""
+        return self._drain() if self._sink is not None else b""
+
+    def close(self) -> bytes:
+        """Bytes that follow the last frame (the Arrow end-of-stream marker)"""
+        if self._writer is None:
+            return b""
+        self._writer.close()
+        self._writer = None
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate()
+        return data
+
+def encode_frames(content_type: str, schema: Dict[str, str], frames: Iterable[Tuple[Dict[str, Any], Dict[str, Any]]]) -> bytes:
+    """Encode a complete body from (fields, columns) pairs"""
+    encoder = FrameEncoder(content_type, schema)
+    parts = [encoder.start()]
+    parts.extend(encoder.encode(fields, columns) for fields, columns in frames)
+    parts.append(encoder.close())
+    return b"".join(parts)
+
+def encode_numpy_frame(fields: Dict[str, Any], columns: Dict[str, np.ndarray]) -> bytes:
+    """Encode one NumPy frame from scalar fields and equal-length 8-byte columns"""
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise CodecError("All columns in a frame must have the same length")
+
+    arrays = []
+    layout = []
+    for name, values in columns.items():
+        array = np.ascontiguousarray(values)
+        dtype = array.dtype.newbyteorder("<") if array.dtype.byteorder == ">" else array.dtype
+        dtype_str = dtype.str
+        if dtype_str not in _ALLOWED_DTYPES:
+            raise CodecError(f"Column '{name}' has unsupported dtype {array.dtype}")
+        arrays.append(array.astype(dtype, copy=False))
+        layout.append([name, dtype_str])
+
+    header = json.dumps(
+        {"fields": fields, "length": lengths.pop() if lengths else 0, "columns": layout},
+        default=str
+    ).encode("utf-8")
+    # Pad so the column data that follows stays 8-byte aligned
+    header += b" " * (-(_FRAME_PREFIX.size + len(header)) % 8)
+
+    return b"".join(
+        [_FRAME_PREFIX.pack(NUMPY_FRAME_MAGIC, len(header)), header]
+        + [array.tobytes() for array in arrays]
+    )
+
+def decode_numpy_frames(body: bytes) -> List[Frame]:
+    """Decode every NumPy frame in a body; columns are read-only views of it"""
+    frames = []
+    offset = 0
+    while offset < len(body):
+        if len(body) - offset < _FRAME_PREFIX.size:
+            raise CodecError("Truncated frame prefix")
+        magic, header_length = _FRAME_PREFIX.unpack_from(body, offset)
+        if magic != NUMPY_FRAME_MAGIC:
+            raise CodecError("Invalid frame magic")
+        offset += _FRAME_PREFIX.size
+
+        if offset + header_length > len(body):
+            raise CodecError("Truncated frame header")
+        try:
+            header = json.loads(body[offset:offset + header_length])
+            length = int(header["length"])
+            layout = header["columns"]
+            fields = header.get("fields", {})
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise CodecError(f"Invalid frame header: {str(e)}")
+        if length < 0:
+            raise CodecError(f"Invalid frame length {length}")
+        if not isinstance(fields, dict):
+            raise CodecError("Frame fields must be an object")
+        if not isinstance(layout, list) or not all(
+            isinstance(entry, list) and len(entry) == 2 and all(isinstance(part, str) for part in entry)
+            for entry in layout
+        ):
+            raise CodecError("Frame columns must be a list of [name, dtype] pairs")
+        offset += header_length
+
+        columns = {}
+        for name, dtype_str in layout:
+            if name in columns:
+                raise CodecError(f"Duplicate column '{name}'")
+            if dtype_str not in _ALLOWED_DTYPES:
+                raise CodecError(f"Column '{name}' has unsupported dtype {dtype_str}")
+            dtype = np.dtype(dtype_str)
+            size = length * dtype.itemsize
+            if offset + size > len(body):
+                raise CodecError(f"Truncated column '{name}'")
+            columns[name] = np.frombuffer(body, dtype=dtype, count=length, offset=offset)
+            offset += size
+
+        frames.append((fields, columns))
+    return frames
+
+def decode_arrow_stream(body: bytes) -> List[Frame]:
+    """Decode an Arrow IPC stream, one frame per record batch"""
+    if not pyarrow_available:
+        raise CodecError("pyarrow not available - Arrow format disabled")
+
+    try:
+        reader = pa.ipc.open_stream(pa.py_buffer(body))
+        schema_fields = _metadata_fields(reader.schema.metadata)
+        frames = []
+        while True:
+            try:
+                batch, metadata = reader.read_next_batch_with_custom_metadata()
+            except StopIteration:
+                break
+            fields = {**schema_fields, **_metadata_fields(metadata)}
+            columns = {
+                name: _arrow_to_numpy(batch.column(i))
+                for i, name in enumerate(batch.schema.names)
+            }
+            frames.append((fields, columns))
+        return frames
+    except pa.ArrowException as e:
+        raise CodecError(f"Invalid Arrow stream: {str(e)}")
+
+def _metadata_fields(metadata: Optional[Dict[bytes, bytes]]) -> Dict[str, Any]:
+    if not metadata or b"fields" not in metadata:
+        return {}
+    try:
+        return json.loads(metadata[b"fields"])
+    except ValueError as e:
+        raise CodecError(f"Invalid fields metadata: {str(e)}")
+
+def _arrow_to_numpy(column: Any) -> np.ndarray:
+    """Convert an Arrow column, zero-copy for null-free numeric and timestamp[ns] data"""
+    if pa.types.is_date(column.type) or (
+        pa.types.is_timestamp(column.type) and column.type.unit != "ns"
+    ):
+        column = column.cast(pa.timestamp("ns"))
+    if pa.types.is_timestamp(column.type) and column.type.tz is not None:
+        column = column.cast(pa.timestamp("ns"))
+    if column.null_count == 0 and (
+        pa.types.is_floating(column.type)
+        or pa.types.is_integer(column.type)
+        or pa.types.is_timestamp(column.type)
+    ):
+        return column.to_numpy(zero_copy_only=True)
+    return column.to_numpy(zero_copy_only=False)
+
+if pyarrow_available:
+    _ARROW_TYPES = {
+        "timestamp": pa.timestamp("ns"),
+        "float64": pa.float64(),
+        "string": pa.string()
+    }
+else:
+    _ARROW_TYPES = {}
+
+def _to_numpy_column(values: Any, kind: str) -> np.ndarray:
+    if kind == "timestamp":
+        return np.asarray(values, dtype="datetime64[ns]").view("<i8")
+    if isinstance(values, list):
+        # Missing values become NaN in the raw format
+        values = [np.nan if v is None else v for v in values]
+    return np.asarray(values, dtype="<f8")
+
+def _to_arrow_column(values: Any, kind: str) -> Any:
+    if kind == "timestamp":
+        return pa.array(np.asarray(values, dtype="datetime64[ns]"), type=pa.timestamp("ns"))
+    if kind == "float64":
+        # Lists keep None as null; arrays are passed through without copying
+        if not isinstance(values, list):
+            values = np.asarray(values, dtype=np.float64)
+        return pa.array(values, type=pa.float64())
+    return pa.array(values, type=pa.string())
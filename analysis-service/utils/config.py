@@ -26,12 +26,144 @@ class Settings:
     DEFAULT_MODELS: List[str] = ["ensemble"]
     MAX_FORECAST_DAYS: int = 365
     MIN_HISTORICAL_DATA_POINTS: int = 3
+    FORECAST_EXECUTOR_BACKEND: str = os.getenv("FORECAST_EXECUTOR_BACKEND", "thread")  # thread, process or inline
+    FORECAST_MAX_WORKERS: int = int(os.getenv("FORECAST_MAX_WORKERS", 4))
+    MAX_BATCH_ITEMS: int = int(os.getenv("MAX_BATCH_ITEMS", 500))
 
     # CatBoost Settings (for future training)
     CATBOOST_ITERATIONS: int = 100
     CATBOOST_LEARNING_RATE: float = 0.1
     CATBOOST_DEPTH: int = 6
     CATBOOST_VERBOSE: bool = False
+    CATBOOST_INCREMENTAL_ITERATIONS: int = int(os.getenv("CATBOOST_INCREMENTAL_ITERATIONS", 20))
+    # 'vectorized' holds the last observed features over the horizon; 'direct' trains one
+    # model on lag features plus a horizon column and predicts all days from the last row,
+    # continuing recursively past the longest of CATBOOST_DIRECT_HORIZONS
+    CATBOOST_HORIZON_STRATEGY: str = os.getenv("CATBOOST_HORIZON_STRATEGY", "vectorized")
+    CATBOOST_DIRECT_HORIZONS: List[int] = [
+        int(h) for h in os.getenv("CATBOOST_DIRECT_HORIZONS", "1,2,3,5,7,14,21,30,60,90").split(",")
+    ]
+
+    # Fitted Model Cache
+    MODEL_CACHE_ENABLED: bool = os.getenv("MODEL_CACHE_ENABLED", "true").lower() == "true"
+    MODEL_CACHE_MAX_ENTRIES: int = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", 256))
+    MODEL_CACHE_TTL_SECONDS: int = int(os.getenv("MODEL_CACHE_TTL_SECONDS", 3600))
+    MODEL_CACHE_DIR: str = os.getenv("MODEL_CACHE_DIR", "")  # Empty disables joblib spill
+    MODEL_CACHE_DIR_MAX_MB: int = int(os.getenv("MODEL_CACHE_DIR_MAX_MB", 512))  # Oldest spilled models go first
+
+    # Incremental Model Updates (require the fitted model cache)
+    INCREMENTAL_FIT_ENABLED: bool = os.getenv("INCREMENTAL_FIT_ENABLED", "true").lower() == "true"
+    INCREMENTAL_MAX_UPDATES: int = int(os.getenv("INCREMENTAL_MAX_UPDATES", 30))  # Full refit after this many
+
+    # Pretrained Model Registry (CatBoost .cbm artifacts with .json sidecars)
+    MODEL_REGISTRY_ENABLED: bool = os.getenv("MODEL_REGISTRY_ENABLED", "true").lower() == "true"
+    MODEL_REGISTRY_DIR: str = os.getenv("MODEL_REGISTRY_DIR", "models/registry")
+    MODEL_REGISTRY_RELOAD_SECONDS: int = int(os.getenv("MODEL_REGISTRY_RELOAD_SECONDS", 30))  # 0 disables hot reload
+
+    # Route Optimization: solves run on their own pool ('process' keeps the
+    # OR-Tools search, which holds the GIL, off the API process)
+    ROUTE_EXECUTOR_BACKEND: str = os.getenv("ROUTE_EXECUTOR_BACKEND", "process")
+    ROUTE_MAX_WORKERS: int = int(os.getenv("ROUTE_MAX_WORKERS", 2))
+    ROUTE_TIME_LIMIT_SECONDS: float = float(os.getenv("ROUTE_TIME_LIMIT_SECONDS", 30))  # Default search budget
+    ROUTE_MAX_TIME_LIMIT_SECONDS: float = float(os.getenv("ROUTE_MAX_TIME_LIMIT_SECONDS", 120))
+    ROUTE_STREAM_MIN_INTERVAL_SECONDS: float = float(os.getenv("ROUTE_STREAM_MIN_INTERVAL_SECONDS", 0.25))
+    ROUTE_DEFAULT_START_TIME: str = os.getenv("ROUTE_DEFAULT_START_TIME", "07:00")  # Plan start when a request omits start_time
+    # Large instances: 'auto' solves requests above the threshold cluster-first
+    # (sweep), 'sweep'/'kmeans' always decompose, 'none' builds one model
+    ROUTE_DECOMPOSITION: str = os.getenv("ROUTE_DECOMPOSITION", "auto")
+    ROUTE_DECOMPOSITION_THRESHOLD: int = int(os.getenv("ROUTE_DECOMPOSITION_THRESHOLD", 400))
+    ROUTE_CLUSTER_SIZE: int = int(os.getenv("ROUTE_CLUSTER_SIZE", 200))
+    # Cluster solve processes per route worker (each route worker keeps its own
+    # pool; 1 solves clusters in the route worker itself)
+    ROUTE_CLUSTER_WORKERS: int = int(os.getenv("ROUTE_CLUSTER_WORKERS", 1))
+
+    # Route Distance Cache (memory-mapped pairwise meters, and road network seconds, for known locations)
+    DISTANCE_CACHE_ENABLED: bool = os.getenv("DISTANCE_CACHE_ENABLED", "true").lower() == "true"
+    DISTANCE_CACHE_DIR: str = os.getenv("DISTANCE_CACHE_DIR", "cache/distances")
+    DISTANCE_CACHE_MAX_LOCATIONS: int = int(os.getenv("DISTANCE_CACHE_MAX_LOCATIONS", 8192))  # 256 MiB matrix when full
+    DISTANCE_CACHE_TTL_SECONDS: int = int(os.getenv("DISTANCE_CACHE_TTL_SECONDS", 30 * 24 * 3600))
+
+    # Route Distances: 'haversine' (straight line, travel time at a constant speed) or
+    # 'road_network' (shortest paths over the CSR road graph at ROAD_GRAPH_PATH;
+    # 'synthetic' builds a small test city instead of loading a file)
+    DISTANCE_PROVIDER: str = os.getenv("DISTANCE_PROVIDER", "haversine")
+    ROAD_GRAPH_PATH: str = os.getenv("ROAD_GRAPH_PATH", "data/road_graph.npz")
+    ROAD_ACCESS_SPEED_KMH: float = float(os.getenv("ROAD_ACCESS_SPEED_KMH", 20))  # Location to nearest road node
+
+    # Route Plan Cache: exact repeats are answered from the cache; requests for the
+    # same fleet whose stops overlap a cached plan by at least the similarity start from it
+    ROUTE_CACHE_ENABLED: bool = os.getenv("ROUTE_CACHE_ENABLED", "true").lower() == "true"
+    ROUTE_CACHE_MAX_ENTRIES: int = int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", 256))
+    ROUTE_CACHE_TTL_SECONDS: int = int(os.getenv("ROUTE_CACHE_TTL_SECONDS", 3600))
+    ROUTE_CACHE_MIN_SIMILARITY: float = float(os.getenv("ROUTE_CACHE_MIN_SIMILARITY", 0.8))  # Jaccard over stops
+
+    # WhatsApp Dispatch: compliance verifications are queued and sent in the background
+    # over one pooled connection to the Twilio REST API (point the base URL at a
+    # local fake server for testing)
+    TWILIO_ACCOUNT_SID: str = os.getenv("TWILIO_ACCOUNT_SID", "")
+    TWILIO_AUTH_TOKEN: str = os.getenv("TWILIO_AUTH_TOKEN", "")
+    TWILIO_WHATSAPP_NUMBER: str = os.getenv("TWILIO_WHATSAPP_NUMBER", "+14155238886")  # Twilio sandbox number
+    TWILIO_API_BASE_URL: str = os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com")
+    WHATSAPP_MAX_CONNECTIONS: int = int(os.getenv("WHATSAPP_MAX_CONNECTIONS", 20))
+    WHATSAPP_RATE_PER_SECOND: float = float(os.getenv("WHATSAPP_RATE_PER_SECOND", 10))  # Per sender number
+    WHATSAPP_BURST: int = int(os.getenv("WHATSAPP_BURST", 20))
+    WHATSAPP_BATCH_SIZE: int = int(os.getenv("WHATSAPP_BATCH_SIZE", 50))
+    WHATSAPP_MAX_ATTEMPTS: int = int(os.getenv("WHATSAPP_MAX_ATTEMPTS", 5))
+    WHATSAPP_RETRY_BASE_SECONDS: float = float(os.getenv("WHATSAPP_RETRY_BASE_SECONDS", 1.0))  # Doubles per attempt
+    WHATSAPP_QUEUE_SIZE: int = int(os.getenv("WHATSAPP_QUEUE_SIZE", 10000))
+    WHATSAPP_JOB_TTL_SECONDS: int = int(os.getenv("WHATSAPP_JOB_TTL_SECONDS", 24 * 3600))  # Status lookups and de-duplication
+
+    # Verification Replies: farmers' YES/NO replies arrive on POST /webhooks/whatsapp and
+    # resolve the pending verifications kept in SQLite; unanswered ones are flagged
+    VERIFICATION_DB_PATH: str = os.getenv("VERIFICATION_DB_PATH", "data/verifications.sqlite3")
+    VERIFICATION_RESPONSE_WINDOW_HOURS: float = float(os.getenv("VERIFICATION_RESPONSE_WINDOW_HOURS", 24))
+    VERIFICATION_SWEEP_SECONDS: int = int(os.getenv("VERIFICATION_SWEEP_SECONDS", 60))  # 0 disables the sweeper
+    VERIFICATION_RETENTION_DAYS: float = float(os.getenv("VERIFICATION_RETENTION_DAYS", 90))  # Resolved rows
+    TWILIO_WEBHOOK_URL: str = os.getenv("TWILIO_WEBHOOK_URL", "")  # Public URL Twilio signs; defaults to the request URL
+    TWILIO_WEBHOOK_VALIDATE: bool = os.getenv("TWILIO_WEBHOOK_VALIDATE", "true").lower() == "true"
+
+    # HET Price Table: product x region x effective date prices (Rp/kg, region '*' is
+    # national) from CSV or Parquet, reloaded when the file changes
+    HET_TABLE_PATH: str = os.getenv("HET_TABLE_PATH", "data/het_prices.csv")
+    HET_RELOAD_SECONDS: int = int(os.getenv("HET_RELOAD_SECONDS", 30))  # 0 disables hot reload
+    HET_SACK_KG: float = float(os.getenv("HET_SACK_KG", 50))  # Kilograms per reported sack
+    HET_TOLERANCE: float = float(os.getenv("HET_TOLERANCE", 0.0))  # Fraction above HET still accepted
+
+    # Violation Detection: per-kiosk rolling windows over checked transactions and replies
+    DETECTOR_WINDOW: int = int(os.getenv("DETECTOR_WINDOW", 200))  # Transactions per kiosk
+    DETECTOR_REPLY_WINDOW: int = int(os.getenv("DETECTOR_REPLY_WINDOW", 50))  # Replies per kiosk
+    DETECTOR_MIN_SAMPLES: int = int(os.getenv("DETECTOR_MIN_SAMPLES", 20))  # Before rate and anomaly rules apply
+    DETECTOR_MIN_REPLIES: int = int(os.getenv("DETECTOR_MIN_REPLIES", 5))
+    DETECTOR_OVER_HET_SHARE: float = float(os.getenv("DETECTOR_OVER_HET_SHARE", 0.2))
+    DETECTOR_NO_REPLY_SHARE: float = float(os.getenv("DETECTOR_NO_REPLY_SHARE", 0.3))
+    DETECTOR_ZSCORE: float = float(os.getenv("DETECTOR_ZSCORE", 4.0))  # Price/HET ratio anomaly score
+    DETECTOR_COOLDOWN_SECONDS: int = int(os.getenv("DETECTOR_COOLDOWN_SECONDS", 3600))  # Per kiosk and rule
+    DETECTOR_MAX_KIOSKS: int = int(os.getenv("DETECTOR_MAX_KIOSKS", 100000))  # Least recently seen dropped
+    DETECTOR_MAX_VIOLATIONS: int = int(os.getenv("DETECTOR_MAX_VIOLATIONS", 1000))  # Recent violations kept
+    DETECTOR_QUEUE_SIZE: int = int(os.getenv("DETECTOR_QUEUE_SIZE", 100000))
+    DETECTOR_BATCH_SIZE: int = int(os.getenv("DETECTOR_BATCH_SIZE", 1000))
+    DETECTOR_TAIL_PATH: str = os.getenv("DETECTOR_TAIL_PATH", "")  # JSON-lines transaction file to follow
+    DETECTOR_TAIL_SECONDS: float = float(os.getenv("DETECTOR_TAIL_SECONDS", 1.0))
+
+    # Chat Parsing
+    MAX_CHAT_BATCH_MESSAGES: int = int(os.getenv("MAX_CHAT_BATCH_MESSAGES", 10000))  # Per /parse-chat/batch call
+
+    # NDVI: daily values per lat/lng grid cell in a memory-mapped store under
+    # NDVI_STORE_DIR; satellite observations replace the synthetic series
+    NDVI_STORE_ENABLED: bool = os.getenv("NDVI_STORE_ENABLED", "true").lower() == "true"
+    NDVI_STORE_DIR: str = os.getenv("NDVI_STORE_DIR", "cache/ndvi")
+    NDVI_GRID_DEGREES: float = float(os.getenv("NDVI_GRID_DEGREES", 0.05))  # About 5.5 km cells
+    NDVI_STORE_START: str = os.getenv("NDVI_STORE_START", "2000-01-01")
+    NDVI_STORE_END: str = os.getenv("NDVI_STORE_END", "2059-12-31")  # 21915 days, about 107 KB per cell
+    NDVI_MAX_CELLS: int = int(os.getenv("NDVI_MAX_CELLS", 4096))  # Least recently used cells evicted beyond this
+    NDVI_MAX_OBSERVATIONS: int = int(os.getenv("NDVI_MAX_OBSERVATIONS", 100000))  # Per POST /ndvi/observations
+
+    # Model Warm-up: 'background' (default) imports libraries and runs one tiny
+    # fit per model after startup, 'eager' does it before accepting traffic, 'off' skips it
+    WARMUP_MODE: str = os.getenv("WARMUP_MODE", "background")
+    WARMUP_MODELS: List[str] = [
+        m.strip() for m in os.getenv("WARMUP_MODELS", "ES,ARIMA,CatBoost").split(",") if m.strip()
+    ]
 
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")